@@ -1,59 +1,125 @@
+import copy
 import json
 import logging
+from collections import OrderedDict, deque
 
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.validators import URLValidator
-from reversion import revisions as reversion
 from django.db import transaction
-from django.utils.datetime_safe import datetime
 from app.ciscoeox.exception import ConnectionFailedException, CiscoApiCallFailed
 from app.ciscoeox.base_api import CiscoEoxApi
+from app.ciscoeox.normalization import EOX_DATE_VALUE_MAP, EoxLifecycle, clean_url
+from app.ciscoeox.normalization import clean_api_url_response, convert_time_format
 from app.config.settings import AppSettings
+from app.productdb import bulk_operations
 from app.productdb.models import Product, Vendor, ProductMigrationSource, ProductMigrationOption
+from app.productdb.revisions import RevisionBatch, REVISION_PER_ROW, REVISION_PER_CHUNK
 
 logger = logging.getLogger("productdb")
 
-
-def convert_time_format(date_format):
+# clean_api_url_response and convert_time_format are part of the normalization module, both are re-exported for the
+# existing callers of the crawler
+__all__ = [
+    "REVISION_COMMENT",
+    "EOX_PRODUCT_UPDATE_FIELDS",
+    "EOX_MIGRATION_OPTION_UPDATE_FIELDS",
+    "EOX_MIGRATION_SOURCE_NAME",
+    "clean_api_url_response",
+    "convert_time_format",
+    "is_unchanged_eox_record",
+    "update_local_db_based_on_record",
+    "update_local_db_based_on_records",
+    "iter_raw_api_pages",
+    "get_raw_api_data",
+    "iter_archived_api_pages",
+    "get_archived_api_data",
+]
+
+REVISION_COMMENT = "Updated by the Cisco EoX API crawler"
+
+# Product fields that are written by the batch update
+EOX_PRODUCT_UPDATE_FIELDS = list(EOX_DATE_VALUE_MAP.values()) + [
+    "eol_reference_url",
+    "eol_reference_number",
+    "update_timestamp",
+    "import_fingerprint",
+    "eox_fingerprint",
+]
+
+EOX_MIGRATION_OPTION_UPDATE_FIELDS = [
+    "replacement_product_id",
+    "replacement_db_product",
+    "comment",
+    "migration_product_info_url",
+]
+
+EOX_MIGRATION_SOURCE_NAME = "Cisco EoX Migration option"
+
+
+def is_unchanged_eox_record(product, eox_record):
     """
-    helper function to convert the data format that is used by the Cisco EoX API
-    :param date_format:
-    :return:
+    True, if the EoX record was already synchronized to the product (same UpdatedTimeStamp and fingerprint)
     """
-    if date_format == "YYYY-MM-DD":
-        return "%Y-%m-%d"
+    try:
+        lifecycle = EoxLifecycle.from_record(eox_record)
+
+    except Exception:
+        # invalid record
+        return False
+
+    return lifecycle.is_synchronized(product)
+
+
+def _get_eox_migration_source():
+    product_migration_source, created = ProductMigrationSource.objects.get_or_create(
+        name=EOX_MIGRATION_SOURCE_NAME
+    )
 
-    return "%Y-%m-%d"
+    if created:
+        product_migration_source.description = "Migration option suggested by the Cisco EoX API."
+        product_migration_source.save()
 
+    return product_migration_source
 
-def clean_api_url_response(url_response):
+
+def _apply_migration_details(pmo, migration_details):
     """
-    clean the string to a valid URL field (used with API data, because sometimes there are multiple or entries
+    set the migration details of the EoX record to the Product Migration Option (not saved)
+    :return: message if only the first of multiple URL values is used, otherwise None
     """
-    clean_response = url_response.strip()
-    if url_response != "":
-        clean_response = clean_response if ";" not in clean_response else clean_response.split(";")[0]
-        clean_response = clean_response if " or http://" not in clean_response \
-            else clean_response.split(" or http://")[0]
-        clean_response = clean_response if " and http://" not in clean_response \
-            else clean_response.split(" and http://")[0]
-        clean_response = clean_response if " http://" not in clean_response \
-            else clean_response.split(" http://")[0]
-        clean_response = clean_response if " and https://" not in clean_response \
-            else clean_response.split(" and https://")[0]
-        clean_response = clean_response if " or https://" not in clean_response \
-            else clean_response.split(" or https://")[0]
-        clean_response = clean_response if " https://" not in clean_response \
-            else clean_response.split(" https://")[0]
-    return clean_response
+    if migration_details["MigrationOption"] == "Enter PID(s)":
+        # product replacement available, add replacement PID
+        pmo.replacement_product_id = migration_details["MigrationProductId"].strip()
+        pmo.migration_product_info_url = clean_url(migration_details["MigrationProductInfoURL"])
+
+    elif migration_details["MigrationOption"] == "See Migration Section" or \
+            migration_details["MigrationOption"] == "Enter Product Name(s)":
+        # complex product migration, only add comment
+        mig_strat = migration_details["MigrationStrategy"].strip()
+        pmo.comment = mig_strat if mig_strat != "" else migration_details["MigrationProductName"].strip()
+        pmo.migration_product_info_url = clean_url(migration_details["MigrationProductInfoURL"])
+
+    else:
+        # no replacement available, only add comment
+        pmo.comment = migration_details["MigrationOption"].strip()  # some data separated by blank
+        pmo.migration_product_info_url = clean_url(migration_details["MigrationProductInfoURL"])
 
+    # add message if only a single entry was saved
+    if pmo.migration_product_info_url != migration_details["MigrationProductInfoURL"].strip():
+        return "Multiple URL values from the Migration Note received, only the first one is saved"
 
-def update_local_db_based_on_record(eox_record, create_missing=False):
+    return None
+
+
+def update_local_db_based_on_record(eox_record, create_missing=False, revision_batch=None):
     """
     update a database entry based on an EoX record provided by the Cisco EoX API
 
     :param eox_record: JSON data from the Cisco EoX API
     :param create_missing: set to True, if the product should be created if it's not part of the local database
+    :param revision_batch: RevisionBatch that tracks the changes of the synchronization, if None, the product is saved
+                           within its own revision
     :return: returns an error message or None if successful
     """
     pid = eox_record['EOLProductID']
@@ -78,53 +144,17 @@ def update_local_db_based_on_record(eox_record, create_missing=False):
 
     # update the lifecycle information
     try:
+        lifecycle = EoxLifecycle.from_record(eox_record)
+        if not created and lifecycle.is_synchronized(product):
+            logger.debug("%15s: EoX record not changed since the last synchronization" % pid)
+            return None
+
         logger.debug("%15s: update product lifecycle values" % pid)
+        lifecycle.apply_to(product)
 
-        # save datetime values from Cisco EoX API record
-        value_map = {
-            # <API value> : <class attribute>
-            "UpdatedTimeStamp": "eox_update_time_stamp",
-            "EndOfSaleDate": "end_of_sale_date",
-            "LastDateOfSupport": "end_of_support_date",
-            "EOXExternalAnnouncementDate": "eol_ext_announcement_date",
-            "EndOfSWMaintenanceReleases": "end_of_sw_maintenance_date",
-            "EndOfRoutineFailureAnalysisDate": "end_of_routine_failure_analysis",
-            "EndOfServiceContractRenewal": "end_of_service_contract_renewal",
-            "EndOfSvcAttachDate": "end_of_new_service_attachment_date",
-            "EndOfSecurityVulSupportDate": "end_of_sec_vuln_supp_date",
-        }
-
-        for key in value_map.keys():
-            if eox_record.get(key, None):
-                value = eox_record[key].get("value", None)
-                if value != " ":
-                    setattr(
-                        product,
-                        value_map[key],
-                        datetime.strptime(
-                            value,
-                            convert_time_format(eox_record[key].get("dateFormat", "%Y-%m-%d"))
-                        ).date()
-                    )
-
-        # save string values from Cisco EoX API record
-        if "LinkToProductBulletinURL" in eox_record.keys():
-            value = clean_api_url_response(eox_record.get('LinkToProductBulletinURL', ""))
-            if value != "":
-                val = URLValidator()
-                try:
-                    val(value)
-                    product.eol_reference_url = value
-
-                except ValidationError:
-                    raise Exception("invalid EoL reference URL")
-
-                if "ProductBulletinNumber" in eox_record.keys():
-                    product.eol_reference_number = eox_record.get('ProductBulletinNumber', "EoL bulletin")
-
-        with transaction.atomic(), reversion.create_revision():
-            product.save()
-            reversion.set_comment("Updated by the Cisco EoX API crawler")
+        if revision_batch is None:
+            revision_batch = RevisionBatch(REVISION_COMMENT, granularity=REVISION_PER_ROW)
+        revision_batch.save(product)
 
     except Exception as ex:
         if created:
@@ -138,48 +168,304 @@ def update_local_db_based_on_record(eox_record, create_missing=False):
     # save migration information if defined
     if "EOXMigrationDetails" in eox_record:
         migration_details = eox_record["EOXMigrationDetails"]
-        product_migration_source, created = ProductMigrationSource.objects.get_or_create(
-            name="Cisco EoX Migration option"
-        )
-
-        if created:
-            product_migration_source.description = "Migration option suggested by the Cisco EoX API."
-            product_migration_source.save()
+        product_migration_source = _get_eox_migration_source()
 
         if "MigrationOption" in migration_details:
             # only a single migration option per migration source is allowed
             pmo, _ = ProductMigrationOption.objects.get_or_create(product=product,
                                                                   migration_source=product_migration_source)
-            if migration_details["MigrationOption"] == "Enter PID(s)":
-                # product replacement available, add replacement PID
-                pmo.replacement_product_id = migration_details["MigrationProductId"].strip()
-                pmo.migration_product_info_url = clean_api_url_response(migration_details["MigrationProductInfoURL"])
-
-            elif migration_details["MigrationOption"] == "See Migration Section" or \
-                    migration_details["MigrationOption"] == "Enter Product Name(s)":
-                # complex product migration, only add comment
-                mig_strat = migration_details["MigrationStrategy"].strip()
-                pmo.comment = mig_strat if mig_strat != "" else migration_details["MigrationProductName"].strip()
-                pmo.migration_product_info_url = clean_api_url_response(migration_details["MigrationProductInfoURL"])
-
-            else:
-                # no replacement available, only add comment
-                pmo.comment = migration_details["MigrationOption"].strip()  # some data separated by blank
-                pmo.migration_product_info_url = clean_api_url_response(migration_details["MigrationProductInfoURL"])
-
-            # add message if only a single entry was saved
-            if pmo.migration_product_info_url != migration_details["MigrationProductInfoURL"].strip():
-                return "Multiple URL values from the Migration Note received, only the first one is saved"
-
+            message = _apply_migration_details(pmo, migration_details)
+            pmo.eox_synchronized = True
             pmo.save()
 
+            return message
 
-def get_raw_api_data(api_query):
+
+def update_local_db_based_on_records(eox_records, create_missing=False, revision_batch=None, unchanged=None):
     """
-    returns all EoX records for a specific query (from all pages)
+    update the database entries based on a batch of EoX records provided by the Cisco EoX API (e.g. a result page),
+    the products and migration options of the batch are loaded with a constant amount of queries, updated in memory
+    and written in bulk within a single transaction. If the bulk write fails, the products are saved one by one.
+
+    :param eox_records: list of EoX records from the Cisco EoX API
+    :param create_missing: set to True, if the products should be created if they are not part of the local database
+    :param revision_batch: RevisionBatch that tracks the changes of the synchronization, if None, the products are
+                           saved within a revision per batch
+    :param unchanged: set that collects the Product IDs of the records that were not changed since the last
+                      synchronization (these records are skipped without any write)
+    :return: dictionary with the messages per Product ID (same messages as update_local_db_based_on_record)
+    """
+    messages = OrderedDict()
+    if len(eox_records) == 0:
+        return messages
+
+    if revision_batch is None:
+        revision_batch = RevisionBatch(REVISION_COMMENT, granularity=REVISION_PER_CHUNK, chunk_size=len(eox_records))
+
+    loaded_products = Product.objects.filter(
+        product_id__in=set([record["EOLProductID"] for record in eox_records])
+    ).select_related("vendor", "product_group")
+    loaded_products = {p.product_id: p for p in loaded_products}
+
+    products = dict(loaded_products)    # product ID: current state of the product within the batch
+    new_products = OrderedDict()        # product ID: product object
+    changed_products = OrderedDict()    # product ID: product object
+    migration_records = []              # (product ID, EoX record) of the records with migration details
+    cisco_vendor = None
+
+    for eox_record in eox_records:
+        pid = eox_record["EOLProductID"]
+        current_product = products.get(pid, None)
+        if current_product is None:
+            if not create_missing:
+                logger.debug("%15s: Product not found in database (create disabled)" % pid)
+                continue
+
+            if cisco_vendor is None:
+                # it is a Cisco API and the vendors are predefined in the database
+                cisco_vendor = Vendor.objects.get(name="Cisco Systems")
+            product = Product(product_id=pid, description=eox_record['ProductIDDescription'], vendor=cisco_vendor)
+
+        else:
+            # work on a copy, that invalid values are not applied to the product of the batch
+            product = copy.copy(current_product)
+
+        try:
+            lifecycle = EoxLifecycle.from_record(eox_record)
+            if current_product is not None and lifecycle.is_synchronized(current_product):
+                logger.debug("%15s: EoX record not changed since the last synchronization" % pid)
+                if unchanged is not None:
+                    unchanged.add(pid)
+                continue
+
+            logger.debug("%15s: update product lifecycle values" % pid)
+            lifecycle.apply_to(product)
+
+            # validate the data in memory (the uniqueness of the product ID is ensured by the lookup and the relations
+            # are not changed by the EoX record)
+            product.update_change_timestamps()
+            product.full_clean(exclude=["vendor", "product_group"], validate_unique=False)
+
+        except Exception as ex:
+            logger.error("%15s: Product Data update failed." % pid, exc_info=True)
+            logger.debug("%15s: DataSet with exception\n%s" % (pid, json.dumps(eox_record, indent=4)))
+            messages[pid] = "Product Data update failed: %s" % str(ex)
+            continue
+
+        products[pid] = product
+        if pid in loaded_products:
+            changed_products[pid] = product
+
+        else:
+            new_products[pid] = product
+
+        if "EOXMigrationDetails" in eox_record:
+            migration_records.append((pid, eox_record))
+
+    with transaction.atomic():
+        failed_products = _write_products_in_bulk(new_products, changed_products, revision_batch, messages)
+
+        migration_records = [(pid, record) for pid, record in migration_records if pid not in failed_products]
+        if len(migration_records) != 0:
+            _update_migration_options_in_bulk(migration_records, products, messages)
+
+    bulk_operations.invalidate_product_caches()
+
+    return messages
+
+
+def _write_products_in_bulk(new_products, changed_products, revision_batch, messages):
+    """
+    write the new and changed products within a single transaction, if the bulk write fails, the products are saved
+    one by one
+    :return: set with the Product IDs that cannot be saved
+    """
+    failed_products = set()
+    if len(new_products) == 0 and len(changed_products) == 0:
+        return failed_products
+
+    revision_savepoint = revision_batch.savepoint()
+    try:
+        with transaction.atomic():
+            Product.objects.bulk_create(list(new_products.values()))
+            bulk_operations.bulk_update_objects(Product, list(changed_products.values()), EOX_PRODUCT_UPDATE_FIELDS)
+            bulk_operations.update_replacement_db_product_relations(list(new_products.keys()))
+
+            for product in list(new_products.values()) + list(changed_products.values()):
+                revision_batch.add(product)
+            revision_batch.end_chunk()
+
+    except Exception:
+        logger.warning("bulk write of the EoX records failed, fallback to single writes", exc_info=True)
+        revision_batch.rollback(revision_savepoint)
+        for pid, product in list(new_products.items()) + list(changed_products.items()):
+            try:
+                if pid in new_products:
+                    product.pk = None
+                revision_batch.save(product)
+
+            except Exception as ex:
+                logger.error("%15s: Product Data update failed." % pid, exc_info=True)
+                messages[pid] = "Product Data update failed: %s" % str(ex)
+                failed_products.add(pid)
+
+    return failed_products
+
+
+def _update_migration_options_in_bulk(migration_records, products, messages):
+    """
+    update the Product Migration Options of the EoX migration source based on the given (Product ID, EoX record)
+    tuples, the options are loaded with a single query and written in bulk
+    """
+    product_migration_source = _get_eox_migration_source()
+
+    migration_records = [
+        (pid, record) for pid, record in migration_records if "MigrationOption" in record["EOXMigrationDetails"]
+    ]
+    migration_options = ProductMigrationOption.objects.filter(
+        product__in=[products[pid] for pid, _ in migration_records],
+        migration_source=product_migration_source
+    )
+    migration_options = {pmo.product_id: pmo for pmo in migration_options}
+    new_options = OrderedDict()         # product ID: migration option
+    changed_options = OrderedDict()     # product ID: migration option
+
+    for pid, eox_record in migration_records:
+        product = products[pid]
+        # only a single migration option per migration source is allowed
+        pmo = migration_options.get(product.id, None)
+        if pmo is None:
+            pmo = ProductMigrationOption(product=product, migration_source=product_migration_source)
+            migration_options[product.id] = pmo
+            new_options[pid] = pmo
+
+        elif pid not in new_options:
+            changed_options[pid] = pmo
+
+        pmo.product = product
+        message = _apply_migration_details(pmo, eox_record["EOXMigrationDetails"])
+        if message:
+            messages[pid] = message
+
+    # resolve the replacement products with a single query (instead of the lookup in the pre_save signal)
+    options = list(new_options.values()) + list(changed_options.values())
+    replacement_products = Product.objects.filter(
+        product_id__in=set([pmo.replacement_product_id for pmo in options if pmo.replacement_product_id])
+    )
+    replacement_products = {p.product_id: p for p in replacement_products}
+
+    valid_new_options = []
+    valid_changed_options = []
+    for pmo in options:
+        try:
+            if pmo.replacement_product_id == pmo.product.product_id:
+                raise ValidationError({
+                    "replacement_product_id": "Product ID that should be replaced cannot be the same as the suggested "
+                                              "replacement Product ID"
+                })
+            pmo.replacement_db_product = replacement_products.get(pmo.replacement_product_id, None)
+            pmo.replacement_db_product_resolved = True
+            pmo.full_clean(exclude=["product", "migration_source", "replacement_db_product"], validate_unique=False)
+
+        except ValidationError as ex:
+            logger.error("invalid data received from Cisco API, cannot save migration option for "
+                         "'%s' (%s)" % (pmo.product.product_id, str(ex)), exc_info=True)
+            continue
+
+        if pmo.pk is None:
+            valid_new_options.append(pmo)
+
+        else:
+            valid_changed_options.append(pmo)
+
+    try:
+        with transaction.atomic():
+            ProductMigrationOption.objects.bulk_create(valid_new_options)
+            bulk_operations.bulk_update_objects(
+                ProductMigrationOption,
+                valid_changed_options,
+                EOX_MIGRATION_OPTION_UPDATE_FIELDS
+            )
+
+    except Exception:
+        logger.warning("bulk write of the EoX migration options failed, fallback to single writes", exc_info=True)
+        for pmo in valid_new_options:
+            pmo.pk = None
+
+        for pmo in valid_new_options + valid_changed_options:
+            try:
+                pmo.eox_synchronized = True
+                pmo.save()
+
+            except Exception:
+                logger.error("invalid data received from Cisco API, cannot save migration option for "
+                             "'%s'" % pmo.product.product_id, exc_info=True)
+
+
+def _get_page_records(eoxapi, api_query, page, archive=None):
+    """
+    returns the EoX records of a single result page
+    :param archive: EoxApiArchive that stores the raw response (optional)
+    :raises CiscoApiCallFailed: exception raised if Cisco EoX API call failed
+    """
+    if page == 1:
+        logger.info("Executing API query '%s' on first page" % api_query)
+
+    else:
+        logger.info("Executing API query '%s' on page '%d" % (api_query, page))
+
+    # will raise a CiscoApiCallFailed exception on error
+    eoxapi.query_product(product_id=api_query, page=page)
+    if archive is not None:
+        archive.write_page(api_query, page, eoxapi.last_json_result)
+
+    if eoxapi.get_page_record_count() > 0:
+        return eoxapi.get_eox_records()
+
+    return []
+
+
+def _iter_remaining_pages(eoxapi, api_query, result_pages, archive=None):
+    """
+    yields the EoX records of the pages 2 to result_pages in page order, the pages are fetched concurrently using a
+    bounded thread pool (see PDB_CISCO_EOX_API_PAGE_WORKERS). Only PDB_CISCO_EOX_API_PAGE_WORKERS pages are fetched
+    ahead, therefore the records of the current page can be processed while the next pages are fetched.
+    :raises CiscoApiCallFailed: exception raised if a Cisco EoX API call failed
+    """
+    pages = deque(range(2, result_pages + 1))
+    max_workers = max(1, min(settings.PDB_CISCO_EOX_API_PAGE_WORKERS, len(pages)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = deque()
+
+        def submit_next_page():
+            # every page is fetched with its own client that shares the access token of the first call
+            futures.append(executor.submit(_get_page_records, eoxapi.copy_client(), api_query, pages.popleft(),
+                                           archive))
+
+        try:
+            while len(pages) != 0 and len(futures) < max_workers:
+                submit_next_page()
+
+            while len(futures) != 0:
+                records = futures.popleft().result()
+                if len(pages) != 0:
+                    submit_next_page()
+                yield records
+
+        finally:
+            # a single failed page fails the query, the pending pages are not fetched
+            for future in futures:
+                future.cancel()
+
+
+def iter_raw_api_pages(api_query, archive=None):
+    """
+    yields the EoX records for a specific query page by page, the first page is fetched to determine the amount of
+    pages, the remaining pages are fetched concurrently while the records of the previous page are processed
     :param api_query: single query that is send to the Cisco EoX API
+    :param archive: EoxApiArchive that stores the raw responses (optional)
     :raises CiscoApiCallFailed: exception raised if Cisco EoX API call failed
-    :return: list that contains all EoX records from the Cisco EoX API
     """
     if type(api_query) is not str:
         raise ValueError("api_query must be a string value")
@@ -197,27 +483,22 @@ def get_raw_api_data(api_query):
 
     eoxapi = CiscoEoxApi()
     eoxapi.load_client_credentials()
-    results = []
 
     try:
-        current_page = 1
-        result_pages = 999
-
-        while current_page <= result_pages:
-            if current_page == 1:
-                logger.info("Executing API query '%s' on first page" % api_query)
+        first_page = _get_page_records(eoxapi, api_query, 1, archive)
+        result_pages = eoxapi.amount_of_pages()
 
-            else:
-                logger.info("Executing API query '%s' on page '%d" % (api_query, current_page))
+        if result_pages > 1:
+            remaining_pages = _iter_remaining_pages(eoxapi, api_query, result_pages, archive)
 
-            # will raise a CiscoApiCallFailed exception on error
-            eoxapi.query_product(product_id=api_query, page=current_page)
-            result_pages = eoxapi.amount_of_pages()
+            # the requests of the next pages are sent before the first page is processed
+            next_page = next(remaining_pages)
+            yield first_page
+            yield next_page
+            yield from remaining_pages
 
-            if eoxapi.get_page_record_count() > 0:
-                results.extend(eoxapi.get_eox_records())
-
-            current_page += 1
+        else:
+            yield first_page
 
     except ConnectionFailedException:
         logger.error("Query failed, server not reachable: %s" % api_query, exc_info=True)
@@ -227,4 +508,51 @@ def get_raw_api_data(api_query):
         logger.fatal("Query failed: %s" % api_query, exc_info=True)
         raise
 
+
+def get_raw_api_data(api_query, archive=None):
+    """
+    returns all EoX records for a specific query (from all pages)
+    :param api_query: single query that is send to the Cisco EoX API
+    :param archive: EoxApiArchive that stores the raw responses (optional)
+    :raises CiscoApiCallFailed: exception raised if Cisco EoX API call failed
+    :return: list that contains all EoX records from the Cisco EoX API
+    """
+    results = []
+    for records in iter_raw_api_pages(api_query, archive):
+        results.extend(records)
+
+    return results
+
+
+def iter_archived_api_pages(api_query, archive):
+    """
+    yields the EoX records for a specific query page by page from an archived synchronization run (same result as
+    iter_raw_api_pages without any Cisco API call)
+    :param api_query: query that was send to the Cisco EoX API
+    :param archive: EoxApiArchive of the run
+    :raises CiscoApiCallFailed: exception raised if the query failed during the archived run
+    """
+    logger.info("load archived results of query '%s' from %s" % (api_query, archive.path))
+    eoxapi = CiscoEoxApi()
+    for response in archive.get_pages(api_query):
+        eoxapi.last_json_result = response
+        if eoxapi.get_page_record_count() > 0:
+            yield eoxapi.get_eox_records()
+
+        else:
+            yield []
+
+
+def get_archived_api_data(api_query, archive):
+    """
+    returns all EoX records for a specific query from an archived synchronization run
+    :param api_query: query that was send to the Cisco EoX API
+    :param archive: EoxApiArchive of the run
+    :raises CiscoApiCallFailed: exception raised if the query failed during the archived run
+    :return: list that contains all EoX records of the query
+    """
+    results = []
+    for records in iter_archived_api_pages(api_query, archive):
+        results.extend(records)
+
     return results
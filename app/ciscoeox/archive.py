@@ -0,0 +1,134 @@
+"""
+archive of the raw Cisco EoX API responses: every synchronization run writes the result pages of a query to a
+compressed JSONL file (one page per line) within a directory per run, e.g.
+
+    <PDB_CISCO_EOX_API_ARCHIVE_DIRECTORY>/20171209-030000/WS-C2960_-<hash>.jsonl.gz
+
+An archived run can be replayed by the synchronization task (without any Cisco API call).
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from django.conf import settings
+from django.utils.timezone import now
+from app.ciscoeox.exception import CiscoApiCallFailed
+
+logger = logging.getLogger("productdb")
+
+RUN_NAME_FORMAT = "%Y%m%d-%H%M%S"
+ARCHIVE_FILE_SUFFIX = ".jsonl.gz"
+LATEST_RUN = "latest"
+
+
+def _get_file_name(query):
+    """
+    file name of a query (characters that are not allowed in file names are replaced, the hash of the query avoids
+    collisions)
+    """
+    return "%s-%s%s" % (
+        re.sub(r"[^A-Za-z0-9_.\-]", "_", query),
+        hashlib.sha1(query.encode("utf-8")).hexdigest()[:8],
+        ARCHIVE_FILE_SUFFIX
+    )
+
+
+class EoxApiArchive:
+    """
+    archive of a single synchronization run, the pages are written by the concurrent page requests of a query and are
+    therefore synchronized using a lock
+    """
+    def __init__(self, run_name=None, directory=None):
+        """
+        :param run_name: name of the run, if None, a new run is created (based on the current timestamp)
+        :param directory: base directory of the archive, if None, PDB_CISCO_EOX_API_ARCHIVE_DIRECTORY is used
+        """
+        self.directory = directory if directory else settings.PDB_CISCO_EOX_API_ARCHIVE_DIRECTORY
+        self.run_name = run_name if run_name else now().strftime(RUN_NAME_FORMAT)
+        self.path = os.path.join(self.directory, self.run_name)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory=None):
+        """create the archive for a new synchronization run"""
+        archive = cls(directory=directory)
+        os.makedirs(archive.path, exist_ok=True)
+        logger.info("archive raw Cisco EoX API responses to %s" % archive.path)
+        return archive
+
+    @classmethod
+    def open(cls, run_name=LATEST_RUN, directory=None):
+        """
+        open the archive of a previous synchronization run
+        :param run_name: name of the run or "latest" for the last run
+        :raises FileNotFoundError: if the archive does not exist
+        """
+        if run_name == LATEST_RUN:
+            runs = cls.get_runs(directory)
+            if len(runs) == 0:
+                raise FileNotFoundError("no archived Cisco EoX API responses found")
+            run_name = runs[-1]
+
+        archive = cls(run_name=run_name, directory=directory)
+        if not os.path.isdir(archive.path):
+            raise FileNotFoundError("archive %s not found" % run_name)
+
+        return archive
+
+    @staticmethod
+    def get_runs(directory=None):
+        """names of the archived runs (oldest first)"""
+        directory = directory if directory else settings.PDB_CISCO_EOX_API_ARCHIVE_DIRECTORY
+        if not os.path.isdir(directory):
+            return []
+
+        return sorted([e for e in os.listdir(directory) if os.path.isdir(os.path.join(directory, e))])
+
+    def _write_line(self, query, entry):
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        with self._lock:
+            with gzip.open(os.path.join(self.path, _get_file_name(query)), "ab") as f:
+                f.write(line)
+
+    def write_page(self, query, page, response):
+        """
+        archive the raw response of a result page
+        :param query: query that was sent to the Cisco EoX API
+        :param page: page of the response
+        :param response: JSON response of the Cisco EoX API
+        """
+        self._write_line(query, {"query": query, "page": page, "timestamp": now().isoformat(), "response": response})
+
+    def write_error(self, query, message):
+        """archive the failure of a query"""
+        self._write_line(query, {"query": query, "timestamp": now().isoformat(), "error": message})
+
+    def get_queries(self):
+        """queries of the archived run (in the order of the first archived page)"""
+        entries = []
+        for file_name in os.listdir(self.path):
+            if file_name.endswith(ARCHIVE_FILE_SUFFIX):
+                with gzip.open(os.path.join(self.path, file_name), "rt", encoding="utf-8") as f:
+                    first_entry = json.loads(f.readline())
+                entries.append((first_entry["timestamp"], first_entry["query"]))
+
+        return [query for _, query in sorted(entries)]
+
+    def get_pages(self, query):
+        """
+        returns the archived responses of the query in page order
+        :raises CiscoApiCallFailed: if the query failed during the archived run
+        """
+        pages = {}
+        with gzip.open(os.path.join(self.path, _get_file_name(query)), "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if "error" in entry:
+                    raise CiscoApiCallFailed(entry["error"])
+
+                pages[entry["page"]] = entry["response"]
+
+        return [pages[page] for page in sorted(pages.keys())]
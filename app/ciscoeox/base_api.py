@@ -1,14 +1,56 @@
 import datetime
 import json
 import logging
-import requests
+import threading
+from django.conf import settings
 from django.core.cache import cache
+from app.ciscoeox import http_client
 from app.ciscoeox.exception import *
+from app.ciscoeox.rate_limit import TokenBucketRateLimiter
 from app.config.settings import AppSettings
 
 logger = logging.getLogger("productdb")
 
 
+def is_token_fresh(token_expire_datetime):
+    """True, if the token does not expire within the next PDB_CISCO_API_TOKEN_REFRESH_MARGIN seconds"""
+    if token_expire_datetime is None:
+        return False
+
+    refresh_margin = datetime.timedelta(seconds=settings.PDB_CISCO_API_TOKEN_REFRESH_MARGIN)
+    return datetime.datetime.now() + refresh_margin < token_expire_datetime
+
+
+class AccessTokenMemo:
+    """
+    in-process memo of the access token in front of the cache, the auth header and the expire datetime are kept parsed
+    in memory and are shared by all clients of the process. The lock is used as single-flight lock: only one thread
+    refreshes an expiring token, the other threads wait and use its result.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._token = None
+
+    def get(self):
+        """
+        :return: tuple with the auth header and the expire datetime, None if no fresh token is available
+        """
+        token = self._token
+        if token is not None and is_token_fresh(token[1]):
+            return token
+
+        return None
+
+    def set(self, http_auth_header, token_expire_datetime):
+        self._token = (http_auth_header, token_expire_datetime)
+
+    def clear(self):
+        self._token = None
+
+
+access_token_memo = AccessTokenMemo()
+
+
 class BaseCiscoApiConsole:
     """
     Basic Cisco API implementation
@@ -25,11 +67,7 @@ class BaseCiscoApiConsole:
     current_access_token = None
     http_auth_header = None
     token_expire_datetime = datetime.datetime.now()
-    _session = None
-
-    def __del__(self):
-        if self._session is not None:
-            self._session.close()
+    rate_limiter = None
 
     def __repr__(self):
         return {
@@ -77,6 +115,8 @@ class BaseCiscoApiConsole:
     def __check_response_for_errors__(self, respone):
         """check for common errors on the API endpoints"""
         if respone.status_code == 401:
+            # the access token is rejected, a new token is requested with the next call
+            self.drop_cached_token()
             logger.error("cannot claim access token, Invalid client or client credentials (%s)" % respone.url)
             raise InvalidClientCredentialsException("Invalid client or client credentials")
 
@@ -103,6 +143,18 @@ class BaseCiscoApiConsole:
         # load client credentials
         self.client_id = app_settings.get_cisco_api_client_id()
         self.client_secret = app_settings.get_cisco_api_client_secret()
+        self.load_rate_limit(app_settings)
+
+    def load_rate_limit(self, app_settings=None):
+        """load the rate limit of the API calls from the configuration, the limit is shared per client ID"""
+        if app_settings is None:
+            app_settings = AppSettings()
+
+        self.rate_limiter = TokenBucketRateLimiter(
+            "cisco_api:%s" % self.client_id,
+            calls_per_second=int(app_settings.get_cisco_api_calls_per_second()),
+            calls_per_day=int(app_settings.get_cisco_api_calls_per_day())
+        )
 
     def get_client_credentials(self):
         if self.client_id is None:
@@ -123,16 +175,24 @@ class BaseCiscoApiConsole:
             "grant_type": "client_credentials"
         }
 
-        # try to load the cached token
-        if not self.__load_cached_temp_token__():
+        if not force_new_token and self.__use_memoized_token__():
+            logger.debug("memoized token valid, continue with it")
+            return
+
+        # try to load the cached token (a new token is always requested if forced)
+        if force_new_token or not self.__load_cached_temp_token__():
             # check if previous token expired
-            if self.__is_cached_token_valid__():
+            if not force_new_token and self.__is_cached_token_valid__():
                 logger.debug("cached token valid, continue with it")
 
             else:
                 logger.debug("cached token invalid or not existing (force:%s)" % force_new_token)
                 try:
-                    response = requests.post(self.AUTHENTICATION_URL, params=authz_header)
+                    # the client credentials grant has no side effects, therefore the request is retried on errors
+                    response = http_client.post(self.AUTHENTICATION_URL, params=authz_header, retry=True)
+
+                except CiscoApiUnavailable:
+                    raise
 
                 except Exception as ex:
                     logger.error("cannot contact authentication server at %s" % self.AUTHENTICATION_URL, exc_info=True)
@@ -162,9 +222,24 @@ class BaseCiscoApiConsole:
 
                 # dump token to temp file
                 self.__save_cached_temp_token__(self.current_access_token['expires_in'])
+                access_token_memo.set(self.http_auth_header, self.token_expire_datetime)
+
+    def copy_client(self):
+        """
+        create a new client with the same credentials and access token (a client keeps the state of the last API
+        call, therefore a separate client is required per thread)
+        """
+        client = self.__class__()
+        client.client_id = self.client_id
+        client.client_secret = self.client_secret
+        client.http_auth_header = self.http_auth_header
+        client.token_expire_datetime = self.token_expire_datetime
+        client.rate_limiter = self.rate_limiter
+        return client
 
     def drop_cached_token(self):
         cache.delete(self.AUTH_TOKEN_CACHE_KEY)
+        access_token_memo.clear()
         self.current_access_token = None
         self.http_auth_header = None
         self.token_expire_datetime = None
@@ -186,23 +261,42 @@ class BaseCiscoApiConsole:
         if self.client_id is None:
             return False
 
-        if self.http_auth_header is None:
-            # check that a valid token exists, renew if required
-            if not self.__load_cached_temp_token__():
-                self.create_temporary_access_token(force_new_token=True)
+        if self.http_auth_header is not None and is_token_fresh(self.token_expire_datetime):
+            return True
+
+        if not self.__use_memoized_token__():
+            with access_token_memo.lock:
+                # the token may be refreshed by another thread while waiting for the lock
+                if not self.__use_memoized_token__():
+                    # check that a valid token exists in the cache, renew if required
+                    if not self.__load_cached_temp_token__() or not is_token_fresh(self.token_expire_datetime):
+                        logger.debug("access token expired or not existing, claim new one")
+                        self.create_temporary_access_token(force_new_token=True)
+
+                    access_token_memo.set(self.http_auth_header, self.token_expire_datetime)
+
+        return True
 
-        elif not self.__is_cached_token_valid__():
-            logger.debug("access token expired, claim new one")
-            self.create_temporary_access_token(force_new_token=True)
+    def __use_memoized_token__(self):
+        """use the access token of the in-process memo (if it is not expiring)"""
+        token = access_token_memo.get()
+        if token is None:
+            return False
 
+        self.http_auth_header, self.token_expire_datetime = token
         return True
 
     def get_request(self, url):
-        if self._session is None:
-            self._session = requests.Session()
+        # every API call (including the retries) passes the rate limiter (raises a CiscoApiRateLimitExceeded exception
+        # if the daily limit is reached)
+        if self.rate_limiter is None:
+            self.load_rate_limit()
 
         try:
-            response = self._session.get(url, headers=self.http_auth_header)
+            response = http_client.get(url, headers=self.http_auth_header, rate_limiter=self.rate_limiter)
+
+        except (CiscoApiRateLimitExceeded, CiscoApiUnavailable):
+            raise
 
         except Exception as ex:
             logger.error("cannot contact API endpoint at %s" % url, exc_info=True)
@@ -240,6 +334,9 @@ class CiscoEoxApi(BaseCiscoApiConsole):
     """
     EOX_API_URL = "https://api.cisco.com/supporttools/eox/rest/5/EOXByProductID/%d/%s"
 
+    # maximum amount of comma separated Product IDs per query
+    MAX_PRODUCT_IDS_PER_QUERY = 20
+
     last_json_result = None
     last_page_call = 0
 
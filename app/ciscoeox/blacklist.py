@@ -0,0 +1,147 @@
+"""
+product blacklist of the Cisco EoX API synchronization, the entries are regular expressions that are matched (case
+insensitive) against the Product IDs of the EoX records
+"""
+import logging
+import re
+
+logger = logging.getLogger("productdb")
+
+REGEX_META_CHARACTERS = set(".^$*+?{}[]\\|()")
+
+# entries that cannot be combined within a single alternation (backreferences and inline flags depend on the position
+# within the expression)
+NON_COMBINABLE_ENTRY = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)")
+
+
+def split_blacklist_entries(blacklist_raw_string):
+    """
+    split the raw blacklist string from the configuration (entries separated by line break or semicolon)
+    :return: list of the (non-empty) blacklist entries
+    """
+    blacklist = []
+    for e in [e.split(";") for e in blacklist_raw_string.splitlines()]:
+        blacklist += e
+    return [e for e in blacklist if e != ""]
+
+
+def _is_literal(value):
+    return not any(c in REGEX_META_CHARACTERS for c in value)
+
+
+class BlacklistMatcher:
+    """
+    matches Product IDs against the entries of the product blacklist, the result is the same as a case insensitive
+    re.search with every entry. The entries are validated and compiled once:
+      * exact entries (e.g. ^WS-C2960-24T-S$) are matched using a set lookup
+      * prefix entries (e.g. ^WS-C2960 or ^WS-C2960.*) are matched using a set lookup per prefix length
+      * all other entries are combined to a single regular expression
+
+    Invalid entries are logged once and ignored.
+    """
+    def __init__(self, entries):
+        """
+        :param entries: list of regular expressions
+        """
+        self.invalid_entries = []
+        self._exact_values = set()
+        self._prefixes = {}             # length of the prefix: set of prefixes
+        self._substrings = []
+        regex_entries = []
+        separate_entries = []
+
+        for entry in entries:
+            try:
+                re.compile(entry, re.I)
+
+            except re.error:
+                logger.warning("invalid regular expression in blacklist: %s" % entry)
+                self.invalid_entries.append(entry)
+                continue
+
+            if not self._add_literal_entry(entry):
+                if NON_COMBINABLE_ENTRY.search(entry):
+                    separate_entries.append(re.compile(entry, re.I))
+
+                else:
+                    regex_entries.append(entry)
+
+        self._regexes = separate_entries
+        if len(regex_entries) != 0:
+            try:
+                self._regexes.insert(0, re.compile("|".join(["(?:%s)" % e for e in regex_entries]), re.I))
+
+            except re.error:
+                # e.g. the same group name is used in multiple entries
+                self._regexes = [re.compile(e, re.I) for e in regex_entries] + separate_entries
+
+    @classmethod
+    def from_string(cls, blacklist_raw_string):
+        """create the matcher from the raw blacklist string of the configuration"""
+        return cls(split_blacklist_entries(blacklist_raw_string))
+
+    def _add_literal_entry(self, entry):
+        """
+        add the entry to the set lookups if it is a (anchored) literal value
+        :return: True if the entry was added
+        """
+        if entry.startswith("^"):
+            value = entry[1:]
+            if value.endswith("$") and _is_literal(value[:-1]):
+                self._exact_values.add(value[:-1].lower())
+                return True
+
+            for suffix in (".*$", ".*", ""):
+                if value.endswith(suffix) and _is_literal(value[:len(value) - len(suffix)]):
+                    prefix = value[:len(value) - len(suffix)].lower()
+                    self._prefixes.setdefault(len(prefix), set()).add(prefix)
+                    return True
+
+            return False
+
+        if _is_literal(entry):
+            self._substrings.append(entry.lower())
+            return True
+
+        return False
+
+    def matches(self, product_id):
+        """
+        :return: True if the Product ID is blacklisted
+        """
+        value = product_id.lower()
+        if value in self._exact_values:
+            return True
+
+        for length, prefixes in self._prefixes.items():
+            if value[:length] in prefixes:
+                return True
+
+        for substring in self._substrings:
+            if substring in value:
+                return True
+
+        for regex in self._regexes:
+            if regex.search(product_id):
+                return True
+
+        return False
+
+    def filter(self, product_ids):
+        """
+        split the given Product IDs in allowed and blacklisted Product IDs
+        :return: tuple with the list of the allowed and the set of the blacklisted Product IDs
+        """
+        allowed = []
+        blacklisted = set()
+        for product_id in product_ids:
+            if product_id in blacklisted:
+                continue
+
+            if self.matches(product_id):
+                blacklisted.add(product_id)
+
+            else:
+                allowed.append(product_id)
+
+        return allowed, blacklisted
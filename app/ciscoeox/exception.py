@@ -45,3 +45,17 @@ class CiscoApiCallFailed(Exception):
     exception raised if an API call failed
     """
     pass
+
+
+class CiscoApiRateLimitExceeded(CiscoApiCallFailed):
+    """
+    exception raised if the daily amount of API calls is exhausted
+    """
+    pass
+
+
+class CiscoApiUnavailable(CiscoApiCallFailed):
+    """
+    exception raised if the circuit breaker of a Cisco API endpoint is open (the endpoint failed repeatedly)
+    """
+    pass
@@ -0,0 +1,212 @@
+"""
+HTTP client of the Cisco API endpoints: all API calls of a process share a pooled session (keep-alive connections, see
+PDB_CISCO_API_POOL_SIZE) and use per-request timeouts. Idempotent calls are retried with exponential backoff and jitter
+on connection errors and HTTP 5xx responses. A circuit breaker per host stops the API calls early if the endpoint is
+not available.
+"""
+import logging
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from django.conf import settings
+from app.ciscoeox.exception import CiscoApiUnavailable
+
+logger = logging.getLogger("productdb")
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_circuit_breakers = {}
+
+
+class CircuitBreaker:
+    """
+    circuit breaker of an API endpoint (within the current process):
+      * closed - all calls are executed, consecutive failures are counted
+      * open - after failure_threshold consecutive failures, all calls fail immediately for reset_timeout seconds
+      * half open - after the reset timeout, a single trial call is executed, the breaker is closed if it succeeds
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half open"
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return self.OPEN
+
+        return self.HALF_OPEN
+
+    def before_call(self):
+        """
+        :raises CiscoApiUnavailable: if the circuit breaker is open
+        """
+        with self._lock:
+            state = self.state
+            if state == self.OPEN or (state == self.HALF_OPEN and self._trial_running):
+                raise CiscoApiUnavailable("Cisco API endpoint %s not available (%d consecutive failures)" % (
+                    self.name, self.failures
+                ))
+
+            if state == self.HALF_OPEN:
+                self._trial_running = True
+
+    def cancel_call(self):
+        """the call failed before the endpoint was contacted (neither a success nor a failure of the endpoint)"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                if self.opened_at is None:
+                    logger.error("circuit breaker of %s opened after %d consecutive failures" % (self.name,
+                                                                                                 self.failures))
+                self.opened_at = time.monotonic()
+
+
+def create_session():
+    """create a session with a connection pool per host (the retries are handled by the request function)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.PDB_CISCO_API_POOL_SIZE,
+        pool_maxsize=settings.PDB_CISCO_API_POOL_SIZE,
+        max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """shared session of the process (a new session is created after a fork, e.g. within a celery worker)"""
+    global _session, _session_pid
+
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = create_session()
+            _session_pid = os.getpid()
+
+        return _session
+
+
+def get_circuit_breaker(url):
+    """circuit breaker of the host of the given URL"""
+    host = urlparse(url).netloc
+    with _lock:
+        if host not in _circuit_breakers:
+            _circuit_breakers[host] = CircuitBreaker(
+                host,
+                failure_threshold=settings.PDB_CISCO_API_CIRCUIT_BREAKER_THRESHOLD,
+                reset_timeout=settings.PDB_CISCO_API_CIRCUIT_BREAKER_RESET
+            )
+
+        return _circuit_breakers[host]
+
+
+def reset():
+    """close the shared session and reset all circuit breakers"""
+    global _session, _session_pid
+
+    with _lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = None
+        _session_pid = None
+        _circuit_breakers.clear()
+
+
+def get_backoff_delay(attempt):
+    """exponential backoff with full jitter (random delay between zero and the exponential delay)"""
+    delay = min(settings.PDB_CISCO_API_RETRY_BACKOFF_MAX, settings.PDB_CISCO_API_RETRY_BACKOFF * (2 ** attempt))
+    return random.uniform(0, delay)
+
+
+def request(method, url, retry=None, rate_limiter=None, **kwargs):
+    """
+    send a request to a Cisco API endpoint
+    :param method: HTTP method
+    :param url: URL of the request
+    :param retry: retry the request on connection errors and HTTP 5xx responses, if None, only idempotent methods
+                  are retried
+    :param rate_limiter: rate limiter that is acquired before every attempt (optional)
+    :param kwargs: arguments of the request (the timeout is set based on the configuration if not given)
+    :raises CiscoApiUnavailable: if the circuit breaker of the endpoint is open
+    :return: the response of the last attempt (the exception of the last attempt is raised if no response was received)
+    """
+    if retry is None:
+        retry = method.upper() in IDEMPOTENT_METHODS
+    max_attempts = 1 + (settings.PDB_CISCO_API_MAX_RETRIES if retry else 0)
+    kwargs.setdefault("timeout", (settings.PDB_CISCO_API_CONNECT_TIMEOUT, settings.PDB_CISCO_API_READ_TIMEOUT))
+
+    circuit_breaker = get_circuit_breaker(url)
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        circuit_breaker.before_call()
+
+        try:
+            response = getattr(get_session(), method.lower())(url, **kwargs)
+
+        except RETRY_EXCEPTIONS as ex:
+            circuit_breaker.record_failure()
+            attempt += 1
+            if attempt >= max_attempts:
+                raise
+
+            logger.warning("%s %s failed (%s), retry %d of %d" % (method, url, ex, attempt, max_attempts - 1))
+
+        except Exception:
+            circuit_breaker.cancel_call()
+            raise
+
+        else:
+            if response.status_code < 500:
+                circuit_breaker.record_success()
+                return response
+
+            circuit_breaker.record_failure()
+            attempt += 1
+            if attempt >= max_attempts:
+                return response
+
+            logger.warning("%s %s failed (HTTP %d), retry %d of %d" % (method, url, response.status_code, attempt,
+                                                                       max_attempts - 1))
+
+        time.sleep(get_backoff_delay(attempt - 1))
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,169 @@
+"""
+normalization of the EoX records from the Cisco EoX API: a raw record is converted to an EoxLifecycle object with the
+typed values that are written to the product. The same dates and URLs are part of many records, therefore the parsed
+dates, the cleaned URLs and the result of the URL validation are kept in bounded LRU caches.
+"""
+import hashlib
+import json
+from functools import lru_cache
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.utils.datetime_safe import datetime
+
+# maximum amount of entries per LRU cache
+DATE_CACHE_SIZE = 4096
+URL_CACHE_SIZE = 4096
+
+# <API value>: <Product attribute>
+EOX_DATE_VALUE_MAP = {
+    "UpdatedTimeStamp": "eox_update_time_stamp",
+    "EndOfSaleDate": "end_of_sale_date",
+    "LastDateOfSupport": "end_of_support_date",
+    "EOXExternalAnnouncementDate": "eol_ext_announcement_date",
+    "EndOfSWMaintenanceReleases": "end_of_sw_maintenance_date",
+    "EndOfRoutineFailureAnalysisDate": "end_of_routine_failure_analysis",
+    "EndOfServiceContractRenewal": "end_of_service_contract_renewal",
+    "EndOfSvcAttachDate": "end_of_new_service_attachment_date",
+    "EndOfSecurityVulSupportDate": "end_of_sec_vuln_supp_date",
+}
+
+# values of the EoX record that are part of the fingerprint
+EOX_FINGERPRINT_KEYS = sorted(list(EOX_DATE_VALUE_MAP.keys()) + [
+    "LinkToProductBulletinURL",
+    "ProductBulletinNumber",
+    "EOXMigrationDetails",
+])
+
+_url_validator = URLValidator()
+
+
+def convert_time_format(date_format):
+    """
+    helper function to convert the data format that is used by the Cisco EoX API
+    :param date_format:
+    :return:
+    """
+    if date_format == "YYYY-MM-DD":
+        return "%Y-%m-%d"
+
+    return "%Y-%m-%d"
+
+
+def clean_api_url_response(url_response):
+    """
+    clean the string to a valid URL field (used with API data, because sometimes there are multiple or entries
+    """
+    clean_response = url_response.strip()
+    if url_response != "":
+        clean_response = clean_response if ";" not in clean_response else clean_response.split(";")[0]
+        clean_response = clean_response if " or http://" not in clean_response \
+            else clean_response.split(" or http://")[0]
+        clean_response = clean_response if " and http://" not in clean_response \
+            else clean_response.split(" and http://")[0]
+        clean_response = clean_response if " http://" not in clean_response \
+            else clean_response.split(" http://")[0]
+        clean_response = clean_response if " and https://" not in clean_response \
+            else clean_response.split(" and https://")[0]
+        clean_response = clean_response if " or https://" not in clean_response \
+            else clean_response.split(" or https://")[0]
+        clean_response = clean_response if " https://" not in clean_response \
+            else clean_response.split(" https://")[0]
+    return clean_response
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_eox_date(value, date_format="YYYY-MM-DD"):
+    """
+    parse a date value of the Cisco EoX API (invalid values are not cached)
+    :raises TypeError, ValueError: if the value is not a valid date
+    """
+    return datetime.strptime(value, convert_time_format(date_format)).date()
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def clean_url(url_response):
+    """cached version of clean_api_url_response"""
+    return clean_api_url_response(url_response)
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def is_valid_url(value):
+    try:
+        _url_validator(value)
+        return True
+
+    except ValidationError:
+        return False
+
+
+def get_cache_statistics():
+    """statistics of the LRU caches (e.g. for logging after a synchronization)"""
+    return {
+        "dates": parse_eox_date.cache_info(),
+        "cleaned_urls": clean_url.cache_info(),
+        "validated_urls": is_valid_url.cache_info(),
+    }
+
+
+def get_eox_record_fingerprint(eox_record):
+    """
+    fingerprint of the lifecycle and migration values of an EoX record, if it matches the fingerprint of the product,
+    the record was already synchronized and the product was not changed since then
+    """
+    values = [(key, eox_record.get(key, None)) for key in EOX_FINGERPRINT_KEYS]
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class EoxLifecycle:
+    """
+    typed lifecycle values of an EoX record, the attributes are named like the Product fields (None if the record
+    contains no value and the field should not be changed)
+    """
+    __slots__ = tuple(EOX_DATE_VALUE_MAP.values()) + ("eol_reference_url", "eol_reference_number", "eox_fingerprint")
+
+    def __init__(self, eox_fingerprint=None, **values):
+        for attr in self.__slots__:
+            setattr(self, attr, values.get(attr, None))
+        self.eox_fingerprint = eox_fingerprint
+
+    @classmethod
+    def from_record(cls, eox_record):
+        """
+        normalize the EoX record
+        :raises Exception: if the record contains invalid values
+        """
+        values = {}
+        for key, attr in EOX_DATE_VALUE_MAP.items():
+            if eox_record.get(key, None):
+                value = eox_record[key].get("value", None)
+                if value != " ":
+                    values[attr] = parse_eox_date(value, eox_record[key].get("dateFormat", "%Y-%m-%d"))
+
+        if "LinkToProductBulletinURL" in eox_record.keys():
+            url = clean_url(eox_record.get("LinkToProductBulletinURL", ""))
+            if url != "":
+                if not is_valid_url(url):
+                    raise Exception("invalid EoL reference URL")
+
+                values["eol_reference_url"] = url
+                if "ProductBulletinNumber" in eox_record.keys():
+                    values["eol_reference_number"] = eox_record.get("ProductBulletinNumber", "EoL bulletin")
+
+        return cls(eox_fingerprint=get_eox_record_fingerprint(eox_record), **values)
+
+    def is_synchronized(self, product):
+        """
+        True, if the values were already synchronized to the product (same UpdatedTimeStamp and fingerprint)
+        """
+        if not product.eox_fingerprint or self.eox_update_time_stamp is None:
+            return False
+
+        return product.eox_update_time_stamp == self.eox_update_time_stamp and \
+            product.eox_fingerprint == self.eox_fingerprint
+
+    def apply_to(self, product):
+        """set the lifecycle values to the product (not saved)"""
+        for attr in self.__slots__:
+            value = getattr(self, attr)
+            if value is not None:
+                setattr(product, attr, value)
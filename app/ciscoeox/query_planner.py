@@ -0,0 +1,85 @@
+"""
+query planner for the Cisco EoX API synchronization: reduces the configured queries to the minimum amount of API
+queries that return the same EoX records
+"""
+import logging
+import re
+from app.ciscoeox.base_api import CiscoEoxApi
+
+logger = logging.getLogger("productdb")
+
+WILDCARD = "*"
+
+
+def _wildcard_regex(query):
+    """
+    regular expression of a wildcard query, the literal characters never match the wildcard character, therefore the
+    expression matches another query only if all of its wildcards are covered by wildcards of this query (case-sensitive
+    like the lc_state_sync filter of the products)
+    """
+    return re.compile("^" + ".*".join([re.escape(e) for e in query.split(WILDCARD)]) + "$")
+
+
+def is_covered_by(query, wildcard_query):
+    """True, if all Product IDs that match the query also match the wildcard query"""
+    return _wildcard_regex(wildcard_query).match(query) is not None
+
+
+class QueryPlan:
+    """
+    execution plan of the configured queries:
+      * duplicates and queries that are covered by a (broader) wildcard query are removed
+      * the remaining Product IDs without wildcard are combined to comma separated queries (up to
+        max_product_ids per query)
+    """
+    def __init__(self, queries, max_product_ids=None):
+        """
+        :param queries: configured queries (a query may contain comma separated Product IDs)
+        :param max_product_ids: maximum amount of Product IDs per query, if None, the limit of the Cisco EoX API is used
+        """
+        self.max_product_ids = max_product_ids if max_product_ids else CiscoEoxApi.MAX_PRODUCT_IDS_PER_QUERY
+        self.configured_queries = queries
+        self.covered_queries = {}       # query: query that covers it
+        self.wildcard_queries = []
+        self.product_id_queries = []
+        self._plan(queries)
+
+    def _plan(self, queries):
+        terms = []
+        known_terms = set()
+        for query in queries:
+            for term in query.split(","):
+                term = term.strip()
+                if term != "" and term not in known_terms:
+                    known_terms.add(term)
+                    terms.append(term)
+
+        wildcard_terms = [e for e in terms if WILDCARD in e]
+        for term in terms:
+            for wildcard_term in wildcard_terms:
+                if wildcard_term != term and wildcard_term not in self.covered_queries and \
+                        is_covered_by(term, wildcard_term):
+                    self.covered_queries[term] = wildcard_term
+                    break
+
+        remaining_terms = [e for e in terms if e not in self.covered_queries]
+        self.wildcard_queries = [e for e in remaining_terms if WILDCARD in e]
+        product_ids = [e for e in remaining_terms if WILDCARD not in e]
+        self.product_id_queries = [
+            ",".join(product_ids[index:index + self.max_product_ids])
+            for index in range(0, len(product_ids), self.max_product_ids)
+        ]
+
+    @property
+    def queries(self):
+        """queries that should be sent to the Cisco EoX API"""
+        return self.wildcard_queries + self.product_id_queries
+
+    def log(self):
+        logger.info("Cisco EoX API query plan: %d configured queries, %d API queries (%d wildcard queries, %d Product "
+                    "ID queries)" % (len(self.configured_queries), len(self.queries), len(self.wildcard_queries),
+                                     len(self.product_id_queries)))
+        for query, wildcard_query in self.covered_queries.items():
+            logger.info("query '%s' is covered by '%s'" % (query, wildcard_query))
+        for query in self.queries:
+            logger.info("planned query: %s" % query)
@@ -0,0 +1,123 @@
+"""
+token bucket rate limiter for the Cisco API calls, the state of the bucket is stored in Redis and shared by all workers
+(e.g. the scheduled synchronization and a manual synchronization that run at the same time)
+"""
+import datetime
+import logging
+import time
+import redis
+from django.conf import settings
+from app.ciscoeox.exception import CiscoApiRateLimitExceeded
+
+logger = logging.getLogger("productdb")
+
+# takes a token from the bucket (refilled with calls_per_second tokens per second, up to calls_per_second tokens) and
+# counts the calls of the day, returns the seconds to wait for the next token or -1 if the daily limit is reached
+TOKEN_BUCKET_SCRIPT = """
+local bucket_key = KEYS[1]
+local day_key = KEYS[2]
+local rate = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local calls_per_day = tonumber(ARGV[3])
+
+if calls_per_day > 0 and tonumber(redis.call("GET", day_key) or "0") >= calls_per_day then
+    return "-1"
+end
+
+local bucket = redis.call("HMGET", bucket_key, "tokens", "timestamp")
+local tokens = tonumber(bucket[1])
+local timestamp = tonumber(bucket[2])
+if tokens == nil or timestamp == nil then
+    tokens = rate
+    timestamp = now
+end
+tokens = math.min(rate, tokens + math.max(0, now - timestamp) * rate)
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    if calls_per_day > 0 then
+        redis.call("INCR", day_key)
+        redis.call("EXPIRE", day_key, 172800)
+    end
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call("HMSET", bucket_key, "tokens", tostring(tokens), "timestamp", tostring(now))
+redis.call("EXPIRE", bucket_key, 60)
+return tostring(wait)
+"""
+
+
+class TokenBucketRateLimiter:
+    """
+    rate limiter that allows calls_per_second calls per second (with a burst of up to calls_per_second calls) and
+    calls_per_day calls per (UTC) day. If Redis is not reachable, the calls are not limited.
+    """
+    KEY_PREFIX = "pdb_rate_limit"
+
+    _redis_client = None
+    _script = None
+
+    def __init__(self, name, calls_per_second, calls_per_day=None):
+        """
+        :param name: name of the limit, all limiters with the same name share the same bucket
+        :param calls_per_second: maximum amount of calls per second
+        :param calls_per_day: maximum amount of calls per day (None or 0 for no limit)
+        """
+        if calls_per_second <= 0:
+            raise ValueError("calls_per_second must be greater than 0")
+
+        self.name = name
+        self.calls_per_second = float(calls_per_second)
+        self.calls_per_day = int(calls_per_day) if calls_per_day else 0
+
+    @classmethod
+    def _get_script(cls):
+        if cls._script is None:
+            cls._redis_client = redis.StrictRedis.from_url(settings.PDB_RATE_LIMIT_REDIS_URL)
+            cls._script = cls._redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+        return cls._script
+
+    def _get_keys(self):
+        return [
+            "%s:%s:bucket" % (self.KEY_PREFIX, self.name),
+            "%s:%s:%s" % (self.KEY_PREFIX, self.name, datetime.datetime.utcnow().strftime("%Y-%m-%d"))
+        ]
+
+    def try_acquire(self):
+        """
+        try to take a token
+        :raises CiscoApiRateLimitExceeded: if the daily limit is reached
+        :return: 0 if the token was taken, otherwise the amount of seconds until the next token is available
+        """
+        try:
+            wait = float(self._get_script()(
+                keys=self._get_keys(),
+                args=[self.calls_per_second, "%.6f" % time.time(), self.calls_per_day]
+            ))
+
+        except redis.RedisError:
+            logger.warning("rate limiter for %s not available, continue without rate limit" % self.name,
+                           exc_info=True)
+            return 0
+
+        if wait < 0:
+            msg = "daily limit of %d API calls reached" % self.calls_per_day
+            logger.error("%s (%s)" % (msg, self.name))
+            raise CiscoApiRateLimitExceeded(msg)
+
+        return wait
+
+    def acquire(self):
+        """
+        wait until a token is available and take it
+        :raises CiscoApiRateLimitExceeded: if the daily limit is reached
+        """
+        wait = self.try_acquire()
+        while wait > 0:
+            logger.debug("rate limit for %s reached, wait %.3f seconds" % (self.name, wait))
+            time.sleep(wait)
+            wait = self.try_acquire()
@@ -0,0 +1,95 @@
+"""
+Product IDs that were synchronized within a SyncRun, the records that are returned by multiple queries are applied only
+once. The Product IDs of a parallel synchronization are stored in a Redis set that is shared by all tasks of the run.
+"""
+import logging
+import redis
+from django.conf import settings
+
+logger = logging.getLogger("productdb")
+
+
+class SynchronizedProducts:
+    """
+    set of the synchronized Product IDs of a SyncRun. If the set is shared, it is stored in Redis (the key expires
+    after KEY_TIMEOUT seconds). If Redis is not reachable (or the set is not shared), the Product IDs are stored
+    per process.
+    """
+    KEY_PREFIX = "pdb_synchronized_products"
+    KEY_TIMEOUT = 60 * 60 * 24
+
+    _redis_client = None
+    _local_sets = {}
+
+    def __init__(self, sync_run_id, shared=True):
+        """
+        :param sync_run_id: ID of the SyncRun, all instances with the same ID share the same set
+        :param shared: store the set in Redis (required for the synchronization in parallel tasks)
+        """
+        self.key = "%s:%s" % (self.KEY_PREFIX, sync_run_id)
+        self.shared = shared
+
+    @classmethod
+    def _get_client(cls):
+        if cls._redis_client is None:
+            cls._redis_client = redis.StrictRedis.from_url(settings.PDB_RATE_LIMIT_REDIS_URL)
+
+        return cls._redis_client
+
+    def add_new(self, product_ids):
+        """
+        add the Product IDs to the set
+        :param product_ids: list of Product IDs
+        :return: list of the Product IDs that were not part of the set
+        """
+        if len(product_ids) == 0:
+            return []
+
+        if self.shared:
+            try:
+                pipeline = self._get_client().pipeline(transaction=False)
+                for product_id in product_ids:
+                    pipeline.sadd(self.key, product_id)
+                pipeline.expire(self.key, self.KEY_TIMEOUT)
+                added = pipeline.execute()[:-1]
+
+                return [product_id for product_id, is_new in zip(product_ids, added) if is_new]
+
+            except redis.RedisError:
+                logger.warning("synchronized products of %s not available in Redis, continue per process" % self.key,
+                               exc_info=True)
+
+        local_set = self._local_sets.setdefault(self.key, set())
+        new_product_ids = []
+        for product_id in product_ids:
+            if product_id not in local_set:
+                local_set.add(product_id)
+                new_product_ids.append(product_id)
+
+        return new_product_ids
+
+    def remove(self, product_ids):
+        """
+        remove the Product IDs from the set (e.g. if the records were not written)
+        :param product_ids: list of Product IDs
+        """
+        if len(product_ids) == 0:
+            return
+
+        self._local_sets.get(self.key, set()).difference_update(product_ids)
+        if self.shared:
+            try:
+                self._get_client().srem(self.key, *product_ids)
+
+            except redis.RedisError:
+                logger.warning("cannot remove synchronized products from %s" % self.key, exc_info=True)
+
+    def delete(self):
+        """remove the set"""
+        self._local_sets.pop(self.key, None)
+        if self.shared:
+            try:
+                self._get_client().delete(self.key)
+
+            except redis.RedisError:
+                logger.warning("cannot delete synchronized products of %s" % self.key, exc_info=True)
@@ -1,23 +1,66 @@
+import hashlib
+import json
 import logging
 import re
 
-import time
+from celery import chord, group
+from celery.utils import uuid
+from django.conf import settings
 from django.core.cache import cache
+from django.core.urlresolvers import reverse
 from django.db import transaction
-from django.core.exceptions import ValidationError
+from django.db.models import Count, Max, Q
 
 import app.ciscoeox.api_crawler as cisco_eox_api_crawler
-from app.ciscoeox.exception import CiscoApiCallFailed
+from app.ciscoeox.archive import EoxApiArchive
+from app.ciscoeox.blacklist import BlacklistMatcher
+from app.ciscoeox import normalization
+from app.ciscoeox.exception import CiscoApiCallFailed, CiscoApiUnavailable
+from app.ciscoeox.query_planner import QueryPlan
+from app.ciscoeox.synchronized_products import SynchronizedProducts
 from app.config.settings import AppSettings
-from app.config.models import NotificationMessage
+from app.config.models import NotificationMessage, SyncRun
 from app.config import utils
+from app.productdb import bulk_operations
 from app.productdb.models import Vendor, Product
-from django_project.celery import app as app, TaskState
+from app.productdb.revisions import RevisionBatch
+from django_project.celery import app as app, TaskState, ProgressReporter
 
 logger = logging.getLogger("productdb")
 
 NOTIFICATION_MESSAGE_TITLE = "Synchronization with Cisco EoX API"
 
+# state of the last lc_state_sync computation (queries, configuration and Cisco products), the flags are computed at
+# least once within the timeout
+LC_STATE_SYNC_STATE_CACHE_KEY = Product.LC_STATE_SYNC_STATE_CACHE_KEY
+LC_STATE_SYNC_STATE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_lc_state_sync_filter(queries):
+    """
+    filter for the products that are part of the given Cisco EoX API queries: Product IDs without wildcard are matched
+    using a single IN lookup, queries with a single trailing wildcard using prefix lookups (that can use the index of
+    the Product ID) and the remaining queries using a single combined regular expression. The queries are matched
+    case-sensitive (like the QueryPlan of the synchronization).
+    """
+    product_ids = [e for e in queries if "*" not in e]
+    prefixes = [e[:-1] for e in queries if e.endswith("*") and "*" not in e[:-1]]
+    wildcard_queries = [e for e in queries if "*" in e and e not in ["%s*" % prefix for prefix in prefixes]]
+
+    product_filter = Q(pk__in=[])
+    if len(product_ids) != 0:
+        product_filter |= Q(product_id__in=product_ids)
+
+    for prefix in prefixes:
+        product_filter |= Q(product_id__startswith=prefix)
+
+    if len(wildcard_queries) != 0:
+        # escape the query strings and convert the wildcard values
+        wildcard_queries = [re.escape(e).replace("\\*", ".*") for e in wildcard_queries]
+        product_filter |= Q(product_id__regex="^(%s)$" % "|".join(wildcard_queries))
+
+    return product_filter
+
 
 @app.task(name="ciscoeox.populate_product_lc_state_sync_field")
 def cisco_eox_populate_product_lc_state_sync_field():
@@ -36,25 +79,44 @@ def cisco_eox_populate_product_lc_state_sync_field():
 
     cisco_products = Product.objects.filter(vendor=cis_vendor)
 
-    if cisco_products.count() != 0:
+    if cisco_products.exists():
         app_config = AppSettings()
-        queries = app_config.get_cisco_eox_api_queries_as_list()
-
-        # escape the query strings
-        queries = [re.escape(e) for e in queries]
-
-        # convert the wildcard values
-        queries = [e.replace("\\*", ".*") for e in queries]
-        queries = ["^" + e + "$" for e in queries]
+        queries = []
+        for query in app_config.get_cisco_eox_api_queries_as_list():
+            queries += [e.strip() for e in query.split(",") if e.strip() != ""]
+
+        # only set the state sync to true if the periodic synchronization is enabled
+        periodic_sync_enabled = app_config.is_periodic_sync_enabled()
+
+        # nothing to do if neither the queries nor the Cisco products were changed since the last run (the state is
+        # removed from the cache if the Product ID or the Vendor of a product is changed)
+        cisco_product_state = cisco_products.aggregate(
+            amount=Count("id"),
+            max_id=Max("id"),
+            max_update_timestamp=Max("update_timestamp")
+        )
+        state = hashlib.sha1(json.dumps([
+            queries,
+            periodic_sync_enabled,
+            cis_vendor.id,
+            cisco_product_state["amount"],
+            cisco_product_state["max_id"],
+            str(cisco_product_state["max_update_timestamp"])
+        ]).encode("utf-8")).hexdigest()
+        if cache.get(LC_STATE_SYNC_STATE_CACHE_KEY) == state:
+            return {"status": "No changes required"}
+
+        synced_products = Q(pk__in=[])
+        if periodic_sync_enabled:
+            synced_products = get_lc_state_sync_filter(queries)
 
         with transaction.atomic():
-            # reset all entries for the vendor
-            Product.objects.filter(vendor=cis_vendor).update(lc_state_sync=False)
+            # only the rows with a changed flag are updated
+            changed = cisco_products.filter(synced_products).filter(lc_state_sync=False).update(lc_state_sync=True)
+            changed += cisco_products.exclude(synced_products).filter(lc_state_sync=True).update(lc_state_sync=False)
 
-            # only set the state sync to true if the periodic synchronization is enabled
-            if app_config.is_periodic_sync_enabled():
-                for query in queries:
-                    Product.objects.filter(product_id__regex=query, vendor=cis_vendor).update(lc_state_sync=True)
+        cache.set(LC_STATE_SYNC_STATE_CACHE_KEY, state, LC_STATE_SYNC_STATE_TIMEOUT)
+        logger.info("lc_state_sync flag of %d products changed" % changed)
 
         return {"status": "Database updated"}
 
@@ -62,12 +124,304 @@ def cisco_eox_populate_product_lc_state_sync_field():
         return {"error": "No Products associated to \"Cisco Systems\" found in database"}
 
 
+def _execute_queries(task, queries, blacklist, create_missing, update_task_state, sync_run, archive=None,
+                     replay_archive=None, batch_progress=None, synchronized_products=None):
+    """
+    execute the queries and apply the results to the local database, every result page is applied to the database
+    while the next pages are fetched (only the counters are kept, the messages per Product ID are written to the
+    SyncRun)
+    :param task: bound task that executes the queries
+    :param queries: queries that are sent to the Cisco EoX API (or loaded from the archive)
+    :param blacklist: BlacklistMatcher of the product blacklist
+    :param create_missing: create products that are not part of the local database
+    :param update_task_state: ProgressReporter of the task
+    :param sync_run: SyncRun that stores the messages per Product ID
+    :param archive: EoxApiArchive that stores the raw responses or that is replayed
+    :param replay_archive: name of the archived run that is replayed
+    :param batch_progress: ProgressReporter that receives the amount of finished queries (optional)
+    :param synchronized_products: SynchronizedProducts of the SyncRun (shared by the tasks of a parallel
+                                  synchronization), by default the Product IDs are tracked within this call
+    :return: JSON serializable dictionary with the state of every query ("records", "error"), the amount of messages
+             and the amount of unchanged products
+    """
+    query_results = {}
+    reported_products = set()
+    unchanged_products = set()
+    local_synchronized_products = synchronized_products is None
+    if local_synchronized_products:
+        synchronized_products = SynchronizedProducts(sync_run.id, shared=False)
+    revision_batch = RevisionBatch(cisco_eox_api_crawler.REVISION_COMMENT)
+    api_unavailable_msg = None
+    counter = 1
+    for query in queries:
+        query_results[query] = {"records": 0, "error": None}
+        if api_unavailable_msg is not None:
+            # the circuit breaker of the Cisco API is open, the remaining queries are not executed
+            query_results[query]["error"] = "not executed, %s" % api_unavailable_msg
+            counter += 1
+            continue
+
+        update_task_state("send query <code>%s</code> to the Cisco EoX API (<strong>%d of "
+                          "%d</strong>)..." % (query, counter, len(queries)))
+        query_progress = ProgressReporter(task)
+
+        # the API calls are limited by the rate limiter of the client (see TokenBucketRateLimiter)
+        try:
+            if replay_archive:
+                pages = cisco_eox_api_crawler.iter_archived_api_pages(query, archive)
+
+            else:
+                pages = cisco_eox_api_crawler.iter_raw_api_pages(query, archive=archive)
+
+            for page_records in pages:
+                for records in bulk_operations.chunks(page_records):
+                    _, blacklisted = blacklist.filter([record["EOLProductID"] for record in records])
+
+                    # records that are returned by multiple queries (also of other tasks of the SyncRun) are applied
+                    # only once
+                    new_product_ids = synchronized_products.add_new([r["EOLProductID"] for r in records])
+                    pending_product_ids = set(new_product_ids)
+                    sync_records = []
+                    messages = {}
+                    for record in records:
+                        if record["EOLProductID"] not in pending_product_ids:
+                            continue
+
+                        pending_product_ids.discard(record["EOLProductID"])
+                        if record["EOLProductID"] in blacklisted:
+                            messages[record["EOLProductID"]] = " Product record ignored"
+
+                        else:
+                            sync_records.append(record)
+
+                    # the records of the batch are written in bulk, if the write fails, the Product IDs are removed
+                    # from the synchronized products (the records are applied again if the query is retried)
+                    try:
+                        messages.update(cisco_eox_api_crawler.update_local_db_based_on_records(
+                            sync_records,
+                            create_missing,
+                            revision_batch=revision_batch,
+                            unchanged=unchanged_products
+                        ))
+
+                    except Exception:
+                        synchronized_products.remove(new_product_ids)
+                        raise
+
+                    # a message is reported once per Product ID (written in bulk with the SyncRun)
+                    for product_id, message in messages.items():
+                        if product_id not in reported_products:
+                            reported_products.add(product_id)
+                            sync_run.add_item(
+                                message,
+                                key=product_id,
+                                status=NotificationMessage.MESSAGE_INFO if product_id in blacklisted
+                                else NotificationMessage.MESSAGE_WARNING
+                            )
+
+                    query_results[query]["records"] += len(records)
+                    status_message = "update database (query <code>%s</code> (<strong>%d of %d</strong>), " \
+                                     "processed <b>%d</b> results)..." % (query, counter, len(queries),
+                                                                          query_results[query]["records"])
+                    if batch_progress is not None:
+                        # the progress of a batch is based on the finished queries, the message is sent with the next
+                        # progress update
+                        batch_progress.status_message = status_message
+
+                    else:
+                        query_progress(status_message, processed=query_results[query]["records"])
+
+        except CiscoApiUnavailable as ex:
+            logger.error("Query %s to Cisco EoX API failed, stop the synchronization (%s)" % (query, ex),
+                         exc_info=True)
+            query_results[query]["error"] = str(ex)
+            api_unavailable_msg = str(ex)
+
+        except CiscoApiCallFailed as ex:
+            msg = "Cisco EoX API call failed (%s)" % str(ex)
+            logger.error("Query %s to Cisco EoX API failed (%s)" % (query, msg), exc_info=True)
+            query_results[query]["error"] = str(ex)
+
+        except Exception as ex:
+            msg = "Unexpected Exception, cannot access the Cisco API. Please ensure that the server is " \
+                  "connected to the internet and that the authentication settings are " \
+                  "valid."
+
+            logger.error("Query %s to Cisco EoX API failed (%s)" % (query, msg), exc_info=True)
+            query_results[query]["error"] = str(ex)
+
+        if query_results[query]["error"] is not None and archive is not None and not replay_archive:
+            archive.write_error(query, query_results[query]["error"])
+
+        if batch_progress is not None:
+            batch_progress.progress(counter)
+
+        counter += 1
+
+    # write the pending versions (depends on the revision granularity)
+    revision_batch.flush()
+    sync_run.flush()
+    if local_synchronized_products:
+        synchronized_products.delete()
+    logger.debug("cache statistics of the EoX record normalization: %s" % normalization.get_cache_statistics())
+
+    return {
+        "queries": query_results,
+        "messages": len(reported_products),
+        "unchanged_products": len(unchanged_products)
+    }
+
+
+def _merge_query_results(results):
+    """
+    combine the results of multiple _execute_queries calls (e.g. of the parallel tasks), a later result of a query
+    replaces an earlier one (e.g. if a failed query was retried)
+    """
+    merged = {"queries": {}, "messages": 0, "unchanged_products": 0}
+    for result in results:
+        merged["queries"].update(result["queries"])
+        merged["messages"] += result["messages"]
+        merged["unchanged_products"] += result["unchanged_products"]
+
+    return merged
+
+
+def _get_sync_run_messages(sync_run, notification):
+    """
+    HTML list of the first PDB_RESULT_SUMMARY_MESSAGES messages of the SyncRun (all messages are paged in the detail
+    view of the Notification Message)
+    """
+    items = list(sync_run.items.all()[:settings.PDB_RESULT_SUMMARY_MESSAGES + 1])
+    if len(items) == 0:
+        return ""
+
+    message = "<br>The following comment/errors occurred during the synchronization:<br>" \
+              "<ul style=\"text-align: left;\">"
+    for item in items[:settings.PDB_RESULT_SUMMARY_MESSAGES]:
+        message += "<li><code>%s</code>: %s</li>" % (item.key, item.message)
+    message += "</ul>"
+
+    if len(items) > settings.PDB_RESULT_SUMMARY_MESSAGES:
+        message += "<a href=\"%s\">view all messages</a>" % reverse(
+            "productdb_config:notification-detail", kwargs={"message_id": notification.id}
+        )
+
+    return message
+
+
+def _create_sync_notification(result, sync_run):
+    """
+    create the Notification Message based on the results of the queries, the messages per Product ID are part of the
+    SyncRun (only the amount is part of the Notification Message)
+    :param result: dictionary with the results of the queries (see _execute_queries)
+    :param sync_run: SyncRun of the synchronization
+    :return: tuple with the detailed message (including the first messages of the SyncRun) and the summary message
+    """
+    failed_queries = [query for query, state in result["queries"].items() if state["error"] is not None]
+    successful_queries = [query for query, state in result["queries"].items() if state["error"] is None]
+
+    # view the queries in the detailed message and the amount of messages (if there are some)
+    detailed_message = "The following queries were executed:<br><ul style=\"text-align: left;\">"
+    for fq in failed_queries:
+        detailed_message += "<li class=\"text-danger\"><code>%s</code> " \
+                            "(failed, %s)</li>" % (fq, result["queries"][fq]["error"])
+    for sq in successful_queries:
+        detailed_message += "<li><code>%s</code> (<b>affects %d products</b>, " \
+                            "success)</li>" % (sq, result["queries"][sq]["records"])
+    detailed_message += "</ul>"
+
+    if result["unchanged_products"] > 0:
+        detailed_message += "<b>%d</b> products were not changed since the last synchronization " \
+                            "(no update required).<br>" % result["unchanged_products"]
+
+    notification_message = detailed_message
+    if result["messages"] > 0:
+        notification_message += "<br><b>%d</b> comment/errors occurred during the synchronization (see " \
+                                "below).<br>" % result["messages"]
+
+    # show the executed queries in the summary message
+    if len(failed_queries) == 0 and len(successful_queries) != 0:
+        summary_html = "The following queries were successful executed: %s" % ", ".join(
+            ["<code>%s</code>" % query for query in successful_queries]
+        )
+        notification = NotificationMessage.objects.create(
+            title=NOTIFICATION_MESSAGE_TITLE, type=NotificationMessage.MESSAGE_SUCCESS,
+            summary_message="The synchronization with the Cisco EoX API was successful. " + summary_html,
+            detailed_message=notification_message
+        )
+
+    elif len(failed_queries) != 0 and len(successful_queries) == 0:
+        summary_html = "The following queries failed to execute: %s" % ", ".join(
+            ["<code>%s</code>" % query for query in failed_queries]
+        )
+        notification = NotificationMessage.objects.create(
+            title=NOTIFICATION_MESSAGE_TITLE, type=NotificationMessage.MESSAGE_ERROR,
+            summary_message="The synchronization with the Cisco EoX API was not successful. " + summary_html,
+            detailed_message=notification_message
+        )
+
+    else:
+        summary_html = "The following queries were successful executed: %s\n<br>The following queries " \
+                       "failed to execute: %s" % (
+                           ", ".join(["<code>%s</code>" % query for query in successful_queries]),
+                           ", ".join(["<code>%s</code>" % query for query in failed_queries])
+                       )
+        notification = NotificationMessage.objects.create(
+            title=NOTIFICATION_MESSAGE_TITLE, type=NotificationMessage.MESSAGE_WARNING,
+            summary_message="The synchronization with the Cisco EoX API was partially "
+                            "successful. " + summary_html,
+            detailed_message=notification_message
+        )
+
+    sync_run.finish(notification=notification)
+    detailed_message += _get_sync_run_messages(sync_run, notification)
+
+    return detailed_message, summary_html
+
+
+def _start_parallel_synchronization(queries, blacklist_raw_string, create_missing, sync_run, archive=None):
+    """
+    split the queries into batches of PDB_CISCO_EOX_API_QUERIES_PER_TASK queries and execute them as a group of
+    synchronize_cisco_eox_queries tasks, the results are combined by the summarize_cisco_eox_synchronization task (all
+    tasks write their messages to the given SyncRun)
+    :return: result of the summary task if executed eager, otherwise the IDs of the tasks
+    """
+    batch_size = max(1, settings.PDB_CISCO_EOX_API_QUERIES_PER_TASK)
+    query_batches = [queries[index:index + batch_size] for index in range(0, len(queries), batch_size)]
+    query_task_ids = [uuid() for _ in query_batches]
+
+    query_tasks = group([
+        synchronize_cisco_eox_queries.s(
+            queries=query_batch,
+            blacklist_raw_string=blacklist_raw_string,
+            create_missing=create_missing,
+            sync_run_id=sync_run.id,
+            archive_run=archive.run_name if archive else None
+        ).set(task_id=task_id) for query_batch, task_id in zip(query_batches, query_task_ids)
+    ])
+    summary_task = chord(query_tasks)(summarize_cisco_eox_synchronization.s(sync_run_id=sync_run.id))
+
+    if summary_task.ready():
+        # executed eager
+        return summary_task.get()
+
+    # the progress of the query tasks is combined in the task status view
+    return {
+        "status_message": "Synchronization started in %d parallel tasks..." % len(query_task_ids),
+        "parallel_tasks": {
+            "task_ids": query_task_ids,
+            "summary_task_id": summary_task.id,
+            "total_entries": len(queries)
+        }
+    }
+
+
 @app.task(
     serializer="json",
     name="ciscoeox.synchronize_with_cisco_eox_api",
     bind=True
 )
-def execute_task_to_synchronize_cisco_eox_states(self, ignore_periodic_sync_flag=False):
+def execute_task_to_synchronize_cisco_eox_states(self, ignore_periodic_sync_flag=False, replay_archive=None):
     """
     This task synchronize the local database with the Cisco EoX API. It executes all configured queries and stores the
     results in the local database. There are two types of operation:
@@ -76,21 +430,49 @@ def execute_task_to_synchronize_cisco_eox_states(self, ignore_periodic_sync_flag
       * cisco_eox_api_auto_sync_auto_create_elements is set to false - will only update entries, which are already
                                                                        included in the database
 
+    If PDB_CISCO_EOX_API_ARCHIVE is enabled, the raw responses of the Cisco EoX API are archived. An archived run can be
+    replayed using the replay_archive parameter (the queries and results are loaded from the archive instead of the
+    Cisco EoX API).
+
+    If PDB_CISCO_EOX_API_PARALLEL_SYNC is enabled, the queries are executed in parallel tasks (see
+    synchronize_cisco_eox_queries) and the Notification Message is created by the summarize_cisco_eox_synchronization
+    task.
+
+    :param ignore_periodic_sync_flag: run the task even if the periodic synchronization is disabled
+    :param replay_archive: name of the archived run that should be replayed (or "latest" for the last run)
     :return:
     """
     app_config = AppSettings()
     run_task = app_config.is_periodic_sync_enabled()
 
-    if run_task or ignore_periodic_sync_flag:
+    if run_task or ignore_periodic_sync_flag or replay_archive:
         logger.info("start sync with Cisco EoX API...")
-        self.update_state(state=TaskState.PROCESSING, meta={
-            "status_message": "sync with Cisco EoX API..."
-        })
+        update_task_state = ProgressReporter(self)
+        update_task_state("sync with Cisco EoX API...")
 
         # read configuration for the Cisco EoX API synchronization
-        queries = app_config.get_cisco_eox_api_queries_as_list()
         blacklist_raw_string = app_config.get_product_blacklist_regex()
         create_missing = app_config.is_auto_create_new_products()
+        archive = None
+        if replay_archive:
+            try:
+                archive = EoxApiArchive.open(replay_archive)
+                queries = archive.get_queries()
+
+            except FileNotFoundError as ex:
+                logger.error("cannot replay Cisco EoX API archive %s" % replay_archive, exc_info=True)
+                cache.delete("CISCO_EOX_API_SYN_IN_PROGRESS")
+                return {"error_message": "Cannot replay the Cisco EoX API responses: %s" % str(ex)}
+
+            logger.info("replay the Cisco EoX API responses from %s" % archive.path)
+
+        else:
+            # overlapping queries are removed and the Product IDs are combined to multi-ID queries
+            query_plan = QueryPlan(app_config.get_cisco_eox_api_queries_as_list())
+            query_plan.log()
+            queries = query_plan.queries
+            if settings.PDB_CISCO_EOX_API_ARCHIVE:
+                archive = EoxApiArchive.create()
 
         if len(queries) == 0:
             result = {
@@ -107,150 +489,56 @@ def execute_task_to_synchronize_cisco_eox_states(self, ignore_periodic_sync_flag
 
         # update the local database with the Cisco EoX API
         else:
-            # test Cisco EoX API access
-            test_result = utils.check_cisco_eox_api_access(
+            # test Cisco EoX API access (not required to replay an archive)
+            test_result = replay_archive or utils.check_cisco_eox_api_access(
                 app_config.get_cisco_api_client_id(),
                 app_config.get_cisco_api_client_secret(),
                 False
             )
 
-            if test_result:
-                # execute all queries from the configuration
-                query_eox_records = {}
-                failed_queries = []
-                failed_query_msgs = {}
-                successful_queries = []
-                counter = 1
-                for query in queries:
-                    self.update_state(state=TaskState.PROCESSING, meta={
-                        "status_message": "send query <code>%s</code> to the Cisco EoX API (<strong>%d of "
-                                          "%d</strong>)..." % (query, counter, len(queries))
-                    })
-
-                    # wait some time between the query calls
-                    time.sleep(int(app_config.get_cisco_eox_api_sync_wait_time()))
-                    try:
-                        query_eox_records[query] = cisco_eox_api_crawler.get_raw_api_data(query)
-                        successful_queries.append(query)
-
-                    except CiscoApiCallFailed as ex:
-                        msg = "Cisco EoX API call failed (%s)" % str(ex)
-                        logger.error("Query %s to Cisco EoX API failed (%s)" % (query, msg), exc_info=True)
-                        failed_queries.append(query)
-                        failed_query_msgs[query] = str(ex)
-
-                    except Exception as ex:
-                        msg = "Unexpected Exception, cannot access the Cisco API. Please ensure that the server is " \
-                              "connected to the internet and that the authentication settings are " \
-                              "valid."
-
-                        logger.error("Query %s to Cisco EoX API failed (%s)" % (query, msg), exc_info=True)
-                        failed_queries.append(query)
-                        failed_query_msgs[query] = str(ex)
-
-                    counter += 1
-
-                # build blacklist from configuration
-                blacklist = []
-                for e in [e.split(";") for e in blacklist_raw_string.splitlines()]:
-                    blacklist += e
-                blacklist = [e for e in blacklist if e != ""]
-
-                # update data in database
-                self.update_state(state=TaskState.PROCESSING, meta={
-                    "status_message": "update database..."
-                })
-                messages = {}
-                for key in query_eox_records:
-                    amount_of_records = len(query_eox_records[key])
-                    self.update_state(state=TaskState.PROCESSING, meta={
-                        "status_message": "update database (query <code>%s</code>, processed <b>0</b> of "
-                                          "<b>%d</b> results)..." % (key, amount_of_records)
-                    })
-                    counter = 0
-                    for record in query_eox_records[key]:
-                        if counter % 100 == 0:
-                            self.update_state(state=TaskState.PROCESSING, meta={
-                                "status_message": "update database (query <code>%s</code>, processed <b>%d</b> of "
-                                                  "<b>%d</b> results)..." % (key, counter, amount_of_records)
-                            })
-
-                        blacklisted = False
-                        for regex in blacklist:
-                            try:
-                                if re.search(regex, record["EOLProductID"], re.I):
-                                    blacklisted = True
-                                    break
-
-                            except:
-                                logger.warning("invalid regular expression in blacklist: %s" % regex)
-
-                        if not blacklisted:
-                            try:
-                                message = cisco_eox_api_crawler.update_local_db_based_on_record(record, create_missing)
-                                if message:
-                                    messages[record["EOLProductID"]] = message
-
-                            except ValidationError as ex:
-                                logger.error("invalid data received from Cisco API, cannot save data object for "
-                                             "'%s' (%s)" % (record, str(ex)), exc_info=True)
-                        else:
-                            messages[record["EOLProductID"]] = " Product record ignored"
+            sync_run = SyncRun.objects.create(task_id=self.request.id) if test_result else None
 
-                        counter += 1
-
-                # view the queries in the detailed message and all messages (if there are some)
-                detailed_message = "The following queries were executed:<br><ul style=\"text-align: left;\">"
-                for fq in failed_queries:
-                    detailed_message += "<li class=\"text-danger\"><code>%s</code> " \
-                                        "(failed, %s)</li>" % (fq, failed_query_msgs.get(fq, "unknown"))
-                for sq in successful_queries:
-                    detailed_message += "<li><code>%s</code> (<b>affects %d products</b>, " \
-                                        "success)</li>" % (sq, len(query_eox_records[sq]))
-                detailed_message += "</ul>"
-
-                if len(messages) > 0:
-                    detailed_message += "<br>The following comment/errors occurred " \
-                                        "during the synchronization:<br><ul style=\"text-align: left;\">"
-                    for e in messages.keys():
-                        detailed_message += "<li><code>%s</code>: %s</li>" % (e, messages[e])
-                    detailed_message += "</ul>"
-
-                # show the executed queries in the summary message
-                if len(failed_queries) == 0 and len(successful_queries) != 0:
-                    summary_html = "The following queries were successful executed: %s" % ", ".join(
-                        ["<code>%s</code>" % query for query in successful_queries]
-                    )
-                    NotificationMessage.objects.create(
-                        title=NOTIFICATION_MESSAGE_TITLE, type=NotificationMessage.MESSAGE_SUCCESS,
-                        summary_message="The synchronization with the Cisco EoX API was successful. " + summary_html,
-                        detailed_message=detailed_message
-                    )
+            if test_result and settings.PDB_CISCO_EOX_API_PARALLEL_SYNC and not replay_archive:
+                update_task_state("start %d queries in parallel tasks..." % len(queries))
 
-                elif len(failed_queries) != 0 and len(successful_queries) == 0:
-                    summary_html = "The following queries failed to execute: %s" % ", ".join(
-                        ["<code>%s</code>" % query for query in failed_queries]
-                    )
-                    NotificationMessage.objects.create(
+                # the in progress flag is removed by the summary task
+                try:
+                    result = _start_parallel_synchronization(queries, blacklist_raw_string, create_missing,
+                                                             sync_run, archive=archive)
+
+                except Exception as ex:  # e.g. the message broker is not reachable
+                    logger.error("cannot start the parallel synchronization with the Cisco EoX API", exc_info=True)
+                    msg = "Cannot start the parallel synchronization with the Cisco EoX API (%s)." % str(ex)
+                    notification = NotificationMessage.objects.create(
                         title=NOTIFICATION_MESSAGE_TITLE, type=NotificationMessage.MESSAGE_ERROR,
-                        summary_message="The synchronization with the Cisco EoX API was not successful. " + summary_html,
-                        detailed_message=detailed_message
+                        summary_message="The synchronization with the Cisco EoX API was not successful.",
+                        detailed_message=msg
                     )
+                    sync_run.finish(notification=notification)
+                    SynchronizedProducts(sync_run.id).delete()
+                    cache.delete("CISCO_EOX_API_SYN_IN_PROGRESS")
 
-                else:
-                    summary_html = "The following queries were successful executed: %s\n<br>The following queries " \
-                                   "failed to execute: %s" % (
-                                       ", ".join(["<code>%s</code>" % query for query in successful_queries]),
-                                       ", ".join(["<code>%s</code>" % query for query in failed_queries])
-                                   )
-                    NotificationMessage.objects.create(
-                        title=NOTIFICATION_MESSAGE_TITLE, type=NotificationMessage.MESSAGE_WARNING,
-                        summary_message="The synchronization with the Cisco EoX API was partially "
-                                        "successful. " + summary_html,
-                        detailed_message=detailed_message
-                    )
+                    return {"error_message": msg}
+
+                # if the task was executed eager, set state to SUCCESS (required for testing)
+                if self.request.is_eager:
+                    self.update_state(state=TaskState.SUCCESS, meta=result)
+
+                return result
+
+            elif test_result:
+                # build blacklist from configuration (invalid entries are logged once)
+                blacklist = BlacklistMatcher.from_string(blacklist_raw_string)
 
-                result = {"status_message": "<p style=\"text-align: left;\">" + detailed_message + "</p>"}
+                # execute all queries from the configuration
+                query_results = _execute_queries(self, queries, blacklist, create_missing, update_task_state,
+                                                 sync_run, archive=archive, replay_archive=replay_archive)
+                detailed_message, summary_html = _create_sync_notification(query_results, sync_run)
+
+                result = {
+                    "status_message": "<p style=\"text-align: left;\">" + detailed_message + "</p>",
+                    "sync_run_id": sync_run.id
+                }
 
                 # if the task was executed eager, set state to SUCCESS (required for testing)
                 if self.request.is_eager:
@@ -279,3 +567,102 @@ def execute_task_to_synchronize_cisco_eox_states(self, ignore_periodic_sync_flag
     cache.delete("CISCO_EOX_API_SYN_IN_PROGRESS")
 
     return result
+
+
+@app.task(serializer="json", name="ciscoeox.synchronize_cisco_eox_queries", bind=True)
+def synchronize_cisco_eox_queries(self, queries, sync_run_id, blacklist_raw_string="", create_missing=False,
+                                  archive_run=None, previous_result=None):
+    """
+    execute a batch of queries of the parallel synchronization (the API calls of all tasks share the rate limit of the
+    client ID). The failed queries of the batch are retried on their own (up to PDB_CISCO_EOX_API_QUERY_RETRIES times,
+    the results of the successful queries are kept).
+    :param queries: queries that are sent to the Cisco EoX API
+    :param sync_run_id: ID of the SyncRun that stores the messages per Product ID
+    :param blacklist_raw_string: product blacklist of the configuration
+    :param create_missing: create products that are not part of the local database
+    :param archive_run: name of the EoxApiArchive run that stores the raw responses (optional)
+    :param previous_result: result of the previous attempt of the batch (if retried)
+    :return: dictionary with the results of the queries (see _execute_queries)
+    """
+    update_task_state = ProgressReporter(self)
+    batch_progress = ProgressReporter(self, total=len(queries), min_count=1)
+    archive = EoxApiArchive(run_name=archive_run) if archive_run else None
+
+    try:
+        result = _execute_queries(
+            self,
+            queries,
+            BlacklistMatcher.from_string(blacklist_raw_string),
+            create_missing,
+            update_task_state,
+            SyncRun.objects.get(id=sync_run_id),
+            archive=archive,
+            batch_progress=batch_progress,
+            synchronized_products=SynchronizedProducts(sync_run_id)
+        )
+
+    except Exception as ex:  # catch any exception, the summary task (chord callback) must be executed
+        logger.error("Unexpected exception occurred while executing the queries %s" % ", ".join(queries),
+                     exc_info=True)
+        result = {
+            "queries": {query: {"records": 0, "error": "Unexpected exception (%s)" % ex} for query in queries},
+            "messages": 0,
+            "unchanged_products": 0
+        }
+
+    failed_queries = [query for query, state in result["queries"].items() if state["error"] is not None]
+    if previous_result:
+        result = _merge_query_results([previous_result, result])
+
+    if len(failed_queries) != 0 and not self.request.is_eager and \
+            self.request.retries < settings.PDB_CISCO_EOX_API_QUERY_RETRIES:
+        logger.info("retry the failed queries %s" % ", ".join(failed_queries))
+        raise self.retry(
+            kwargs={
+                "queries": failed_queries,
+                "sync_run_id": sync_run_id,
+                "blacklist_raw_string": blacklist_raw_string,
+                "create_missing": create_missing,
+                "archive_run": archive_run,
+                "previous_result": result
+            },
+            countdown=settings.PDB_CISCO_EOX_API_QUERY_RETRY_DELAY * (2 ** self.request.retries),
+            max_retries=settings.PDB_CISCO_EOX_API_QUERY_RETRIES
+        )
+
+    result["processed_entries"] = len(result["queries"])
+
+    # if the task was executed eager, set state to SUCCESS (required for testing)
+    if self.request.is_eager:
+        self.update_state(state=TaskState.SUCCESS, meta=result)
+
+    return result
+
+
+@app.task(serializer="json", name="ciscoeox.summarize_cisco_eox_synchronization", bind=True)
+def summarize_cisco_eox_synchronization(self, query_results, sync_run_id):
+    """
+    combine the results of the parallel synchronization and create the Notification Message (chord callback of the
+    synchronize_cisco_eox_queries tasks)
+    :param query_results: list with the results of the synchronize_cisco_eox_queries tasks
+    :param sync_run_id: ID of the SyncRun that stores the messages per Product ID
+    """
+    try:
+        sync_run = SyncRun.objects.get(id=sync_run_id)
+        detailed_message, summary_html = _create_sync_notification(_merge_query_results(query_results), sync_run)
+
+        result = {
+            "status_message": "<p style=\"text-align: left;\">" + detailed_message + "</p>",
+            "sync_run_id": sync_run.id
+        }
+
+        # if the task was executed eager, set state to SUCCESS (required for testing)
+        if self.request.is_eager:
+            self.update_state(state=TaskState.SUCCESS, meta={"status_message": summary_html})
+
+    finally:
+        # remove in progress flag with the cache and the synchronized products of the run
+        SynchronizedProducts(sync_run_id).delete()
+        cache.delete("CISCO_EOX_API_SYN_IN_PROGRESS")
+
+    return result
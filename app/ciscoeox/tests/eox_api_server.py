@@ -0,0 +1,275 @@
+"""
+local stand-in for the Cisco API authentication server and the Cisco EoX API (version 5), used by the benchmark of the
+Cisco EoX API synchronization. The EoX records are generated from Product ID patterns, the page size, latency and
+the injected errors are configurable.
+
+The server can be started manually with
+
+    python -m app.ciscoeox.tests.eox_api_server --port 8080 --pattern "WS-C2960-%04d=5000"
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import unquote
+
+TOKEN_PATH = "/as/token.oauth2"
+EOX_API_PATH = "/supporttools/eox/rest/5/EOXByProductID/"
+
+MIGRATION_OPTIONS = [
+    ("Enter PID(s)", "Replacement product"),
+    ("See Migration Section", "Customers are encouraged to migrate to the next generation"),
+    ("No Replacement Available", ""),
+]
+
+
+def _date_value(value):
+    return {"value": value, "dateFormat": "YYYY-MM-DD"}
+
+
+def generate_eox_record(product_id, index, update_time_stamp="2017-01-01"):
+    """generate a synthetic EoX record (the values depend on the index of the Product ID)"""
+    year = 2010 + index % 10
+    migration_option, migration_strategy = MIGRATION_OPTIONS[index % len(MIGRATION_OPTIONS)]
+    return {
+        "EOLProductID": product_id,
+        "ProductIDDescription": "Synthetic product %s" % product_id,
+        "ProductBulletinNumber": "EOL%d" % (index % 1000),
+        "LinkToProductBulletinURL": "http://www.cisco.com/c/en/us/products/eol%d.html" % (index % 1000),
+        "EOXExternalAnnouncementDate": _date_value("%d-01-%02d" % (year, 1 + index % 28)),
+        "EndOfSaleDate": _date_value("%d-07-%02d" % (year, 1 + index % 28)),
+        "EndOfSWMaintenanceReleases": _date_value("%d-07-%02d" % (year + 1, 1 + index % 28)),
+        "EndOfSecurityVulSupportDate": _date_value(" "),
+        "EndOfRoutineFailureAnalysisDate": _date_value("%d-07-%02d" % (year + 1, 1 + index % 28)),
+        "EndOfServiceContractRenewal": _date_value("%d-10-%02d" % (year + 4, 1 + index % 28)),
+        "LastDateOfSupport": _date_value("%d-07-%02d" % (year + 5, 1 + index % 28)),
+        "EndOfSvcAttachDate": _date_value("%d-07-%02d" % (year + 1, 1 + index % 28)),
+        "UpdatedTimeStamp": _date_value(update_time_stamp),
+        "EOXMigrationDetails": {
+            "PIDActiveFlag": "Y",
+            "MigrationInformation": "",
+            "MigrationOption": migration_option,
+            "MigrationProductId": "%s-NG" % product_id if migration_option == "Enter PID(s)" else "",
+            "MigrationProductName": "",
+            "MigrationStrategy": migration_strategy,
+            "MigrationProductInfoURL": "http://www.cisco.com/c/en/us/products/migration.html"
+        },
+        "EOXInputType": "ShowEOXByPids",
+        "EOXInputValue": product_id
+    }
+
+
+def _error_record(error_id, description):
+    return {"EOLProductID": "", "EOXError": {"ErrorID": error_id, "ErrorDescription": description}}
+
+
+class EoxApiStandInServer:
+    """
+    threaded HTTP server that implements the token endpoint and the EOXByProductID endpoint
+    """
+    def __init__(self, patterns=None, page_size=50, latency=0.0, error_rate=0.0, server_error_rate=0.0,
+                 unauthorized_requests=0, update_time_stamp="2017-01-01", seed=None, host="127.0.0.1", port=0):
+        """
+        :param patterns: dictionary with the Product ID patterns (format strings) and the amount of Product IDs
+        :param page_size: amount of records per page
+        :param latency: delay of every response in seconds
+        :param error_rate: rate of the EoX API calls that return an EoX API error
+        :param server_error_rate: rate of the EoX API calls that fail with HTTP 500
+        :param unauthorized_requests: amount of the first EoX API calls that fail with HTTP 401
+        :param update_time_stamp: UpdatedTimeStamp value of all records
+        :param seed: seed of the error injection
+        :param host: listen address
+        :param port: listen port (0 to use a free port)
+        """
+        patterns = patterns if patterns else {"WS-C2960-%04d": 1000}
+        self.product_ids = []
+        for pattern, amount in patterns.items():
+            self.product_ids += [pattern % index for index in range(amount)]
+        self.records = {
+            product_id: generate_eox_record(product_id, index, update_time_stamp)
+            for index, product_id in enumerate(self.product_ids)
+        }
+
+        self.page_size = page_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.server_error_rate = server_error_rate
+        self.unauthorized_requests = unauthorized_requests
+        self.random = random.Random(seed)
+        self.statistics = {
+            "token_requests": 0,
+            "api_requests": 0,
+            "api_errors": 0,
+            "server_errors": 0,
+            "unauthorized": 0,
+        }
+        self._lock = threading.Lock()
+        self._httpd = _ThreadedHTTPServer((host, port), _RequestHandler)
+        self._httpd.stand_in = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return "http://%s:%d" % self._httpd.server_address[:2]
+
+    @property
+    def authentication_url(self):
+        return self.base_url + TOKEN_PATH
+
+    @property
+    def eox_api_url(self):
+        """URL template of the EoX API (same format as CiscoEoxApi.EOX_API_URL)"""
+        return self.base_url + EOX_API_PATH + "%d/%s"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _count(self, key):
+        with self._lock:
+            self.statistics[key] += 1
+            return self.statistics[key]
+
+    def _inject(self, rate):
+        with self._lock:
+            return rate > 0 and self.random.random() < rate
+
+    def find_product_ids(self, query):
+        """Product IDs that match the query (comma separated Product IDs with optional wildcards)"""
+        result = []
+        for term in [e.strip() for e in query.split(",") if e.strip() != ""]:
+            regex = re.compile("^" + ".*".join([re.escape(e) for e in term.split("*")]) + "$", re.I)
+            result += [e for e in self.product_ids if regex.match(e) and e not in result]
+        return result
+
+    def token_response(self):
+        self._count("token_requests")
+        return 200, {"access_token": "stand-in-token", "token_type": "Bearer", "expires_in": 3599}
+
+    def eox_api_response(self, page, query):
+        """
+        :return: tuple with the HTTP status code and the JSON content
+        """
+        request_count = self._count("api_requests")
+        if request_count <= self.unauthorized_requests:
+            self._count("unauthorized")
+            return 401, {"error": "invalid_token"}
+
+        if self._inject(self.server_error_rate):
+            self._count("server_errors")
+            return 500, {"error": "internal server error"}
+
+        if self._inject(self.error_rate):
+            self._count("api_errors")
+            return 200, {
+                "PaginationResponseRecord": {"PageIndex": page, "LastIndex": 1, "TotalRecords": 1, "PageRecords": 1},
+                "EOXRecord": [_error_record("SSA_GENERIC_ERR", "Synthetic error of the EoX API stand-in")]
+            }
+
+        product_ids = self.find_product_ids(query)
+        if len(product_ids) == 0:
+            return 200, {
+                "PaginationResponseRecord": {"PageIndex": 1, "LastIndex": 1, "TotalRecords": 1, "PageRecords": 1},
+                "EOXRecord": [_error_record(
+                    "SSA_ERR_026",
+                    "EOX information does not exist for the following product ID(s): %s" % query
+                )]
+            }
+
+        last_page = (len(product_ids) + self.page_size - 1) // self.page_size
+        page_product_ids = product_ids[(page - 1) * self.page_size:page * self.page_size]
+        return 200, {
+            "PaginationResponseRecord": {
+                "PageIndex": page,
+                "LastIndex": last_page,
+                "TotalRecords": len(product_ids),
+                "PageRecords": len(page_product_ids)
+            },
+            "EOXRecord": [self.records[e] for e in page_product_ids]
+        }
+
+
+class _ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status_code, content):
+        data = json.dumps(content).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        stand_in = self.server.stand_in
+        if not self.path.startswith(TOKEN_PATH):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        time.sleep(stand_in.latency)
+        self._send_json(*stand_in.token_response())
+
+    def do_GET(self):
+        stand_in = self.server.stand_in
+        path = unquote(self.path)
+        if not path.startswith(EOX_API_PATH):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        page, _, query = path[len(EOX_API_PATH):].partition("/")
+        time.sleep(stand_in.latency)
+        self._send_json(*stand_in.eox_api_response(int(page), query))
+
+    def log_message(self, format, *args):
+        # no access log
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="local stand-in for the Cisco EoX API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pattern", action="append", default=[],
+                        help="Product ID pattern and amount, e.g. WS-C2960-%%04d=1000")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--unauthorized-requests", type=int, default=0)
+    args = parser.parse_args()
+
+    server = EoxApiStandInServer(
+        patterns={e.rsplit("=", 1)[0]: int(e.rsplit("=", 1)[1]) for e in args.pattern},
+        page_size=args.page_size,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        server_error_rate=args.server_error_rate,
+        unauthorized_requests=args.unauthorized_requests,
+        host=args.host,
+        port=args.port
+    )
+    print("Cisco EoX API stand-in listening on %s" % server.base_url)
+    try:
+        server._httpd.serve_forever()
+
+    except KeyboardInterrupt:
+        server._httpd.server_close()
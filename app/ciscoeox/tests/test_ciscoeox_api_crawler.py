@@ -4,11 +4,10 @@ Test suite for the ciscoeox.api_crawler module
 import pytest
 import json
 import datetime
-import requests
 from copy import deepcopy
 from mixer.backend.django import mixer
 from requests import Response
-from app.ciscoeox import api_crawler
+from app.ciscoeox import api_crawler, http_client
 from app.ciscoeox.exception import CiscoApiCallFailed, ConnectionFailedException
 from app.config.settings import AppSettings
 from app.productdb.models import Vendor, Product, ProductMigrationSource, ProductMigrationOption
@@ -109,7 +108,7 @@ class TestGetRawApiData:
         class MockSession:
             def get(self, *args, **kwargs):
                 raise Exception("Server is down")
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         with pytest.raises(ConnectionFailedException) as exinfo:
             api_crawler.get_raw_api_data("MyQuery")
@@ -134,11 +133,13 @@ class TestGetRawApiData:
                 with open("app/ciscoeox/tests/data/cisco_eox_error_response.json") as f:
                     r._content = f.read().encode("utf-8")
                 return r
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         with pytest.raises(CiscoApiCallFailed) as exinfo:
             api_crawler.get_raw_api_data("WS-C2950G-48-EI-WS")
 
+        assert exinfo.match("Cisco EoX API error: Some unknown error occurred during the API access")
+
     @pytest.mark.usefixtures("mock_cisco_api_authentication_server")
     @pytest.mark.usefixtures("enable_cisco_api")
     def test_single_page_results(self, monkeypatch):
@@ -150,7 +151,7 @@ class TestGetRawApiData:
                 with open("app/ciscoeox/tests/data/cisco_eox_response_page_1_of_1.json") as f:
                     r._content = f.read().encode("utf-8")
                 return r
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         result = api_crawler.get_raw_api_data("WS-C2950G-48-EI-WS")
 
@@ -180,7 +181,7 @@ class TestGetRawApiData:
                     with open("app/ciscoeox/tests/data/cisco_eox_response_page_2_of_2.json") as f:
                         r._content = f.read().encode("utf-8")
                 return r
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         result = api_crawler.get_raw_api_data("WS-C2950G-48-EI-WS")
 
@@ -191,6 +192,67 @@ class TestGetRawApiData:
             assert "EOXMigrationDetails" in e.keys()
             assert "ProductIDDescription" in e.keys()
 
+    @staticmethod
+    def mock_page_session(monkeypatch, amount_of_pages, failed_page=None):
+        """the records of every page contain the page number in the Product ID"""
+        with open("app/ciscoeox/tests/data/cisco_eox_response_page_1_of_2.json") as f:
+            page_template = json.loads(f.read())
+        with open("app/ciscoeox/tests/data/cisco_eox_error_response.json") as f:
+            error_response = f.read()
+
+        class MockSession:
+            def get(self, url, *args, **kwargs):
+                page = int(url.split("/")[-2])
+                r = Response()
+                r.status_code = 200
+                if page == failed_page:
+                    r._content = error_response.encode("utf-8")
+
+                else:
+                    data = deepcopy(page_template)
+                    data["PaginationResponseRecord"]["PageIndex"] = page
+                    data["PaginationResponseRecord"]["LastIndex"] = amount_of_pages
+                    for index, record in enumerate(data["EOXRecord"]):
+                        record["EOLProductID"] = "PID-%02d-%d" % (page, index)
+                    r._content = json.dumps(data).encode("utf-8")
+                return r
+        monkeypatch.setattr(http_client, "create_session", MockSession)
+
+    @pytest.mark.usefixtures("mock_cisco_api_authentication_server")
+    @pytest.mark.usefixtures("enable_cisco_api")
+    def test_concurrent_page_results_in_page_order(self, monkeypatch, settings):
+        settings.PDB_CISCO_EOX_API_PAGE_WORKERS = 4
+        self.mock_page_session(monkeypatch, 12)
+
+        result = api_crawler.get_raw_api_data("WS-C2950*")
+
+        expected_pids = ["PID-%02d-%d" % (page, index) for page in range(1, 13) for index in range(2)]
+        assert [e["EOLProductID"] for e in result] == expected_pids
+
+    @pytest.mark.usefixtures("mock_cisco_api_authentication_server")
+    @pytest.mark.usefixtures("enable_cisco_api")
+    def test_iter_raw_api_pages(self, monkeypatch, settings):
+        settings.PDB_CISCO_EOX_API_PAGE_WORKERS = 2
+        self.mock_page_session(monkeypatch, 5, failed_page=5)
+
+        pages = api_crawler.iter_raw_api_pages("WS-C2950*")
+
+        # the pages are yielded one by one in page order, a failed page fails the remaining iteration
+        for page in range(1, 5):
+            assert [e["EOLProductID"] for e in next(pages)] == ["PID-%02d-%d" % (page, index) for index in range(2)]
+
+        with pytest.raises(CiscoApiCallFailed):
+            next(pages)
+
+    @pytest.mark.usefixtures("mock_cisco_api_authentication_server")
+    @pytest.mark.usefixtures("enable_cisco_api")
+    def test_concurrent_page_results_with_failed_page(self, monkeypatch, settings):
+        settings.PDB_CISCO_EOX_API_PAGE_WORKERS = 4
+        self.mock_page_session(monkeypatch, 12, failed_page=5)
+
+        with pytest.raises(CiscoApiCallFailed):
+            api_crawler.get_raw_api_data("WS-C2950*")
+
 
 @pytest.mark.usefixtures("import_default_vendors")
 class TestUpdateLocalDbBasedOnRecord:
@@ -398,6 +460,127 @@ class TestUpdateLocalDbBasedOnRecord:
         assert pmo.get_valid_replacement_product() is None
 
 
+
+@pytest.mark.usefixtures("import_default_vendors")
+class TestUpdateLocalDbBasedOnRecords:
+    def test_with_valid_new_records(self):
+        result = api_crawler.update_local_db_based_on_records([valid_eox_record])
+
+        assert len(result) == 0
+        assert Product.objects.count() == 0, "No product was created, because the created flag was not set"
+
+    def test_with_empty_batch(self):
+        assert len(api_crawler.update_local_db_based_on_records([], create_missing=True)) == 0
+
+    def test_with_valid_and_invalid_records(self):
+        mixer.blend("productdb.Product", product_id="WS-C2960-24T-S", vendor=Vendor.objects.get(id=1),
+                    eox_update_time_stamp=datetime.date(1999, 1, 1))
+        invalid_date_record = deepcopy(valid_eox_record)
+        invalid_date_record["EOLProductID"] = "MyTest123"
+        invalid_date_record["EndOfRoutineFailureAnalysisDate"]["value"] = None
+        invalid_url_record = deepcopy(valid_eox_record)
+        invalid_url_record["EOLProductID"] = "xyz"
+        invalid_url_record["LinkToProductBulletinURL"] = "Not yet provided"
+        new_record = deepcopy(valid_eox_record)
+        new_record["EOLProductID"] = "WS-C2960-48T-S"
+
+        result = api_crawler.update_local_db_based_on_records(
+            [valid_eox_record, invalid_date_record, invalid_url_record, new_record],
+            create_missing=True
+        )
+
+        assert result == {
+            "MyTest123": "Product Data update failed: strptime() argument 1 must be str, not None",
+            "xyz": "Product Data update failed: invalid EoL reference URL",
+        }, "should contain the same messages as update_local_db_based_on_record"
+        assert Product.objects.count() == 2, "invalid records should not be created"
+
+        p = Product.objects.get(product_id="WS-C2960-24T-S")
+        assert p.eox_update_time_stamp == datetime.date(2016, 10, 3), "update must be processed"
+        assert p.end_of_support_date == datetime.date(2016, 10, 8)
+        assert p.eol_reference_number == "12345"
+
+        p = Product.objects.get(product_id="WS-C2960-48T-S")
+        assert p.description == "Some description of the product"
+        assert p.vendor.name == "Cisco Systems"
+        assert p.end_of_sale_date == datetime.date(2016, 10, 5)
+        assert p.eol_reference_url == "http://www.cisco.com/en/US/products/hw/switches/ps628/prod_eol_notice0" \
+                                      "900aecd804658c9.html"
+
+    def test_skip_unchanged_records(self):
+        unchanged = set()
+        api_crawler.update_local_db_based_on_records([valid_eox_record], create_missing=True, unchanged=unchanged)
+
+        assert len(unchanged) == 0
+        assert Product.objects.get(product_id="WS-C2960-24T-S").eox_fingerprint is not None
+
+        # change the value without a save, the record is not applied again
+        Product.objects.filter(product_id="WS-C2960-24T-S").update(end_of_sale_date=datetime.date(2000, 1, 1))
+
+        result = api_crawler.update_local_db_based_on_records([valid_eox_record], unchanged=unchanged)
+
+        assert len(result) == 0
+        assert unchanged == {"WS-C2960-24T-S"}
+        p = Product.objects.get(product_id="WS-C2960-24T-S")
+        assert p.end_of_sale_date == datetime.date(2000, 1, 1), "unchanged record should not be written"
+
+        # a new UpdatedTimeStamp is applied
+        updated_record = deepcopy(valid_eox_record)
+        updated_record["UpdatedTimeStamp"]["value"] = "2016-11-03"
+        unchanged = set()
+        api_crawler.update_local_db_based_on_records([updated_record], unchanged=unchanged)
+
+        assert len(unchanged) == 0
+        p = Product.objects.get(product_id="WS-C2960-24T-S")
+        assert p.eox_update_time_stamp == datetime.date(2016, 11, 3)
+        assert p.end_of_sale_date == datetime.date(2016, 10, 5)
+
+        # a product that was changed outside of the synchronization is updated
+        p.end_of_sale_date = datetime.date(2000, 1, 1)
+        p.save()
+        assert p.eox_fingerprint is None
+
+        api_crawler.update_local_db_based_on_records([updated_record], unchanged=unchanged)
+
+        assert len(unchanged) == 0
+        assert Product.objects.get(product_id="WS-C2960-24T-S").end_of_sale_date == datetime.date(2016, 10, 5)
+
+    def test_migration_options_are_equal_to_single_record_update(self):
+        with open("app/ciscoeox/tests/data/cisco_eox_reponse_migration_data.json") as f:
+            eox_records = json.loads(f.read())["EOXRecord"]
+
+        for record in eox_records:
+            api_crawler.update_local_db_based_on_record(record, create_missing=True)
+
+        expected_products = list(Product.objects.order_by("product_id").values())
+        expected_options = list(ProductMigrationOption.objects.order_by("product__product_id").values(
+            "product__product_id", "replacement_product_id", "comment", "migration_product_info_url"
+        ))
+        ProductMigrationOption.objects.all().delete()
+        Product.objects.all().delete()
+
+        result = api_crawler.update_local_db_based_on_records(eox_records, create_missing=True)
+
+        assert len(result) == 0
+        assert ProductMigrationSource.objects.filter(name="Cisco EoX Migration option").count() == 1
+        products = list(Product.objects.order_by("product_id").values())
+        assert len(products) == len(expected_products)
+        for product, expected_product in zip(products, expected_products):
+            product.pop("id")
+            expected_product.pop("id")
+            assert product == expected_product
+
+        assert list(ProductMigrationOption.objects.order_by("product__product_id").values(
+            "product__product_id", "replacement_product_id", "comment", "migration_product_info_url"
+        )) == expected_options
+
+        # update the existing migration options
+        result = api_crawler.update_local_db_based_on_records(eox_records, create_missing=True)
+
+        assert len(result) == 0
+        assert ProductMigrationOption.objects.count() == len(expected_options)
+
+
 def test_clean_url_values():
     """
     test case to clean the URL values from the Cisco API response
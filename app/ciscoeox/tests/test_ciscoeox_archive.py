@@ -0,0 +1,52 @@
+"""
+Test suite for the ciscoeox.archive module
+"""
+import json
+import pytest
+from app.ciscoeox import api_crawler
+from app.ciscoeox.archive import EoxApiArchive
+from app.ciscoeox.exception import CiscoApiCallFailed
+
+
+@pytest.fixture
+def eox_response():
+    with open("app/ciscoeox/tests/data/cisco_eox_response_page_1_of_1.json") as f:
+        return json.loads(f.read())
+
+
+class TestEoxApiArchive:
+    def test_open_missing_archive(self, tmpdir):
+        assert EoxApiArchive.get_runs(str(tmpdir)) == []
+
+        with pytest.raises(FileNotFoundError):
+            EoxApiArchive.open(directory=str(tmpdir))
+
+        with pytest.raises(FileNotFoundError):
+            EoxApiArchive.open("20171209-030000", directory=str(tmpdir))
+
+    def test_write_and_read_pages(self, tmpdir, eox_response):
+        archive = EoxApiArchive.create(directory=str(tmpdir))
+        second_page = {"PaginationResponseRecord": eox_response["PaginationResponseRecord"], "EOXRecord": []}
+
+        # the pages of a query are written in the order of the responses
+        archive.write_page("WS-C2960-*", 2, second_page)
+        archive.write_page("WS-C2960-*", 1, eox_response)
+        archive.write_error("WS-C2950*", "Cisco EoX API error")
+
+        assert EoxApiArchive.get_runs(str(tmpdir)) == [archive.run_name]
+
+        archive = EoxApiArchive.open(directory=str(tmpdir))
+        assert archive.get_queries() == ["WS-C2960-*", "WS-C2950*"]
+        assert archive.get_pages("WS-C2960-*") == [eox_response, second_page]
+
+        with pytest.raises(CiscoApiCallFailed) as exinfo:
+            archive.get_pages("WS-C2950*")
+        assert exinfo.match("Cisco EoX API error")
+
+    def test_get_archived_api_data(self, tmpdir, eox_response):
+        archive = EoxApiArchive.create(directory=str(tmpdir))
+        archive.write_page("WS-C2960-*", 1, eox_response)
+
+        result = api_crawler.get_archived_api_data("WS-C2960-*", archive)
+
+        assert result == eox_response["EOXRecord"]
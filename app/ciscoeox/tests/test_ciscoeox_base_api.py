@@ -3,10 +3,11 @@ Test suite for the ciscoeox.base_api module
 """
 import datetime
 import json
+import threading
+import time
 import pytest
-import requests
 from requests.models import Response
-from app.ciscoeox import base_api
+from app.ciscoeox import base_api, http_client
 from app.ciscoeox.base_api import CiscoHelloApi, CiscoApiCallFailed, CredentialsNotFoundException, \
     InvalidClientCredentialsException, ConnectionFailedException, AuthorizationFailedException, CiscoEoxApi
 from django.core.cache import cache
@@ -52,6 +53,12 @@ class BaseCiscoApiConsoleSettings:
         except:
             return "dummy_secret"
 
+    def get_cisco_api_calls_per_second(self):
+        return "5"
+
+    def get_cisco_api_calls_per_day(self):
+        return "5000"
+
 
 def mock_access_token_generation():
     temp_auth_token = {}
@@ -173,7 +180,7 @@ class TestCiscoHelloApi:
             r.status_code = 401
             return r
 
-        monkeypatch.setattr(requests, "post", lambda x, params: get_invalid_authentication_response())
+        monkeypatch.setattr(http_client, "post", lambda url, **kwargs: get_invalid_authentication_response())
 
         cisco_hello_api = CiscoHelloApi()
         cisco_hello_api.load_client_credentials()
@@ -186,7 +193,7 @@ class TestCiscoHelloApi:
         def get_invalid_authentication_response():
             raise Exception()
 
-        monkeypatch.setattr(requests, "post", lambda x, params: get_invalid_authentication_response())
+        monkeypatch.setattr(http_client, "post", lambda url, **kwargs: get_invalid_authentication_response())
 
         cisco_hello_api = CiscoHelloApi()
         cisco_hello_api.load_client_credentials()
@@ -202,7 +209,7 @@ class TestCiscoHelloApi:
             r._content = "<h1>Not Authorized</h1>".encode("utf-8")
             return r
 
-        monkeypatch.setattr(requests, "post", lambda x, params: get_invalid_authentication_response())
+        monkeypatch.setattr(http_client, "post", lambda url, **kwargs: get_invalid_authentication_response())
 
         cisco_hello_api = CiscoHelloApi()
         cisco_hello_api.load_client_credentials()
@@ -218,7 +225,7 @@ class TestCiscoHelloApi:
             r._content = "<h1>Developer Inactive</h1>".encode("utf-8")
             return r
 
-        monkeypatch.setattr(requests, "post", lambda x, params: get_invalid_authentication_response())
+        monkeypatch.setattr(http_client, "post", lambda url, **kwargs: get_invalid_authentication_response())
 
         cisco_hello_api = CiscoHelloApi()
         cisco_hello_api.load_client_credentials()
@@ -234,7 +241,7 @@ class TestCiscoHelloApi:
             r._content = "".encode("utf-8")
             return r
 
-        monkeypatch.setattr(requests, "post", lambda x, params: get_invalid_authentication_response())
+        monkeypatch.setattr(http_client, "post", lambda url, **kwargs: get_invalid_authentication_response())
 
         cisco_hello_api = CiscoHelloApi()
         cisco_hello_api.load_client_credentials()
@@ -250,7 +257,7 @@ class TestCiscoHelloApi:
             r._content = "<h1>Gateway Timeout</h1>".encode("utf-8")
             return r
 
-        monkeypatch.setattr(requests, "post", lambda x, params: get_invalid_authentication_response())
+        monkeypatch.setattr(http_client, "post", lambda url, **kwargs: get_invalid_authentication_response())
 
         cisco_hello_api = CiscoHelloApi()
         cisco_hello_api.load_client_credentials()
@@ -266,7 +273,7 @@ class TestCiscoHelloApi:
             r._content = "My invalid JSON string".encode("utf-8")
             return r
 
-        monkeypatch.setattr(requests, "post", lambda x, params: get_invalid_authentication_response())
+        monkeypatch.setattr(http_client, "post", lambda url, **kwargs: get_invalid_authentication_response())
 
         cisco_hello_api = CiscoHelloApi()
         cisco_hello_api.load_client_credentials()
@@ -275,6 +282,100 @@ class TestCiscoHelloApi:
             cisco_hello_api.create_temporary_access_token()
         assert exinfo.match("unexpected content from API endpoint")
 
+    @pytest.mark.usefixtures("use_test_api_configuration")
+    def test_memoized_access_token(self, monkeypatch):
+        token_requests = []
+
+        def get_authentication_response(url, **kwargs):
+            token_requests.append(url)
+            time.sleep(0.1)
+            r = Response()
+            r.status_code = 200
+            r._content = json.dumps({
+                "access_token": "access_token_%d" % len(token_requests),
+                "token_type": "Bearer",
+                "expires_in": 3599
+            }).encode("utf-8")
+            return r
+
+        monkeypatch.setattr(http_client, "post", get_authentication_response)
+
+        # concurrent clients request only a single token
+        clients = [CiscoHelloApi() for _ in range(8)]
+        for client in clients:
+            client.load_client_credentials()
+        threads = [threading.Thread(target=client.is_ready_for_use) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(token_requests) == 1
+        assert all([client.http_auth_header["Authorization"] == "Bearer access_token_1" for client in clients])
+
+        # the token is used from memory (without access to the cache)
+        cache.delete(CiscoHelloApi.AUTH_TOKEN_CACHE_KEY)
+        cisco_hello_api = CiscoHelloApi()
+        cisco_hello_api.load_client_credentials()
+        assert cisco_hello_api.is_ready_for_use() is True
+        assert cisco_hello_api.http_auth_header["Authorization"] == "Bearer access_token_1"
+        assert len(token_requests) == 1
+
+        # a token that expires within the refresh margin is renewed
+        base_api.access_token_memo.set(cisco_hello_api.http_auth_header,
+                                       datetime.datetime.now() + datetime.timedelta(seconds=30))
+        cisco_hello_api = CiscoHelloApi()
+        cisco_hello_api.load_client_credentials()
+        assert cisco_hello_api.is_ready_for_use() is True
+        assert cisco_hello_api.http_auth_header["Authorization"] == "Bearer access_token_2"
+        assert len(token_requests) == 2
+
+        # the memo is cleared with the cached token
+        cisco_hello_api.drop_cached_token()
+        assert base_api.access_token_memo.get() is None
+
+    @pytest.mark.usefixtures("use_test_api_configuration")
+    def test_rejected_access_token_is_renewed(self, monkeypatch):
+        token_requests = []
+
+        def get_authentication_response(url, **kwargs):
+            token_requests.append(url)
+            r = Response()
+            r.status_code = 200
+            r._content = json.dumps({
+                "access_token": "access_token_%d" % len(token_requests),
+                "token_type": "Bearer",
+                "expires_in": 3599
+            }).encode("utf-8")
+            return r
+
+        class MockSession:
+            def get(self, *args, **kwargs):
+                r = Response()
+                r.status_code = 401
+                return r
+
+        monkeypatch.setattr(http_client, "post", get_authentication_response)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
+
+        cisco_hello_api = CiscoHelloApi()
+        cisco_hello_api.drop_cached_token()
+        cisco_hello_api.load_client_credentials()
+        assert cisco_hello_api.is_ready_for_use() is True
+        assert len(token_requests) == 1
+
+        with pytest.raises(InvalidClientCredentialsException):
+            cisco_hello_api.hello_api_call()
+
+        # the rejected token is removed from the instance, the cache and the memo
+        assert cisco_hello_api.http_auth_header is None
+        assert cache.get(CiscoHelloApi.AUTH_TOKEN_CACHE_KEY) is None
+        assert base_api.access_token_memo.get() is None
+
+        assert cisco_hello_api.is_ready_for_use() is True
+        assert cisco_hello_api.http_auth_header["Authorization"] == "Bearer access_token_2"
+        assert len(token_requests) == 2
+
     @pytest.mark.usefixtures("use_test_api_configuration")
     @online
     def test_online_hello_api_call(self):
@@ -294,7 +395,7 @@ class TestCiscoHelloApi:
                 r._content = json.dumps({'helloResponse': {'response': 'Hello World!'}}).encode("utf-8")
                 return r
 
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         cisco_hello_api = CiscoHelloApi()
         monkeypatch.setattr(cisco_hello_api, "create_temporary_access_token", lambda force_new_token=True: mock_access_token_generation())
@@ -317,7 +418,7 @@ class TestCiscoHelloApi:
                 r._content = "My invalid JSON string".encode("utf-8")
                 return r
 
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         cisco_hello_api = CiscoHelloApi()
         monkeypatch.setattr(cisco_hello_api, "create_temporary_access_token", lambda force_new_token=True: mock_access_token_generation())
@@ -333,7 +434,7 @@ class TestCiscoHelloApi:
             def get(self, *args, **kwargs):
                 raise Exception()
 
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         cisco_hello_api = CiscoHelloApi()
         monkeypatch.setattr(cisco_hello_api, "create_temporary_access_token", lambda force_new_token=True: mock_access_token_generation())
@@ -451,7 +552,7 @@ class TestCiscoEoxApi:
                     r._content = f.read().encode("utf-8")
                 return r
 
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         cisco_eox_api = CiscoEoxApi()
         monkeypatch.setattr(cisco_eox_api, "create_temporary_access_token", lambda force_new_token=True: mock_access_token_generation())
@@ -497,7 +598,7 @@ class TestCiscoEoxApi:
 
                 return r
 
-        monkeypatch.setattr(requests, "Session", MockSessionPageOne)
+        monkeypatch.setattr(http_client, "create_session", MockSessionPageOne)
 
         cisco_eox_api = CiscoEoxApi()
         monkeypatch.setattr(cisco_eox_api, "create_temporary_access_token", lambda force_new_token=True: mock_access_token_generation())
@@ -575,7 +676,7 @@ class TestCiscoEoxApi:
                     r._content = f.read().encode("utf-8")
                 return r
 
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         cisco_eox_api = CiscoEoxApi()
         monkeypatch.setattr(cisco_eox_api, "create_temporary_access_token", lambda force_new_token=True: mock_access_token_generation())
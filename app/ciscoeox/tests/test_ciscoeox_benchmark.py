@@ -0,0 +1,124 @@
+"""
+Benchmark of the Cisco EoX API synchronization against the local Cisco EoX API stand-in server (requires --benchmark)
+"""
+import time
+import pytest
+import requests
+from app.ciscoeox import tasks
+from app.ciscoeox.base_api import BaseCiscoApiConsole, CiscoEoxApi
+from app.ciscoeox.tests.eox_api_server import EoxApiStandInServer
+from app.config.settings import AppSettings
+from app.productdb.models import Product
+import app.ciscoeox.api_crawler as cisco_eox_api_crawler
+
+pytestmark = pytest.mark.django_db
+benchmark = pytest.mark.skipif(not pytest.config.getoption("--benchmark"), reason="need --benchmark to run")
+
+
+@pytest.fixture
+def use_stand_in_api_configuration():
+    app = AppSettings()
+    app.set_cisco_api_enabled(True)
+    app.set_product_blacklist_regex("")
+    app.set_auto_create_new_products(True)
+    app.set_periodic_sync_enabled(False)
+    app.set_cisco_api_client_id("stand_in_id")
+    app.set_cisco_api_client_secret("stand_in_secret")
+    app.set_cisco_api_calls_per_second(10000)
+    app.set_cisco_api_calls_per_day(10000000)
+
+
+def start_stand_in_server(monkeypatch, **kwargs):
+    """start the stand-in server and use it as Cisco API endpoint"""
+    server = EoxApiStandInServer(**kwargs).start()
+    monkeypatch.setattr(BaseCiscoApiConsole, "AUTHENTICATION_URL", server.authentication_url)
+    monkeypatch.setattr(CiscoEoxApi, "EOX_API_URL", server.eox_api_url)
+    return server
+
+
+def measure_db_write_time(monkeypatch):
+    """wrap the bulk update of the local database to measure the time of the DB writes"""
+    db_write_time = {"seconds": 0.0}
+    update_local_db_based_on_records = cisco_eox_api_crawler.update_local_db_based_on_records
+
+    def timed_update_local_db_based_on_records(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return update_local_db_based_on_records(*args, **kwargs)
+
+        finally:
+            db_write_time["seconds"] += time.perf_counter() - start
+
+    monkeypatch.setattr(cisco_eox_api_crawler, "update_local_db_based_on_records",
+                        timed_update_local_db_based_on_records)
+    return db_write_time
+
+
+def test_stand_in_server_pagination():
+    with EoxApiStandInServer(patterns={"WS-C2960-%04d": 120, "C9300-%02dP-E": 10}, page_size=50) as server:
+        r = requests.get(server.eox_api_url % (3, "WS-C2960-*"))
+        assert r.status_code == 200
+        jdata = r.json()
+        assert jdata["PaginationResponseRecord"]["LastIndex"] == 3
+        assert jdata["PaginationResponseRecord"]["TotalRecords"] == 120
+        assert [e["EOLProductID"] for e in jdata["EOXRecord"]] == ["WS-C2960-%04d" % e for e in range(100, 120)]
+
+        r = requests.get(server.eox_api_url % (1, "C9300-01P-E,c9300-02p-e"))
+        assert [e["EOLProductID"] for e in r.json()["EOXRecord"]] == ["C9300-01P-E", "C9300-02P-E"]
+
+        r = requests.get(server.eox_api_url % (1, "WS-C3850-*"))
+        assert "EOXError" in r.json()["EOXRecord"][0]
+
+        r = requests.post(server.authentication_url)
+        assert r.json()["token_type"] == "Bearer"
+        assert server.statistics["api_requests"] == 3
+        assert server.statistics["token_requests"] == 1
+
+
+def test_stand_in_server_error_injection():
+    with EoxApiStandInServer(patterns={"WS-C2960-%04d": 10}, server_error_rate=1.0, unauthorized_requests=1) as server:
+        assert requests.get(server.eox_api_url % (1, "WS-C2960-*")).status_code == 401
+        assert requests.get(server.eox_api_url % (1, "WS-C2960-*")).status_code == 500
+        assert server.statistics["unauthorized"] == 1
+        assert server.statistics["server_errors"] == 1
+
+
+@benchmark
+@pytest.mark.usefixtures("use_stand_in_api_configuration")
+@pytest.mark.usefixtures("set_celery_always_eager")
+@pytest.mark.usefixtures("redis_server_required")
+@pytest.mark.usefixtures("import_default_vendors")
+@pytest.mark.parametrize("amount, page_size, latency, error_rate", [
+    (1000, 50, 0.0, 0.0),
+    (5000, 50, 0.0, 0.0),
+    (5000, 50, 0.05, 0.0),
+    (5000, 50, 0.0, 0.05),
+])
+def test_synchronization_throughput(monkeypatch, amount, page_size, latency, error_rate):
+    server = start_stand_in_server(
+        monkeypatch,
+        patterns={"WS-C2960-%05d": amount // 2, "C9300-%05d-E": amount - amount // 2},
+        page_size=page_size,
+        latency=latency,
+        error_rate=error_rate,
+        seed=0
+    )
+    db_write_time = measure_db_write_time(monkeypatch)
+    AppSettings().set_cisco_eox_api_queries("WS-C2960-*\nC9300-*")
+
+    try:
+        start = time.perf_counter()
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(ignore_periodic_sync_flag=True)
+        duration = time.perf_counter() - start
+
+    finally:
+        server.stop()
+
+    assert task.status == "SUCCESS", task.traceback
+    record_count = Product.objects.filter(vendor__id=1).count()
+    print("\n%d records (page size %d, latency %.3fs, error rate %.2f): %.1f records/s, %d API requests, "
+          "%d token requests, %.2fs total, %.2fs DB write time" % (
+              amount, page_size, latency, error_rate, record_count / duration, server.statistics["api_requests"],
+              server.statistics["token_requests"], duration, db_write_time["seconds"]))
+    if error_rate == 0.0:
+        assert record_count == amount
@@ -0,0 +1,69 @@
+"""
+Test suite for the ciscoeox.blacklist module
+"""
+import re
+from app.ciscoeox.blacklist import BlacklistMatcher, split_blacklist_entries
+
+PRODUCT_IDS = [
+    "WS-C2960-24T-S",
+    "WS-C2960-48T-S",
+    "ws-c2960g-24tc-l",
+    "WS-C2950G-24-EI",
+    "WS-C2950G-48-EI-WS",
+    "AIR-CT8540-K9",
+    "C9300-48P-E",
+    "",
+]
+
+
+def test_split_blacklist_entries():
+    assert split_blacklist_entries("") == []
+    assert split_blacklist_entries("A;B\nC\n\n;D;") == ["A", "B", "C", "D"]
+
+
+class TestBlacklistMatcher:
+    def test_matches_like_re_search(self):
+        entries = [
+            "^WS-C2960-24T-S$",         # exact
+            "^ws-c2950g",               # prefix
+            "^AIR-.*",                  # prefix
+            "-48P-",                    # substring
+            "^C[0-9]+-24",              # regular expression
+            "EI-WS$",                   # regular expression
+            r"(WS)-\1",                 # backreference
+            "^$",                       # empty Product ID
+        ]
+        matcher = BlacklistMatcher(entries)
+
+        assert matcher.invalid_entries == []
+        for product_id in PRODUCT_IDS:
+            expected = any([re.search(e, product_id, re.I) for e in entries])
+            assert matcher.matches(product_id) is expected, product_id
+
+    def test_invalid_entries(self):
+        matcher = BlacklistMatcher.from_string("WS-C2960-*;^(invalid\n[invalid")
+
+        assert matcher.invalid_entries == ["^(invalid", "[invalid"]
+        assert matcher.matches("WS-C2960-24T-S") is True
+        assert matcher.matches("C9300-48P-E") is False
+
+    def test_duplicate_group_names(self):
+        matcher = BlacklistMatcher(["^(?P<name>C9300)-48", "(?P<name>AIR)-CT"])
+
+        assert matcher.matches("AIR-CT8540-K9") is True
+        assert matcher.matches("C9300-48P-E") is True
+        assert matcher.matches("WS-C2960-24T-S") is False
+
+    def test_empty_blacklist(self):
+        matcher = BlacklistMatcher.from_string("")
+
+        allowed, blacklisted = matcher.filter(PRODUCT_IDS)
+        assert allowed == PRODUCT_IDS
+        assert blacklisted == set()
+
+    def test_filter(self):
+        matcher = BlacklistMatcher.from_string("^WS-C2960;EI-WS$")
+
+        allowed, blacklisted = matcher.filter(PRODUCT_IDS + ["WS-C2960-24T-S"])
+        assert allowed == ["WS-C2950G-24-EI", "AIR-CT8540-K9", "C9300-48P-E", ""]
+        assert blacklisted == {"WS-C2960-24T-S", "WS-C2960-48T-S", "ws-c2960g-24tc-l", "WS-C2950G-48-EI-WS"}
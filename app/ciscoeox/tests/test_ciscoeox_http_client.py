@@ -0,0 +1,155 @@
+"""
+Test suite for the ciscoeox.http_client module
+"""
+import pytest
+import requests
+from requests import Response
+from app.ciscoeox import http_client
+from app.ciscoeox.exception import CiscoApiUnavailable
+
+URL = "https://api.cisco.com/supporttools/eox/rest/5/EOXByProductID/1/WS-C2960-*"
+
+
+def get_response(status_code):
+    r = Response()
+    r.status_code = status_code
+    r._content = "{}".encode("utf-8")
+    return r
+
+
+class MockSession:
+    """returns the given responses (or raises the given exceptions) in order"""
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = []
+
+    def _request(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def get(self, url, **kwargs):
+        return self._request(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._request(url, **kwargs)
+
+
+def mock_session(monkeypatch, results):
+    session = MockSession(results)
+    monkeypatch.setattr(http_client, "create_session", lambda: session)
+    return session
+
+
+class TestRequest:
+    def test_shared_session(self):
+        session = http_client.get_session()
+        assert http_client.get_session() is session
+
+        http_client.reset()
+        assert http_client.get_session() is not session
+
+    def test_retry_on_server_error(self, monkeypatch):
+        session = mock_session(monkeypatch, [get_response(500), get_response(503), get_response(200)])
+
+        response = http_client.get(URL, headers={"Accept": "application/json"})
+
+        assert response.status_code == 200
+        assert len(session.calls) == 3
+        assert session.calls[0][1]["timeout"] == (10, 60)
+        assert session.calls[0][1]["headers"] == {"Accept": "application/json"}
+
+    def test_retries_exhausted(self, settings, monkeypatch):
+        settings.PDB_CISCO_API_MAX_RETRIES = 2
+        session = mock_session(monkeypatch, [requests.exceptions.ConnectionError()] * 2 + [get_response(500)])
+        assert http_client.get(URL).status_code == 500
+        assert len(session.calls) == 3
+
+        session = mock_session(monkeypatch, [requests.exceptions.Timeout()] * 3)
+        http_client.reset()
+        with pytest.raises(requests.exceptions.Timeout):
+            http_client.get(URL)
+        assert len(session.calls) == 3
+
+    def test_no_retry_on_client_error_and_post(self, monkeypatch):
+        session = mock_session(monkeypatch, [get_response(404), get_response(500), get_response(500),
+                                             get_response(200)])
+
+        assert http_client.get(URL).status_code == 404
+        assert http_client.post(URL).status_code == 500
+        assert http_client.post(URL, retry=True).status_code == 200
+        assert len(session.calls) == 4
+
+    def test_no_retry_on_unexpected_exception(self, monkeypatch):
+        session = mock_session(monkeypatch, [ValueError("unexpected")])
+
+        with pytest.raises(ValueError):
+            http_client.get(URL)
+        assert len(session.calls) == 1
+
+    def test_rate_limiter_per_attempt(self, monkeypatch):
+        class MockRateLimiter:
+            calls = 0
+
+            def acquire(self):
+                self.calls += 1
+
+        mock_session(monkeypatch, [get_response(500), get_response(200)])
+        rate_limiter = MockRateLimiter()
+
+        http_client.get(URL, rate_limiter=rate_limiter)
+
+        assert rate_limiter.calls == 2
+
+    def test_backoff_delay(self, settings):
+        settings.PDB_CISCO_API_RETRY_BACKOFF = 0.5
+        settings.PDB_CISCO_API_RETRY_BACKOFF_MAX = 3
+
+        for attempt, max_delay in [(0, 0.5), (1, 1), (2, 2), (3, 3), (10, 3)]:
+            delays = [http_client.get_backoff_delay(attempt) for _ in range(50)]
+            assert all([0 <= e <= max_delay for e in delays])
+
+
+class TestCircuitBreaker:
+    def test_open_after_consecutive_failures(self, settings, monkeypatch):
+        settings.PDB_CISCO_API_MAX_RETRIES = 0
+        settings.PDB_CISCO_API_CIRCUIT_BREAKER_THRESHOLD = 3
+        session = mock_session(monkeypatch, [get_response(500), get_response(200)] + [get_response(500)] * 3)
+
+        for _ in range(5):
+            http_client.get(URL)
+        assert http_client.get_circuit_breaker(URL).state == http_client.CircuitBreaker.OPEN
+
+        with pytest.raises(CiscoApiUnavailable) as exinfo:
+            http_client.get(URL)
+        assert exinfo.match(r"Cisco API endpoint api.cisco.com not available \(3 consecutive failures\)")
+        assert len(session.calls) == 5
+
+        # the circuit breaker is maintained per host
+        session.results = [get_response(200)]
+        assert http_client.get("https://cloudsso.cisco.com/as/token.oauth2").status_code == 200
+
+    def test_half_open(self, monkeypatch):
+        circuit_breaker = http_client.CircuitBreaker("api.cisco.com", failure_threshold=2, reset_timeout=60)
+        circuit_breaker.record_failure()
+        circuit_breaker.record_failure()
+        assert circuit_breaker.state == http_client.CircuitBreaker.OPEN
+
+        # after the reset timeout, a single trial call is allowed
+        circuit_breaker.opened_at -= 60
+        assert circuit_breaker.state == http_client.CircuitBreaker.HALF_OPEN
+        circuit_breaker.before_call()
+        with pytest.raises(CiscoApiUnavailable):
+            circuit_breaker.before_call()
+
+        # a failed trial call opens the circuit breaker again
+        circuit_breaker.record_failure()
+        assert circuit_breaker.state == http_client.CircuitBreaker.OPEN
+
+        circuit_breaker.opened_at -= 60
+        circuit_breaker.before_call()
+        circuit_breaker.record_success()
+        assert circuit_breaker.state == http_client.CircuitBreaker.CLOSED
+        assert circuit_breaker.failures == 0
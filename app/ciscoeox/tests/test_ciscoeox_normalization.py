@@ -0,0 +1,89 @@
+"""
+Test suite for the ciscoeox.normalization module
+"""
+import datetime
+import pytest
+from mixer.backend.django import mixer
+from app.ciscoeox.normalization import EoxLifecycle, parse_eox_date, clean_url, is_valid_url, \
+    get_eox_record_fingerprint
+from app.productdb.models import Product
+
+pytestmark = pytest.mark.django_db
+
+EOX_RECORD = {
+    "EOLProductID": "WS-C2960-24T-S",
+    "ProductIDDescription": "Catalyst 2960 24 10/100 + 2 1000BT LAN Base Image",
+    "ProductBulletinNumber": "EOL6415",
+    "LinkToProductBulletinURL": "http://www.cisco.com/c/en/us/products/eol6415.html; http://www.cisco.com/other",
+    "EOXExternalAnnouncementDate": {"value": "2012-11-30", "dateFormat": "YYYY-MM-DD"},
+    "EndOfSaleDate": {"value": "2013-11-30", "dateFormat": "YYYY-MM-DD"},
+    "EndOfSWMaintenanceReleases": {"value": "2014-11-30", "dateFormat": "YYYY-MM-DD"},
+    "EndOfSecurityVulSupportDate": {"value": " ", "dateFormat": "YYYY-MM-DD"},
+    "EndOfRoutineFailureAnalysisDate": {"value": "2014-11-30", "dateFormat": "YYYY-MM-DD"},
+    "EndOfServiceContractRenewal": {"value": "2018-02-28", "dateFormat": "YYYY-MM-DD"},
+    "LastDateOfSupport": {"value": "2018-11-30", "dateFormat": "YYYY-MM-DD"},
+    "EndOfSvcAttachDate": {"value": "2014-11-30", "dateFormat": "YYYY-MM-DD"},
+    "UpdatedTimeStamp": {"value": "2016-11-15", "dateFormat": "YYYY-MM-DD"},
+}
+
+
+def test_parse_eox_date():
+    parse_eox_date.cache_clear()
+
+    assert parse_eox_date("2014-11-30", "YYYY-MM-DD") == datetime.date(2014, 11, 30)
+    assert parse_eox_date("2014-11-30", "YYYY-MM-DD") == datetime.date(2014, 11, 30)
+    assert parse_eox_date.cache_info().hits == 1
+    assert parse_eox_date.cache_info().misses == 1
+
+    with pytest.raises(TypeError):
+        parse_eox_date(None)
+
+    with pytest.raises(ValueError):
+        parse_eox_date("30.11.2014")
+
+
+def test_clean_and_validate_url():
+    assert clean_url("http://localhost or http://another_localhost") == "http://localhost"
+    assert is_valid_url("http://localhost") is True
+    assert is_valid_url("Not yet provided") is False
+
+
+class TestEoxLifecycle:
+    def test_from_record(self):
+        lifecycle = EoxLifecycle.from_record(EOX_RECORD)
+
+        assert not hasattr(lifecycle, "__dict__")
+        assert lifecycle.end_of_sale_date == datetime.date(2013, 11, 30)
+        assert lifecycle.end_of_support_date == datetime.date(2018, 11, 30)
+        assert lifecycle.eox_update_time_stamp == datetime.date(2016, 11, 15)
+        assert lifecycle.end_of_sec_vuln_supp_date is None, "blank values are not changed"
+        assert lifecycle.eol_reference_url == "http://www.cisco.com/c/en/us/products/eol6415.html"
+        assert lifecycle.eol_reference_number == "EOL6415"
+        assert lifecycle.eox_fingerprint == get_eox_record_fingerprint(EOX_RECORD)
+
+    def test_from_invalid_record(self):
+        record = dict(EOX_RECORD, LinkToProductBulletinURL="Not yet provided")
+        with pytest.raises(Exception) as exinfo:
+            EoxLifecycle.from_record(record)
+        assert exinfo.match("invalid EoL reference URL")
+
+        record = dict(EOX_RECORD, EndOfSaleDate={"value": None, "dateFormat": "YYYY-MM-DD"})
+        with pytest.raises(TypeError):
+            EoxLifecycle.from_record(record)
+
+    def test_apply_to_product(self):
+        product = mixer.blend("productdb.Product", product_id="WS-C2960-24T-S",
+                              end_of_sec_vuln_supp_date=datetime.date(2015, 1, 1))
+        lifecycle = EoxLifecycle.from_record(EOX_RECORD)
+        assert lifecycle.is_synchronized(product) is False
+
+        lifecycle.apply_to(product)
+        product.save()
+
+        product = Product.objects.get(product_id="WS-C2960-24T-S")
+        assert product.end_of_sale_date == datetime.date(2013, 11, 30)
+        assert product.end_of_sec_vuln_supp_date == datetime.date(2015, 1, 1)
+        assert product.eol_reference_number == "EOL6415"
+        assert lifecycle.is_synchronized(product) is True
+        assert EoxLifecycle.from_record(dict(EOX_RECORD, ProductBulletinNumber="EOL1")).is_synchronized(product) \
+            is False
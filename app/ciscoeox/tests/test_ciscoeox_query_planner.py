@@ -0,0 +1,46 @@
+"""
+Test suite for the ciscoeox.query_planner module
+"""
+from app.ciscoeox.query_planner import QueryPlan, is_covered_by
+
+
+def test_is_covered_by():
+    assert is_covered_by("WS-C2960X*", "WS-C2960*") is True
+    assert is_covered_by("WS-C2960-24T-S", "WS-C2960*") is True
+    assert is_covered_by("ws-c2960-24t-s", "WS-C2960*") is False, "the queries are case-sensitive"
+    assert is_covered_by("WS-C2960*", "WS-C2960X*") is False
+    assert is_covered_by("*VPN*", "VPN*") is False
+    assert is_covered_by("VPN*", "*VPN*") is True
+    assert is_covered_by("WS-C2960*", "WS-C2960-24T-S") is False
+    assert is_covered_by("WS-C2.60-24", "WS-C2960*") is False
+
+
+class TestQueryPlan:
+    def test_empty_plan(self):
+        plan = QueryPlan([])
+
+        assert plan.queries == []
+
+    def test_remove_covered_queries(self):
+        plan = QueryPlan(["WS-C2960X*", "WS-C2960*", "WS-C2960-24T-S", "ws-c2960*", "C9300*", "C9300**"])
+
+        assert plan.queries == ["WS-C2960*", "ws-c2960*", "C9300**"]
+        assert plan.covered_queries == {
+            "WS-C2960X*": "WS-C2960*",
+            "WS-C2960-24T-S": "WS-C2960*",
+            "C9300*": "C9300**",
+        }
+
+    def test_combine_product_ids(self):
+        product_ids = ["PID-%d" % index for index in range(5)]
+        plan = QueryPlan(["WS-C2960*"] + product_ids[:3] + [",".join(product_ids[3:] + ["PID-0"])], max_product_ids=2)
+
+        assert plan.wildcard_queries == ["WS-C2960*"]
+        assert plan.product_id_queries == ["PID-0,PID-1", "PID-2,PID-3", "PID-4"]
+        assert plan.queries == ["WS-C2960*", "PID-0,PID-1", "PID-2,PID-3", "PID-4"]
+
+    def test_default_limit(self):
+        plan = QueryPlan(["PID-%d" % index for index in range(25)])
+
+        assert len(plan.product_id_queries) == 2
+        assert len(plan.product_id_queries[0].split(",")) == 20
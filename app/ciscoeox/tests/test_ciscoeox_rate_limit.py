@@ -0,0 +1,46 @@
+"""
+Test suite for the ciscoeox.rate_limit module
+"""
+import uuid
+import pytest
+from app.ciscoeox.exception import CiscoApiRateLimitExceeded, CiscoApiCallFailed
+from app.ciscoeox.rate_limit import TokenBucketRateLimiter
+
+pytestmark = pytest.mark.django_db
+
+
+class TestTokenBucketRateLimiter:
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucketRateLimiter("test", calls_per_second=0)
+
+    @pytest.mark.usefixtures("redis_server_required")
+    def test_calls_per_second(self):
+        name = "test-%s" % uuid.uuid4()
+        limiter = TokenBucketRateLimiter(name, calls_per_second=5)
+
+        # the bucket allows a burst of calls_per_second calls
+        for _ in range(5):
+            assert limiter.try_acquire() == 0
+
+        wait = limiter.try_acquire()
+        assert 0 < wait <= 0.2
+
+        # the bucket is shared by all limiters with the same name
+        assert TokenBucketRateLimiter(name, calls_per_second=5).try_acquire() > 0
+        assert TokenBucketRateLimiter("other-%s" % name, calls_per_second=5).try_acquire() == 0
+
+        # wait for the next token
+        limiter.acquire()
+
+    @pytest.mark.usefixtures("redis_server_required")
+    def test_calls_per_day(self):
+        limiter = TokenBucketRateLimiter("test-%s" % uuid.uuid4(), calls_per_second=100, calls_per_day=3)
+        for _ in range(3):
+            limiter.acquire()
+
+        with pytest.raises(CiscoApiRateLimitExceeded) as exinfo:
+            limiter.acquire()
+
+        assert exinfo.match("daily limit of 3 API calls reached")
+        assert isinstance(exinfo.value, CiscoApiCallFailed)
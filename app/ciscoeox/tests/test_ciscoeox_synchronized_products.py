@@ -0,0 +1,34 @@
+"""
+Test suite for the ciscoeox.synchronized_products module
+"""
+import uuid
+import pytest
+from app.ciscoeox.synchronized_products import SynchronizedProducts
+
+
+class TestSynchronizedProducts:
+    @pytest.mark.usefixtures("redis_server_required")
+    def test_shared_set(self):
+        sync_run_id = str(uuid.uuid4())
+        synchronized_products = SynchronizedProducts(sync_run_id)
+
+        assert synchronized_products.add_new(["A", "B", "A"]) == ["A", "B"]
+        assert synchronized_products.add_new([]) == []
+
+        # the set is shared by all instances of the SyncRun
+        assert SynchronizedProducts(sync_run_id).add_new(["B", "C"]) == ["C"]
+        assert SynchronizedProducts("other-%s" % sync_run_id).add_new(["B"]) == ["B"]
+
+        synchronized_products.delete()
+        assert SynchronizedProducts(sync_run_id).add_new(["A"]) == ["A"]
+        synchronized_products.delete()
+
+    def test_local_set(self):
+        synchronized_products = SynchronizedProducts(str(uuid.uuid4()), shared=False)
+
+        assert synchronized_products.add_new(["A", "B", "A"]) == ["A", "B"]
+        assert synchronized_products.add_new(["B", "C"]) == ["C"]
+
+        synchronized_products.delete()
+        assert synchronized_products.add_new(["A"]) == ["A"]
+        synchronized_products.delete()
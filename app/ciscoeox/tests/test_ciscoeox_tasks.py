@@ -4,13 +4,14 @@ Test suite for the ciscoeox.tasks module
 import datetime
 import pytest
 import json
-import requests
+from django.core.cache import cache
 from mixer.backend.django import mixer
 from requests import Response
-from app.ciscoeox import tasks
-from app.ciscoeox.exception import CiscoApiCallFailed, CredentialsNotFoundException
+from app.ciscoeox import http_client, tasks
+from app.ciscoeox.exception import CiscoApiCallFailed, CiscoApiUnavailable, CredentialsNotFoundException
+from app.ciscoeox.synchronized_products import SynchronizedProducts
 from app.config import utils
-from app.config.models import NotificationMessage
+from app.config.models import NotificationMessage, SyncRun
 from app.config.settings import AppSettings
 from app.productdb.models import Product, Vendor
 import app.ciscoeox.api_crawler as cisco_eox_api_crawler
@@ -51,7 +52,7 @@ class TestExecuteTaskToSynchronizeCiscoEoxStateTask:
                     r._content = f.read().encode("utf-8")
                 return r
 
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
     def test_manual_task(self, monkeypatch):
         self.mock_api_call(monkeypatch)
@@ -81,15 +82,56 @@ class TestExecuteTaskToSynchronizeCiscoEoxStateTask:
         task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(ignore_periodic_sync_flag=True)
         expected_result = '<p style="text-align: left;">The following queries were executed:<br>' \
                           '<ul style="text-align: left;"><li><code>WS-C2960-*</code> (<b>affects 3 products</b>, ' \
-                          'success)</li></ul></p>'
+                          'success)</li></ul><b>2</b> products were not changed since the last synchronization ' \
+                          '(no update required).<br></p>'
 
         assert task is not None
         assert task.status == "SUCCESS", task.traceback
         assert task.state == TaskState.SUCCESS
         assert task.info.get("status_message") == expected_result
         assert NotificationMessage.objects.count() == 2, "Task should create a Notification Message"
+        p = Product.objects.get(product_id="WS-C2950G-24-EI")
+        assert p.eox_update_time_stamp != datetime.date(1999, 1, 1), "changed product should be updated"
         assert Product.objects.count() == 3, "Three products are part of the update"
 
+    def test_replay_archived_task(self, monkeypatch, settings, tmpdir):
+        self.mock_api_call(monkeypatch)
+        settings.PDB_CISCO_EOX_API_ARCHIVE = True
+        settings.PDB_CISCO_EOX_API_ARCHIVE_DIRECTORY = str(tmpdir)
+
+        app = AppSettings()
+        app.set_cisco_eox_api_queries("WS-C2960-*")
+
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(ignore_periodic_sync_flag=True)
+
+        assert task.status == "SUCCESS", task.traceback
+        assert Product.objects.count() == 3
+
+        # replay the synchronization without access to the Cisco EoX API
+        Product.objects.all().delete()
+        app.set_cisco_eox_api_queries("")
+
+        def raise_exception(*args, **kwargs):
+            raise Exception("API call not expected")
+
+        monkeypatch.setattr(http_client, "create_session", raise_exception)
+        monkeypatch.setattr(utils, "check_cisco_eox_api_access", raise_exception)
+
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(replay_archive="latest")
+        expected_result = '<p style="text-align: left;">The following queries were executed:<br>' \
+                          '<ul style="text-align: left;"><li><code>WS-C2960-*</code> (<b>affects 3 products</b>, ' \
+                          'success)</li></ul></p>'
+
+        assert task.status == "SUCCESS", task.traceback
+        assert task.info.get("status_message") == expected_result
+        assert Product.objects.count() == 3
+
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(replay_archive="19990101-000000")
+
+        assert task.status == "SUCCESS", task.traceback
+        assert task.info.get("error_message") == "Cannot replay the Cisco EoX API responses: archive " \
+                                                 "19990101-000000 not found"
+
     def test_manual_task_with_single_blacklist_entry(self, monkeypatch):
         self.mock_api_call(monkeypatch)
 
@@ -146,6 +188,30 @@ class TestExecuteTaskToSynchronizeCiscoEoxStateTask:
         nm = NotificationMessage.objects.first()
         assert nm.type == NotificationMessage.MESSAGE_SUCCESS, "Incomplete configuration, should throw a warning "
 
+        # the messages are stored per Product ID, the Notification Message contains only the amount
+        sync_run = SyncRun.objects.get(id=task.info.get("sync_run_id"))
+        assert nm.get_result_run() == sync_run
+        assert sync_run.finished is not None
+        assert sorted(sync_run.items.values_list("key", flat=True)) == ["WS-C2950G-24-EI", "WS-C2950G-48-EI-WS"]
+        assert "<b>2</b> comment/errors occurred during the synchronization" in nm.detailed_message
+        assert "WS-C2950G-24-EI" not in nm.detailed_message
+
+    def test_manual_task_with_truncated_messages(self, monkeypatch, settings):
+        self.mock_api_call(monkeypatch)
+        settings.PDB_RESULT_SUMMARY_MESSAGES = 1
+
+        app = AppSettings()
+        app.set_cisco_eox_api_queries("WS-C2960-*")
+        app.set_product_blacklist_regex("WS-C2950G-48-EI-WS;WS-C2950G-24-EI")
+
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(ignore_periodic_sync_flag=True)
+
+        assert task.status == "SUCCESS", task.traceback
+        assert task.info.get("status_message").count("Product record ignored") == 1, \
+            "only the first messages are part of the result"
+        assert "view all messages" in task.info.get("status_message")
+        assert SyncRun.objects.get(id=task.info.get("sync_run_id")).items.count() == 2
+
     def test_periodic_task_without_queries(self, monkeypatch):
         self.mock_api_call(monkeypatch)
 
@@ -171,7 +237,7 @@ class TestExecuteTaskToSynchronizeCiscoEoxStateTask:
             def get(self, *args, **kwargs):
                 raise CiscoApiCallFailed("The API is broken")
 
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         # test automatic trigger
         app = AppSettings()
@@ -200,7 +266,7 @@ class TestExecuteTaskToSynchronizeCiscoEoxStateTask:
             def get(self, *args, **kwargs):
                 raise CredentialsNotFoundException("Something is wrong with the credentials handling")
 
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         # test automatic trigger
         app = AppSettings()
@@ -228,7 +294,7 @@ class TestExecuteTaskToSynchronizeCiscoEoxStateTask:
             def get(self, *args, **kwargs):
                 raise Exception("The API is broken")
 
-        monkeypatch.setattr(requests, "Session", MockSession)
+        monkeypatch.setattr(http_client, "create_session", MockSession)
 
         # test automatic trigger
         app = AppSettings()
@@ -277,7 +343,8 @@ class TestExecuteTaskToSynchronizeCiscoEoxStateTask:
             raise CiscoApiCallFailed("Cisco API call failed message")
 
         monkeypatch.setattr(utils, "check_cisco_eox_api_access", lambda x, y, z: True)
-        monkeypatch.setattr(cisco_eox_api_crawler, "get_raw_api_data", lambda query: raise_ciscoapicallfailed())
+        monkeypatch.setattr(cisco_eox_api_crawler, "iter_raw_api_pages",
+                            lambda query, archive=None: raise_ciscoapicallfailed())
 
         # test automatic trigger
         app = AppSettings()
@@ -298,6 +365,166 @@ class TestExecuteTaskToSynchronizeCiscoEoxStateTask:
         nm = NotificationMessage.objects.first()
         assert nm.type == NotificationMessage.MESSAGE_ERROR, "Should be an error message, because all queries failed"
 
+    def test_execute_task_to_synchronize_cisco_eox_states_with_unavailable_api(self, monkeypatch):
+        executed_queries = []
+
+        def raise_ciscoapiunavailable(query):
+            executed_queries.append(query)
+            raise CiscoApiUnavailable("Cisco API endpoint api.cisco.com not available (5 consecutive failures)")
+
+        monkeypatch.setattr(utils, "check_cisco_eox_api_access", lambda x, y, z: True)
+        monkeypatch.setattr(cisco_eox_api_crawler, "iter_raw_api_pages",
+                            lambda query, archive=None: raise_ciscoapiunavailable(query))
+
+        app = AppSettings()
+        app.set_cisco_eox_api_queries("WS-C2960-*\nWS-C3850-*")
+
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(ignore_periodic_sync_flag=True)
+
+        expected_status_message = "<p style=\"text-align: left;\">The following queries were executed:<br>" \
+                                  "<ul style=\"text-align: left;\"><li class=\"text-danger\">" \
+                                  "<code>WS-C2960-*</code> (failed, Cisco API endpoint api.cisco.com not available " \
+                                  "(5 consecutive failures))</li><li class=\"text-danger\"><code>WS-C3850-*</code> " \
+                                  "(failed, not executed, Cisco API endpoint api.cisco.com not available (5 " \
+                                  "consecutive failures))</li></ul></p>"
+
+        assert task is not None
+        assert task.status == "SUCCESS", task.traceback
+        assert task.info.get("status_message") == expected_status_message
+        assert executed_queries == ["WS-C2960-*"], "the remaining queries are not sent to the API"
+
+    def test_execute_task_to_synchronize_cisco_eox_states_in_parallel(self, monkeypatch, settings):
+        self.mock_api_call(monkeypatch)
+        settings.PDB_CISCO_EOX_API_PARALLEL_SYNC = True
+        settings.PDB_CISCO_EOX_API_QUERIES_PER_TASK = 1
+        iter_raw_api_pages = cisco_eox_api_crawler.iter_raw_api_pages
+
+        def iter_api_pages(query, archive=None):
+            if query == "WS-C3850-*":
+                raise CiscoApiCallFailed("Cisco API call failed message")
+            return iter_raw_api_pages(query, archive=archive)
+
+        monkeypatch.setattr(cisco_eox_api_crawler, "iter_raw_api_pages", iter_api_pages)
+
+        app = AppSettings()
+        app.set_cisco_eox_api_queries("WS-C2960-*\nWS-C3850-*")
+
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(ignore_periodic_sync_flag=True)
+
+        expected_status_message = "<p style=\"text-align: left;\">The following queries were executed:<br>" \
+                                  "<ul style=\"text-align: left;\"><li class=\"text-danger\">" \
+                                  "<code>WS-C3850-*</code> (failed, Cisco API call failed message)</li>" \
+                                  "<li><code>WS-C2960-*</code> (<b>affects 3 products</b>, success)</li></ul></p>"
+
+        assert task is not None
+        assert task.status == "SUCCESS", task.traceback
+        assert task.info.get("status_message") == expected_status_message
+        assert Product.objects.count() == 3, "Three products are part of the update"
+        assert NotificationMessage.objects.count() == 1, "Summary task should create a single Notification Message"
+        nm = NotificationMessage.objects.first()
+        assert nm.type == NotificationMessage.MESSAGE_WARNING, "Should be a warning, because a single query failed"
+
+    def test_records_of_parallel_tasks_are_applied_once(self, monkeypatch, settings):
+        # the mocked API returns the same records for every query
+        self.mock_api_call(monkeypatch)
+        settings.PDB_CISCO_EOX_API_PARALLEL_SYNC = True
+        settings.PDB_CISCO_EOX_API_QUERIES_PER_TASK = 1
+        update_local_db_based_on_records = cisco_eox_api_crawler.update_local_db_based_on_records
+        applied_product_ids = []
+
+        def update_local_db(records, *args, **kwargs):
+            applied_product_ids.extend([record["EOLProductID"] for record in records])
+            return update_local_db_based_on_records(records, *args, **kwargs)
+
+        monkeypatch.setattr(cisco_eox_api_crawler, "update_local_db_based_on_records", update_local_db)
+
+        app = AppSettings()
+        app.set_cisco_eox_api_queries("WS-C2960-*\nWS-C3850-*")
+
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(ignore_periodic_sync_flag=True)
+
+        assert task.status == "SUCCESS", task.traceback
+        assert len(applied_product_ids) == 3
+        assert len(set(applied_product_ids)) == 3, "records of multiple tasks are applied once"
+
+    def test_parallel_synchronization_with_unexpected_exception(self, monkeypatch, settings):
+        self.mock_api_call(monkeypatch)
+        settings.PDB_CISCO_EOX_API_PARALLEL_SYNC = True
+        settings.PDB_CISCO_EOX_API_QUERIES_PER_TASK = 1
+        execute_queries = tasks._execute_queries
+
+        def _execute_queries(task, queries, *args, **kwargs):
+            if "WS-C3850-*" in queries:
+                raise Exception("unexpected exception")
+            return execute_queries(task, queries, *args, **kwargs)
+
+        monkeypatch.setattr(tasks, "_execute_queries", _execute_queries)
+
+        app = AppSettings()
+        app.set_cisco_eox_api_queries("WS-C2960-*\nWS-C3850-*")
+
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(ignore_periodic_sync_flag=True)
+
+        assert task.status == "SUCCESS", task.traceback
+        assert "<code>WS-C3850-*</code> (failed, Unexpected exception (unexpected exception))" in \
+               task.info.get("status_message")
+        assert NotificationMessage.objects.count() == 1, "the summary task is executed"
+        assert NotificationMessage.objects.first().type == NotificationMessage.MESSAGE_WARNING
+
+    def test_parallel_synchronization_cannot_be_started(self, monkeypatch, settings):
+        self.mock_api_call(monkeypatch)
+        settings.PDB_CISCO_EOX_API_PARALLEL_SYNC = True
+
+        def raise_exception(*args, **kwargs):
+            raise Exception("broker not reachable")
+
+        monkeypatch.setattr(tasks, "_start_parallel_synchronization", raise_exception)
+
+        app = AppSettings()
+        app.set_cisco_eox_api_queries("WS-C2960-*")
+        cache.set("CISCO_EOX_API_SYN_IN_PROGRESS", "started")
+
+        task = tasks.execute_task_to_synchronize_cisco_eox_states.delay(ignore_periodic_sync_flag=True)
+
+        assert task.status == "SUCCESS", task.traceback
+        assert task.info.get("error_message") == "Cannot start the parallel synchronization with the Cisco EoX API " \
+                                                 "(broker not reachable)."
+        assert cache.get("CISCO_EOX_API_SYN_IN_PROGRESS") is None
+        assert SyncRun.objects.count() == 1
+        assert SyncRun.objects.first().finished is not None
+        assert NotificationMessage.objects.first().type == NotificationMessage.MESSAGE_ERROR
+
+    def test_records_of_failed_write_are_applied_on_retry(self, monkeypatch):
+        self.mock_api_call(monkeypatch)
+        update_local_db_based_on_records = cisco_eox_api_crawler.update_local_db_based_on_records
+        write_attempts = []
+
+        def update_local_db(records, *args, **kwargs):
+            write_attempts.append([record["EOLProductID"] for record in records])
+            if len(write_attempts) == 1:
+                raise Exception("write failed")
+            return update_local_db_based_on_records(records, *args, **kwargs)
+
+        monkeypatch.setattr(cisco_eox_api_crawler, "update_local_db_based_on_records", update_local_db)
+        sync_run = SyncRun.objects.create(task_id="test")
+
+        # the retry of the failed query is executed with the same SyncRun (eager tasks are not retried)
+        result = tasks.synchronize_cisco_eox_queries.delay(["WS-C2960-*"], sync_run.id, create_missing=True)
+
+        assert result.status == "SUCCESS", result.traceback
+        assert result.info["queries"]["WS-C2960-*"]["error"] is not None
+        assert Product.objects.count() == 0
+
+        result = tasks.synchronize_cisco_eox_queries.delay(["WS-C2960-*"], sync_run.id, create_missing=True)
+
+        assert result.status == "SUCCESS", result.traceback
+        assert result.info["queries"]["WS-C2960-*"]["error"] is None
+        assert len(write_attempts) == 2
+        assert write_attempts[1] == write_attempts[0], "records of the failed write are applied on retry"
+        assert Product.objects.count() == 3
+
+        SynchronizedProducts(sync_run.id).delete()
+
 
 @pytest.mark.usefixtures("set_celery_always_eager")
 @pytest.mark.usefixtures("redis_server_required")
@@ -406,3 +633,65 @@ class TestPopulateProductLifecycleStateSyncTask:
         assert result.status == "SUCCESS"
         assert filterquery.count() == 0, "Periodic sync disabled, no value should be true"
 
+
+    @pytest.mark.usefixtures("import_default_vendors")
+    def test_populate_flag_without_changes(self):
+        app_config = AppSettings()
+        v = Vendor.objects.get(id=1)
+        mixer.blend("productdb.Product", product_id="TestA", vendor=v, lc_state_sync=False)
+        mixer.blend("productdb.Product", product_id="TestB", vendor=v, lc_state_sync=False)
+        app_config.set_cisco_eox_api_queries("TestA,XYZ\n*B*")
+        app_config.set_periodic_sync_enabled(True)
+
+        result = tasks.cisco_eox_populate_product_lc_state_sync_field.delay()
+
+        assert result.info == {"status": "Database updated"}
+        assert Product.objects.filter(lc_state_sync=True).count() == 2
+
+        # neither the configuration nor the products are changed
+        Product.objects.all().update(lc_state_sync=False)
+
+        result = tasks.cisco_eox_populate_product_lc_state_sync_field.delay()
+
+        assert result.info == {"status": "No changes required"}
+        assert Product.objects.filter(lc_state_sync=True).count() == 0
+
+        # new products are part of the computation
+        mixer.blend("productdb.Product", product_id="TestC", vendor=v, lc_state_sync=False)
+
+        result = tasks.cisco_eox_populate_product_lc_state_sync_field.delay()
+
+        assert result.info == {"status": "Database updated"}
+        assert list(Product.objects.filter(lc_state_sync=True).order_by("id").values_list(
+            "product_id", flat=True
+        )) == ["TestA", "TestB"]
+
+        # products of other vendors are not part of the computation
+        mixer.blend("productdb.Product", product_id="TestD", vendor=Vendor.objects.get(id=2), lc_state_sync=False)
+
+        result = tasks.cisco_eox_populate_product_lc_state_sync_field.delay()
+
+        assert result.info == {"status": "No changes required"}
+
+        # renamed products and products that are moved to another vendor (on the same day) are part of the computation
+        p = Product.objects.get(product_id="TestC")
+        p.product_id = "TestBC"
+        p.save()
+
+        result = tasks.cisco_eox_populate_product_lc_state_sync_field.delay()
+
+        assert result.info == {"status": "Database updated"}
+        assert list(Product.objects.filter(lc_state_sync=True).order_by("id").values_list(
+            "product_id", flat=True
+        )) == ["TestA", "TestB", "TestBC"]
+
+        p = mixer.blend("productdb.Product", product_id="TestBD", vendor=Vendor.objects.get(id=2), lc_state_sync=False)
+        p.vendor = v
+        p.save()
+
+        result = tasks.cisco_eox_populate_product_lc_state_sync_field.delay()
+
+        assert result.info == {"status": "Database updated"}
+        assert list(Product.objects.filter(lc_state_sync=True).order_by("id").values_list(
+            "product_id", flat=True
+        )) == ["TestA", "TestB", "TestBC", "TestBD"]
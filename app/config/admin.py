@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from app.config.models import NotificationMessage, TextBlock, ConfigOption
+from app.config.models import NotificationMessage, TextBlock, ConfigOption, SyncRun, ImportRun
 
 
 class ConfigOptionAdmin(admin.ModelAdmin):
@@ -39,3 +39,16 @@ class TextBlockAdmin(admin.ModelAdmin):
     )
 
 admin.site.register(TextBlock, TextBlockAdmin)
+
+
+class ResultRunAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'task_id',
+        'started',
+        'finished',
+        'notification',
+    )
+
+admin.site.register(SyncRun, ResultRunAdmin)
+admin.site.register(ImportRun, ResultRunAdmin)
@@ -95,12 +95,20 @@ class SettingsForm(forms.Form):
                   "<strong>auto-create new products</strong>-option is enabled."
     )
 
-    eox_api_wait_time = forms.IntegerField(
+    cisco_api_calls_per_second = forms.IntegerField(
         min_value=1,
-        max_value=60,
+        max_value=100,
         required=False,
-        label="Cisco EoX query wait time:",
-        help_text="Value between 1 and 60 seconds that is used as a wait timer between the Cisco EoX API queries."
+        label="Cisco API calls per second:",
+        help_text="Maximum amount of Cisco API calls per second (value between 1 and 100), the limit is shared by all "
+                  "synchronization tasks."
+    )
+
+    cisco_api_calls_per_day = forms.IntegerField(
+        min_value=1,
+        required=False,
+        label="Cisco API calls per day:",
+        help_text="Maximum amount of Cisco API calls per day, further calls fail until the next day (UTC)."
     )
 
     def _get_eox_api_blacklist_as_list(self):
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2017-12-16 11:02
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('config', '0005_auto_20160925_1536'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('started', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('notification', models.OneToOneField(blank=True, help_text='Notification Message of the run, the results are deleted with the message', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='importrun', to='config.NotificationMessage')),
+            ],
+            options={
+                'ordering': ('started',),
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportRunItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(blank=True, default='', help_text='identifier of the item, e.g. the Product ID', max_length=512)),
+                ('status', models.CharField(choices=[('INFO', 'info'), ('SUCC', 'success'), ('ERR', 'error'), ('WARN', 'warning')], default='INFO', max_length=8)),
+                ('message', models.TextField(blank=True, default='', max_length=16384)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='config.ImportRun')),
+            ],
+            options={
+                'ordering': ('id',),
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('started', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('notification', models.OneToOneField(blank=True, help_text='Notification Message of the run, the results are deleted with the message', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='syncrun', to='config.NotificationMessage')),
+            ],
+            options={
+                'ordering': ('started',),
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncRunItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(blank=True, default='', help_text='identifier of the item, e.g. the Product ID', max_length=512)),
+                ('status', models.CharField(choices=[('INFO', 'info'), ('SUCC', 'success'), ('ERR', 'error'), ('WARN', 'warning')], default='INFO', max_length=8)),
+                ('message', models.TextField(blank=True, default='', max_length=16384)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='config.SyncRun')),
+            ],
+            options={
+                'ordering': ('id',),
+                'abstract': False,
+            },
+        ),
+    ]
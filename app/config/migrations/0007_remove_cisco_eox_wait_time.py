@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def remove_cisco_eox_wait_time_option(apps, schema_editor):
+    # the wait time between the Cisco EoX API queries is replaced by the rate limit of the Cisco API calls
+    ConfigOption = apps.get_model("config", "ConfigOption")
+    ConfigOption.objects.filter(key="cisco_eox.wait_time_between_queries").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('config', '0006_syncrun_importrun'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_cisco_eox_wait_time_option, migrations.RunPython.noop)
+    ]
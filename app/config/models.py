@@ -1,5 +1,8 @@
 from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.db.models import Count
+from django.utils.timezone import now
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
@@ -79,6 +82,17 @@ class NotificationMessage(models.Model):
             detailed_message=detailed_message
         )
 
+    def get_result_run(self):
+        """SyncRun or ImportRun with the results of the Notification Message (None if not available)"""
+        for related_name in ["syncrun", "importrun"]:
+            try:
+                return getattr(self, related_name)
+
+            except ObjectDoesNotExist:
+                pass
+
+        return None
+
     def save(self, *args, **kwargs):
         # clean the object before save
         self.full_clean()
@@ -91,6 +105,124 @@ class NotificationMessage(models.Model):
         ordering = ('created',)
 
 
+class ResultRun(models.Model):
+    """
+    run of a task that stores the result of every item (e.g. the messages per Product ID) in its own row instead of a
+    single HTML string, the rows are written in bulk and paged in the Notification Message detail view
+    """
+    # amount of items that are written with a single query
+    ITEM_BATCH_SIZE = 1000
+
+    task_id = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True
+    )
+
+    started = models.DateTimeField(
+        auto_now_add=True,
+        editable=False
+    )
+
+    finished = models.DateTimeField(
+        null=True,
+        blank=True
+    )
+
+    notification = models.OneToOneField(
+        NotificationMessage,
+        help_text="Notification Message of the run, the results are deleted with the message",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="%(class)s"
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending_items = []
+
+    def add_item(self, message, key="", status=NotificationMessage.MESSAGE_INFO):
+        """add the result of an item, the pending items are written in bulk (see flush)"""
+        self._pending_items.append(self.items.model(run=self, key=key, status=status, message=message))
+        if len(self._pending_items) >= self.ITEM_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """write the pending items to the database"""
+        if len(self._pending_items) != 0:
+            self.items.model.objects.bulk_create(self._pending_items, batch_size=self.ITEM_BATCH_SIZE)
+            self._pending_items = []
+
+    def get_item_counts(self):
+        """amount of items per status"""
+        return dict(self.items.order_by().values_list("status").annotate(count=Count("id")))
+
+    def finish(self, notification=None):
+        """write the pending items and set the finish time (and the Notification Message of the run)"""
+        self.flush()
+        self.finished = now()
+        if notification:
+            self.notification = notification
+        self.save()
+
+    class Meta:
+        abstract = True
+        ordering = ('started',)
+
+
+class ResultRunItem(models.Model):
+    """result of a single item of a ResultRun"""
+    key = models.CharField(
+        help_text="identifier of the item, e.g. the Product ID",
+        max_length=512,
+        blank=True,
+        default=""
+    )
+
+    status = models.CharField(
+        max_length=8,
+        choices=NotificationMessage.MESSAGE_TYPE,
+        default=NotificationMessage.MESSAGE_INFO
+    )
+
+    message = models.TextField(
+        max_length=16384,
+        blank=True,
+        default=""
+    )
+
+    class Meta:
+        abstract = True
+        ordering = ('id',)
+
+
+class SyncRun(ResultRun):
+    """synchronization with the Cisco EoX API"""
+    pass
+
+
+class SyncRunItem(ResultRunItem):
+    run = models.ForeignKey(
+        SyncRun,
+        related_name="items",
+        on_delete=models.CASCADE
+    )
+
+
+class ImportRun(ResultRun):
+    """import of a product list"""
+    pass
+
+
+class ImportRunItem(ResultRunItem):
+    run = models.ForeignKey(
+        ImportRun,
+        related_name="items",
+        on_delete=models.CASCADE
+    )
+
+
 class TextBlock(models.Model):
     """
     Dynamic content at some page views
@@ -131,7 +263,8 @@ class ConfigOption(models.Model):
     CISCO_EOX_CRAWLER_LAST_EXECUTION_RESULT = "cisco_eox.last_execution_result"
     CISCO_EOX_API_QUERIES = "cisco_eox.api_queries"
     CISCO_EOX_PRODUCT_BLACKLIST_REGEX = "cisco_eox.product_blacklist_regex"
-    CISCO_EOX_WAIT_TIME = "cisco_eox.wait_time_between_queries"
+    CISCO_API_CALLS_PER_SECOND = "cisco_api.calls_per_second"
+    CISCO_API_CALLS_PER_DAY = "cisco_api.calls_per_day"
     STAT_AMOUNT_OF_PRODUCT_CHECKS = "statistics.amount_product_check_runs"
     STAT_AMOUNT_OF_UNIQUE_PRODUCT_CHECK_ENTRIES = "statistics.amount_unique_product_check_entries"
 
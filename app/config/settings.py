@@ -13,11 +13,28 @@ class AppSettings:
     Product Database settings
     """
     CONFIG_OPTIONS_DICT_CACHE_KEY = "PRODUCTDB_CONFIG_OPTIONS"
+    DEFAULT_CONFIG_OPTIONS = {
+        ConfigOption.GLOBAL_CISCO_API_ENABLED: "false",
+        ConfigOption.GLOBAL_LOGIN_ONLY_MODE: "false",
+        ConfigOption.CISCO_API_CLIENT_ID: "PlsChgMe",
+        ConfigOption.CISCO_API_CLIENT_SECRET: "PlsChgMe",
+        ConfigOption.CISCO_EOX_CRAWLER_AUTO_SYNC: "false",
+        ConfigOption.CISCO_EOX_CRAWLER_CREATE_PRODUCTS: "false",
+        ConfigOption.CISCO_EOX_API_QUERIES: "",
+        ConfigOption.CISCO_EOX_PRODUCT_BLACKLIST_REGEX: "",
+        ConfigOption.GLOBAL_INTERNAL_PRODUCT_ID_LABEL: "Internal Product ID",
+        ConfigOption.CISCO_API_CALLS_PER_SECOND: "5",
+        ConfigOption.CISCO_API_CALLS_PER_DAY: "5000",
+        ConfigOption.CISCO_EOX_CRAWLER_LAST_EXECUTION_TIME: None,
+        ConfigOption.CISCO_EOX_CRAWLER_LAST_EXECUTION_RESULT: None,
+        ConfigOption.STAT_AMOUNT_OF_PRODUCT_CHECKS: "0",
+        ConfigOption.STAT_AMOUNT_OF_UNIQUE_PRODUCT_CHECK_ENTRIES: "0"
+    }
 
     def __init__(self):
         self._config_options = cache.get(self.CONFIG_OPTIONS_DICT_CACHE_KEY, None)
-        if not self._config_options or len(self._config_options) < 12:
-            # populate cache
+        if not self._config_options or not set(self.DEFAULT_CONFIG_OPTIONS).issubset(self._config_options):
+            # populate cache (also if a cached dictionary of a previous version misses an option)
             self.create_defaults()
             self._config_options = dict(ConfigOption.objects.all().values_list("key", "value"))
             cache.set(self.CONFIG_OPTIONS_DICT_CACHE_KEY, self._config_options, timeout=None)
@@ -49,23 +66,7 @@ class AppSettings:
         """
         create default configuration if not set
         """
-        expected_defaults = {
-            ConfigOption.GLOBAL_CISCO_API_ENABLED: "false",
-            ConfigOption.GLOBAL_LOGIN_ONLY_MODE: "false",
-            ConfigOption.CISCO_API_CLIENT_ID: "PlsChgMe",
-            ConfigOption.CISCO_API_CLIENT_SECRET: "PlsChgMe",
-            ConfigOption.CISCO_EOX_CRAWLER_AUTO_SYNC: "false",
-            ConfigOption.CISCO_EOX_CRAWLER_CREATE_PRODUCTS: "false",
-            ConfigOption.CISCO_EOX_API_QUERIES: "",
-            ConfigOption.CISCO_EOX_PRODUCT_BLACKLIST_REGEX: "",
-            ConfigOption.GLOBAL_INTERNAL_PRODUCT_ID_LABEL: "Internal Product ID",
-            ConfigOption.CISCO_EOX_WAIT_TIME: "5",
-            ConfigOption.CISCO_EOX_CRAWLER_LAST_EXECUTION_TIME: None,
-            ConfigOption.CISCO_EOX_CRAWLER_LAST_EXECUTION_RESULT: None,
-            ConfigOption.STAT_AMOUNT_OF_PRODUCT_CHECKS: "0",
-            ConfigOption.STAT_AMOUNT_OF_UNIQUE_PRODUCT_CHECK_ENTRIES: "0"
-        }
-        for key, value in expected_defaults.items():
+        for key, value in AppSettings.DEFAULT_CONFIG_OPTIONS.items():
             if not ConfigOption.objects.filter(key=key).exists():
                 co = ConfigOption.objects.create(key=key)
                 co.value = value
@@ -244,20 +245,38 @@ class AppSettings:
         co.save()
         self._rebuild_config_cache()
 
-    def get_cisco_eox_api_sync_wait_time(self):
+    def get_cisco_api_calls_per_second(self):
         """
-        get the amount of seconds to wait between each API call
+        get the maximum amount of Cisco API calls per second (shared by all workers)
         :return:
         """
-        return self._config_options[ConfigOption.CISCO_EOX_WAIT_TIME]
+        return self._config_options[ConfigOption.CISCO_API_CALLS_PER_SECOND]
 
-    def set_cisco_eox_api_sync_wait_time(self, value):
+    def set_cisco_api_calls_per_second(self, value):
         """
-        set the Cisco EoX API timeout
+        set the maximum amount of Cisco API calls per second
         :param value:
         :return:
         """
-        co, _ = ConfigOption.objects.get_or_create(key=ConfigOption.CISCO_EOX_WAIT_TIME)
+        co, _ = ConfigOption.objects.get_or_create(key=ConfigOption.CISCO_API_CALLS_PER_SECOND)
+        co.value = value
+        co.save()
+        self._rebuild_config_cache()
+
+    def get_cisco_api_calls_per_day(self):
+        """
+        get the maximum amount of Cisco API calls per day (shared by all workers)
+        :return:
+        """
+        return self._config_options[ConfigOption.CISCO_API_CALLS_PER_DAY]
+
+    def set_cisco_api_calls_per_day(self, value):
+        """
+        set the maximum amount of Cisco API calls per day
+        :param value:
+        :return:
+        """
+        co, _ = ConfigOption.objects.get_or_create(key=ConfigOption.CISCO_API_CALLS_PER_DAY)
         co.value = value
         co.save()
         self._rebuild_config_cache()
@@ -0,0 +1,20 @@
+import datetime
+import logging
+from django.conf import settings
+from django.utils.timezone import now
+from app.config.models import SyncRun, ImportRun
+from django_project.celery import app
+
+logger = logging.getLogger("productdb")
+
+
+@app.task(name="config.delete_expired_result_runs")
+def delete_expired_result_runs():
+    """
+    delete the SyncRuns and ImportRuns without Notification Message, that are older than the task results
+    (CELERY_TASK_RESULT_EXPIRES), the runs of a Notification Message are deleted with the message
+    """
+    expired = now() - datetime.timedelta(seconds=settings.CELERY_TASK_RESULT_EXPIRES)
+    for model in [SyncRun, ImportRun]:
+        deleted, _ = model.objects.filter(notification__isnull=True, started__lt=expired).delete()
+        logger.info("deleted %d expired %s objects (including the items)" % (deleted, model.__name__))
@@ -53,39 +53,41 @@ class TestSettingsForm:
         assert form.is_valid() is True
         assert form.cleaned_data["internal_product_id_label"] == test_internal_product_id
 
-    def test_form_cisco_eox_api_wait_time(self):
+    def test_form_cisco_api_rate_limit(self):
         # test with only a single invalid entry
         data = {
-            "eox_api_wait_time": "Test"
+            "cisco_api_calls_per_second": "Test"
         }
         form = SettingsForm(data=data)
         assert form.is_valid() is False
-        assert "eox_api_wait_time" in form.errors
-        assert "Enter a whole number." in form.errors["eox_api_wait_time"]
+        assert "cisco_api_calls_per_second" in form.errors
+        assert "Enter a whole number." in form.errors["cisco_api_calls_per_second"]
 
         data = {
-            "eox_api_wait_time": "90"
+            "cisco_api_calls_per_second": "200"
         }
         form = SettingsForm(data=data)
         assert form.is_valid() is False
-        assert "eox_api_wait_time" in form.errors
-        assert "Ensure this value is less than or equal to 60." in form.errors["eox_api_wait_time"]
+        assert "cisco_api_calls_per_second" in form.errors
+        assert "Ensure this value is less than or equal to 100." in form.errors["cisco_api_calls_per_second"]
 
         data = {
-            "eox_api_wait_time": "-20"
+            "cisco_api_calls_per_day": "-20"
         }
         form = SettingsForm(data=data)
         assert form.is_valid() is False
-        assert "eox_api_wait_time" in form.errors
-        assert "Ensure this value is greater than or equal to 1." in form.errors["eox_api_wait_time"]
+        assert "cisco_api_calls_per_day" in form.errors
+        assert "Ensure this value is greater than or equal to 1." in form.errors["cisco_api_calls_per_day"]
 
         # test with valid entry
         data = {
-            "eox_api_wait_time": "15"
+            "cisco_api_calls_per_second": "10",
+            "cisco_api_calls_per_day": "5000"
         }
         form = SettingsForm(data=data)
         assert form.is_valid() is True
-        assert form.cleaned_data["eox_api_wait_time"] == 15
+        assert form.cleaned_data["cisco_api_calls_per_second"] == 10
+        assert form.cleaned_data["cisco_api_calls_per_day"] == 5000
 
     def test_form_api_blacklist_entries(self):
         # test with only a single invalid entry
@@ -5,7 +5,7 @@ import pytest
 from django.core.exceptions import ValidationError
 from mixer.backend.django import mixer
 from app.config import models
-from app.config.models import ConfigOption
+from app.config.models import ConfigOption, SyncRun, SyncRunItem, ImportRun, NotificationMessage
 
 pytestmark = pytest.mark.django_db
 
@@ -107,3 +107,45 @@ class TestConfigOptionModel:
             ConfigOption.objects.create(key="test")
 
         assert exinfo.match("key': \['Config option with this Key already exists")
+
+
+class TestResultRunModels:
+    def test_add_items_in_bulk(self, monkeypatch):
+        monkeypatch.setattr(SyncRun, "ITEM_BATCH_SIZE", 10)
+        sync_run = SyncRun.objects.create(task_id="my_task_id")
+
+        for i in range(0, 15):
+            sync_run.add_item("message %d" % i, key="Product %d" % i)
+        sync_run.add_item("update failed", key="Product X", status=NotificationMessage.MESSAGE_ERROR)
+
+        assert sync_run.items.count() == 10, "the pending items are written if the batch size is reached"
+
+        sync_run.finish()
+
+        assert sync_run.finished is not None
+        assert sync_run.items.count() == 16
+        assert list(sync_run.items.values_list("key", flat=True)[:2]) == ["Product 0", "Product 1"]
+        assert sync_run.get_item_counts() == {
+            NotificationMessage.MESSAGE_INFO: 15,
+            NotificationMessage.MESSAGE_ERROR: 1
+        }
+
+    def test_notification_message_result_run(self):
+        nm = mixer.blend("config.NotificationMessage")
+        assert nm.get_result_run() is None
+
+        import_run = ImportRun.objects.create()
+        import_run.add_item("product <code>Product A</code> created")
+        import_run.finish(notification=nm)
+
+        nm = NotificationMessage.objects.get(id=nm.id)
+        assert nm.get_result_run() == import_run
+
+        sync_run = SyncRun.objects.create()
+        sync_run.add_item("Product record ignored", key="Product A")
+        sync_run.finish(notification=mixer.blend("config.NotificationMessage"))
+
+        assert SyncRunItem.objects.count() == 1
+        sync_run.notification.delete()
+        assert SyncRun.objects.count() == 0, "the results are deleted with the Notification Message"
+        assert SyncRunItem.objects.count() == 0
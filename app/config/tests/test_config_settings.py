@@ -23,11 +23,26 @@ def test_config_options_cache():
     assert type(cache.get(AppSettings.CONFIG_OPTIONS_DICT_CACHE_KEY)) is dict
 
 
+def test_config_options_cache_of_previous_version():
+    # the cached dictionary of a previous version doesn't contain the rate limit options
+    AppSettings()
+    config_options = cache.get(AppSettings.CONFIG_OPTIONS_DICT_CACHE_KEY)
+    del config_options[ConfigOption.CISCO_API_CALLS_PER_SECOND]
+    del config_options[ConfigOption.CISCO_API_CALLS_PER_DAY]
+    config_options["cisco_eox.wait_time_between_queries"] = "5"
+    cache.set(AppSettings.CONFIG_OPTIONS_DICT_CACHE_KEY, config_options, timeout=None)
+
+    settings = AppSettings()
+
+    assert settings.get_cisco_api_calls_per_second() == "5"
+    assert settings.get_cisco_api_calls_per_day() == "5000"
+
+
 class TestConfigSettings:
     def test_create_default_config(self):
         # default configuration is created on object initialization
         AppSettings()
-        assert ConfigOption.objects.count() == 14
+        assert ConfigOption.objects.count() == 15
 
     def test_login_only_mode_configuration(self):
         # create new AppSettings object and create defaults
@@ -189,19 +204,19 @@ class TestConfigSettings:
 
         assert value == test_internal_product_label
 
-    def test_cisco_eox_wait_time(self):
+    def test_cisco_api_rate_limit(self):
         settings = AppSettings()
 
         # get value
-        value = settings.get_cisco_eox_api_sync_wait_time()
-        assert value == "5"
+        assert settings.get_cisco_api_calls_per_second() == "5"
+        assert settings.get_cisco_api_calls_per_day() == "5000"
 
         # set values
-        test_cisco_eox_wait_time = "10"
-        settings.set_cisco_eox_api_sync_wait_time(test_cisco_eox_wait_time)
-        value = settings.get_cisco_eox_api_sync_wait_time()
+        settings.set_cisco_api_calls_per_second("10")
+        settings.set_cisco_api_calls_per_day("1000")
 
-        assert value == test_cisco_eox_wait_time
+        assert settings.get_cisco_api_calls_per_second() == "10"
+        assert settings.get_cisco_api_calls_per_day() == "1000"
 
     def test_statistics_counter(self):
         settings = AppSettings()
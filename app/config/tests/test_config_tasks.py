@@ -0,0 +1,31 @@
+"""
+Test suite for the config.tasks module
+"""
+import datetime
+import pytest
+from mixer.backend.django import mixer
+from app.config import tasks
+from app.config.models import SyncRun, ImportRun, ImportRunItem
+
+pytestmark = pytest.mark.django_db
+
+
+def test_delete_expired_result_runs(settings):
+    settings.CELERY_TASK_RESULT_EXPIRES = 3600
+    expired_run = ImportRun.objects.create()
+    expired_run.add_item("expired message")
+    expired_run.finish()
+    ImportRun.objects.filter(id=expired_run.id).update(started=expired_run.started - datetime.timedelta(hours=2))
+
+    run_with_notification = SyncRun.objects.create()
+    run_with_notification.finish(notification=mixer.blend("config.NotificationMessage"))
+    SyncRun.objects.filter(id=run_with_notification.id).update(
+        started=run_with_notification.started - datetime.timedelta(hours=2)
+    )
+    current_run = ImportRun.objects.create()
+
+    tasks.delete_expired_result_runs()
+
+    assert list(ImportRun.objects.values_list("id", flat=True)) == [current_run.id]
+    assert ImportRunItem.objects.count() == 0
+    assert SyncRun.objects.count() == 1, "runs of a Notification Message are deleted with the message"
@@ -13,7 +13,7 @@ from django.test import RequestFactory
 from mixer.backend.django import mixer
 from django_project import celery
 from app.config import views
-from app.config.models import NotificationMessage, TextBlock
+from app.config.models import NotificationMessage, TextBlock, ImportRun
 from app.config import utils
 from app.config.settings import AppSettings
 
@@ -513,6 +513,32 @@ class TestServerMessagesDetail:
 
         assert response.status_code == 200, "Should be callable"
 
+    def test_paged_result_items(self, monkeypatch):
+        monkeypatch.setattr(views, "NOTIFICATION_RESULT_ITEMS_PER_PAGE", 2)
+        nm = mixer.blend("config.NotificationMessage")
+        import_run = ImportRun.objects.create()
+        for product_id in ["Product A", "Product B", "Product C"]:
+            import_run.add_item("product <code>%s</code> created" % product_id)
+        import_run.finish(notification=nm)
+
+        url = reverse(self.URL_NAME, kwargs={"message_id": nm.id})
+        request = RequestFactory().get(url + "?page=2")
+        request.user = mixer.blend("auth.User", is_superuser=False, is_staff=False)
+        response = views.server_message_detail(request, nm.id)
+
+        assert response.status_code == 200, "Should be callable"
+        page = response.content.decode()
+        assert "product <code>Product C</code> created" in page
+        assert "product <code>Product A</code> created" not in page, "only the items of the second page are shown"
+
+        # invalid page numbers show the first or the last page
+        request = RequestFactory().get(url + "?page=invalid")
+        request.user = mixer.blend("auth.User", is_superuser=False, is_staff=False)
+        response = views.server_message_detail(request, nm.id)
+
+        assert response.status_code == 200, "Should be callable"
+        assert "product <code>Product A</code> created" in response.content.decode()
+
     def test_404(self):
         url = reverse(self.URL_NAME, kwargs={"message_id": 9999})
         request = RequestFactory().get(url)
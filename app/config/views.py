@@ -3,6 +3,7 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.core.cache import cache
+from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.core.urlresolvers import reverse
 from django.http import Http404
 from django.shortcuts import resolve_url, redirect, render
@@ -14,6 +15,9 @@ from app.config import utils
 from app.productdb.utils import login_required_if_login_only_mode
 from django_project import celery
 
+# amount of result items per page in the Notification Message detail view
+NOTIFICATION_RESULT_ITEMS_PER_PAGE = 100
+
 
 @login_required()
 @permission_required('is_superuser', raise_exception=True)
@@ -144,7 +148,8 @@ def change_configuration(request):
                 app_config.set_auto_create_new_products(False)
                 app_config.set_cisco_eox_api_queries("")
                 app_config.set_product_blacklist_regex("")
-                app_config.set_cisco_eox_api_sync_wait_time("5")
+                app_config.set_cisco_api_calls_per_second("5")
+                app_config.set_cisco_api_calls_per_day("5000")
 
             else:
                 app_config.set_cisco_api_enabled(api_enabled)
@@ -161,8 +166,10 @@ def change_configuration(request):
                 app_config.set_auto_create_new_products(form.cleaned_data["eox_auto_sync_auto_create_elements"])
                 app_config.set_cisco_eox_api_queries(form.cleaned_data["eox_api_queries"])
                 app_config.set_product_blacklist_regex(form.cleaned_data["eox_api_blacklist"])
-                if form.cleaned_data["eox_api_wait_time"]:
-                    app_config.set_cisco_eox_api_sync_wait_time(form.cleaned_data["eox_api_wait_time"])
+                if form.cleaned_data["cisco_api_calls_per_second"]:
+                    app_config.set_cisco_api_calls_per_second(form.cleaned_data["cisco_api_calls_per_second"])
+                if form.cleaned_data["cisco_api_calls_per_day"]:
+                    app_config.set_cisco_api_calls_per_day(form.cleaned_data["cisco_api_calls_per_day"])
 
                 if client_id != "PlsChgMe":
                     result = utils.check_cisco_eox_api_access(
@@ -203,7 +210,8 @@ def change_configuration(request):
         form.fields['eox_auto_sync_auto_create_elements'].initial = app_config.is_auto_create_new_products()
         form.fields['eox_api_queries'].initial = app_config.get_cisco_eox_api_queries()
         form.fields['eox_api_blacklist'].initial = app_config.get_product_blacklist_regex()
-        form.fields['eox_api_wait_time'].initial = app_config.get_cisco_eox_api_sync_wait_time()
+        form.fields['cisco_api_calls_per_second'].initial = app_config.get_cisco_api_calls_per_second()
+        form.fields['cisco_api_calls_per_day'].initial = app_config.get_cisco_api_calls_per_day()
         form.fields['homepage_text_before'].initial = hp_content_before.html_content
         form.fields['homepage_text_after'].initial = hp_content_after.html_content
 
@@ -237,11 +245,29 @@ def server_message_detail(request, message_id):
         return redirect('%s?next=%s' % (settings.LOGIN_URL, request.path))
 
     try:
-        context = {
-            "message": NotificationMessage.objects.get(id=message_id)
-        }
-
-        return render(request, "config/notification-detail.html", context=context)
+        message = NotificationMessage.objects.get(id=message_id)
 
     except:
         raise Http404()
+
+    context = {
+        "message": message
+    }
+
+    # the results of a synchronization or import are paged from the database
+    result_run = message.get_result_run()
+    if result_run:
+        paginator = Paginator(result_run.items.all(), NOTIFICATION_RESULT_ITEMS_PER_PAGE)
+        try:
+            result_items = paginator.page(request.GET.get("page", 1))
+
+        except PageNotAnInteger:
+            result_items = paginator.page(1)
+
+        except EmptyPage:
+            result_items = paginator.page(paginator.num_pages)
+
+        context["result_run"] = result_run
+        context["result_items"] = result_items
+
+    return render(request, "config/notification-detail.html", context=context)
@@ -0,0 +1,97 @@
+"""
+helper functions for set-based write operations on the Product Database models (used by the import and
+synchronization jobs that process large amounts of data)
+"""
+import logging
+from cacheops import invalidate_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import OuterRef, Subquery
+from psycopg2.extras import execute_values
+from app.productdb import imported_files
+from app.productdb.models import Product, ProductMigrationOption
+
+logger = logging.getLogger("productdb")
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def chunks(values, size=DEFAULT_BATCH_SIZE):
+    """
+    split the given list into lists with the given maximum size
+    """
+    for index in range(0, len(values), size):
+        yield values[index:index + size]
+
+
+def bulk_update_objects(model, objects, field_names, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    update the given fields of the model objects using a single UPDATE ... FROM (VALUES ...) statement per batch
+    (the objects are not validated, no signals are sent)
+
+    :param model: model class of the objects
+    :param objects: list of model instances (must be already part of the database)
+    :param field_names: list of field names that should be updated
+    :param batch_size: amount of rows per statement
+    :return: amount of updated objects
+    """
+    if len(objects) == 0 or len(field_names) == 0:
+        return 0
+
+    qn = connection.ops.quote_name
+    pk_field = model._meta.pk
+    fields = [model._meta.get_field(name) for name in field_names]
+
+    set_statement = ", ".join([
+        "%s = v.%s::%s" % (qn(f.column), qn(f.column), f.db_type(connection)) for f in fields
+    ])
+    value_columns = ", ".join([qn(f.column) for f in [pk_field] + fields])
+    sql = "UPDATE %s AS t SET %s FROM (VALUES %%s) AS v (%s) WHERE t.%s = v.%s" % (
+        qn(model._meta.db_table),
+        set_statement,
+        value_columns,
+        qn(pk_field.column),
+        qn(pk_field.column)
+    )
+
+    with connection.cursor() as cursor:
+        for batch in chunks(objects, batch_size):
+            rows = []
+            for obj in batch:
+                row = [pk_field.get_db_prep_save(obj.pk, connection)]
+                row += [f.get_db_prep_save(getattr(obj, f.attname), connection) for f in fields]
+                rows.append(row)
+
+            # the raw psycopg2 cursor is required for the execute_values helper
+            execute_values(cursor.cursor, sql, rows, page_size=batch_size)
+
+    return len(objects)
+
+
+def update_replacement_db_product_relations(product_ids):
+    """
+    set based replacement for the post_save signal of the Product model: link all Product Migration Options that
+    reference one of the given Product IDs as replacement to the Product in the database
+    """
+    if len(product_ids) == 0:
+        return 0
+
+    return ProductMigrationOption.objects.filter(
+        replacement_product_id__in=product_ids
+    ).update(
+        replacement_db_product=Subquery(
+            Product.objects.filter(product_id=OuterRef("replacement_product_id")).values("id")[:1]
+        )
+    )
+
+
+def invalidate_product_caches():
+    """
+    invalidate all cache values that are related to the Product model (required after bulk operations, because no
+    signals are sent and cacheops cannot track the changes)
+    """
+    invalidate_model(Product)
+    invalidate_model(ProductMigrationOption)
+    cache.delete("PDB_HOMEPAGE_CONTEXT")
+    imported_files.invalidate_imported_files()
+    cache.delete(Product.LC_STATE_SYNC_STATE_CACHE_KEY)
@@ -0,0 +1,291 @@
+"""
+import of large price lists using the PostgreSQL COPY command: the normalized rows of the file are streamed into a
+temporary staging table and merged into the product table using set-based statements (no revisions are created)
+"""
+import io
+import logging
+import pandas as pd
+from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import connection, transaction
+from app.productdb import bulk_operations
+from app.productdb.excel_import import ProductsExcelImporter, IMPORT_ERROR_COLUMN, INVALID_TYPE_COLUMN_SUFFIX
+from app.productdb.models import Product, ProductGroup, Vendor
+
+logger = logging.getLogger("productdb")
+
+STAGING_TABLE = "productdb_product_staging"
+
+# column of the staging table - column of the normalized data frame
+STAGING_COLUMNS = [
+    ("product_id", "product id", "varchar(512)"),
+    ("description", "description", "text"),
+    ("list_price", "list price", "double precision"),
+    ("currency", "currency", "varchar(16)"),
+    ("vendor", "vendor", "varchar(128)"),
+    ("product_group", "product group", "varchar(512)"),
+    ("eol_reference_url", "eol note url", "varchar(200)"),
+    ("eol_reference_number", "eol note url (friendly name)", "varchar(2048)"),
+    ("internal_product_id", "internal product id", "varchar(255)"),
+] + [
+    (field_name, column_name, "date") for field_name, column_name in ProductsExcelImporter.DATETIME_COLUMN_MAP.items()
+]
+
+# product fields that are taken from the file if a value is provided (otherwise the current value is kept)
+MERGED_FIELDS = [
+    "description",
+    "eol_reference_url",
+    "eol_reference_number",
+    "internal_product_id",
+] + list(ProductsExcelImporter.DATETIME_COLUMN_MAP.keys())
+
+
+class ProductsCopyImporter(ProductsExcelImporter):
+    """
+    Importer for large price lists (e.g. a nightly refresh of the entire catalog). The file format and the
+    normalization of the values is the same as in the ProductsExcelImporter, but the rows are written to a staging
+    table using COPY and merged into the product table with a single INSERT ... ON CONFLICT statement. The update and
+    list price timestamps are maintained in the same way as in the Product.save() method. Vendors and Product Groups
+    are resolved using joins, missing Product Groups are created.
+
+    Rows with invalid values are skipped completely (the row by row import applies the valid values of a row) and if a
+    Product ID is used multiple times in the file, the last row is used. No revisions are created.
+    """
+    created_products = 0
+    updated_products = 0
+    unchanged_products = 0
+
+    def import_to_database(self, status_callback=None, update_only=False, bulk_mode=False):
+        """
+        Import products from the associated excel sheet to the database
+        :param status_callback: optional status message callback function
+        :param update_only: don't create new entries
+        :param bulk_mode: ignored, the import is always set-based
+        """
+        self.valid_imported_products = 0
+        self.invalid_products = 0
+        self.processed_entries = 0
+        self.created_products = 0
+        self.updated_products = 0
+        self.unchanged_products = 0
+        self.import_result_entries.clear()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("CREATE TEMPORARY TABLE %s (row_number bigint, %s) ON COMMIT DROP" % (
+                STAGING_TABLE,
+                ", ".join(["%s %s" % (column, db_type) for column, _, db_type in STAGING_COLUMNS])
+            ))
+
+            for data_frame in self._iter_data_frames():
+                self._update_status(status_callback, self.processed_entries + 1)
+
+                staging_data_frame = self._create_staging_data_frame(self._normalize_data_frame(data_frame))
+                if staging_data_frame is None:
+                    # too many errors, nothing is written to the database
+                    return
+
+                self._copy_to_staging_table(cursor, staging_data_frame)
+                self.processed_entries += len(data_frame.index)
+
+            if status_callback:
+                status_callback("Merge the Products into the database...")
+
+            if self._report_unknown_vendors(cursor):
+                return
+
+            self._create_missing_product_groups(cursor)
+            created_product_ids = self._merge_products(cursor, update_only)
+
+            bulk_operations.update_replacement_db_product_relations(created_product_ids)
+
+        bulk_operations.invalidate_product_caches()
+
+        self.valid_imported_products = self.created_products + self.updated_products
+        self._add_result_message(
+            "%d Products created, %d Products updated, %d Products unchanged" % (
+                self.created_products,
+                self.updated_products,
+                self.unchanged_products
+            )
+        )
+
+    def _create_staging_data_frame(self, normalized_data_frame):
+        """
+        verify the normalized values and create a data frame with the columns of the staging table, invalid rows are
+        reported and dropped
+        :return: data frame for the staging table or None, if there are too many errors in the file
+        """
+        product_ids = normalized_data_frame["product id"]
+        errors = normalized_data_frame[IMPORT_ERROR_COLUMN].copy()
+
+        invalid = errors.isnull() & (normalized_data_frame["list price"] < 0)
+        errors[invalid] = "cannot set list price for <code>" + product_ids[invalid] + "</code> (list price must be " \
+                                                                                      "greater or equal to zero)"
+
+        for _, column_name, _ in STAGING_COLUMNS:
+            type_column = column_name + INVALID_TYPE_COLUMN_SUFFIX
+            if type_column in normalized_data_frame.columns:
+                invalid = errors.isnull() & normalized_data_frame[type_column].notnull()
+                errors[invalid] = "cannot set " + column_name + " for <code>" + product_ids[invalid] + \
+                                  "</code> (invalid type " + normalized_data_frame[type_column][invalid] + ")"
+
+        column_name = "eol note url"
+        if column_name in normalized_data_frame.columns:
+            # the URL is stripped as in the Product.save() method
+            urls = normalized_data_frame[column_name]
+            urls = urls.where(urls.isnull(), urls[urls.notnull()].astype(str).str.strip())
+            normalized_data_frame[column_name] = urls
+
+            validate_url = URLValidator()
+            for index, url in urls[urls.notnull() & errors.isnull()].items():
+                try:
+                    validate_url(url)
+
+                except ValidationError:
+                    errors[index] = "cannot set %s for <code>%s</code> (invalid URL)" % (column_name,
+                                                                                           product_ids[index])
+
+        for product_id, msg in zip(product_ids[errors.notnull()], errors[errors.notnull()]):
+            if self._add_faulty_entry(product_id, msg):
+                return None
+
+        staging_data_frame = pd.DataFrame(index=normalized_data_frame.index)
+        staging_data_frame["row_number"] = normalized_data_frame.index
+        for column, column_name, _ in STAGING_COLUMNS:
+            if column_name in normalized_data_frame.columns:
+                staging_data_frame[column] = normalized_data_frame[column_name]
+
+            else:
+                staging_data_frame[column] = None
+
+        # the currency is only applied together with the list price
+        staging_data_frame["currency"] = staging_data_frame["currency"].where(
+            staging_data_frame["list_price"].notnull(), None
+        )
+
+        return staging_data_frame[errors.isnull().values]
+
+    @staticmethod
+    def _copy_to_staging_table(cursor, staging_data_frame):
+        """write the data frame to the staging table using COPY (empty values are NULL)"""
+        data = io.StringIO()
+        staging_data_frame.to_csv(data, header=False, index=False, na_rep="")
+        data.seek(0)
+
+        # the raw psycopg2 cursor is required for the COPY command
+        cursor.cursor.copy_expert(
+            "COPY %s (%s) FROM STDIN WITH (FORMAT csv)" % (STAGING_TABLE, ", ".join(staging_data_frame.columns)),
+            data
+        )
+
+    def _report_unknown_vendors(self, cursor):
+        """
+        report and remove the rows with unknown vendor names
+        :return: True, if there are too many errors in the file
+        """
+        cursor.execute(
+            "DELETE FROM {staging} AS s WHERE s.vendor IS NOT NULL AND NOT EXISTS ("
+            "SELECT 1 FROM {vendor} AS v WHERE v.name = s.vendor"
+            ") RETURNING s.product_id, s.vendor".format(staging=STAGING_TABLE, vendor=Vendor._meta.db_table)
+        )
+        for product_id, vendor_name in cursor.fetchall():
+            msg = "cannot set vendor for <code>%s</code> (Vendor <strong>%s</strong> doesn't exist)" % (
+                product_id, vendor_name
+            )
+            if self._add_faulty_entry(product_id, msg):
+                return True
+
+        return False
+
+    @staticmethod
+    def _create_missing_product_groups(cursor):
+        """create the Product Groups of the file that are not part of the database"""
+        cursor.execute(
+            "INSERT INTO {product_group} (name, vendor_id) "
+            "SELECT DISTINCT s.product_group, COALESCE(v.id, p.vendor_id, 0) FROM {staging} AS s "
+            "LEFT JOIN {product} AS p ON p.product_id = s.product_id "
+            "LEFT JOIN {vendor} AS v ON v.name = s.vendor "
+            "WHERE s.product_group IS NOT NULL "
+            "ON CONFLICT (name, vendor_id) DO NOTHING".format(
+                product_group=ProductGroup._meta.db_table,
+                staging=STAGING_TABLE,
+                product=Product._meta.db_table,
+                vendor=Vendor._meta.db_table
+            )
+        )
+
+    def _merge_products(self, cursor, update_only=False):
+        """
+        merge the staging table into the product table, only new and changed products are written
+        :return: list of the Product IDs that were created
+        """
+        today = datetime.today().date()
+        values = [
+            "COALESCE(s.%s, p.%s) AS %s" % (field, field, field) for field in MERGED_FIELDS
+        ] + [
+            "COALESCE(s.list_price, p.list_price) AS list_price",
+            "COALESCE(s.currency, p.currency, 'USD') AS currency",
+            "COALESCE(v.id, p.vendor_id, 0) AS vendor_id",
+            "COALESCE(pg.id, p.product_group_id) AS product_group_id",
+        ]
+        fields = MERGED_FIELDS + ["list_price", "currency", "vendor_id", "product_group_id"]
+
+        changed_condition = "(%s) IS DISTINCT FROM (%s)" % (
+            ", ".join(["source.%s" % f for f in fields]),
+            ", ".join(["p.%s" % f for f in fields])
+        )
+        if update_only:
+            changed_condition = "source.current_id IS NOT NULL AND " + changed_condition
+
+        else:
+            changed_condition = "source.current_id IS NULL OR " + changed_condition
+
+        sql = (
+            "WITH source AS ("
+            "  SELECT DISTINCT ON (s.product_id) s.product_id, p.id AS current_id, {values} "
+            "  FROM {staging} AS s "
+            "  LEFT JOIN {product} AS p ON p.product_id = s.product_id "
+            "  LEFT JOIN {vendor} AS v ON v.name = s.vendor "
+            "  LEFT JOIN {product_group} AS pg ON pg.name = s.product_group "
+            "    AND pg.vendor_id = COALESCE(v.id, p.vendor_id, 0) "
+            "  ORDER BY s.product_id, s.row_number DESC"
+            "), changed AS ("
+            "  SELECT source.* FROM source LEFT JOIN {product} AS p ON p.id = source.current_id "
+            "  WHERE {changed_condition}"
+            ") "
+            "INSERT INTO {product} (product_id, {fields}, tags, lc_state_sync, update_timestamp, list_price_timestamp) "
+            "SELECT product_id, {fields}, '', FALSE, %(today)s, "
+            "  CASE WHEN list_price IS NULL THEN NULL ELSE %(today)s::date END "
+            "FROM changed "
+            "ON CONFLICT (product_id) DO UPDATE SET {update_fields}, "
+            "  update_timestamp = EXCLUDED.update_timestamp, import_fingerprint = NULL, eox_fingerprint = NULL, "
+            "  list_price_timestamp = CASE WHEN {product}.list_price IS DISTINCT FROM EXCLUDED.list_price "
+            "    THEN EXCLUDED.update_timestamp ELSE {product}.list_price_timestamp END "
+            "RETURNING product_id, (xmax = 0) AS created"
+        ).format(
+            values=", ".join(values),
+            staging=STAGING_TABLE,
+            product=Product._meta.db_table,
+            vendor=Vendor._meta.db_table,
+            product_group=ProductGroup._meta.db_table,
+            changed_condition=changed_condition,
+            fields=", ".join(fields),
+            update_fields=", ".join(["%s = EXCLUDED.%s" % (f, f) for f in fields])
+        )
+        cursor.execute(sql, {"today": today})
+        merged_products = cursor.fetchall()
+
+        created_product_ids = [product_id for product_id, created in merged_products if created]
+        self.created_products = len(created_product_ids)
+        self.updated_products = len(merged_products) - self.created_products
+
+        cursor.execute(
+            "SELECT COUNT(DISTINCT s.product_id) FROM {staging} AS s {join}".format(
+                staging=STAGING_TABLE,
+                join="JOIN %s AS p ON p.product_id = s.product_id" % Product._meta.db_table if update_only else ""
+            )
+        )
+        self.unchanged_products = cursor.fetchone()[0] - len(merged_products)
+
+        return created_product_ids
@@ -1,15 +1,40 @@
+import copy
 import datetime
+import hashlib
+import json
 import logging
+import os
+import tempfile
+import numpy as np
+import openpyxl
 import pandas as pd
+from collections import OrderedDict
+from zipfile import BadZipfile
+from django.conf import settings
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from openpyxl.utils.exceptions import InvalidFileException
 from reversion import revisions as reversion
 from xlrd import XLRDError
-from app.productdb.models import Product, CURRENCY_CHOICES, ProductGroup, ProductMigrationSource, ProductMigrationOption
+from app.productdb.models import Product, CURRENCY_CHOICES, ProductMigrationSource, ProductMigrationOption
 from app.productdb.models import Vendor
+from app.config.models import NotificationMessage
+from app.productdb import bulk_operations
+from app.productdb.lookup_cache import ImportLookupCache, LOOKUP_BATCH_SIZE
+from app.productdb.revisions import RevisionBatch, REVISION_PER_ROW, REVISION_PER_CHUNK
 
 logger = logging.getLogger("productdb")
 
+# column of the normalized data frame that contains the error message for the row (None if the row is valid)
+IMPORT_ERROR_COLUMN = "import error"
+
+# suffix for columns of the normalized data frame that contain the type name of values that cannot be converted
+INVALID_TYPE_COLUMN_SUFFIX = " (invalid type)"
+
+# suffix for the columns with the current values from the database (used by the dry-run)
+CURRENT_VALUE_COLUMN_SUFFIX = " (current)"
+
 
 class InvalidExcelFileFormat(Exception):
     """Exception thrown if there is an issue with the low level file format"""
@@ -21,9 +46,82 @@ class InvalidImportFormatException(Exception):
     pass
 
 
+class InvalidRowValueException(Exception):
+    """Exception thrown if a value of a row within the Excel file is invalid"""
+    pass
+
+
+class ImportDiff:
+    """
+    result of a dry-run of an import: the changes per entry (only created, changed and invalid entries) and a summary,
+    the changes of a field are stored as tuple of the current and the new value
+    """
+    CREATED = "created"
+    CHANGED = "changed"
+    UNCHANGED = "unchanged"
+    INVALID = "invalid"
+
+    def __init__(self, import_type, update_only=False, entries=None, summary=None):
+        self.import_type = import_type
+        self.update_only = update_only
+        self.entries = entries if entries is not None else []
+        self.summary = summary if summary is not None else OrderedDict()
+
+    @staticmethod
+    def to_value(value):
+        """convert the given value to a JSON serializable value (used to compare the values during the apply)"""
+        if value is None or (not isinstance(value, str) and pd.isnull(value)):
+            return None
+
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.strftime("%Y-%m-%d")
+
+        if isinstance(value, (float, np.floating)):
+            return float(value)
+
+        return str(value)
+
+    def add_entry(self, key, status, changes=None, message=None):
+        self.entries.append({
+            "key": key,
+            "status": status,
+            "changes": changes if changes is not None else OrderedDict(),
+            "message": message
+        })
+
+    def to_dict(self):
+        return {
+            "import_type": self.import_type,
+            "update_only": self.update_only,
+            "entries": self.entries,
+            "summary": self.summary
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["import_type"], data["update_only"], data["entries"], data["summary"])
+
+    def to_data_frame(self):
+        """one row per changed field, used for the download of the preview"""
+        rows = []
+        for entry in self.entries:
+            key = " / ".join(entry["key"]) if isinstance(entry["key"], list) else entry["key"]
+            if len(entry["changes"]) == 0:
+                rows.append([key, entry["status"], None, None, None, entry["message"]])
+
+            for field, (current_value, new_value) in entry["changes"].items():
+                rows.append([key, entry["status"], field, current_value, new_value, entry["message"]])
+
+        return pd.DataFrame(rows, columns=["key", "status", "field", "current value", "new value", "message"])
+
+
 class BaseExcelImporter:
     """
     Base class for the Excel Import
+
+    By default, the entire sheet is loaded into a single data frame. Large files (and CSV files) are read in streaming
+    mode: only the header row is read during the verification and the rows are loaded in chunks of
+    streaming_chunk_size rows during the import, therefore the memory consumption is independent of the file size.
     """
     sheetname = "products"
     required_keys = {"product id", "description", "list price", "vendor"}
@@ -34,12 +132,23 @@ class BaseExcelImporter:
     valid_file = False
     user_for_revision = None
     __wb_data_frame__ = None
-    import_result_messages = None
-
-    def __init__(self, path_to_excel_file=None, user_for_revision=None):
+    import_result_entries = None
+    datetime_columns = ()
+    streaming = False
+    streaming_chunk_size = 5000
+    streaming_min_file_size = 10 * 1024 * 1024
+    amount_of_rows_in_file = None
+
+    def __init__(self, path_to_excel_file=None, user_for_revision=None, streaming=None):
+        """
+        :param path_to_excel_file: path or file object of the Excel (or CSV) file
+        :param user_for_revision: user that is used for the revision tracking
+        :param streaming: read the file in chunks, if None, the streaming mode is used for CSV files and for files
+                          that are larger than streaming_min_file_size
+        """
         self.path_to_excel_file = path_to_excel_file
-        if self.import_result_messages is None:
-            self.import_result_messages = []
+        if self.import_result_entries is None:
+            self.import_result_entries = []
         if self.import_converter is None:
             self.import_converter = {}
         if self.drop_na_columns is None:
@@ -47,6 +156,50 @@ class BaseExcelImporter:
         if user_for_revision:
             self.user_for_revision = user_for_revision
 
+        if streaming is None:
+            self.streaming = self._is_csv_file() or self._get_file_size() > self.streaming_min_file_size
+
+        else:
+            self.streaming = streaming
+
+    @property
+    def import_result_messages(self):
+        """messages of the import result entries"""
+        return [message for _, _, message in self.import_result_entries]
+
+    def _add_result_message(self, message, product_id="", status=NotificationMessage.MESSAGE_INFO):
+        """
+        add an import result message with the Product ID and the status (NotificationMessage message type)
+        :return: index of the import result entry
+        """
+        self.import_result_entries.append((product_id, status, message))
+        return len(self.import_result_entries) - 1
+
+    def _get_file_name(self):
+        return str(getattr(self.path_to_excel_file, "name", self.path_to_excel_file))
+
+    def _get_file_size(self):
+        """size of the file in bytes (0 if the file is not found)"""
+        try:
+            if hasattr(self.path_to_excel_file, "size"):
+                return self.path_to_excel_file.size
+
+            elif os.path.isfile(self._get_file_name()):
+                return os.path.getsize(self._get_file_name())
+
+        except Exception:  # catch any exception
+            logger.debug("cannot determine the size of the file '%s'" % self._get_file_name(), exc_info=True)
+
+        return 0
+
+    def _is_csv_file(self):
+        return self._get_file_name().lower().endswith(".csv")
+
+    def _rewind_file(self):
+        """reset the position if a file object is used"""
+        if hasattr(self.path_to_excel_file, "seek"):
+            self.path_to_excel_file.seek(0)
+
     def _load_workbook(self):
         try:
             self.workbook = pd.ExcelFile(self.path_to_excel_file)
@@ -59,33 +212,231 @@ class BaseExcelImporter:
             logger.fatal("unable to read workbook at '%s'" % self.path_to_excel_file, exc_info=True)
             raise
 
+    def _load_read_only_workbook(self):
+        """open the workbook in read-only mode, the rows are loaded while iterating over the worksheet"""
+        self._rewind_file()
+        try:
+            return openpyxl.load_workbook(self.path_to_excel_file, read_only=True, data_only=True)
+
+        except (InvalidFileException, BadZipfile, KeyError) as ex:
+            logger.error("invalid format of excel file '%s' (%s)" % (self.path_to_excel_file, ex), exc_info=True)
+            raise InvalidExcelFileFormat("invalid file format") from ex
+
+        except Exception:
+            logger.fatal("unable to read workbook at '%s'" % self.path_to_excel_file, exc_info=True)
+            raise
+
+    def _prepare_data_frame(self, data_frame, apply_converters=False):
+        """
+        normalize the column names (all lowercase, strip whitespace if any) and drop the rows with empty values in
+        the drop_na_columns
+        """
+        data_frame.columns = [x.lower() for x in data_frame.columns]
+        data_frame.columns = [x.strip() for x in data_frame.columns]
+
+        if apply_converters:
+            # convert all values that are not empty
+            for row_key, converter in self.import_converter.items():
+                if row_key in data_frame.columns:
+                    values = data_frame[row_key]
+                    data_frame[row_key] = values.where(values.isnull(), values[values.notnull()].map(converter))
+
+        # drop NA columns if defined
+        if len(self.drop_na_columns) != 0:
+            data_frame.dropna(axis=0, subset=self.drop_na_columns, inplace=True)
+
+        return data_frame
+
     def _create_data_frame(self):
-        self.__wb_data_frame__ = self.workbook.parse(
+        self.__wb_data_frame__ = self._prepare_data_frame(self.workbook.parse(
             self.sheetname, converters=self.import_converter
+        ))
+
+    def _read_header(self):
+        """
+        read the sheet names and the header row of the file (streaming mode)
+        :return: tuple with the list of sheet names and the column names
+        """
+        if self._is_csv_file():
+            # a CSV file contains only a single sheet
+            self._rewind_file()
+            try:
+                header = list(pd.read_csv(self.path_to_excel_file, nrows=1, dtype=str).columns)
+
+            except Exception as ex:
+                logger.error("invalid format of CSV file '%s' (%s)" % (self.path_to_excel_file, ex), exc_info=True)
+                raise InvalidExcelFileFormat("invalid file format") from ex
+
+            return [self.sheetname], header
+
+        workbook = self._load_read_only_workbook()
+        try:
+            if self.sheetname not in workbook.sheetnames:
+                return workbook.sheetnames, []
+
+            header = []
+            for row in workbook[self.sheetname].iter_rows(max_row=1):
+                header = ["" if cell.value is None else str(cell.value) for cell in row]
+
+            return workbook.sheetnames, header
+
+        finally:
+            workbook.close()
+
+    def _iter_csv_data_frames(self):
+        """read the CSV file in chunks, all values are read as text"""
+        self._rewind_file()
+        reader = pd.read_csv(
+            self.path_to_excel_file,
+            chunksize=self.streaming_chunk_size,
+            dtype=str,
+            keep_default_na=False,
+            na_values=[""]
         )
+        for data_frame in reader:
+            data_frame = self._prepare_data_frame(data_frame)
 
-        # normalize the column names (all lowercase, strip whitespace if any)
-        self.__wb_data_frame__.columns = [x.lower() for x in self.__wb_data_frame__.columns]
-        self.__wb_data_frame__.columns = [x.strip() for x in self.__wb_data_frame__.columns]
+            # dates are provided as text
+            for row_key in self.datetime_columns:
+                if row_key in data_frame.columns:
+                    dates = pd.to_datetime(data_frame[row_key], errors="coerce")
+                    data_frame[row_key] = data_frame[row_key].where(dates.isnull(), dates)
 
-        # drop NA columns if defined
-        if len(self.drop_na_columns) != 0:
-            self.__wb_data_frame__.dropna(axis=0, subset=self.drop_na_columns, inplace=True)
+            yield data_frame
+
+    def _create_chunk_data_frame(self, rows, header, row_position):
+        data_frame = pd.DataFrame(rows, columns=header, index=range(row_position, row_position + len(rows)))
+        return self._prepare_data_frame(data_frame, apply_converters=True)
+
+    def _iter_xlsx_data_frames(self):
+        """read the worksheet in chunks using a read-only workbook"""
+        workbook = self._load_read_only_workbook()
+        try:
+            worksheet = workbook[self.sheetname]
+            if worksheet.max_row:
+                self.amount_of_rows_in_file = worksheet.max_row - 1
+
+            header = None
+            rows = []
+            row_position = 0
+            for row in worksheet.iter_rows():
+                values = [cell.value for cell in row]
+                if header is None:
+                    header = ["unnamed: %d" % i if v is None else str(v) for i, v in enumerate(values)]
+                    continue
+
+                # the rows of a read-only worksheet may be shorter than the header
+                rows.append((values + [None] * len(header))[:len(header)])
+                if len(rows) == self.streaming_chunk_size:
+                    yield self._create_chunk_data_frame(rows, header, row_position)
+                    row_position += len(rows)
+                    rows = []
+
+            if len(rows) != 0:
+                yield self._create_chunk_data_frame(rows, header, row_position)
+
+        finally:
+            workbook.close()
+
+    def _iter_sheet_data_frames(self):
+        if self.streaming and self.__wb_data_frame__ is None:
+            if self._is_csv_file():
+                yield from self._iter_csv_data_frames()
+
+            else:
+                yield from self._iter_xlsx_data_frames()
+
+        else:
+            if self.workbook is None:
+                self._load_workbook()
+            if self.__wb_data_frame__ is None:
+                self._create_data_frame()
+
+            self.amount_of_rows_in_file = len(self.__wb_data_frame__.index)
+            yield self.__wb_data_frame__
+
+    def _iter_data_frames(self):
+        """
+        yields the content of the sheet as data frames, a single data frame with all rows or chunks of
+        streaming_chunk_size rows if the streaming mode is used. The index of the data frames is the position of the
+        row within the sheet.
+        """
+        yield from self._iter_sheet_data_frames()
+
+    @property
+    def amount_of_entries(self):
+        """amount of rows that are processed (None if unknown)"""
+        return self.amount_of_rows_in_file
+
+    def _update_status(self, status_callback, current_entry):
+        """
+        report the progress to the status callback (if defined), the callback is called with the status message and
+        the processed and total amount of entries as keyword arguments (e.g. a ProgressReporter, which throttles the
+        updates)
+        """
+        if status_callback:
+            status_callback(self._status_message(current_entry), processed=current_entry, total=self.amount_of_entries)
+
+    def _status_message(self, current_entry):
+        """status message for the progress of the import (the amount of rows may be unknown in streaming mode)"""
+        if self.amount_of_entries is None:
+            return "Process entry <strong>%s</strong>..." % current_entry
+
+        return "Process entry <strong>%s</strong> of " \
+               "<strong>%s</strong>..." % (current_entry, self.amount_of_entries)
+
+    def split_into_chunk_files(self, amount_of_chunks, key_column="product id"):
+        """
+        split the rows of the sheet into (at most) the given amount of CSV files with a similar amount of rows, the
+        sheet is read once. All rows with the same value in the key column are part of the same chunk, the keys are
+        distributed to the chunks in the order of their first occurrence (the order of the rows is kept).
+        :return: list of tuples with the CSV file (temporary file at position 0) and the amount of rows per chunk
+        """
+        chunk_of_key = {}
+        chunk_files = [tempfile.TemporaryFile(mode="w+", encoding="utf-8") for _ in range(amount_of_chunks)]
+        chunk_rows = [0] * amount_of_chunks
+        for data_frame in self._iter_data_frames():
+            chunks = data_frame[key_column].map(
+                lambda key: chunk_of_key.setdefault(key, len(chunk_of_key) % amount_of_chunks)
+            )
+            for chunk in chunks.unique():
+                rows = data_frame[(chunks == chunk).values]
+                rows.to_csv(chunk_files[chunk], header=chunk_rows[chunk] == 0, index=False)
+                chunk_rows[chunk] += len(rows.index)
+
+        result = []
+        for chunk_file, amount_of_rows in zip(chunk_files, chunk_rows):
+            if amount_of_rows == 0:
+                chunk_file.close()
+                continue
+
+            chunk_file.seek(0)
+            result.append((chunk_file, amount_of_rows))
+
+        return result
 
     def verify_file(self):
-        if self.workbook is None:
-            self._load_workbook()
         self.valid_file = False
 
-        sheets = self.workbook.sheet_names
+        if self.streaming:
+            # only the header row is required
+            sheets, keys = self._read_header()
+            keys = [x.lower() for x in keys]
+
+        else:
+            if self.workbook is None:
+                self._load_workbook()
+            sheets = self.workbook.sheet_names
+            keys = None
 
         # verify worksheet that is required
         if self.sheetname not in sheets:
             raise InvalidImportFormatException("sheet '%s' not found" % self.sheetname)
 
         # verify keys in file
-        dframe = self.workbook.parse(self.sheetname)
-        keys = [x.lower() for x in set(dframe.keys())]
+        if keys is None:
+            dframe = self.workbook.parse(self.sheetname)
+            keys = [x.lower() for x in set(dframe.keys())]
 
         if len(self.required_keys.intersection(keys)) != len(self.required_keys):
             req_key_str = ", ".join(sorted(self.required_keys))
@@ -97,31 +448,45 @@ class BaseExcelImporter:
     def is_valid_file(self):
         return self.valid_file
 
+    @staticmethod
+    def _normalize_datetime_column(data_frame, row_key, result):
+        """
+        convert the given datetime column of the data frame to date values (None if empty) and add it to the result
+        data frame, values that are not a datetime are stored with their type name in a separate column
+        """
+        values = data_frame[row_key]
+        value_types = values.map(type)
+        is_datetime = value_types.isin([pd.Timestamp, datetime.datetime])
+
+        dates = pd.to_datetime(values.where(is_datetime), errors="coerce")
+        result[row_key] = pd.Series(dates.dt.date, index=values.index, dtype=object).where(dates.notnull(), None)
+
+        invalid_values = values.notnull() & ~is_datetime
+        if invalid_values.any():
+            result[row_key + INVALID_TYPE_COLUMN_SUFFIX] = value_types[invalid_values].map(lambda e: e.__name__)
+
     @staticmethod
     def _import_datetime_column_from_file(row_key, row, target_key, product):
         """
-        helper method to import an optional columns from the excel file
+        helper method to import an optional columns from the excel file (requires a normalized row, see
+        _normalize_datetime_column)
         """
         changed = False
         faulty_entry = False
         msg = ""
-        try:
-            if row_key in row:
-                if not pd.isnull(row[row_key]):
-                    currval = getattr(product, target_key)
-                    if (type(row[row_key]) is pd.tslib.Timestamp) or (type(row[row_key]) is datetime.datetime):
-                        newval = row[row_key].date()
+        if row_key in row:
+            invalid_type = row.get(row_key + INVALID_TYPE_COLUMN_SUFFIX, None)
+            if not pd.isnull(invalid_type):
+                # value is not a datetime, ignore it if the field is not set
+                if getattr(product, target_key) is not None:
+                    faulty_entry = True
+                    msg = "cannot set %s for <code>%s</code> ('%s' object has no attribute " \
+                          "'date')" % (row_key, row["product id"], invalid_type)
 
-                    else:
-                        newval = None
-
-                    if currval != newval:
-                        setattr(product, target_key, row[row_key].date())
-                        changed = True
-
-        except Exception as ex:  # catch any exception
-            faulty_entry = True
-            msg = "cannot set %s for <code>%s</code> (%s)" % (row_key, row["product id"], ex)
+            elif not pd.isnull(row[row_key]):
+                if getattr(product, target_key) != row[row_key]:
+                    setattr(product, target_key, row[row_key])
+                    changed = True
 
         return changed, faulty_entry, msg
 
@@ -148,39 +513,449 @@ class ProductsExcelImporter(BaseExcelImporter):
     drop_na_columns = ["product id"]
     valid_imported_products = 0
     invalid_products = 0
+    processed_entries = 0
+    bulk_chunk_size = 1000
+    # "row", "chunk" or "job", if None, the PDB_REVISION_GRANULARITY setting is used
+    revision_granularity = None
+    revision_batch = None
+    lookup_cache = None
+    # skip the rows that were already imported (see _row_fingerprint)
+    skip_unchanged_rows = True
+
+    DATETIME_COLUMN_MAP = {
+        # product attribute - data frame column name (lowered during the import)
+        "eox_update_time_stamp": "eox update timestamp",
+        "eol_ext_announcement_date": "eol announcement date",
+        "end_of_sale_date": "end of sale date",
+        "end_of_new_service_attachment_date": "end of new service attachment date",
+        "end_of_sw_maintenance_date": "end of sw maintenance date",
+        "end_of_routine_failure_analysis": "end of routing failure analysis date",
+        "end_of_service_contract_renewal": "end of service contract renewal date",
+        "end_of_support_date": "last date of support",
+        "end_of_sec_vuln_supp_date": "end of security/vulnerability support date"
+    }
+
+    # optional columns that are imported without conversion
+    OPTIONAL_COLUMNS = [
+        "product group",
+        "eol note url",
+        "eol note url (friendly name)",
+        "internal product id"
+    ]
+
+    # fields that are written during the bulk import
+    BULK_UPDATE_FIELDS = [
+        "description",
+        "list_price",
+        "currency",
+        "vendor",
+        "product_group",
+        "eol_reference_url",
+        "eol_reference_number",
+        "internal_product_id",
+        "update_timestamp",
+        "list_price_timestamp",
+        "import_fingerprint",
+        "eox_fingerprint",
+    ] + list(DATETIME_COLUMN_MAP.keys())
+
+    # columns that are compared during the dry-run - product field (vendor before product group)
+    DIFF_COLUMNS = OrderedDict([
+        ("description", "description"),
+        ("list price", "list_price"),
+        ("currency", "currency"),
+        ("vendor", "vendor__name"),
+        ("product group", "product_group__name"),
+        ("eol note url", "eol_reference_url"),
+        ("eol note url (friendly name)", "eol_reference_number"),
+        ("internal product id", "internal_product_id"),
+    ] + [(column, field) for field, column in DATETIME_COLUMN_MAP.items()])
+
+    datetime_columns = list(DATETIME_COLUMN_MAP.values())
 
     @property
     def amount_of_products(self):
-        return len(self.__wb_data_frame__) if self.__wb_data_frame__ is not None else -1
+        if self.__wb_data_frame__ is not None:
+            return len(self.__wb_data_frame__)
 
-    def import_to_database(self, status_callback=None, update_only=False):
+        return self.amount_of_rows_in_file if self.amount_of_rows_in_file is not None else -1
+
+    def _normalize_data_frame(self, data_frame):
+        """
+        normalize the values of the data frame using column-wide operations: the list price is converted to a float
+        value, the currency is determined from the list price or the currency column and the datetime columns are
+        converted to date values. Invalid list prices and currencies are stored as message in the import error column.
+        :return: normalized data frame (the row processing only compares and applies the values)
+        """
+        result = pd.DataFrame(index=data_frame.index)
+        for row_key in ["product id", "description", "vendor"] + self.OPTIONAL_COLUMNS:
+            if row_key in data_frame.columns:
+                result[row_key] = data_frame[row_key]
+
+        currencies = list(dict(CURRENCY_CHOICES).keys())
+        errors = pd.Series(None, index=data_frame.index, dtype=object)
+        list_prices = pd.Series(np.nan, index=data_frame.index, dtype=float)
+        currency = pd.Series("USD", index=data_frame.index, dtype=object)   # default in model
+
+        # determine the list price and currency from the excel file
+        row_key = "list price"
+        values = data_frame[row_key]
+        value_types = values.map(type)
+
+        is_number = value_types.isin([int, float]) & values.notnull()
+        list_prices[is_number] = values[is_number].astype(float)
+
+        is_string = value_types == str
+        if is_string.any():
+            price = values[is_string].str.split(" ")
+            amount_of_tokens = price.str.len()
+
+            # only a number
+            single_value = values[is_string][amount_of_tokens == 1]
+            numbers = pd.to_numeric(single_value, errors="coerce")
+            list_prices[numbers.index] = numbers
+            invalid = single_value[numbers.isnull()]
+            errors[invalid.index] = invalid.map(lambda e: "could not convert string to float: %r" % e)
+
+            # contains a number and a currency
+            price_with_currency = price[amount_of_tokens == 2]
+            numbers = pd.to_numeric(price_with_currency.str[0], errors="coerce")
+            new_currency = price_with_currency.str[1].str.upper()
+            valid_currency = new_currency.isin(currencies)
+
+            errors[numbers[numbers.isnull()].index] = "cannot convert price information to float"
+            invalid = new_currency[numbers.notnull() & ~valid_currency]
+            errors[invalid.index] = "cannot set currency unknown value " + invalid
+
+            valid = numbers.notnull() & valid_currency
+            list_prices[valid[valid].index] = numbers[valid]
+            currency[valid[valid].index] = new_currency[valid]
+
+            errors[amount_of_tokens[amount_of_tokens > 2].index] = "invalid format for list price, detected " \
+                                                                   "multiple spaces"
+
+        invalid = values[values.notnull() & ~is_number & ~is_string]
+        if len(invalid) != 0:
+            logger.debug("invalid list price data types for %s" % ", ".join(data_frame["product id"][invalid.index]))
+            errors[invalid.index] = "invalid data-type for list price"
+
+        has_error = errors.notnull()
+        list_prices[has_error] = np.nan
+        errors[has_error] = "cannot set list price for <code>" + data_frame["product id"][has_error] + \
+                            "</code> (" + errors[has_error] + ")"
+
+        # the currency column overrides the currency from the list price
+        row_key = "currency"
+        if row_key in data_frame.columns:
+            values = data_frame[row_key][data_frame[row_key].notnull()].astype(str).str.upper()
+            valid_currency = values.isin(currencies)
+            currency[values[valid_currency].index] = values[valid_currency]
+
+            invalid = values[~valid_currency & ~has_error[values.index]]
+            errors[invalid.index] = "cannot set currency for <code>" + data_frame["product id"][invalid.index] + \
+                                    "</code> (cannot set currency unknown value " + invalid + ")"
+
+        result["list price"] = list_prices
+        result["currency"] = currency
+        result[IMPORT_ERROR_COLUMN] = errors
+
+        # import datetime columns from file (all optional)
+        for row_key in self.DATETIME_COLUMN_MAP.values():
+            if row_key in data_frame.columns:
+                self._normalize_datetime_column(data_frame, row_key, result)
+
+        return result
+
+    def _apply_row_to_product(self, row, p, created):
+        """
+        apply the values of a row from the Excel file to the given product (only if a value is set, otherwise it is
+        ignored), the product is not saved
+        :return: tuple with changed flag, faulty entry flag and the result message
+        """
+        changed = created
+        faulty_entry = False        # indicates an invalid entry
+        msg = "import successful"   # message to describe the result of the product import
+
+        row_key = "description"
+        try:
+            # set the description value
+            if not pd.isnull(row[row_key]):
+                if p.description != row[row_key]:
+                    p.description = row[row_key]
+                    changed = True
+
+            if not pd.isnull(row[IMPORT_ERROR_COLUMN]):
+                # invalid list price or currency, already identified during the normalization of the data frame
+                raise InvalidRowValueException(row[IMPORT_ERROR_COLUMN])
+
+            # apply the new list price and currency if required
+            row_key = "list price"
+            if not pd.isnull(row[row_key]):
+                if p.list_price != row[row_key]:
+                    p.list_price = row[row_key]
+                    changed = True
+                if p.currency != row["currency"]:
+                    p.currency = row["currency"]
+                    changed = True
+
+            # set vendor to unassigned (ID 0) if no Vendor is provided and the product was created
+            row_key = "vendor"
+            if pd.isnull(row[row_key]) and created:
+                v = self.lookup_cache.get_vendor_by_id(0)
+                changed = True
+                p.vendor = v
+
+            elif not pd.isnull(row[row_key]):
+                if self.lookup_cache.get_vendor_by_id(p.vendor_id).name != row[row_key]:
+                    try:
+                        v = self.lookup_cache.get_vendor(row[row_key])
+
+                    except Vendor.DoesNotExist:
+                        raise Exception("Vendor <strong>%s</strong> doesn't exist" % row[row_key])
+
+                    changed = True
+                    p.vendor = v
+
+            # set vendor to unassigned (ID 0) if no Vendor is provided and the product was created
+            row_key = "product group"
+            if row_key in row:  # optional key
+                if not pd.isnull(row[row_key]):
+                    set_value = False
+                    current_product_group = self.lookup_cache.get_product_group_by_id(p.product_group_id)
+                    if not current_product_group:
+                        set_value = True
+
+                    elif current_product_group.name != row[row_key]:
+                        set_value = True
+
+                    if set_value:
+                        pg = self.lookup_cache.get_product_group(row[row_key], p.vendor_id)
+
+                        changed = True
+                        p.product_group = pg
+
+            # set Eol note URL and friendly name (both optional)
+            row_key = "eol note url"
+            if row_key in row:  # optional key
+                if not pd.isnull(row[row_key]):
+                    if p.eol_reference_url != row[row_key]:
+                        p.eol_reference_url = row[row_key]
+                        changed = True
+
+            row_key = "eol note url (friendly name)"
+            if row_key in row:  # optional key
+                if not pd.isnull(row[row_key]):
+                    if p.eol_reference_number != row[row_key]:
+                        p.eol_reference_number = row[row_key]
+
+            # set internal product ID (optional)
+            row_key = "internal product id"
+            if row_key in row:  # optional key
+                if not pd.isnull(row[row_key]):
+                    if p.internal_product_id != row[row_key]:
+                        p.internal_product_id = row[row_key]
+                        changed = True
+
+        except InvalidRowValueException as ex:
+            faulty_entry = True
+            msg = str(ex)
+
+        except Exception as ex:
+            faulty_entry = True
+            msg = "cannot set %s for <code>%s</code> (%s)" % (row_key, row["product id"], ex)
+
+        # import datetime columns from file (all optional)
+        for key in self.DATETIME_COLUMN_MAP.keys():
+            c, f, ret_msg = self._import_datetime_column_from_file(self.DATETIME_COLUMN_MAP[key], row, key, p)
+            if c:
+                # value was changed
+                changed = True
+            if f:
+                # value was faulty
+                msg = ret_msg
+                faulty_entry = True
+                break
+
+        return changed, faulty_entry, msg
+
+    def _create_revision_batch(self, bulk_mode=False):
+        """create the RevisionBatch that tracks the changes of the import"""
+        granularity = self.revision_granularity if self.revision_granularity else settings.PDB_REVISION_GRANULARITY
+        if bulk_mode and granularity == REVISION_PER_ROW:
+            # the bulk mode stores the changes of a chunk within a single revision
+            granularity = REVISION_PER_CHUNK
+
+        user = None
+        if self.user_for_revision:
+            if isinstance(self.user_for_revision, User):
+                user = self.user_for_revision
+
+            else:
+                logger.warn("Cannot find username <strong>%s</strong> in database" % self.user_for_revision)
+
+        self.revision_batch = RevisionBatch(
+            "manual product import",
+            user=user,
+            granularity=granularity,
+            chunk_size=self.bulk_chunk_size if bulk_mode else None
+        )
+
+    def _add_faulty_entry(self, product_id, msg, message_index=None):
+        """
+        register a faulty entry, the message replaces an existing import result message if a message_index is given
+        :return: True, if there are too many errors in the file and the import should be terminated
+        """
+        logger.error("cannot import %s (%s)" % (product_id, msg))
+        if message_index is None:
+            self._add_result_message(msg, product_id, NotificationMessage.MESSAGE_ERROR)
+
+        else:
+            self.import_result_entries[message_index] = (product_id, NotificationMessage.MESSAGE_ERROR, msg)
+        self.invalid_products += 1
+
+        # terminate the process after 30 errors
+        if self.invalid_products > 30:
+            self._add_result_message("There are too many errors in your file, please correct them and upload it "
+                                     "again", status=NotificationMessage.MESSAGE_ERROR)
+            return True
+
+        return False
+
+    def import_to_database(self, status_callback=None, update_only=False, bulk_mode=False):
         """
         Import products from the associated excel sheet to the database
         :param status_callback: optional status message callback function
         :param update_only: don't create new entries
+        :param bulk_mode: write the products in chunks using bulk operations (see _import_to_database_in_bulk)
         """
-        if self.workbook is None:
-            self._load_workbook()
-        if self.__wb_data_frame__ is None:
-            self._create_data_frame()
-
         self.valid_imported_products = 0
         self.invalid_products = 0
-        self.import_result_messages.clear()
-        amount_of_entries = len(self.__wb_data_frame__.index)
+        self.processed_entries = 0
+        self.import_result_entries.clear()
+        self._create_revision_batch(bulk_mode)
+        self.lookup_cache = ImportLookupCache()
+
+        # the data frames are chunks of the file in streaming mode
+        for data_frame in self._iter_data_frames():
+            normalized_data_frame = self._normalize_data_frame(data_frame)
+            self._load_fingerprints(normalized_data_frame)
+            if not update_only:
+                self._create_missing_product_groups(normalized_data_frame)
+
+            if bulk_mode:
+                terminate = self._import_to_database_in_bulk(normalized_data_frame, status_callback, update_only)
+
+            else:
+                terminate = self._import_to_database_row_by_row(normalized_data_frame, status_callback, update_only)
+
+            self._write_fingerprints()
+            if terminate:
+                break
+
+        self.revision_batch.flush()
+
+    @staticmethod
+    def _row_fingerprint(row):
+        """
+        fingerprint of the values of a normalized row (including the column names), if it matches the fingerprint
+        of the product, the row was already imported and the product was not changed since then
+        """
+        values = sorted(row.items(), key=lambda e: e[0])
+        return hashlib.sha1(json.dumps(values, default=str).encode("utf-8")).hexdigest()
+
+    def _load_fingerprints(self, normalized_data_frame):
+        """load the fingerprints of the products within the data frame (without loading the products)"""
+        self._fingerprints = {}
+        self._pending_fingerprints = OrderedDict()
+        if not self.skip_unchanged_rows:
+            return
+
+        product_ids = [pid for pid in normalized_data_frame["product id"].unique() if not pd.isnull(pid)]
+        for batch in bulk_operations.chunks(product_ids, LOOKUP_BATCH_SIZE):
+            self._fingerprints.update(
+                Product.objects.filter(product_id__in=batch).exclude(
+                    import_fingerprint=None
+                ).values_list("product_id", "import_fingerprint")
+            )
+
+    def _is_unchanged_row(self, row, fingerprint):
+        return self._fingerprints.get(row["product id"], None) == fingerprint
+
+    def _set_fingerprint(self, p, fingerprint, changed, faulty_entry):
+        """
+        set the fingerprint of the row if all values are applied to the product, the fingerprint of an unchanged
+        product is written separately (see _write_fingerprints)
+        """
+        if faulty_entry:
+            # not all values of the row are applied to the product
+            p.import_fingerprint = None
+            self._fingerprints[p.product_id] = None
+            return
+
+        if changed:
+            self._pending_fingerprints.pop(p.product_id, None)
+
+        elif p.import_fingerprint != fingerprint:
+            self._pending_fingerprints[p.product_id] = p
+
+        p.import_fingerprint = fingerprint
+        self._fingerprints[p.product_id] = fingerprint
+
+    def _write_fingerprints(self):
+        """write the fingerprints of the products that were not changed by the import"""
+        bulk_operations.bulk_update_objects(
+            Product,
+            list(self._pending_fingerprints.values()),
+            ["import_fingerprint"],
+            batch_size=self.bulk_chunk_size
+        )
+        self._pending_fingerprints.clear()
+
+    def _create_missing_product_groups(self, normalized_data_frame):
+        """
+        create the missing Product Groups of the valid rows with a Vendor value in a single batch (the Product Groups of
+        rows without a Vendor value are created on demand)
+        """
+        if "product group" not in normalized_data_frame.columns:
+            return
+
+        rows = normalized_data_frame[
+            normalized_data_frame["product group"].notnull() &
+            normalized_data_frame["vendor"].notnull() &
+            normalized_data_frame[IMPORT_ERROR_COLUMN].isnull()
+        ]
+        pairs = set()
+        for name, vendor_name in set(zip(rows["product group"], rows["vendor"])):
+            try:
+                pairs.add((name, self.lookup_cache.get_vendor(vendor_name).id))
 
+            except Vendor.DoesNotExist:
+                # reported during the import of the row
+                continue
+
+        self.lookup_cache.create_product_groups(pairs)
+
+    def _import_to_database_row_by_row(self, normalized_data_frame, status_callback=None, update_only=False):
+        """
+        Import the products row by row, the changes are tracked according to the revision granularity
+        :return: True, if the import should be terminated
+        """
         # process entries in file
-        current_entry = 1
-        for index, row in self.__wb_data_frame__.iterrows():
+        for row in normalized_data_frame.to_dict(orient="records"):
+            self.processed_entries += 1
+
             # update status message if defined
-            if status_callback and (current_entry % 100 == 0):
-                status_callback("Process entry <strong>%s</strong> of "
-                                "<strong>%s</strong>..." % (current_entry, amount_of_entries))
+            self._update_status(status_callback, self.processed_entries)
+
+            fingerprint = self._row_fingerprint(row)
+            if self._is_unchanged_row(row, fingerprint):
+                # already imported, the product is not loaded
+                self._add_result_message("<i>no changes for product "
+                                         "<code>%s</code> required</i>" % row["product id"], row["product id"])
+                continue
 
-            faulty_entry = False        # indicates an invalid entry
             created = False             # indicates that the product was created
             skip = False                # skip the current entry (used in update_only mode)
-            msg = "import successful"   # message to describe the result of the product import
 
             if update_only:
                 try:
@@ -197,212 +972,425 @@ class ProductsExcelImporter(BaseExcelImporter):
             else:
                 p, created = Product.objects.get_or_create(product_id=row["product id"])
 
-            changed = created
-
             if not skip:
-                # apply changes (only if a value is set, otherwise ignore it)
-                row_key = "description"
+                changed, faulty_entry, msg = self._apply_row_to_product(row, p, created)
+                self._set_fingerprint(p, fingerprint, changed, faulty_entry)
+
+                # save result to database if any
                 try:
-                    # set the description value
-                    if not pd.isnull(row[row_key]):
-                        if p.description != row[row_key]:
-                            p.description = row[row_key]
-                            changed = True
+                    if changed:
+                        # update element and track the change (see revision_granularity)
+                        self.revision_batch.save(p)
 
-                    # determine the list price and currency from the excel file
-                    row_key = "list price"
-                    new_currency = "USD"    # default in model
+                        self.valid_imported_products += 1
+                        # add import result message
+                        if created:
+                            self._add_result_message("product <code>%s</code> created" % p.product_id, p.product_id,
+                                                     NotificationMessage.MESSAGE_SUCCESS)
+
+                        else:
+                            self._add_result_message("product <code>%s</code> updated" % p.product_id, p.product_id,
+                                                     NotificationMessage.MESSAGE_SUCCESS)
 
-                    if not pd.isnull(row[row_key]):
-                        if type(row[row_key]) == float:
-                            new_price = row[row_key]
+                    else:
+                        self._add_result_message("<i>no changes for product "
+                                                 "<code>%s</code> required</i>" % p.product_id, p.product_id)
 
-                        elif type(row[row_key]) == int:
-                            new_price = float(row[row_key])
+                except Exception as ex:
+                    faulty_entry = True
+                    msg = "cannot save data for <code>%s</code> in database (%s)" % (row["product id"], ex)
+                    self._fingerprints[row["product id"]] = None
 
-                        elif type(row[row_key]) == str:
-                            price = row[row_key].split(" ")
-                            if len(price) == 1:
-                                # only a number
-                                new_price = float(row[row_key])
+                if faulty_entry:
+                    if self._add_faulty_entry(row["product id"], msg):
+                        return True
 
-                            elif len(price) == 2:
-                                # contains a number and a currency
-                                try:
-                                    new_price = float(price[0])
+        return False
 
-                                except:
-                                    raise Exception("cannot convert price information to float")
+    def _import_to_database_in_bulk(self, normalized_data_frame, status_callback=None, update_only=False):
+        """
+        Import the products in chunks of bulk_chunk_size rows. The existing products of a chunk are loaded with a
+        single query, the changes are computed in memory and written using a bulk insert and a bulk update within a
+        single transaction and revision per chunk. The results are the same as in the row by row import.
+        :return: True, if the import should be terminated
+        """
+        amount_of_entries = len(normalized_data_frame.index)
 
-                                # check valid currency value
-                                valid_currency = True if price[1].upper() in dict(CURRENCY_CHOICES).keys() else False
-                                if valid_currency:
-                                    new_currency = price[1].upper()
+        for chunk_start in range(0, amount_of_entries, self.bulk_chunk_size):
+            self._update_status(status_callback, self.processed_entries + 1)
 
-                                else:
-                                    raise Exception("cannot set currency unknown value %s" % price[1].upper())
+            data_frame_chunk = normalized_data_frame.iloc[chunk_start:chunk_start + self.bulk_chunk_size]
+            terminate = self._import_chunk_in_bulk(data_frame_chunk, update_only)
+            self.processed_entries += len(data_frame_chunk.index)
+            if terminate:
+                # too many errors, terminate the import
+                return True
 
-                            else:
-                                raise Exception("invalid format for list price, detected multiple spaces")
+        return False
 
-                        else:
-                            logger.debug("list price data type for %s identified as %s" % (
-                                row["product id"],
-                                str(type(row[row_key]))
-                            ))
-                            raise Exception("invalid data-type for list price")
-                    else:
-                        new_price = None
-
-                    row_key = "currency"
-                    if row_key in row:
-                        if not pd.isnull(row[row_key]):
-                            # check valid currency value
-                            valid_currency = True if row[row_key].upper() in dict(CURRENCY_CHOICES).keys() else False
-                            if valid_currency:
-                                new_currency = row[row_key].upper()
-
-                            else:
-                                raise Exception("cannot set currency unknown value %s" % row[row_key].upper())
-
-                    # apply the new list price and currency if required
-                    if new_price is not None:
-                        if p.list_price != new_price:
-                            p.list_price = new_price
-                            changed = True
-                        if p.currency != new_currency:
-                            p.currency = new_currency
-                            changed = True
-
-                    # set vendor to unassigned (ID 0) if no Vendor is provided and the product was created
-                    row_key = "vendor"
-                    if pd.isnull(row[row_key]) and created:
-                        v = Vendor.objects.get(id=0)
-                        changed = True
-                        p.vendor = v
-
-                    elif not pd.isnull(row[row_key]):
-                        if p.vendor.name != row[row_key]:
-                            try:
-                                v = Vendor.objects.get(name=row[row_key])
-
-                            except Vendor.DoesNotExist:
-                                raise Exception("Vendor <strong>%s</strong> doesn't exist" % row[row_key])
-
-                            changed = True
-                            p.vendor = v
-
-                    # set vendor to unassigned (ID 0) if no Vendor is provided and the product was created
-                    row_key = "product group"
-                    if row_key in row:  # optional key
-                        if not pd.isnull(row[row_key]):
-                            set_value = False
-                            if not p.product_group:
-                                set_value = True
-
-                            elif p.product_group.name != row[row_key]:
-                                set_value = True
-
-                            if set_value:
-                                pg, _ = ProductGroup.objects.get_or_create(name=row[row_key], vendor=p.vendor)
-
-                                changed = True
-                                p.product_group = pg
-
-                    # set Eol note URL and friendly name (both optional)
-                    row_key = "eol note url"
-                    if row_key in row:  # optional key
-                        if not pd.isnull(row[row_key]):
-                            if p.eol_reference_url != row[row_key]:
-                                p.eol_reference_url = row[row_key]
-                                changed = True
-
-                    row_key = "eol note url (friendly name)"
-                    if row_key in row:  # optional key
-                        if not pd.isnull(row[row_key]):
-                            if p.eol_reference_number != row[row_key]:
-                                p.eol_reference_number = row[row_key]
-
-                    # set internal product ID (optional)
-                    row_key = "internal product id"
-                    if row_key in row:  # optional key
-                        if not pd.isnull(row[row_key]):
-                            if p.internal_product_id != row[row_key]:
-                                p.internal_product_id = row[row_key]
-                                changed = True
+    def _import_chunk_in_bulk(self, data_frame_chunk, update_only=False):
+        """
+        import a chunk of rows using bulk operations
+        :return: True, if the import should be terminated
+        """
+        rows = data_frame_chunk.to_dict(orient="records")
+        fingerprints = [self._row_fingerprint(row) for row in rows]
+
+        # the products of the rows that were already imported are not loaded
+        product_ids = set([
+            row["product id"] for row, fingerprint in zip(rows, fingerprints)
+            if not pd.isnull(row["product id"]) and not self._is_unchanged_row(row, fingerprint)
+        ])
+        products = Product.objects.filter(product_id__in=product_ids).select_related("vendor", "product_group")
+        products = {p.product_id: p for p in products}
+
+        new_products = OrderedDict()        # product ID: product object
+        changed_products = OrderedDict()    # product ID: product object
+        message_index = {}                  # product ID: indexes of the import result messages (one per row)
+
+        for row, fingerprint in zip(rows, fingerprints):
+            if self._is_unchanged_row(row, fingerprint):
+                self._add_result_message("<i>no changes for product "
+                                         "<code>%s</code> required</i>" % row["product id"], row["product id"])
+                continue
 
-                except Exception as ex:
-                    faulty_entry = True
-                    msg = "cannot set %s for <code>%s</code> (%s)" % (row_key, row["product id"], ex)
-
-                # import datetime columns from file (all optional)
-                data_map = {
-                    # product attribute - data frame column name (lowered during the import)
-                    "eox_update_time_stamp": "eox update timestamp",
-                    "eol_ext_announcement_date": "eol announcement date",
-                    "end_of_sale_date": "end of sale date",
-                    "end_of_new_service_attachment_date": "end of new service attachment date",
-                    "end_of_sw_maintenance_date": "end of sw maintenance date",
-                    "end_of_routine_failure_analysis": "end of routing failure analysis date",
-                    "end_of_service_contract_renewal": "end of service contract renewal date",
-                    "end_of_support_date": "last date of support",
-                    "end_of_sec_vuln_supp_date": "end of security/vulnerability support date"
-                }
-
-                for key in data_map.keys():
-                    c, f, ret_msg = self._import_datetime_column_from_file(data_map[key], row, key, p)
-                    if c:
-                        # value was changed
-                        changed = True
-                    if f:
-                        # value was faulty
-                        msg = ret_msg
-                        faulty_entry = True
-                        break
+            created = False
+            current_product = products.get(row["product id"], None)
+            if current_product is None:
+                if update_only:
+                    # element doesn't exist
+                    continue
 
-                # save result to database if any
-                try:
-                    if changed:
-                        # update element and add revision note
-                        with transaction.atomic(), reversion.create_revision():
-                            p.save()
-                            if self.user_for_revision:
-                                try:
-                                    reversion.set_user(self.user_for_revision)
+                # the product is only created within the database, if the values are valid
+                p = Product(product_id=row["product id"])
+                created = True
 
-                                except:
-                                    logger.warn("Cannot find username <strong>%s</strong> in database" % self.user_for_revision)
+            else:
+                # work on a copy, that invalid values are not applied to the product of the chunk
+                p = copy.copy(current_product)
 
-                            reversion.set_comment("manual product import")
+            changed, faulty_entry, msg = self._apply_row_to_product(row, p, created)
 
-                        self.valid_imported_products += 1
-                        # add import result message
-                        if created:
-                            self.import_result_messages.append("product <code>%s</code> created" % p.product_id)
+            if changed:
+                try:
+                    # validate the data in memory (the uniqueness of the product ID is ensured by the lookup)
+                    p.update_change_timestamps()
+                    p.full_clean(validate_unique=False)
 
-                        else:
-                            self.import_result_messages.append("product <code>%s</code> updated" % p.product_id)
+                    products[p.product_id] = p
+                    if created or p.product_id in new_products:
+                        new_products[p.product_id] = p
 
                     else:
-                        self.import_result_messages.append("<i>no changes for product "
-                                                           "<code>%s</code> required</i>" % p.product_id)
+                        changed_products[p.product_id] = p
+
+                    self.valid_imported_products += 1
+                    # add import result message
+                    message_index.setdefault(p.product_id, []).append(self._add_result_message(
+                        "product <code>%s</code> %s" % (p.product_id, "created" if created else "updated"),
+                        p.product_id,
+                        NotificationMessage.MESSAGE_SUCCESS
+                    ))
 
                 except Exception as ex:
                     faulty_entry = True
                     msg = "cannot save data for <code>%s</code> in database (%s)" % (row["product id"], ex)
 
-                if faulty_entry:
-                    logger.error("cannot import %s (%s)" % (row["product id"], msg))
-                    self.import_result_messages.append(msg)
-                    self.invalid_products += 1
-
-                    # terminate the process after 30 errors
-                    if self.invalid_products > 30:
-                        self.import_result_messages.append("There are too many errors in your file, please "
-                                                           "correct them and upload it again")
+            else:
+                self._add_result_message("<i>no changes for product "
+                                         "<code>%s</code> required</i>" % p.product_id, p.product_id)
+
+            self._set_fingerprint(p, fingerprint, changed, faulty_entry)
+            if faulty_entry:
+                if self._add_faulty_entry(row["product id"], msg):
+                    self._write_chunk_in_bulk(new_products, changed_products, message_index)
+                    return True
+
+        self._write_chunk_in_bulk(new_products, changed_products, message_index)
+        return False
+
+    def _write_chunk_in_bulk(self, new_products, changed_products, message_index):
+        """
+        write the new and changed products of a chunk to the database within a single transaction and revision, if
+        the bulk operation fails, the products are saved one by one to identify the faulty entries
+        """
+        if len(new_products) == 0 and len(changed_products) == 0:
+            return
+
+        revision_savepoint = self.revision_batch.savepoint()
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_create(list(new_products.values()), batch_size=self.bulk_chunk_size)
+                bulk_operations.bulk_update_objects(
+                    Product,
+                    list(changed_products.values()),
+                    self.BULK_UPDATE_FIELDS,
+                    batch_size=self.bulk_chunk_size
+                )
+                bulk_operations.update_replacement_db_product_relations(list(new_products.keys()))
+
+                for p in list(new_products.values()) + list(changed_products.values()):
+                    self.revision_batch.add(p)
+                self.revision_batch.end_chunk()
+
+        except Exception:
+            logger.warn("bulk write of the products failed, fallback to single writes", exc_info=True)
+            self.revision_batch.rollback(revision_savepoint)
+            for p in list(new_products.values()) + list(changed_products.values()):
+                try:
+                    if p.product_id in new_products:
+                        p.pk = None
+                    self.revision_batch.save(p)
+
+                except Exception as ex:
+                    # every row of the Product ID was counted as valid product
+                    message_indexes = message_index.get(p.product_id, [None])
+                    self.valid_imported_products -= len(message_indexes)
+                    msg = "cannot save data for <code>%s</code> in database (%s)" % (p.product_id, ex)
+                    if any([self._add_faulty_entry(p.product_id, msg, index) for index in message_indexes]):
                         break
 
-            current_entry += 1
+        bulk_operations.invalidate_product_caches()
+
+    def dry_run(self, update_only=False):
+        """
+        compare the file with the products in the database without changing them: the affected products are loaded
+        with a single query per LOOKUP_BATCH_SIZE products and compared with the normalized file using a join
+        :param update_only: ignore new products
+        :return: ImportDiff with the created, changed and invalid products
+        """
+        diff = ImportDiff("products", update_only)
+
+        data_frames = [self._normalize_data_frame(data_frame) for data_frame in self._iter_data_frames()]
+        if len(data_frames) == 0:
+            return diff
+        rows = pd.concat(data_frames)
+        product_ids = rows["product id"]
+
+        # rows with invalid values are not applied
+        errors = rows[IMPORT_ERROR_COLUMN].copy()
+        invalid = errors.isnull() & rows["vendor"].notnull() & \
+            ~rows["vendor"].isin(list(Vendor.objects.values_list("name", flat=True)))
+        errors[invalid] = "cannot set vendor for <code>" + product_ids[invalid] + "</code> (Vendor <strong>" + \
+                          rows["vendor"][invalid] + "</strong> doesn't exist)"
+
+        for product_id, msg in zip(product_ids[errors.notnull()], errors[errors.notnull()]):
+            diff.add_entry(product_id, ImportDiff.INVALID, message=msg)
+
+        columns = [column for column in self.DIFF_COLUMNS.keys() if column in rows.columns]
+        invalid_type_columns = [column for column in rows.columns if column.endswith(INVALID_TYPE_COLUMN_SUFFIX)]
+        values = rows[errors.isnull()][["product id"] + columns + invalid_type_columns].copy()
+
+        # the currency is only applied together with the list price and the URL is stripped (see Product.save())
+        values["currency"] = values["currency"].where(values["list price"].notnull())
+        if "eol note url" in columns:
+            urls = values["eol note url"]
+            values["eol note url"] = urls.where(urls.isnull(), urls[urls.notnull()].astype(str).str.strip())
+
+        # if a Product ID is used multiple times, the last value of a column is applied (as in the row by row import)
+        values = values.groupby("product id", sort=False).last()
+
+        fields = [self.DIFF_COLUMNS[column] for column in columns]
+        current_values = [
+            pd.DataFrame.from_records(
+                list(Product.objects.filter(product_id__in=batch).values_list("product_id", "id", *fields)),
+                columns=["product id", "id"] + [column + CURRENT_VALUE_COLUMN_SUFFIX for column in columns]
+            ) for batch in bulk_operations.chunks(list(values.index), LOOKUP_BATCH_SIZE)
+        ]
+        if len(current_values) != 0:
+            values = values.join(pd.concat(current_values).set_index("product id"), how="left")
+
+        else:
+            values["id"] = None
+            for column in columns:
+                values[column + CURRENT_VALUE_COLUMN_SUFFIX] = None
+
+        exists = values["id"].notnull()
+        if update_only:
+            values = values[exists]
+            exists = exists[exists]
+
+        # a value that is not a datetime is ignored if the field of the product is not set, otherwise the product is
+        # invalid (the other columns are applied, see _import_datetime_column_from_file)
+        invalid_type_products = 0
+        for invalid_type_column in invalid_type_columns:
+            column = invalid_type_column[:-len(INVALID_TYPE_COLUMN_SUFFIX)]
+            invalid = values[invalid_type_column].notnull() & values[column + CURRENT_VALUE_COLUMN_SUFFIX].notnull()
+            invalid_type_products += int(invalid.sum())
+            for product_id, invalid_type in values[invalid][invalid_type_column].items():
+                diff.add_entry(
+                    product_id,
+                    ImportDiff.INVALID,
+                    message="cannot set %s for <code>%s</code> ('%s' object has no attribute 'date')" % (
+                        column, product_id, invalid_type
+                    )
+                )
+
+        changed_columns = pd.DataFrame(index=values.index)
+        for column in columns:
+            new_value = values[column]
+            current_value = values[column + CURRENT_VALUE_COLUMN_SUFFIX]
+            changed_columns[column] = new_value.notnull() & (current_value.isnull() | (new_value != current_value))
+
+        has_changes = changed_columns.any(axis=1) if len(columns) != 0 else pd.Series(False, index=values.index)
+        lifecycle_columns = [column for column in self.DATETIME_COLUMN_MAP.values() if column in columns]
+
+        diff.summary["created"] = int((~exists).sum())
+        diff.summary["changed"] = int((exists & has_changes).sum())
+        diff.summary["price changed"] = int((exists & changed_columns["list price"]).sum())
+        diff.summary["lifecycle dates changed"] = int(
+            (exists & changed_columns[lifecycle_columns].any(axis=1)).sum()
+        ) if len(lifecycle_columns) != 0 else 0
+        diff.summary["unchanged"] = int((exists & ~has_changes).sum())
+        diff.summary["invalid"] = int(errors.notnull().sum()) + invalid_type_products
+        diff.summary["changed fields"] = OrderedDict([
+            (column, int((exists & changed_columns[column]).sum())) for column in columns
+        ])
+
+        affected = (~exists | has_changes).values
+        records = values[affected].to_dict(orient="index")
+        changed_records = changed_columns[affected].to_dict(orient="index")
+        for product_id in values.index[affected]:
+            record = records[product_id]
+            diff.add_entry(
+                product_id,
+                ImportDiff.CREATED if pd.isnull(record["id"]) else ImportDiff.CHANGED,
+                OrderedDict([
+                    (column, [
+                        ImportDiff.to_value(record[column + CURRENT_VALUE_COLUMN_SUFFIX]),
+                        ImportDiff.to_value(record[column])
+                    ]) for column in columns if changed_records[product_id][column]
+                ])
+            )
+
+        return diff
+
+    def _get_diff_value(self, product, column):
+        """get the current value of the product for the given diff column"""
+        field = self.DIFF_COLUMNS[column]
+        if field == "vendor__name":
+            return ImportDiff.to_value(product.vendor.name)
+
+        elif field == "product_group__name":
+            return ImportDiff.to_value(product.product_group.name if product.product_group else None)
+
+        return ImportDiff.to_value(getattr(product, field))
+
+    def _set_diff_value(self, product, column, value):
+        """set the value of a diff column to the product"""
+        field = self.DIFF_COLUMNS[column]
+        if field == "vendor__name":
+            try:
+                product.vendor = self.lookup_cache.get_vendor(value)
+
+            except Vendor.DoesNotExist:
+                raise Exception("Vendor <strong>%s</strong> doesn't exist" % value)
+
+        elif field == "product_group__name":
+            product.product_group = self.lookup_cache.get_product_group(value, product.vendor_id)
+
+        elif column in self.DATETIME_COLUMN_MAP.values():
+            setattr(product, field, datetime.datetime.strptime(value, "%Y-%m-%d").date())
+
+        elif field == "list_price":
+            product.list_price = float(value)
+
+        else:
+            setattr(product, field, value)
+
+    def apply_diff(self, diff, status_callback=None):
+        """
+        apply the changes of a dry-run (see dry_run) using the bulk operations, the changes of a product are skipped if
+        the product was changed after the dry-run
+        :param diff: ImportDiff that should be applied
+        :param status_callback: optional status message callback function
+        """
+        self.valid_imported_products = 0
+        self.invalid_products = 0
+        self.processed_entries = 0
+        self.import_result_entries.clear()
+        self._create_revision_batch(bulk_mode=True)
+        self.lookup_cache = ImportLookupCache()
+
+        entries = [e for e in diff.entries if e["status"] in [ImportDiff.CREATED, ImportDiff.CHANGED]]
+
+        for chunk in bulk_operations.chunks(entries, self.bulk_chunk_size):
+            if status_callback:
+                status_callback("Apply change <strong>%s</strong> of "
+                                "<strong>%s</strong>..." % (self.processed_entries + 1, len(entries)),
+                                processed=self.processed_entries + 1, total=len(entries))
+
+            if self._apply_diff_chunk(chunk):
+                # too many errors, terminate the import
+                break
+
+            self.processed_entries += len(chunk)
+
+        self.revision_batch.flush()
+
+    def _apply_diff_chunk(self, entries):
+        """
+        apply a chunk of diff entries
+        :return: True, if the import should be terminated
+        """
+        products = Product.objects.filter(
+            product_id__in=[entry["key"] for entry in entries]
+        ).select_related("vendor", "product_group")
+        products = {p.product_id: p for p in products}
+
+        new_products = OrderedDict()        # product ID: product object
+        changed_products = OrderedDict()    # product ID: product object
+        message_index = {}                  # product ID: indexes of the import result messages (one per row)
+
+        for entry in entries:
+            product_id = entry["key"]
+            current_product = products.get(product_id, None)
+            created = entry["status"] == ImportDiff.CREATED
+            try:
+                # the current values must match the values of the dry-run
+                if created and current_product is not None:
+                    raise InvalidRowValueException("product was created after the preview")
+
+                elif not created and (current_product is None or any([
+                    self._get_diff_value(current_product, column) != current_value
+                    for column, (current_value, _) in entry["changes"].items()
+                ])):
+                    raise InvalidRowValueException("product was changed after the preview")
+
+                if created:
+                    p = Product(product_id=product_id)
+
+                else:
+                    p = copy.copy(current_product)
+
+                for column in self.DIFF_COLUMNS.keys():
+                    if column in entry["changes"]:
+                        self._set_diff_value(p, column, entry["changes"][column][1])
+
+                p.update_change_timestamps()
+                p.full_clean(validate_unique=False)
+
+            except Exception as ex:
+                msg = "cannot apply changes for <code>%s</code> (%s)" % (product_id, ex)
+                if self._add_faulty_entry(product_id, msg):
+                    self._write_chunk_in_bulk(new_products, changed_products, message_index)
+                    return True
+                continue
+
+            self.valid_imported_products += 1
+            if created:
+                new_products[product_id] = p
+
+            else:
+                changed_products[product_id] = p
+            message_index.setdefault(product_id, []).append(self._add_result_message(
+                "product <code>%s</code> %s" % (product_id, "created" if created else "updated"),
+                product_id,
+                NotificationMessage.MESSAGE_SUCCESS
+            ))
+
+        self._write_chunk_in_bulk(new_products, changed_products, message_index)
+        return False
 
 
 class ProductMigrationsExcelImporter(BaseExcelImporter):
@@ -423,64 +1411,266 @@ class ProductMigrationsExcelImporter(BaseExcelImporter):
         "migration product info url": str
     }
 
+    lookup_cache = None
+
+    # columns that are compared during the dry-run - product migration option field
+    DIFF_COLUMNS = OrderedDict([
+        ("comment", "comment"),
+        ("replacement product id", "replacement_product_id"),
+        ("migration product info url", "migration_product_info_url"),
+    ])
+
     def import_to_database(self, status_callback=None, update_only=False):
         """
         Import products from the associated excel sheet to the database
         :param status_callback: optional status message callback function
         :param update_only: don't create new entries
         """
-        if self.workbook is None:
-            self._load_workbook()
-        if self.__wb_data_frame__ is None:
-            self._create_data_frame()
-
         # process entries in file
-        self.import_result_messages = []
+        self.import_result_entries = []
+        self.lookup_cache = ImportLookupCache()
         current_entry = 1
-        amount_of_entries = len(self.__wb_data_frame__.index)
-        for index, row in self.__wb_data_frame__.iterrows():
-            # update status message if defined
-            if status_callback:
-                status_callback("Process entry <strong>%s</strong> of "
-                                "<strong>%s</strong>..." % (current_entry, amount_of_entries))
+        for data_frame in self._iter_data_frames():
+            rows = [row for row in data_frame.to_dict(orient="records")
+                    if not (row["product id"] == "" or row["product id"] is None)]
+            products, migration_options = self._load_chunk(rows)
 
-            if row["product id"] == "" or row["product id"] is None:
-                continue
+            for row in rows:
+                # update status message if defined
+                self._update_status(status_callback, current_entry)
+                current_entry += 1
+
+                # check that product is part of the database
+                try:
+                    if row["product id"] not in products:
+                        raise Product.DoesNotExist()
+                    product = products[row["product id"]]
+
+                    # update element and add revision note
+                    with transaction.atomic(), reversion.create_revision():
+                        migration_source = self.lookup_cache.get_migration_source(row["migration source"])
+                        if migration_source is None:
+                            # invalid name (not created within the chunk), raises the validation error
+                            migration_source, created = ProductMigrationSource.objects.get_or_create(
+                                name=row["migration source"]
+                            )
+
+                            if created:
+                                migration_source.preference = 10
+                                migration_source.save()
+                                self._add_result_message("Product Migration Source \"%s\" was created with a "
+                                                         "preference of 10" % row["migration source"])
+
+                        pmo = migration_options.get((product.id, migration_source.id), None)
+                        created = pmo is None
+                        if created:
+                            pmo = ProductMigrationOption(product=product, migration_source=migration_source)
+
+                        else:
+                            # the product is used in the pre_save signal
+                            pmo.product = product
+
+                        row_key = "comment"
+                        if row_key in row:  # optional key
+                            if not pd.isnull(row[row_key]):
+                                if pmo.comment != row[row_key]:
+                                    pmo.comment = row[row_key]
+
+                        row_key = "replacement product id"
+                        if row_key in row:  # optional key
+                            if not pd.isnull(row[row_key]):
+                                if pmo.replacement_product_id != row[row_key]:
+                                    pmo.replacement_product_id = row[row_key]
+
+                        row_key = "migration product info url"
+                        if row_key in row:  # optional key
+                            if not pd.isnull(row[row_key]):
+                                if pmo.migration_product_info_url != row[row_key]:
+                                    pmo.migration_product_info_url = row[row_key]
+
+                        # the replacement product was loaded with the chunk (no lookup in the pre_save signal)
+                        pmo.replacement_db_product = products.get(pmo.replacement_product_id, None)
+                        pmo.replacement_db_product_resolved = True
+                        pmo.save()
+                        migration_options[(product.id, migration_source.id)] = pmo
+
+                        if self.user_for_revision:
+                            reversion.set_user(self.user_for_revision)
+
+                        reversion.set_comment("manual product migration import")
+
+                    self._add_result_message(
+                        "%s Product Migration path \"%s\" for Product \"%s\"" % (
+                            "create" if created else "update", row["migration source"], row["product id"]
+                        ),
+                        row["product id"],
+                        NotificationMessage.MESSAGE_SUCCESS
+                    )
+
+                except ValidationError as ex:
+                    self._add_result_message("cannot save Product Migration for %s: %s" % (row["product id"], str(ex)),
+                                             row["product id"], NotificationMessage.MESSAGE_ERROR)
+
+                except Product.DoesNotExist:
+                    self._add_result_message("Product %s not found in database, skip entry" % row["product id"],
+                                             row["product id"], NotificationMessage.MESSAGE_WARNING)
 
-            # check that product is part of the database
+    def _load_chunk(self, rows):
+        """
+        load the Products and Product Migration Options of the rows and the replacement Products with a constant amount
+        of queries, the missing Product Migration Sources are created
+        :return: tuple with the Products (Product ID: Product) and the Product Migration Options ((Product ID,
+                 Product Migration Source ID): Product Migration Option)
+        """
+        products = self.lookup_cache.get_products([row["product id"] for row in rows])
+        migration_options = {
+            (pmo.product_id, pmo.migration_source_id): pmo for pmo in ProductMigrationOption.objects.filter(
+                product__in=[p.id for p in products.values()]
+            )
+        }
+
+        # the sources are only created for existing products
+        created_sources = self.lookup_cache.create_migration_sources(
+            [row["migration source"] for row in rows
+             if row["product id"] in products and not pd.isnull(row["migration source"])],
+            preference=10
+        )
+        for name in created_sources:
+            self._add_result_message("Product Migration Source \"%s\" was created with a preference of 10" % name)
+
+        replacement_product_ids = set([
+            row["replacement product id"] for row in rows
+            if not pd.isnull(row.get("replacement product id", None))
+        ] + [pmo.replacement_product_id for pmo in migration_options.values()])
+        products.update(self.lookup_cache.get_products(replacement_product_ids - set(products.keys())))
+
+        return products, migration_options
+
+    def dry_run(self, update_only=False):
+        """
+        compare the file with the Product Migration Options in the database without changing them
+        :param update_only: not used
+        :return: ImportDiff with the created, changed and invalid Product Migration Options
+        """
+        diff = ImportDiff("product_migrations", update_only)
+
+        data_frames = list(self._iter_data_frames())
+        if len(data_frames) == 0:
+            return diff
+        rows = pd.concat(data_frames)
+        rows = rows[rows["product id"] != ""]
+        if len(rows.index) == 0:
+            return diff
+
+        product_ids = list(rows["product id"].unique())
+        existing_product_ids = set()
+        current_values = []
+        fields = ["migration_source__name"] + list(self.DIFF_COLUMNS.values())
+        for batch in bulk_operations.chunks(product_ids, LOOKUP_BATCH_SIZE):
+            existing_product_ids.update(Product.objects.filter(product_id__in=batch).values_list("product_id",
+                                                                                                 flat=True))
+            current_values.append(pd.DataFrame.from_records(
+                list(ProductMigrationOption.objects.filter(product__product_id__in=batch).values_list(
+                    "product__product_id", *fields
+                )),
+                columns=["product id", "migration source"] + [
+                    column + CURRENT_VALUE_COLUMN_SUFFIX for column in self.DIFF_COLUMNS.keys()
+                ]
+            ))
+
+        invalid = ~rows["product id"].isin(list(existing_product_ids))
+        for product_id in rows["product id"][invalid]:
+            diff.add_entry(product_id, ImportDiff.INVALID,
+                           message="Product %s not found in database, skip entry" % product_id)
+
+        columns = [column for column in self.DIFF_COLUMNS.keys() if column in rows.columns]
+        values = rows[~invalid][["product id", "migration source"] + columns]
+        values = values.groupby(["product id", "migration source"], sort=False).last()
+
+        current_values = pd.concat(current_values)
+        current_values["exists"] = True
+        values = values.reset_index().merge(
+            current_values, how="left", on=["product id", "migration source"]
+        ).set_index(["product id", "migration source"])
+        values["exists"] = values["exists"].notnull()
+        exists = values["exists"]
+
+        changed_columns = pd.DataFrame(index=values.index)
+        for column in columns:
+            new_value = values[column]
+            current_value = values[column + CURRENT_VALUE_COLUMN_SUFFIX]
+            changed_columns[column] = new_value.notnull() & (current_value.isnull() | (new_value != current_value))
+
+        has_changes = changed_columns.any(axis=1) if len(columns) != 0 else pd.Series(False, index=values.index)
+        existing_sources = set(ProductMigrationSource.objects.values_list("name", flat=True))
+
+        diff.summary["created"] = int((~exists).sum())
+        diff.summary["changed"] = int((exists & has_changes).sum())
+        diff.summary["unchanged"] = int((exists & ~has_changes).sum())
+        diff.summary["invalid"] = int(invalid.sum())
+        diff.summary["migration sources created"] = len(
+            set(values.index.get_level_values("migration source")) - existing_sources
+        )
+        diff.summary["changed fields"] = OrderedDict([
+            (column, int((exists & changed_columns[column]).sum())) for column in columns
+        ])
+
+        affected = (~exists | has_changes).values
+        for key, record in zip(values.index[affected], values[affected].to_dict(orient="records")):
+            diff.add_entry(
+                list(key),
+                ImportDiff.CHANGED if record["exists"] else ImportDiff.CREATED,
+                OrderedDict([
+                    (column, [
+                        ImportDiff.to_value(record[column + CURRENT_VALUE_COLUMN_SUFFIX]),
+                        ImportDiff.to_value(record[column])
+                    ]) for column in columns if changed_columns[column][key]
+                ])
+            )
+
+        return diff
+
+    def apply_diff(self, diff, status_callback=None):
+        """
+        apply the changes of a dry-run (see dry_run), the changes of a Product Migration Option are skipped if it was
+        changed after the dry-run
+        :param diff: ImportDiff that should be applied
+        :param status_callback: optional status message callback function
+        """
+        self.import_result_entries = []
+        entries = [e for e in diff.entries if e["status"] in [ImportDiff.CREATED, ImportDiff.CHANGED]]
+        for current_entry, entry in enumerate(entries, 1):
+            if status_callback:
+                status_callback("Apply change <strong>%s</strong> of "
+                                "<strong>%s</strong>..." % (current_entry, len(entries)),
+                                processed=current_entry, total=len(entries))
+
+            product_id, migration_source_name = entry["key"]
             try:
-                # update element and add revision note
                 with transaction.atomic(), reversion.create_revision():
-                    product = Product.objects.get(product_id=row["product id"])
+                    product = Product.objects.get(product_id=product_id)
                     migration_source, created = ProductMigrationSource.objects.get_or_create(
-                        name=row["migration source"]
+                        name=migration_source_name
                     )
 
                     if created:
                         migration_source.preference = 10
                         migration_source.save()
-                        self.import_result_messages.append("Product Migration Source \"%s\" was created with a "
-                                                           "preference of 10" % row["migration source"])
+                        self._add_result_message("Product Migration Source \"%s\" was created with a "
+                                                 "preference of 10" % migration_source_name)
 
                     pmo, created = ProductMigrationOption.objects.get_or_create(product=product,
                                                                                 migration_source=migration_source)
-                    row_key = "comment"
-                    if row_key in row:  # optional key
-                        if not pd.isnull(row[row_key]):
-                            if pmo.comment != row[row_key]:
-                                pmo.comment = row[row_key]
-
-                    row_key = "replacement product id"
-                    if row_key in row:  # optional key
-                        if not pd.isnull(row[row_key]):
-                            if pmo.replacement_product_id != row[row_key]:
-                                pmo.replacement_product_id = row[row_key]
-
-                    row_key = "migration product info url"
-                    if row_key in row:  # optional key
-                        if not pd.isnull(row[row_key]):
-                            if pmo.migration_product_info_url != row[row_key]:
-                                pmo.migration_product_info_url = row[row_key]
+
+                    # the current values must match the values of the dry-run
+                    if created != (entry["status"] == ImportDiff.CREATED) or any([
+                        ImportDiff.to_value(getattr(pmo, self.DIFF_COLUMNS[column])) != current_value
+                        for column, (current_value, _) in entry["changes"].items()
+                    ] if not created else []):
+                        raise InvalidRowValueException("Product Migration Option was changed after the preview")
+
+                    for column, (_, new_value) in entry["changes"].items():
+                        setattr(pmo, self.DIFF_COLUMNS[column], new_value)
 
                     pmo.save()
 
@@ -489,17 +1679,18 @@ class ProductMigrationsExcelImporter(BaseExcelImporter):
 
                     reversion.set_comment("manual product migration import")
 
-                if created:
-                    self.import_result_messages.append("create Product Migration path \"%s\" for Product "
-                                                       "\"%s\"" % (row["migration source"], row["product id"]))
-                else:
-                    self.import_result_messages.append("update Product Migration path \"%s\" for Product "
-                                                       "\"%s\"" % (row["migration source"], row["product id"]))
+                self._add_result_message(
+                    "%s Product Migration path \"%s\" for Product \"%s\"" % (
+                        "create" if created else "update", migration_source_name, product_id
+                    ),
+                    product_id,
+                    NotificationMessage.MESSAGE_SUCCESS
+                )
 
-            except ValidationError as ex:
-                self.import_result_messages.append("cannot save Product Migration for %s: %s" % (row["product id"],
-                                                                                                 str(ex)))
+            except (ValidationError, InvalidRowValueException) as ex:
+                self._add_result_message("cannot save Product Migration for %s: %s" % (product_id, str(ex)),
+                                         product_id, NotificationMessage.MESSAGE_ERROR)
 
             except Product.DoesNotExist:
-                self.import_result_messages.append("Product %s not found in database, skip entry" % row["product id"])
-
+                self._add_result_message("Product %s not found in database, skip entry" % product_id,
+                                         product_id, NotificationMessage.MESSAGE_WARNING)
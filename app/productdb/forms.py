@@ -104,10 +104,12 @@ class ProductListForm(forms.ModelForm):
 class ImportProductsFileUploadForm(forms.Form):
     FILE_EXT_WHITELIST = [
         "xlsx",
+        "csv",
     ]
 
     excel_file = forms.FileField(
-        label="Upload Excel File:"
+        label="Upload Excel File:",
+        help_text="Excel (.xlsx) or CSV file, large files are processed in chunks"
     )
 
     suppress_notification = forms.BooleanField(
@@ -122,6 +124,26 @@ class ImportProductsFileUploadForm(forms.Form):
                   "based on a price list)"
     )
 
+    bulk_import = forms.BooleanField(
+        required=False,
+        label="Bulk import mode",
+        help_text="Use this option for large price lists. The Products are written in chunks of 1000 entries and "
+                  "the changes of a chunk are stored within a single revision."
+    )
+
+    parallel_import = forms.BooleanField(
+        required=False,
+        label="Parallel import",
+        help_text="Split the file into chunks that are imported in parallel by the available worker processes"
+    )
+
+    preview_only = forms.BooleanField(
+        required=False,
+        label="Preview changes before import",
+        help_text="Compare the file with the database without changing it, the changes can be downloaded and are "
+                  "applied after confirmation"
+    )
+
     def __init__(self, user=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if user:
@@ -143,12 +165,19 @@ class ImportProductsFileUploadForm(forms.Form):
             raise forms.ValidationError("file type not supported.")
 
         if uploaded_file.name.split('.')[-1] not in self.FILE_EXT_WHITELIST:
-            raise forms.ValidationError("only .xlsx files are allowed")
+            raise forms.ValidationError("only .xlsx and .csv files are allowed")
 
 
 class ImportProductMigrationFileUploadForm(forms.Form):
     excel_file = forms.FileField(label="Product Migration Excel File for import:")
 
+    preview_only = forms.BooleanField(
+        required=False,
+        label="Preview changes before import",
+        help_text="Compare the file with the database without changing it, the changes can be downloaded and are "
+                  "applied after confirmation"
+    )
+
     def clean_excel_file(self):
         # validation of the import products excel file
         uploaded_file = self.cleaned_data.get("excel_file")
@@ -0,0 +1,77 @@
+"""
+registry of the successfully imported price lists (identified by the content hash of the JobFile), an identical
+re-upload is not imported again if the products were not changed since the last import
+
+Every change of the products (save, delete, import or bulk operation) replaces the generation of the product data. An
+imported file is only registered for the current generation, therefore all registrations are invalidated by a change.
+"""
+import uuid
+from django.core.cache import cache
+from django.utils.timezone import now
+
+IMPORTED_FILE_CACHE_KEY = "PDB_IMPORTED_FILE_%s"
+PRODUCT_DATA_GENERATION_CACHE_KEY = "PDB_PRODUCT_DATA_GENERATION"
+
+# registrations are kept for 30 days
+IMPORTED_FILE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def invalidate_imported_files():
+    """invalidate all registered files (required if the product data was changed)"""
+    cache.delete(PRODUCT_DATA_GENERATION_CACHE_KEY)
+
+
+def get_product_data_generation():
+    """
+    token of the current product data, the token is replaced if the products are changed (also used by other jobs to
+    detect changes of the product data)
+    """
+    generation = cache.get(PRODUCT_DATA_GENERATION_CACHE_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        cache.set(PRODUCT_DATA_GENERATION_CACHE_KEY, generation, IMPORTED_FILE_TIMEOUT)
+
+    return generation
+
+
+def register_imported_file(content_hash, update_only=False):
+    """
+    register a file that was imported successfully (without invalid entries), must be called after the changes of the
+    import were written to the database
+    :param content_hash: content hash of the JobFile
+    :param update_only: the file was imported in update only mode
+    """
+    if not content_hash:
+        return
+
+    generation = get_product_data_generation()
+    cache.set(IMPORTED_FILE_CACHE_KEY % content_hash, {
+        "generation": generation,
+        "update_only": update_only,
+        "timestamp": now().strftime("%Y-%m-%d %H:%M:%S %Z")
+    }, IMPORTED_FILE_TIMEOUT)
+
+
+def get_imported_file(content_hash, update_only=False):
+    """
+    get the registration of an identical file that was imported with the current product data
+    :param content_hash: content hash of the JobFile
+    :param update_only: the file should be imported in update only mode (a file that was imported in update only mode
+                        must be imported again if new products can be created)
+    :return: dictionary with the timestamp of the import or None, if the file must be imported
+    """
+    if not content_hash:
+        return None
+
+    imported_file = cache.get(IMPORTED_FILE_CACHE_KEY % content_hash)
+    if imported_file is None:
+        return None
+
+    generation = cache.get(PRODUCT_DATA_GENERATION_CACHE_KEY)
+    if generation is None or imported_file["generation"] != generation:
+        return None
+
+    if imported_file["update_only"] and not update_only:
+        return None
+
+    return imported_file
@@ -0,0 +1,180 @@
+"""
+import scoped lookup caches for the reference tables (Vendor, Product Group and Product Migration Source) and the
+Product lookups of a chunk, the amount of reference table queries of an import is independent of the amount of rows
+"""
+import logging
+from cacheops import invalidate_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from psycopg2.extras import execute_values
+from app.productdb import bulk_operations
+from app.productdb.models import Product, Vendor, ProductGroup, ProductMigrationSource
+
+logger = logging.getLogger("productdb")
+
+# max. amount of values within a single IN lookup
+LOOKUP_BATCH_SIZE = 10000
+
+
+class ImportLookupCache:
+    """
+    Cache for the reference tables that are used during a single import. Every table is loaded once (on first access),
+    missing Product Groups and Product Migration Sources are created in batches. The cache should not be used beyond
+    the scope of an import job.
+    """
+    def __init__(self):
+        self._vendors_by_name = None
+        self._vendors_by_id = None
+        self._product_groups = None             # (name, vendor ID): product group
+        self._product_groups_by_id = None
+        self._migration_sources = None          # name: product migration source
+
+    def _load_vendors(self):
+        if self._vendors_by_id is None:
+            vendors = list(Vendor.objects.all())
+            self._vendors_by_name = {v.name: v for v in vendors}
+            self._vendors_by_id = {v.id: v for v in vendors}
+
+    def _load_product_groups(self):
+        if self._product_groups is None:
+            self._product_groups = {}
+            self._product_groups_by_id = {}
+            for pg in ProductGroup.objects.select_related("vendor"):
+                self._add_product_group(pg)
+
+    def _add_product_group(self, product_group):
+        self._product_groups[(product_group.name, product_group.vendor_id)] = product_group
+        self._product_groups_by_id[product_group.id] = product_group
+
+    def _load_migration_sources(self):
+        if self._migration_sources is None:
+            self._migration_sources = {pms.name: pms for pms in ProductMigrationSource.objects.all()}
+
+    def get_vendor(self, name):
+        """
+        get the Vendor with the given name
+        :raises Vendor.DoesNotExist: if the Vendor is not part of the database
+        """
+        self._load_vendors()
+        try:
+            return self._vendors_by_name[name]
+
+        except KeyError:
+            raise Vendor.DoesNotExist("Vendor matching query does not exist.")
+
+    def get_vendor_by_id(self, vendor_id):
+        """
+        get the Vendor with the given ID
+        :raises Vendor.DoesNotExist: if the Vendor is not part of the database
+        """
+        self._load_vendors()
+        try:
+            return self._vendors_by_id[vendor_id]
+
+        except KeyError:
+            raise Vendor.DoesNotExist("Vendor matching query does not exist.")
+
+    def get_product_group_by_id(self, product_group_id):
+        """get the Product Group with the given ID or None"""
+        if product_group_id is None:
+            return None
+
+        self._load_product_groups()
+        if product_group_id not in self._product_groups_by_id:
+            # created outside of the import
+            pg = ProductGroup.objects.filter(id=product_group_id).first()
+            if pg:
+                self._add_product_group(pg)
+            return pg
+
+        return self._product_groups_by_id[product_group_id]
+
+    def get_product_group(self, name, vendor_id):
+        """get the Product Group with the given name and Vendor, it is created if it doesn't exist"""
+        self._load_product_groups()
+        if (name, vendor_id) not in self._product_groups:
+            pg, _ = ProductGroup.objects.get_or_create(name=name, vendor=self.get_vendor_by_id(vendor_id))
+            self._add_product_group(pg)
+
+        return self._product_groups[(name, vendor_id)]
+
+    def create_product_groups(self, name_vendor_id_pairs):
+        """
+        create the missing Product Groups using a single statement per batch
+        :param name_vendor_id_pairs: iterable of tuples with the name and the Vendor ID of the Product Group
+        :return: amount of Product Groups that were created
+        """
+        self._load_product_groups()
+        max_length = ProductGroup._meta.get_field("name").max_length
+        # invalid names are created one by one (see get_product_group), the validation error is reported for the row
+        missing = sorted(set([
+            (name, vendor_id) for name, vendor_id in name_vendor_id_pairs
+            if (name, vendor_id) not in self._product_groups and 0 < len(name) <= max_length
+        ]))
+        if len(missing) == 0:
+            return 0
+
+        with connection.cursor() as cursor:
+            for batch in bulk_operations.chunks(missing, LOOKUP_BATCH_SIZE):
+                # the raw psycopg2 cursor is required for the execute_values helper
+                execute_values(
+                    cursor.cursor,
+                    "INSERT INTO %s (name, vendor_id) VALUES %%s "
+                    "ON CONFLICT (name, vendor_id) DO NOTHING" % ProductGroup._meta.db_table,
+                    batch,
+                    page_size=LOOKUP_BATCH_SIZE
+                )
+
+        for batch in bulk_operations.chunks(missing, LOOKUP_BATCH_SIZE):
+            for pg in ProductGroup.objects.filter(name__in=set([name for name, _ in batch])).select_related("vendor"):
+                self._add_product_group(pg)
+
+        # raw SQL statements are not tracked by cacheops
+        invalidate_model(ProductGroup)
+        logger.debug("%d product groups created" % len(missing))
+
+        return len(missing)
+
+    def get_migration_source(self, name):
+        """get the Product Migration Source with the given name or None"""
+        self._load_migration_sources()
+        return self._migration_sources.get(name, None)
+
+    def create_migration_sources(self, names, preference=10):
+        """
+        create the missing Product Migration Sources using a bulk insert, invalid names are skipped
+        :return: list with the names of the Product Migration Sources that were created
+        """
+        self._load_migration_sources()
+        new_sources = []
+        for name in sorted(set([name for name in names if name not in self._migration_sources])):
+            pms = ProductMigrationSource(name=name, preference=preference)
+            try:
+                pms.full_clean(validate_unique=False)
+                new_sources.append(pms)
+
+            except ValidationError:
+                # the validation error is reported for the row
+                logger.debug("invalid product migration source name: %s" % name)
+
+        if len(new_sources) == 0:
+            return []
+
+        ProductMigrationSource.objects.bulk_create(new_sources, batch_size=LOOKUP_BATCH_SIZE)
+        for pms in new_sources:
+            self._migration_sources[pms.name] = pms
+
+        return [pms.name for pms in new_sources]
+
+    @staticmethod
+    def get_products(product_ids):
+        """
+        load the Products with the given Product IDs using a single IN query per batch (the Products are not cached)
+        :return: dictionary with the Product ID as key
+        """
+        product_ids = sorted(set([pid for pid in product_ids if pid]))
+        result = {}
+        for batch in bulk_operations.chunks(product_ids, LOOKUP_BATCH_SIZE):
+            result.update({p.product_id: p for p in Product.objects.filter(product_id__in=batch)})
+
+        return result
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from app.productdb.copy_import import ProductsCopyImporter
+from app.productdb.excel_import import InvalidImportFormatException, InvalidExcelFileFormat
+
+
+class Command(BaseCommand):
+    help = "import a price list (Excel or CSV file) using COPY and a set-based merge, intended for the refresh of " \
+           "the entire catalog (no revisions are created)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="path to the Excel or CSV file")
+        parser.add_argument(
+            "--update-only",
+            action="store_true",
+            dest="update_only",
+            default=False,
+            help="don't create new products, update only existing ones"
+        )
+
+    def handle(self, *args, **options):
+        importer = ProductsCopyImporter(path_to_excel_file=options["file"])
+        try:
+            importer.verify_file()
+
+        except (InvalidImportFormatException, InvalidExcelFileFormat) as ex:
+            raise CommandError("import failed, invalid file format (%s)" % ex)
+
+        importer.import_to_database(
+            status_callback=lambda msg, **kwargs: self.stdout.write(msg) if options["verbosity"] > 1 else None,
+            update_only=options["update_only"]
+        )
+
+        for msg in importer.import_result_messages:
+            self.stdout.write(msg)
+
+        self.stdout.write(
+            "created: %d, updated: %d, unchanged: %d, invalid: %d" % (
+                importer.created_products,
+                importer.updated_products,
+                importer.unchanged_products,
+                importer.invalid_products
+            )
+        )
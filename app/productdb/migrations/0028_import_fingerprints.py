@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2017-12-02 10:14
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productdb', '0027_auto_20170302_2319'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobfile',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 hash of the file content', max_length=64, null=True, verbose_name='content hash'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='fingerprint of the last imported values, cleared if the product is changed outside of the import', max_length=40, null=True, verbose_name='import fingerprint'),
+        ),
+    ]
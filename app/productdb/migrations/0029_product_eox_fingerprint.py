@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2017-12-09 16:41
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productdb', '0028_import_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='eox_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='fingerprint of the last synchronized Cisco EoX API record, cleared if the product is changed outside of the synchronization', max_length=40, null=True, verbose_name='EoX fingerprint'),
+        ),
+    ]
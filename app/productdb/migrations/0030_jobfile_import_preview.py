@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2017-12-16 11:02
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('productdb', '0029_product_eox_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobfile',
+            name='created_by',
+            field=models.ForeignKey(blank=True, help_text='user that uploaded the file or created the import preview', null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='created by'),
+        ),
+        migrations.AddField(
+            model_name='jobfile',
+            name='import_preview',
+            field=models.BooleanField(default=False, help_text='the file contains the changes of an import preview (JSON)', verbose_name='import preview'),
+        ),
+    ]
@@ -8,6 +8,7 @@ from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.cache import cache
 from django.core.cache.utils import make_template_fragment_key
+from django.core.files import File
 from django.db import models
 from django.db.models import Q
 from django.db.models.signals import pre_delete, post_save, pre_save, post_delete
@@ -16,6 +17,7 @@ from django.utils.timezone import datetime, now
 from app.config.settings import AppSettings
 from app.productdb.validators import validate_product_list_string
 from app.productdb import utils
+from app.productdb import imported_files
 
 CURRENCY_CHOICES = (
     ('EUR', 'Euro'),
@@ -23,10 +25,55 @@ CURRENCY_CHOICES = (
 )
 
 
+class HashingFile(File):
+    """File wrapper that computes the content hash while the file is written to the storage"""
+    def __init__(self, file, name=None):
+        super().__init__(file, name)
+        self.content_hash = hashlib.sha256()
+
+    def chunks(self, chunk_size=None):
+        for chunk in super().chunks(chunk_size):
+            self.content_hash.update(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8"))
+            yield chunk
+
+
 class JobFile(models.Model):
     """Uploaded files for tasks"""
     file = models.FileField(upload_to=settings.DATA_DIRECTORY)
 
+    content_hash = models.CharField(
+        verbose_name="content hash",
+        help_text="SHA-256 hash of the file content",
+        max_length=64,
+        null=True,
+        blank=True,
+        db_index=True
+    )
+
+    import_preview = models.BooleanField(
+        verbose_name="import preview",
+        help_text="the file contains the changes of an import preview (JSON)",
+        default=False
+    )
+
+    created_by = models.ForeignKey(
+        User,
+        verbose_name="created by",
+        help_text="user that uploaded the file or created the import preview",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE
+    )
+
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            # write the upload to the storage (instead of the pre_save of the FileField) to compute the content hash
+            content = HashingFile(self.file.file, self.file.name)
+            self.file.save(self.file.name, content, save=False)
+            self.content_hash = content.content_hash.hexdigest()
+
+        super().save(*args, **kwargs)
+
 
 @receiver(pre_delete, sender=JobFile)
 def delete_job_file(sender, instance, **kwargs):
@@ -136,6 +183,9 @@ class Product(models.Model):
     # preference greater than the following constant is considered preferred
     LESS_PREFERRED_PREFERENCE_VALUE = 25
 
+    # state of the last lc_state_sync update, removed if the Product ID or the Vendor of a product is changed
+    LC_STATE_SYNC_STATE_CACHE_KEY = "CISCO_EOX_LC_STATE_SYNC_STATE"
+
     product_id = models.CharField(
         unique=True,
         max_length=512,
@@ -291,6 +341,25 @@ class Product(models.Model):
         blank=True
     )
 
+    import_fingerprint = models.CharField(
+        verbose_name="import fingerprint",
+        help_text="fingerprint of the last imported values, cleared if the product is changed outside of the import",
+        max_length=40,
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    eox_fingerprint = models.CharField(
+        verbose_name="EoX fingerprint",
+        help_text="fingerprint of the last synchronized Cisco EoX API record, cleared if the product is changed outside "
+                  "of the synchronization",
+        max_length=40,
+        null=True,
+        blank=True,
+        editable=False
+    )
+
     @property
     def current_lifecycle_states(self):
         """
@@ -356,15 +425,34 @@ class Product(models.Model):
         super().__init__(*args, **kwargs)
         self.__loaded_list_price = self.list_price
         self.__loaded_lc_state_sync = self.lc_state_sync
+        self.__loaded_import_fingerprint = self.import_fingerprint
+        self.__loaded_eox_fingerprint = self.eox_fingerprint
+        self.__loaded_lc_state_sync_relevant_values = (self.product_id, self.vendor_id)
 
     def __str__(self):
         return self.product_id
 
-    def save(self, *args, **kwargs):
+    def is_lc_state_sync_relevant_value_changed(self):
+        """True if the Product ID or the Vendor was changed since the object was loaded"""
+        return self.__loaded_lc_state_sync_relevant_values != (self.product_id, self.vendor_id)
+
+    def update_change_timestamps(self):
+        """
+        normalize the values and update the change timestamps before the object is written to the database (also
+        required for bulk operations, that bypass the save method)
+        """
         # strip URL value
         if self.eol_reference_url is not None:
             self.eol_reference_url = self.eol_reference_url.strip()
 
+        if self.__loaded_import_fingerprint == self.import_fingerprint:
+            # not changed by the import, the values may differ from the last imported values
+            self.import_fingerprint = None
+
+        if self.__loaded_eox_fingerprint == self.eox_fingerprint:
+            # not changed by the Cisco EoX API synchronization
+            self.eox_fingerprint = None
+
         if self.__loaded_list_price != self.list_price:
             # price has changed, update flag
             self.list_price_timestamp = datetime.today()
@@ -374,6 +462,9 @@ class Product(models.Model):
             # state sync not changed, update of the update timestamp
             self.update_timestamp = datetime.today()
 
+    def save(self, *args, **kwargs):
+        self.update_change_timestamps()
+
         # clean the object before save
         self.full_clean()
         super(Product, self).save(*args, **kwargs)
@@ -951,17 +1042,34 @@ def update_db_state_for_the_migration_options_with_product_id(sender, instance,
 def invalidate_product_related_cache_values(sender, instance, **kwargs):
     """delete cache values that are somehow related to the Product data model"""
     cache.delete("PDB_HOMEPAGE_CONTEXT")
+    imported_files.invalidate_imported_files()
+    if not kwargs.get("created", False) and instance.is_lc_state_sync_relevant_value_changed():
+        # a changed Product ID or Vendor affects the lc_state_sync flag (not part of the state of the last computation)
+        cache.delete(Product.LC_STATE_SYNC_STATE_CACHE_KEY)
+
+
+@receiver(post_save, sender=ProductGroup)
+@receiver(post_save, sender=Vendor)
+def invalidate_import_fingerprints(sender, instance, created, **kwargs):
+    """the fingerprints of the products are based on the names of the Vendor and the Product Group"""
+    if not created:
+        products = Product.objects.filter(vendor=instance) if sender == Vendor else \
+            Product.objects.filter(product_group=instance)
+        products.exclude(import_fingerprint=None).update(import_fingerprint=None)
+        imported_files.invalidate_imported_files()
 
 
 @receiver(pre_save, sender=ProductMigrationOption)
 def update_product_migration_replacement_id_relation_field(sender, instance, **kwargs):
     """ensures that a database relation for a replacement product ID exists, if the replacement_product_id is part of
-    the database, validates that these two values cannot be the same"""
+    the database, validates that these two values cannot be the same (the lookup is skipped if the relation was
+    already resolved, e.g. by the import, see replacement_db_product_resolved)"""
     try:
         # check that the replacement product id is not the same as the original product id (would create a loop
         # within migration path computation)
         if instance.replacement_product_id != instance.product.product_id:
-            instance.replacement_db_product = Product.objects.get(product_id=instance.replacement_product_id)
+            if not getattr(instance, "replacement_db_product_resolved", False):
+                instance.replacement_db_product = Product.objects.get(product_id=instance.replacement_product_id)
 
         else:
             raise ValidationError({
@@ -974,3 +1082,11 @@ def update_product_migration_replacement_id_relation_field(sender, instance, **k
 
     except Exception:
         instance.replacement_db_product = None
+
+
+@receiver([post_save, post_delete], sender=ProductMigrationOption)
+def invalidate_eox_fingerprint(sender, instance, **kwargs):
+    """the migration options are part of the EoX record, the record is applied again with the next synchronization if
+    an option is changed outside of the synchronization (see eox_synchronized)"""
+    if not getattr(instance, "eox_synchronized", False):
+        Product.objects.filter(id=instance.product_id).exclude(eox_fingerprint=None).update(eox_fingerprint=None)
@@ -0,0 +1,169 @@
+"""
+revision tracking for imports and synchronizations: the changed objects are stored either within a revision per
+object (the default behavior of django-reversion), within a revision per chunk of objects or within a single revision
+per job, the versions of a chunk or job are written using batched inserts
+"""
+import logging
+from collections import OrderedDict
+from django.conf import settings
+from django.db import transaction
+from django.core import serializers
+from django.utils.encoding import force_text
+from django.utils.timezone import now
+from reversion import revisions as reversion
+from reversion.models import Revision, Version
+
+logger = logging.getLogger("productdb")
+
+REVISION_PER_ROW = "row"
+REVISION_PER_CHUNK = "chunk"
+REVISION_PER_JOB = "job"
+
+REVISION_GRANULARITIES = (
+    REVISION_PER_ROW,
+    REVISION_PER_CHUNK,
+    REVISION_PER_JOB,
+)
+
+
+class RevisionBatch:
+    """
+    collects the changed objects of an import or synchronization job and stores them according to the configured
+    revision granularity:
+      * row - every object is saved within its own revision (the versions are created by django-reversion)
+      * chunk - the versions of chunk_size objects are stored within a single revision
+      * job - the versions of all objects are stored within a single revision (written every chunk_size objects)
+
+    If an object is added multiple times to the same revision, only the last state is kept. Related objects are not
+    followed.
+    """
+    def __init__(self, comment, user=None, granularity=None, chunk_size=None):
+        """
+        :param comment: comment of the revisions
+        :param user: user of the revisions (optional)
+        :param granularity: revision granularity, if None, the PDB_REVISION_GRANULARITY setting is used
+        :param chunk_size: amount of objects per chunk, if None, the PDB_REVISION_CHUNK_SIZE setting is used
+        """
+        self.comment = comment
+        self.user = user
+        self.granularity = granularity if granularity else settings.PDB_REVISION_GRANULARITY
+        self.chunk_size = chunk_size if chunk_size else settings.PDB_REVISION_CHUNK_SIZE
+        if self.granularity not in REVISION_GRANULARITIES:
+            raise ValueError("invalid revision granularity '%s', valid values are %s" % (
+                self.granularity, ", ".join(REVISION_GRANULARITIES)
+            ))
+
+        self.revision = None
+        self.amount_of_revisions = 0
+        self.amount_of_versions = 0
+        self._objects = OrderedDict()      # (model, primary key): object
+
+    @property
+    def per_row(self):
+        return self.granularity == REVISION_PER_ROW
+
+    def save(self, obj):
+        """save the object and track the change according to the revision granularity"""
+        if self.per_row:
+            with transaction.atomic(), reversion.create_revision():
+                obj.save()
+                self._set_revision_meta_data()
+            self.amount_of_revisions += 1
+            self.amount_of_versions += 1
+
+        else:
+            with transaction.atomic():
+                obj.save()
+            self.add(obj)
+
+    def add(self, obj):
+        """
+        add an object that was already written to the database (e.g. using a bulk operation), the object must have a
+        primary key
+        """
+        if self.per_row:
+            with transaction.atomic(), reversion.create_revision():
+                reversion.add_to_revision(obj)
+                self._set_revision_meta_data()
+            self.amount_of_revisions += 1
+            self.amount_of_versions += 1
+            return
+
+        self._objects[(obj.__class__, obj.pk)] = obj
+        if len(self._objects) >= self.chunk_size:
+            # in the job granularity, the versions are written in batches to the same revision
+            self.flush()
+
+    def savepoint(self):
+        """
+        state of the batch before a transaction that adds objects, see rollback
+        """
+        return self.revision, self.amount_of_revisions, self.amount_of_versions, OrderedDict(self._objects)
+
+    def rollback(self, savepoint):
+        """
+        restore the state of the given savepoint if the transaction was rolled back (a revision that was written
+        within the transaction does not exist anymore, the objects that were pending before are written again)
+        """
+        self.revision, self.amount_of_revisions, self.amount_of_versions, self._objects = savepoint
+
+    def end_chunk(self):
+        """write the pending versions if the objects are stored within a revision per chunk"""
+        if self.granularity == REVISION_PER_CHUNK:
+            self.flush()
+
+    def flush(self):
+        """write the pending versions using batched inserts"""
+        if len(self._objects) == 0:
+            return
+
+        with transaction.atomic():
+            if self.revision is None or self.granularity == REVISION_PER_CHUNK:
+                self.revision = Revision.objects.create(
+                    date_created=now(),
+                    user=self.user,
+                    comment=self.comment
+                )
+                self.amount_of_revisions += 1
+
+            versions = [self._create_version(obj) for obj in self._objects.values()]
+            if self.granularity == REVISION_PER_JOB:
+                # an object that was already written in a previous batch is replaced with the current state
+                for content_type, object_ids in self._group_by_content_type(versions).items():
+                    Version.objects.filter(
+                        revision=self.revision,
+                        content_type=content_type,
+                        object_id__in=object_ids
+                    ).delete()
+
+            Version.objects.bulk_create(versions, batch_size=self.chunk_size)
+            self.amount_of_versions += len(versions)
+
+        logger.debug("%d versions written to revision %d" % (len(versions), self.revision.id))
+        self._objects.clear()
+
+    def _set_revision_meta_data(self):
+        if self.user:
+            reversion.set_user(self.user)
+        reversion.set_comment(self.comment)
+
+    def _create_version(self, obj):
+        """create the version of an object in the same way as django-reversion"""
+        # the serialization options of the registered model (e.g. registered by the CompareVersionAdmin)
+        version_options = reversion._get_options(obj.__class__)
+        return Version(
+            revision=self.revision,
+            content_type=reversion._get_content_type(obj.__class__, obj._state.db or "default"),
+            object_id=force_text(obj.pk),
+            db=obj._state.db or "default",
+            format=version_options.format,
+            serialized_data=serializers.serialize(version_options.format, (obj,), fields=version_options.fields),
+            object_repr=force_text(obj)
+        )
+
+    @staticmethod
+    def _group_by_content_type(versions):
+        result = {}
+        for version in versions:
+            result.setdefault(version.content_type, []).append(version.object_id)
+        return result
@@ -1,10 +1,19 @@
 import logging
+import json
+from celery import chord, group
+from celery.utils import uuid
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.urlresolvers import reverse
 from django.contrib.auth.models import User
-from app.config.models import NotificationMessage
+from app.config.models import NotificationMessage, ImportRun
+from app.productdb import imported_files
+from app.productdb.copy_import import ProductsCopyImporter
 from app.productdb.excel_import import ProductsExcelImporter, InvalidImportFormatException, InvalidExcelFileFormat, \
-    ProductMigrationsExcelImporter
+    ProductMigrationsExcelImporter, ImportDiff
 from app.productdb.models import JobFile, ProductCheck
-from django_project.celery import app, TaskState
+from django_project.celery import app, TaskState, ProgressReporter
 import time
 
 logger = logging.getLogger("productdb")
@@ -23,11 +32,8 @@ def perform_product_check(self, product_check_id):
     :param product_check_id:
     :return:
     """
-    def update_task_state(status_message):
-        """Update the status message of the task, which is displayed in the watch view"""
-        self.update_state(state=TaskState.PROCESSING, meta={
-            "status_message": status_message
-        })
+    # throttled status updates, displayed in the watch view
+    update_task_state = ProgressReporter(self)
 
     update_task_state("Load Product Check...")
 
@@ -68,11 +74,8 @@ def import_product_migrations(self, job_file_id, user_for_revision=None):
     :param user_for_revision: username that should be used for the revision tracking (only if started manually)
     :return:
     """
-    def update_task_state(status_message):
-        """Update the status message of the task, which is displayed in the watch view"""
-        self.update_state(state=TaskState.PROCESSING, meta={
-            "status_message": status_message
-        })
+    # throttled status updates, displayed in the watch view
+    update_task_state = ProgressReporter(self)
 
     update_task_state("Try to import uploaded file...")
 
@@ -99,19 +102,13 @@ def import_product_migrations(self, job_file_id, user_for_revision=None):
         import_product_migrations_excel.import_to_database(status_callback=update_task_state)
         update_task_state("Database import finished, processing results...")
 
-        status_message = "<p style=\"text-align: left\">Product migrations successful updated</p>" \
-                         "<ul style=\"text-align: left\">"
-        for msg in import_product_migrations_excel.import_result_messages:
-            status_message += "<li>%s</li>" % msg
-        status_message += "</ul>"
+        result = _create_product_migrations_import_result(
+            _create_import_run(self.request.id, import_product_migrations_excel.import_result_entries)
+        )
 
         # drop the JobFile
         import_excel_file.delete()
 
-        result = {
-            "status_message": status_message
-        }
-
     except (InvalidImportFormatException, InvalidExcelFileFormat) as ex:
         msg = "import failed, invalid file format (%s)" % ex
         logger.error(msg, ex)
@@ -133,20 +130,167 @@ def import_product_migrations(self, job_file_id, user_for_revision=None):
     return result
 
 
+def _add_import_result_entries(import_run, import_result_entries):
+    """
+    write the import result entries (Product ID, status and message, see BaseExcelImporter) to the ImportRun in bulk
+    """
+    for product_id, status, msg in import_result_entries:
+        import_run.add_item(msg, key=product_id, status=status)
+    import_run.flush()
+
+
+def _create_import_run(task_id, import_result_entries=None):
+    """
+    create the ImportRun that stores the result messages of an import
+    """
+    import_run = ImportRun.objects.create(task_id=task_id)
+    _add_import_result_entries(import_run, import_result_entries if import_result_entries else [])
+
+    return import_run
+
+
+def _get_import_run_messages(import_run, notification=None):
+    """
+    HTML list items of the first PDB_RESULT_SUMMARY_MESSAGES messages of the ImportRun (all messages are paged in the
+    detail view of the Notification Message)
+    """
+    amount_of_messages = import_run.items.count()
+    message = ""
+    for e in import_run.items.values_list("message", flat=True)[:settings.PDB_RESULT_SUMMARY_MESSAGES]:
+        message += "<li>%s</li>" % e
+
+    if amount_of_messages > settings.PDB_RESULT_SUMMARY_MESSAGES:
+        message += "<li>%d more messages" % (amount_of_messages - settings.PDB_RESULT_SUMMARY_MESSAGES)
+        if notification:
+            message += ", <a href=\"%s\">view all messages</a>" % reverse(
+                "productdb_config:notification-detail", kwargs={"message_id": notification.id}
+            )
+        message += "</li>"
+
+    return message
+
+
+def _create_product_migrations_import_result(import_run):
+    """
+    create the result of a product migrations import, the result messages are stored in the ImportRun, only the first
+    PDB_RESULT_SUMMARY_MESSAGES messages are part of the status message
+    :return: task result
+    """
+    import_run.finish()
+
+    return {
+        "status_message": "<p style=\"text-align: left\">Product migrations successful updated</p>"
+                          "<ul style=\"text-align: left\">%s</ul>" % _get_import_run_messages(import_run),
+        "import_run_id": import_run.id
+    }
+
+
+def _create_price_list_import_result(valid_imported_products, invalid_products, import_run,
+                                    create_notification_on_server=True, user_for_revision=None):
+    """
+    create the detail message of a price list import and the Notification Message on the server (if required), the
+    result messages are stored in the ImportRun, only the first PDB_RESULT_SUMMARY_MESSAGES messages are part of the
+    detail message
+    :return: task result with the detail message and the ID of the ImportRun
+    """
+    summary_msg = "User <strong>%s</strong> imported a Product list, %s Products " \
+                  "changed." % (user_for_revision, valid_imported_products)
+    detail_msg = "<div style=\"text-align:left;\">%s " \
+                 "Products successful updated. " % valid_imported_products
+
+    if invalid_products != 0:
+        detail_msg += "%s entries are invalid. Please check the following messages for " \
+                      "more details." % invalid_products
+
+    import_run.flush()
+
+    notification = None
+    if create_notification_on_server:
+        # the messages are paged in the detail view of the Notification Message
+        notification = NotificationMessage.objects.create(
+            title="Import product list",
+            type=NotificationMessage.MESSAGE_INFO,
+            summary_message=summary_msg,
+            detailed_message=detail_msg + "</div>"
+        )
+    import_run.finish(notification=notification)
+
+    if import_run.items.exists():
+        detail_msg += "<ul>%s</ul></div>" % _get_import_run_messages(import_run, notification)
+
+    return {
+        "status_message": detail_msg,
+        "import_run_id": import_run.id
+    }
+
+
+def _start_parallel_price_list_import(import_products_excel, job_file_id, amount_of_chunks, import_run,
+                                     create_notification_on_server=True, update_only=False, user_for_revision=None,
+                                     bulk_mode=False):
+    """
+    split the rows of the verified file into chunks and import them as a group of import_price_list_chunk tasks,
+    rows with the same Product ID are part of the same chunk (all chunks write their messages to the given ImportRun).
+    The file is read once, the rows of every chunk are stored in a separate CSV file (JobFile).
+    :return: result of the summary task if executed eager, otherwise the IDs of the tasks
+    """
+    chunk_files = []
+    for chunk, (csv_file, amount_of_rows) in enumerate(import_products_excel.split_into_chunk_files(amount_of_chunks)):
+        with csv_file:
+            chunk_files.append((
+                JobFile.objects.create(file=File(csv_file, name="import_chunk_%s_%d.csv" % (job_file_id, chunk))),
+                amount_of_rows
+            ))
+    chunk_task_ids = [uuid() for _ in chunk_files]
+
+    chunk_tasks = group([
+        import_price_list_chunk.s(
+            chunk_file_id=chunk_file.id,
+            amount_of_entries=amount_of_rows,
+            import_run_id=import_run.id,
+            update_only=update_only,
+            user_for_revision=user_for_revision,
+            bulk_mode=bulk_mode
+        ).set(task_id=task_id) for (chunk_file, amount_of_rows), task_id in zip(chunk_files, chunk_task_ids)
+    ])
+    summary_task = chord(chunk_tasks)(summarize_price_list_import.s(
+        job_file_id=job_file_id,
+        import_run_id=import_run.id,
+        create_notification_on_server=create_notification_on_server,
+        update_only=update_only,
+        user_for_revision=user_for_revision
+    ))
+
+    if summary_task.ready():
+        # executed eager
+        return summary_task.get()
+
+    # the progress of the chunks is combined in the task status view
+    return {
+        "status_message": "Import started in %d parallel chunks..." % len(chunk_task_ids),
+        "parallel_tasks": {
+            "task_ids": chunk_task_ids,
+            "summary_task_id": summary_task.id,
+            "total_entries": sum([amount_of_rows for _, amount_of_rows in chunk_files])
+        }
+    }
+
+
 @app.task(serializer='json', name="productdb.import_price_list", bind=True)
-def import_price_list(self, job_file_id, create_notification_on_server=True, update_only=False, user_for_revision=None):
+def import_price_list(self, job_file_id, create_notification_on_server=True, update_only=False, user_for_revision=None,
+                      bulk_mode=False, amount_of_chunks=1):
     """
     import products from the given price list
     :param job_file_id: ID within the database that references the Excel file that should be imported
     :param create_notification_on_server: create a new Notification Message on the Server
     :param update_only: Don't create new products in the database, update only existing ones
     :param user_for_revision: username that should be used for the revision tracking (only if started manually)
+    :param bulk_mode: write the products in chunks using bulk operations (recommended for large price lists)
+    :param amount_of_chunks: if greater than 1, the rows of the file are split into the given amount of chunks that
+                             are imported in parallel (see import_price_list_chunk), the results are combined by the
+                             summarize_price_list_import task
     """
-    def update_task_state(status_message):
-        """Update the status message of the task, which is displayed in the watch view"""
-        self.update_state(state=TaskState.PROCESSING, meta={
-            "status_message": status_message
-        })
+    # throttled status updates, displayed in the watch view
+    update_task_state = ProgressReporter(self)
 
     update_task_state("Try to import uploaded file...")
 
@@ -161,6 +305,24 @@ def import_price_list(self, job_file_id, create_notification_on_server=True, upd
         }
         return result
 
+    imported_file = imported_files.get_imported_file(import_excel_file.content_hash, update_only)
+    if imported_file:
+        # identical file was already imported and the products were not changed since then
+        msg = "The uploaded file is identical to the file that was imported at %s, " \
+              "no changes required." % imported_file["timestamp"]
+        logger.info("skip import of job file %s (%s)" % (job_file_id, msg))
+        import_excel_file.delete()
+        result = _create_price_list_import_result(
+            0, 0, _create_import_run(self.request.id, [("", NotificationMessage.MESSAGE_INFO, msg)]),
+            create_notification_on_server=create_notification_on_server,
+            user_for_revision=user_for_revision
+        )
+
+        if self.request.is_eager:
+            self.update_state(state=TaskState.SUCCESS, meta=result)
+
+        return result
+
     # verify that file exists
     try:
         import_products_excel = ProductsExcelImporter(
@@ -168,45 +330,304 @@ def import_price_list(self, job_file_id, create_notification_on_server=True, upd
             user_for_revision=User.objects.get(username=user_for_revision)
         )
         import_products_excel.verify_file()
+
+        if amount_of_chunks > 1:
+            update_task_state("File valid, split the import into chunks...")
+            result = _start_parallel_price_list_import(
+                import_products_excel,
+                job_file_id,
+                amount_of_chunks,
+                _create_import_run(self.request.id),
+                create_notification_on_server=create_notification_on_server,
+                update_only=update_only,
+                user_for_revision=user_for_revision,
+                bulk_mode=bulk_mode
+            )
+
+        else:
+            update_task_state("File valid, start updating the database...")
+
+            import_products_excel.import_to_database(
+                status_callback=update_task_state,
+                update_only=update_only,
+                bulk_mode=bulk_mode
+            )
+            update_task_state("Database import finished, processing results...")
+
+            result = _create_price_list_import_result(
+                import_products_excel.valid_imported_products,
+                import_products_excel.invalid_products,
+                _create_import_run(self.request.id, import_products_excel.import_result_entries),
+                create_notification_on_server=create_notification_on_server,
+                user_for_revision=user_for_revision
+            )
+
+            if import_products_excel.invalid_products == 0:
+                imported_files.register_imported_file(import_excel_file.content_hash, update_only)
+
+            # drop the file
+            import_excel_file.delete()
+
+    except (InvalidImportFormatException, InvalidExcelFileFormat) as ex:
+        msg = "import failed, invalid file format (%s)" % ex
+        logger.error(msg, ex)
+        result = {
+            "error_message": msg
+        }
+
+    except Exception as ex:  # catch any exception
+        msg = "Unexpected exception occurred while importing product list (%s)" % ex
+        logger.error(msg, ex)
+        result = {
+            "error_message": msg
+        }
+
+    # if the task was executed eager, set state to SUCCESS (required for testing)
+    if self.request.is_eager:
+        self.update_state(state=TaskState.SUCCESS, meta=result)
+
+    return result
+
+
+@app.task(serializer='json', name="productdb.import_price_list_chunk", bind=True)
+def import_price_list_chunk(self, chunk_file_id, amount_of_entries, import_run_id, update_only=False,
+                            user_for_revision=None, bulk_mode=False):
+    """
+    import a chunk of a price list (used by the parallel import, each chunk is imported within its own
+    transactions)
+    :param chunk_file_id: ID within the database that references the CSV file with the rows of the chunk (deleted
+                          after the import)
+    :param amount_of_entries: amount of rows within the CSV file
+    :param import_run_id: ID of the ImportRun that stores the result messages
+    :param update_only: Don't create new products in the database, update only existing ones
+    :param user_for_revision: username that should be used for the revision tracking (only if started manually)
+    :param bulk_mode: write the products in chunks using bulk operations (recommended for large price lists)
+    :return: dictionary with the results of the import
+    """
+    # the progress of the chunks is combined in the task status view
+    update_task_state = ProgressReporter(self)
+
+    chunk_file = None
+    try:
+        chunk_file = JobFile.objects.get(id=chunk_file_id)
+        import_products_excel = ProductsExcelImporter(
+            path_to_excel_file=chunk_file.file,
+            user_for_revision=User.objects.get(username=user_for_revision)
+        )
+        import_products_excel.amount_of_rows_in_file = amount_of_entries
+        import_products_excel.import_to_database(
+            status_callback=update_task_state,
+            update_only=update_only,
+            bulk_mode=bulk_mode
+        )
+
+        _add_import_result_entries(
+            ImportRun.objects.get(id=import_run_id),
+            import_products_excel.import_result_entries
+        )
+
+        result = {
+            "valid_imported_products": import_products_excel.valid_imported_products,
+            "invalid_products": import_products_excel.invalid_products,
+            "processed_entries": import_products_excel.amount_of_entries
+        }
+
+    except Exception as ex:  # catch any exception
+        msg = "Unexpected exception occurred while importing product list (%s)" % ex
+        logger.error(msg, exc_info=True)
+        result = {
+            "error_message": msg,
+            "processed_entries": amount_of_entries
+        }
+
+    if chunk_file:
+        chunk_file.delete()
+
+    # if the task was executed eager, set state to SUCCESS (required for testing)
+    if self.request.is_eager:
+        self.update_state(state=TaskState.SUCCESS, meta=result)
+
+    return result
+
+
+@app.task(serializer='json', name="productdb.summarize_price_list_import", bind=True)
+def summarize_price_list_import(self, chunk_results, job_file_id, import_run_id, create_notification_on_server=True,
+                                update_only=False, user_for_revision=None):
+    """
+    combine the results of the parallel price list import (chord callback of the import_price_list_chunk tasks)
+    :param chunk_results: list with the results of the import_price_list_chunk tasks (in order of the chunks)
+    :param job_file_id: ID within the database that references the Excel file that was imported
+    :param import_run_id: ID of the ImportRun that stores the result messages of the chunks
+    :param create_notification_on_server: create a new Notification Message on the Server
+    :param update_only: the file was imported in update only mode
+    :param user_for_revision: username that was used for the revision tracking
+    """
+    import_run = ImportRun.objects.get(id=import_run_id)
+    valid_imported_products = 0
+    invalid_products = 0
+    for chunk_result in chunk_results:
+        if "error_message" in chunk_result:
+            invalid_products += 1
+            import_run.add_item(chunk_result["error_message"], status=NotificationMessage.MESSAGE_ERROR)
+            continue
+
+        valid_imported_products += chunk_result["valid_imported_products"]
+        invalid_products += chunk_result["invalid_products"]
+
+    result = _create_price_list_import_result(
+        valid_imported_products,
+        invalid_products,
+        import_run,
+        create_notification_on_server=create_notification_on_server,
+        user_for_revision=user_for_revision
+    )
+
+    import_excel_file = JobFile.objects.filter(id=job_file_id).first()
+    if import_excel_file:
+        if invalid_products == 0:
+            imported_files.register_imported_file(import_excel_file.content_hash, update_only)
+
+        # drop the file
+        import_excel_file.delete()
+
+    # if the task was executed eager, set state to SUCCESS (required for testing)
+    if self.request.is_eager:
+        self.update_state(state=TaskState.SUCCESS, meta=result)
+
+    return result
+
+
+@app.task(serializer='json', name="productdb.copy_import_price_list", bind=True)
+def copy_import_price_list(self, job_file_id, create_notification_on_server=True, update_only=False,
+                           user_for_revision=None):
+    """
+    import products from the given price list using COPY and a set-based merge (see ProductsCopyImporter), intended
+    for the refresh of the entire catalog, no revisions are created
+    :param job_file_id: ID within the database that references the Excel file that should be imported
+    :param create_notification_on_server: create a new Notification Message on the Server
+    :param update_only: Don't create new products in the database, update only existing ones
+    :param user_for_revision: username that started the import (only if started manually)
+    """
+    # throttled status updates, displayed in the watch view
+    update_task_state = ProgressReporter(self)
+
+    update_task_state("Try to import uploaded file...")
+
+    try:
+        import_excel_file = JobFile.objects.get(id=job_file_id)
+
+    except:
+        msg = "Cannot find file that was uploaded."
+        logger.error(msg, exc_info=True)
+        result = {
+            "error_message": msg
+        }
+        return result
+
+    try:
+        import_products_excel = ProductsCopyImporter(path_to_excel_file=import_excel_file.file)
+        import_products_excel.verify_file()
         update_task_state("File valid, start updating the database...")
 
         import_products_excel.import_to_database(status_callback=update_task_state, update_only=update_only)
         update_task_state("Database import finished, processing results...")
 
-        summary_msg = "User <strong>%s</strong> imported a Product list, %s Products " \
-                      "changed." % (user_for_revision, import_products_excel.valid_imported_products)
-        detail_msg = "<div style=\"text-align:left;\">%s " \
-                     "Products successful updated. " % import_products_excel.valid_imported_products
+        result = _create_price_list_import_result(
+            import_products_excel.valid_imported_products,
+            import_products_excel.invalid_products,
+            _create_import_run(self.request.id, import_products_excel.import_result_entries),
+            create_notification_on_server=create_notification_on_server,
+            user_for_revision=user_for_revision
+        )
+        result.update({
+            "created_products": import_products_excel.created_products,
+            "updated_products": import_products_excel.updated_products,
+            "unchanged_products": import_products_excel.unchanged_products
+        })
 
-        if import_products_excel.invalid_products != 0:
-            detail_msg += "%s entries are invalid. Please check the following messages for " \
-                          "more details." % import_products_excel.invalid_products
+        # drop the file
+        import_excel_file.delete()
 
-        if len(import_products_excel.import_result_messages) != 0:
-            detail_msg += "<ul>"
-            for e in import_products_excel.import_result_messages:
-                detail_msg += "<li>%s</li>" % e
-            detail_msg += "</ul></div>"
+    except (InvalidImportFormatException, InvalidExcelFileFormat) as ex:
+        msg = "import failed, invalid file format (%s)" % ex
+        logger.error(msg, ex)
+        result = {
+            "error_message": msg
+        }
 
-        # if the task was executed eager, set state to SUCCESS (required for testing)
-        if self.request.is_eager:
-            self.update_state(state=TaskState.SUCCESS, meta={
-                "status_message": detail_msg
-            })
-
-        if create_notification_on_server:
-            NotificationMessage.objects.create(
-                title="Import product list",
-                type=NotificationMessage.MESSAGE_INFO,
-                summary_message=summary_msg,
-                detailed_message=detail_msg
-            )
+    except Exception as ex:  # catch any exception
+        msg = "Unexpected exception occurred while importing product list (%s)" % ex
+        logger.error(msg, ex)
+        result = {
+            "error_message": msg
+        }
 
-        # drop the file
+    # if the task was executed eager, set state to SUCCESS (required for testing)
+    if self.request.is_eager:
+        self.update_state(state=TaskState.SUCCESS, meta=result)
+
+    return result
+
+
+@app.task(serializer='json', name="productdb.preview_import", bind=True)
+def preview_import(self, job_file_id, import_type="products", update_only=False, username=None):
+    """
+    create a preview of the changes of the uploaded file without changing the database, the result of the dry-run is
+    stored as JSON file, which is applied using the apply_import_preview task
+    :param job_file_id: ID within the database that references the Excel file that should be imported
+    :param import_type: "products" or "product_migrations"
+    :param update_only: Don't create new products in the database, update only existing ones
+    :param username: user that creates the preview (only this user can review and apply the changes)
+    """
+    # throttled status updates, displayed in the watch view
+    update_task_state = ProgressReporter(self)
+
+    update_task_state("Try to load uploaded file...")
+
+    try:
+        import_excel_file = JobFile.objects.get(id=job_file_id)
+
+    except:
+        msg = "Cannot find file that was uploaded."
+        logger.error(msg, exc_info=True)
+        result = {
+            "error_message": msg
+        }
+        return result
+
+    try:
+        if import_type == "product_migrations":
+            importer = ProductMigrationsExcelImporter(path_to_excel_file=import_excel_file.file)
+
+        else:
+            importer = ProductsExcelImporter(path_to_excel_file=import_excel_file.file)
+
+        importer.verify_file()
+        update_task_state("File valid, compare the file with the database...")
+
+        diff = importer.dry_run(update_only=update_only)
+        preview_file = JobFile.objects.create(
+            file=ContentFile(json.dumps(diff.to_dict()), name="import_preview_%s.json" % job_file_id),
+            import_preview=True,
+            created_by=User.objects.filter(username=username).first() if username else None
+        )
+
+        # drop the uploaded file, the preview contains all required values
         import_excel_file.delete()
 
+        status_message = "<div style=\"text-align:left;\"><p>Import preview created (nothing was changed), " \
+                         "<a href=\"%s\">review and confirm the changes</a></p><ul>" % reverse(
+                             "productdb:import_preview", kwargs={"preview_id": preview_file.id}
+                         )
+        for key, value in diff.summary.items():
+            if not isinstance(value, dict):
+                status_message += "<li>%s: %s</li>" % (key, value)
+        status_message += "</ul></div>"
+
         result = {
-            "status_message": detail_msg
+            "status_message": status_message,
+            "preview_id": preview_file.id,
+            "summary": diff.summary
         }
 
     except (InvalidImportFormatException, InvalidExcelFileFormat) as ex:
@@ -217,7 +638,79 @@ def import_price_list(self, job_file_id, create_notification_on_server=True, upd
         }
 
     except Exception as ex:  # catch any exception
-        msg = "Unexpected exception occurred while importing product list (%s)" % ex
+        msg = "Unexpected exception occurred while creating the import preview (%s)" % ex
+        logger.error(msg, ex)
+        result = {
+            "error_message": msg
+        }
+
+    # if the task was executed eager, set state to SUCCESS (required for testing)
+    if self.request.is_eager:
+        self.update_state(state=TaskState.SUCCESS, meta=result)
+
+    return result
+
+
+@app.task(serializer='json', name="productdb.apply_import_preview", bind=True)
+def apply_import_preview(self, preview_file_id, create_notification_on_server=True, user_for_revision=None):
+    """
+    apply the changes of an import preview (see preview_import)
+    :param preview_file_id: ID within the database that references the JSON file of the preview
+    :param create_notification_on_server: create a new Notification Message on the Server (Product imports only)
+    :param user_for_revision: username that should be used for the revision tracking (only if started manually), if
+                              given, the preview must be created by this user
+    """
+    # throttled status updates, displayed in the watch view
+    update_task_state = ProgressReporter(self)
+
+    update_task_state("Try to load import preview...")
+
+    try:
+        preview_files = JobFile.objects.filter(id=preview_file_id, import_preview=True)
+        if user_for_revision:
+            preview_files = preview_files.filter(created_by__username=user_for_revision)
+        preview_file = preview_files.get()
+        preview_file.file.open("r")
+        diff = ImportDiff.from_dict(json.loads(preview_file.file.read()))
+        preview_file.file.close()
+
+    except:
+        msg = "Cannot find import preview."
+        logger.error(msg, exc_info=True)
+        result = {
+            "error_message": msg
+        }
+        return result
+
+    try:
+        user = User.objects.get(username=user_for_revision) if user_for_revision else None
+        update_task_state("Preview loaded, start updating the database...")
+
+        if diff.import_type == "product_migrations":
+            importer = ProductMigrationsExcelImporter(user_for_revision=user)
+            importer.apply_diff(diff, status_callback=update_task_state)
+
+            result = _create_product_migrations_import_result(
+                _create_import_run(self.request.id, importer.import_result_entries)
+            )
+
+        else:
+            importer = ProductsExcelImporter(user_for_revision=user)
+            importer.apply_diff(diff, status_callback=update_task_state)
+
+            result = _create_price_list_import_result(
+                importer.valid_imported_products,
+                importer.invalid_products,
+                _create_import_run(self.request.id, importer.import_result_entries),
+                create_notification_on_server=create_notification_on_server,
+                user_for_revision=user_for_revision
+            )
+
+        # the preview can only be applied once
+        preview_file.delete()
+
+    except Exception as ex:  # catch any exception
+        msg = "Unexpected exception occurred while applying the import preview (%s)" % ex
         logger.error(msg, ex)
         result = {
             "error_message": msg
@@ -0,0 +1,91 @@
+"""
+Test suite for the productdb.copy_import module
+"""
+import os
+import datetime
+import pytest
+from django.core.management import call_command
+from app.productdb.copy_import import ProductsCopyImporter
+from app.productdb.excel_import import ProductsExcelImporter
+from app.productdb.models import Product, ProductGroup
+
+pytestmark = pytest.mark.django_db
+
+PRODUCT_VALUES = ("product_id", "description", "list_price", "currency", "vendor__name", "product_group__name")
+
+
+def get_test_file(filename):
+    return os.path.join(os.getcwd(), "tests", "data", filename)
+
+
+@pytest.mark.usefixtures("import_default_users")
+@pytest.mark.usefixtures("import_default_vendors")
+class TestProductsCopyImporter:
+    def test_import_with_product_group(self):
+        test_file = get_test_file("excel_import_products_test-with_product_group.xlsx")
+        excel_importer = ProductsExcelImporter(test_file)
+        excel_importer.verify_file()
+        excel_importer.import_to_database()
+        expected_values = list(Product.objects.all().order_by("product_id").values_list(*PRODUCT_VALUES))
+        Product.objects.all().delete()
+        ProductGroup.objects.all().delete()
+
+        # the results of the set-based merge should be the same as the results of the row by row import
+        copy_importer = ProductsCopyImporter(test_file)
+        copy_importer.verify_file()
+        copy_importer.import_to_database()
+
+        assert copy_importer.invalid_products == 0
+        assert copy_importer.created_products == len(expected_values)
+        assert copy_importer.updated_products == 0
+        assert copy_importer.unchanged_products == 0
+        assert ProductGroup.objects.all().count() == 2
+        assert list(Product.objects.all().order_by("product_id").values_list(*PRODUCT_VALUES)) == expected_values
+
+        # products are only written if the values have changed
+        copy_importer.import_to_database()
+        assert copy_importer.created_products == 0
+        assert copy_importer.updated_products == 0
+        assert copy_importer.unchanged_products == len(expected_values)
+
+    def test_timestamps_and_update_only_mode(self):
+        test_file = get_test_file("excel_import_products_test.xlsx")
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+
+        copy_importer = ProductsCopyImporter(test_file)
+        copy_importer.verify_file()
+        copy_importer.import_to_database()
+        assert copy_importer.created_products == 25
+
+        Product.objects.filter(product_id="WS-C2960S-48FPD-L").update(list_price=1.0)
+        Product.objects.filter(product_id="WS-C2960S-48LPD-L").update(description="old description")
+        Product.objects.filter(product_id="WS-C2960S-24PD-L").delete()
+        Product.objects.all().update(update_timestamp=yesterday, list_price_timestamp=yesterday)
+
+        copy_importer.import_to_database(update_only=True)
+
+        assert copy_importer.created_products == 0
+        assert copy_importer.updated_products == 2
+        assert copy_importer.unchanged_products == 22
+        assert Product.objects.count() == 24
+
+        # the list price timestamp is only updated if the list price has changed
+        p = Product.objects.get(product_id="WS-C2960S-48FPD-L")
+        assert p.list_price == 8795.0
+        assert p.update_timestamp == datetime.date.today()
+        assert p.list_price_timestamp == datetime.date.today()
+
+        p = Product.objects.get(product_id="WS-C2960S-48LPD-L")
+        assert p.description != "old description"
+        assert p.update_timestamp == datetime.date.today()
+        assert p.list_price_timestamp == yesterday
+
+        p = Product.objects.get(product_id="WS-C2960S-24TD-L")
+        assert p.update_timestamp == yesterday
+
+    def test_management_command(self, capsys):
+        call_command("copy_import_products", get_test_file("excel_import_products_test.xlsx"))
+
+        out, _ = capsys.readouterr()
+        assert "created: 25, updated: 0, unchanged: 0, invalid: 0" in out
+        assert Product.objects.count() == 25
@@ -2,14 +2,19 @@
 Test suite for the productdb.excel_import module
 """
 import os
+import json
 import pandas as pd
 import pytest
 import datetime
 from reversion.models import Version
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from mixer.backend.django import mixer
+from app.config.models import NotificationMessage
 from app.productdb.excel_import import ProductsExcelImporter, InvalidImportFormatException, InvalidExcelFileFormat, \
-    ProductMigrationsExcelImporter
+    ProductMigrationsExcelImporter, ImportDiff
+from app.productdb.revisions import RevisionBatch
 from app.productdb.models import Product, Vendor, ProductGroup, ProductMigrationSource, ProductMigrationOption
 
 pytestmark = pytest.mark.django_db
@@ -387,6 +392,268 @@ class TestProductsExcelImporter:
         assert "manual product import" == versions.first().revision.comment
         assert user == versions.first().revision.user
 
+    @pytest.mark.usefixtures("apply_base_import_products_excel_file_mock")
+    def test_valid_import_with_revision_granularity(self):
+        global CURRENT_PRODUCT_TEST_DATA
+        CURRENT_PRODUCT_TEST_DATA = DEFAULT_PRODUCT_TEST_DATA
+
+        user = User.objects.get(username="api")
+        product_file = ProductsExcelImporter(
+            "virtual_file.xlsx",
+            user_for_revision=user
+        )
+        product_file.revision_granularity = "job"
+        product_file.verify_file()
+        product_file.import_to_database()
+        assert Product.objects.count() == 2
+
+        # all changes of the import are stored within a single revision
+        versions = Version.objects.all()
+        assert len(versions) == 2
+        assert versions.first().revision_id == versions.last().revision_id
+        assert "manual product import" == versions.first().revision.comment
+        assert user == versions.first().revision.user
+        assert product_file.revision_batch.amount_of_revisions == 1
+        assert sorted([v.object_repr for v in versions]) == ["Product A", "Product B"]
+
+        # the versions can be restored
+        Product.objects.filter(product_id="Product A").update(description="changed description")
+        Version.objects.get_for_object(Product.objects.get(product_id="Product A")).first().revert()
+        assert Product.objects.get(product_id="Product A").description == "description of Product A"
+
+        # chunk granularity
+        Product.objects.all().delete()
+        product_file.revision_granularity = "chunk"
+        product_file.bulk_chunk_size = 1
+        product_file.import_to_database(bulk_mode=True)
+        assert product_file.revision_batch.amount_of_revisions == 2
+        assert product_file.revision_batch.amount_of_versions == 2
+
+    @pytest.mark.usefixtures("apply_base_import_products_excel_file_mock")
+    def test_fallback_of_failed_bulk_write_with_revision_granularity(self, monkeypatch):
+        global CURRENT_PRODUCT_TEST_DATA
+        CURRENT_PRODUCT_TEST_DATA = DEFAULT_PRODUCT_TEST_DATA
+
+        # the bulk write fails after the revision was written within the transaction
+        failed_bulk_writes = []
+
+        def end_chunk(self):
+            if len(failed_bulk_writes) == 0:
+                failed_bulk_writes.append(self.revision.id)
+                raise Exception("bulk write failed")
+
+        monkeypatch.setattr(RevisionBatch, "end_chunk", end_chunk)
+
+        product_file = ProductsExcelImporter("virtual_file.xlsx", user_for_revision=User.objects.get(username="api"))
+        product_file.revision_granularity = "job"
+        product_file.bulk_chunk_size = 1
+        product_file.verify_file()
+        product_file.import_to_database(bulk_mode=True)
+
+        assert len(failed_bulk_writes) == 1
+        assert Product.objects.count() == 2
+        assert product_file.invalid_products == 0
+
+        # the products of the fallback are stored in a new revision
+        versions = Version.objects.all()
+        assert len(versions) == 2
+        assert versions.first().revision_id != failed_bulk_writes[0]
+        assert product_file.revision_batch.amount_of_versions == 2
+
+    @pytest.mark.usefixtures("apply_base_import_products_excel_file_mock")
+    def test_failed_fallback_of_bulk_write_with_duplicate_product_ids(self, monkeypatch):
+        global CURRENT_PRODUCT_TEST_DATA
+        CURRENT_PRODUCT_TEST_DATA = pd.DataFrame(
+            [
+                ["Product A", "first description", "", "", "Cisco Systems"],
+                ["Product A", "second description", "", "", "Cisco Systems"],
+                ["Product B", "description of Product B", "", "", "Cisco Systems"],
+            ], columns=PRODUCTS_TEST_DATA_COLUMNS[:5]
+        )
+
+        def raise_exception(*args, **kwargs):
+            raise Exception("write failed")
+
+        monkeypatch.setattr(RevisionBatch, "end_chunk", raise_exception)
+        monkeypatch.setattr(RevisionBatch, "save", raise_exception)
+
+        product_file = ProductsExcelImporter("virtual_file.xlsx")
+        product_file.verify_file()
+        product_file.import_to_database(bulk_mode=True)
+
+        # every row of a Product ID that cannot be saved is reported as invalid
+        assert Product.objects.count() == 0
+        assert product_file.valid_imported_products == 0
+        assert product_file.invalid_products == 3
+        assert len([e for e in product_file.import_result_entries if e[1] == NotificationMessage.MESSAGE_ERROR]) == 3
+
+    @pytest.mark.usefixtures("apply_base_import_products_excel_file_mock")
+    def test_valid_import_in_bulk_mode(self):
+        global CURRENT_PRODUCT_TEST_DATA
+        CURRENT_PRODUCT_TEST_DATA = DEFAULT_PRODUCT_TEST_DATA
+
+        user = User.objects.get(username="api")
+        mixer.blend("productdb.Product", product_id="Product B", vendor=Vendor.objects.get(id=1),
+                    description="old description", list_price=6000.00, currency="USD")
+        product_file = ProductsExcelImporter(
+            "virtual_file.xlsx",
+            user_for_revision=user
+        )
+        product_file.verify_file()
+        product_file.import_to_database(bulk_mode=True)
+
+        assert Product.objects.count() == 2
+        assert product_file.valid_imported_products == 2
+        assert product_file.invalid_products == 0
+        assert product_file.import_result_messages == [
+            "product <code>Product A</code> created",
+            "product <code>Product B</code> updated"
+        ]
+        assert [(product_id, status) for product_id, status, _ in product_file.import_result_entries] == [
+            ("Product A", NotificationMessage.MESSAGE_SUCCESS),
+            ("Product B", NotificationMessage.MESSAGE_SUCCESS)
+        ]
+
+        p = Product.objects.get(product_id="Product A")
+        assert p.description == "description of Product A"
+        assert p.list_price == 4000.0
+        assert p.list_price_timestamp is not None
+        assert p.vendor == Vendor.objects.get(id=1)
+        assert p.end_of_sale_date == datetime.date(2016, 1, 3)
+        assert p.end_of_sec_vuln_supp_date == datetime.date(2016, 1, 9)
+
+        p = Product.objects.get(product_id="Product B")
+        assert p.description == "description of Product B"
+
+        # all changes of a chunk are stored within a single revision
+        versions = Version.objects.all()
+        assert len(versions) == 2
+        assert versions.first().revision_id == versions.last().revision_id
+        assert "manual product import" == versions.first().revision.comment
+        assert user == versions.first().revision.user
+
+        # second import without changes
+        product_file.import_to_database(bulk_mode=True)
+
+        assert product_file.valid_imported_products == 0
+        assert product_file.import_result_messages == [
+            "<i>no changes for product <code>Product A</code> required</i>",
+            "<i>no changes for product <code>Product B</code> required</i>"
+        ]
+        assert Version.objects.count() == 2
+
+    def test_normalize_data_frame(self):
+        data_frame = pd.DataFrame(
+            [
+                ["Product A", "description", "4000.00", None, "Cisco Systems", datetime.datetime(2016, 1, 1)],
+                ["Product B", "description", "4000.00 eur", None, "Cisco Systems", None],
+                ["Product C", "description", 12, "EUR", "Cisco Systems", pd.Timestamp(2016, 1, 2)],
+                ["Product D", "description", None, "EUR", "Cisco Systems", ""],
+                ["Product E", "description", "4000.00 ABC", "USD", "Cisco Systems", None],
+                ["Product F", "description", "abc", None, "Cisco Systems", None],
+                ["Product G", "description", "abc EUR", None, "Cisco Systems", None],
+                ["Product H", "description", "4000.00 EUR EUR", None, "Cisco Systems", None],
+                ["Product I", "description", "4000.00", "ABC", "Cisco Systems", None],
+                ["Product J", "description", datetime.datetime(2016, 1, 1), None, "Cisco Systems", None],
+            ], columns=["product id", "description", "list price", "currency", "vendor", "end of sale date"]
+        )
+        product_file = ProductsExcelImporter("virtual_file.xlsx")
+
+        result = product_file._normalize_data_frame(data_frame)
+        rows = {row["product id"]: row for row in result.to_dict(orient="records")}
+
+        assert rows["Product A"]["list price"] == 4000.00
+        assert rows["Product A"]["currency"] == "USD"
+        assert rows["Product A"]["end of sale date"] == datetime.date(2016, 1, 1)
+        assert rows["Product A"]["import error"] is None
+        assert rows["Product B"]["list price"] == 4000.00
+        assert rows["Product B"]["currency"] == "EUR"
+        assert rows["Product B"]["end of sale date"] is None
+        assert rows["Product C"]["list price"] == 12.0
+        assert rows["Product C"]["currency"] == "EUR"
+        assert rows["Product C"]["end of sale date"] == datetime.date(2016, 1, 2)
+        assert pd.isnull(rows["Product D"]["list price"])
+        assert rows["Product D"]["import error"] is None
+        assert rows["Product D"]["end of sale date"] is None
+        assert rows["Product D"]["end of sale date (invalid type)"] == "str"
+
+        assert rows["Product E"]["import error"] == "cannot set list price for <code>Product E</code> (cannot set " \
+                                                   "currency unknown value ABC)"
+        assert rows["Product F"]["import error"] == "cannot set list price for <code>Product F</code> (could not " \
+                                                   "convert string to float: 'abc')"
+        assert rows["Product G"]["import error"] == "cannot set list price for <code>Product G</code> (cannot " \
+                                                   "convert price information to float)"
+        assert rows["Product H"]["import error"] == "cannot set list price for <code>Product H</code> (invalid " \
+                                                   "format for list price, detected multiple spaces)"
+        assert rows["Product I"]["import error"] == "cannot set currency for <code>Product I</code> (cannot set " \
+                                                   "currency unknown value ABC)"
+        assert rows["Product J"]["import error"] == "cannot set list price for <code>Product J</code> (invalid " \
+                                                   "data-type for list price)"
+
+    @pytest.mark.usefixtures("apply_base_import_products_excel_file_mock")
+    def test_dry_run_with_invalid_datetime_values(self):
+        global CURRENT_PRODUCT_TEST_DATA
+        CURRENT_PRODUCT_TEST_DATA = pd.DataFrame(
+            [
+                ["Product A", "new description", None, None, "Cisco Systems", "invalid date"],
+                ["Product B", "new description", None, None, "Cisco Systems", "invalid date"],
+            ], columns=["product id", "description", "list price", "currency", "vendor", "end of sale date"]
+        )
+        v = Vendor.objects.get(id=1)
+        mixer.blend("productdb.Product", product_id="Product A", description="description", vendor=v,
+                    end_of_sale_date=datetime.date(2016, 1, 1))
+        mixer.blend("productdb.Product", product_id="Product B", description="description", vendor=v,
+                    end_of_sale_date=None)
+
+        product_file = ProductsExcelImporter("virtual_file.xlsx")
+        product_file.verify_file()
+        diff = product_file.dry_run()
+
+        # an invalid value is ignored if the field is not set, the other columns are applied (as in the import)
+        assert diff.summary["invalid"] == 1
+        assert diff.summary["changed"] == 2
+        assert diff.summary["changed fields"]["description"] == 2
+        assert diff.summary["changed fields"]["end of sale date"] == 0
+        invalid_entries = [e for e in diff.entries if e["status"] == ImportDiff.INVALID]
+        assert len(invalid_entries) == 1
+        assert invalid_entries[0]["key"] == "Product A"
+        assert invalid_entries[0]["message"] == "cannot set end of sale date for <code>Product A</code> ('str' " \
+                                                "object has no attribute 'date')"
+
+    def test_split_into_chunk_files(self):
+        product_file = BaseProductsExcelImporterMock("virtual_file.xlsx")
+        product_file.__wb_data_frame__ = pd.DataFrame([
+            ["Product A", "first"],
+            ["Product B", "first"],
+            ["Product C", "first"],
+            ["Product A", "second"],
+            ["Product D", "first"],
+            ["Product B", "second"],
+            ["Product E", "first"],
+        ], columns=["product id", "description"])
+
+        # rows with the same Product ID are part of the same chunk (in the order of the file)
+        chunk_files = product_file.split_into_chunk_files(3)
+        assert [amount_of_rows for _, amount_of_rows in chunk_files] == [3, 3, 1]
+
+        chunks = [pd.read_csv(chunk_file, dtype=str).values.tolist() for chunk_file, _ in chunk_files]
+        for chunk_file, _ in chunk_files:
+            chunk_file.close()
+
+        assert chunks == [
+            [["Product A", "first"], ["Product A", "second"], ["Product D", "first"]],
+            [["Product B", "first"], ["Product B", "second"], ["Product E", "first"]],
+            [["Product C", "first"]]
+        ]
+
+    def test_split_into_more_chunk_files_than_products(self):
+        product_file = BaseProductsExcelImporterMock("virtual_file.xlsx")
+        product_file.__wb_data_frame__ = pd.DataFrame([["Product A"], ["Product A"]], columns=["product id"])
+
+        chunk_files = product_file.split_into_chunk_files(3)
+        assert [amount_of_rows for _, amount_of_rows in chunk_files] == [2]
+        chunk_files[0][0].close()
+
     def test_invalid_file(self):
         valid_test_file = os.path.join(os.getcwd(), "tests", "data", "file_not_found.xlsx")
         product_file = ProductsExcelImporter(valid_test_file)
@@ -431,6 +698,43 @@ class TestProductMigrationExcelImporter:
         ProductMigrationOption.objects.all().delete()
         ProductMigrationSource.objects.all().delete()
 
+    @pytest.mark.usefixtures("apply_base_import_products_excel_file_mock")
+    def test_dry_run_and_apply_diff(self):
+        global CURRENT_PRODUCT_MIGRATION_TEST_DATA
+        CURRENT_PRODUCT_MIGRATION_TEST_DATA = pd.DataFrame(
+            [
+                ["Product A", "New Migration Source", "Replacement Product ID", "comment of the migration", ""],
+                ["Product A", "Existing Migration Source", "Replacement Product ID", "new comment", ""],
+                ["Product B", "Existing Migration Source", "Replacement Product ID", "comment of the migration", ""]
+            ], columns=PRODUCT_MIGRATION_TEST_DATA_COLUMNS
+        )
+        product = mixer.blend("productdb.Product", product_id="Product A", vendor=Vendor.objects.get(id=1))
+        pms = mixer.blend("productdb.ProductMigrationSource", name="Existing Migration Source")
+        ProductMigrationOption.objects.create(product=product, migration_source=pms, comment="old comment",
+                                              replacement_product_id="Replacement Product ID")
+
+        product_migrations_file = ProductMigrationsExcelImporter("virtual_file.xlsx")
+        product_migrations_file.verify_file()
+        diff = product_migrations_file.dry_run()
+
+        assert ProductMigrationSource.objects.count() == 1
+        assert diff.summary["created"] == 1
+        assert diff.summary["changed"] == 1
+        assert diff.summary["invalid"] == 1
+        assert diff.summary["migration sources created"] == 1
+        assert diff.summary["changed fields"]["comment"] == 1
+
+        product_migrations_file.apply_diff(diff)
+        assert ProductMigrationSource.objects.count() == 2
+        assert ProductMigrationOption.objects.count() == 2
+        assert ProductMigrationOption.objects.get(migration_source=pms).comment == "new comment"
+        assert "create Product Migration path \"New Migration Source\" for Product \"Product A\"" in product_migrations_file.import_result_messages
+
+        # the preview is applied only if the Product Migration Option is not changed in the meantime
+        ProductMigrationOption.objects.filter(migration_source=pms).update(comment="changed comment")
+        product_migrations_file.apply_diff(diff)
+        assert ProductMigrationOption.objects.get(migration_source=pms).comment == "changed comment"
+
     @pytest.mark.usefixtures("apply_base_import_products_excel_file_mock")
     def test_import_with_missing_migration_source(self):
         """test import with missing migration source (ignore it)"""
@@ -1027,3 +1331,167 @@ class TestMigratedImportProductsExcelFile:
         # test that given value has no group assignment
         p = Product.objects.get(product_id=example_none_value)
         assert p.product_group is None
+
+    def test_bulk_mode_import_with_product_group(self):
+        test_file = "excel_import_products_test-with_product_group.xlsx"
+        expected_create_messages = self.prepare_import_products_excel_file(test_file).import_result_messages
+        expected_update_messages = self.prepare_import_products_excel_file(test_file).import_result_messages
+        expected_values = list(Product.objects.all().values_list("product_id", "list_price", "product_group__name"))
+        Product.objects.all().delete()
+        ProductGroup.objects.all().delete()
+
+        # the results of the bulk mode should be the same as the results of the row by row import
+        product_file = self.prepare_import_products_excel_file(test_file, start_import=False)
+        product_file.bulk_chunk_size = 10
+        product_file.import_to_database(bulk_mode=True)
+
+        assert product_file.invalid_products == 0
+        assert product_file.import_result_messages == expected_create_messages
+        assert ProductGroup.objects.all().count() == 2
+        assert list(Product.objects.all().values_list(
+            "product_id", "list_price", "product_group__name"
+        )) == expected_values
+
+        product_file.import_to_database(bulk_mode=True)
+        assert product_file.valid_imported_products == 0
+        assert product_file.import_result_messages == expected_update_messages
+
+    def test_reference_table_queries_with_product_group(self):
+        product_file = self.prepare_import_products_excel_file("excel_import_products_test-with_product_group.xlsx",
+                                                               start_import=False)
+        with CaptureQueriesContext(connection) as context:
+            product_file.import_to_database()
+
+        # the reference tables are loaded once per import, the missing product groups are created in a single batch
+        vendor_queries = [q for q in context.captured_queries if q["sql"].startswith(
+            "SELECT \"%s\"" % Vendor._meta.db_table
+        )]
+        product_group_inserts = [q for q in context.captured_queries if q["sql"].startswith(
+            "INSERT INTO %s" % ProductGroup._meta.db_table
+        )]
+        assert product_file.invalid_products == 0
+        assert len(vendor_queries) <= 1
+        assert len(product_group_inserts) == 1
+        assert ProductGroup.objects.count() == 2
+
+    def test_skip_unchanged_rows(self):
+        test_file = "excel_import_products_test-with_product_group.xlsx"
+        product_file = self.prepare_import_products_excel_file(test_file)
+        assert product_file.invalid_products == 0
+        assert Product.objects.filter(import_fingerprint=None).count() == 0
+
+        # the products of a second import are not loaded (only the fingerprints)
+        product_file = self.prepare_import_products_excel_file(test_file, start_import=False)
+        with CaptureQueriesContext(connection) as context:
+            product_file.import_to_database()
+
+        product_queries = [q for q in context.captured_queries if q["sql"].startswith(
+            "SELECT \"%s\".\"id\"" % Product._meta.db_table
+        )]
+        assert product_file.valid_imported_products == 0
+        assert len(product_queries) == 0
+        assert len([msg for msg in product_file.import_result_messages if "no changes for product" not in msg]) == 0
+
+        # the fingerprint is cleared if the product is changed outside of the import
+        p = Product.objects.first()
+        p.description = "changed description"
+        p.save()
+        assert Product.objects.get(id=p.id).import_fingerprint is None
+
+        product_file = self.prepare_import_products_excel_file(test_file, start_import=False)
+        product_file.import_to_database(bulk_mode=True)
+
+        assert product_file.valid_imported_products == 1
+        assert "product <code>%s</code> updated" % p.product_id in product_file.import_result_messages
+        assert Product.objects.get(id=p.id).description != "changed description"
+        assert Product.objects.filter(import_fingerprint=None).count() == 0
+
+    def test_dry_run_and_apply_diff_with_product_group(self):
+        test_file = "excel_import_products_test-with_product_group.xlsx"
+        self.prepare_import_products_excel_file(test_file)
+        product_values = ("product_id", "description", "list_price", "vendor__name", "product_group__name")
+        expected_values = list(Product.objects.all().order_by("product_id").values_list(*product_values))
+        Product.objects.all().delete()
+        ProductGroup.objects.all().delete()
+
+        product_file = self.prepare_import_products_excel_file(test_file, start_import=False)
+        diff = product_file.dry_run()
+
+        # the dry-run doesn't change the database
+        assert Product.objects.count() == 0
+        assert ProductGroup.objects.count() == 0
+        assert diff.summary["created"] == len(expected_values)
+        assert diff.summary["changed"] == 0
+        assert diff.summary["invalid"] == 0
+
+        # the preview is stored as JSON
+        diff = ImportDiff.from_dict(json.loads(json.dumps(diff.to_dict())))
+        assert len(diff.to_data_frame().index) != 0
+
+        product_file.apply_diff(diff)
+        assert product_file.invalid_products == 0
+        assert list(Product.objects.all().order_by("product_id").values_list(*product_values)) == expected_values
+
+        # no changes after the import
+        diff = product_file.dry_run()
+        assert diff.summary["created"] == 0
+        assert diff.summary["changed"] == 0
+        assert diff.summary["unchanged"] == len(expected_values)
+
+        # changes after the preview are not overwritten
+        Product.objects.filter(product_id="WS-C2960S-48FPD-L").update(list_price=1.0)
+        diff = product_file.dry_run()
+        assert diff.summary["changed"] == 1
+        assert diff.summary["price changed"] == 1
+
+        Product.objects.filter(product_id="WS-C2960S-48FPD-L").update(list_price=2.0)
+        product_file.apply_diff(diff)
+        assert product_file.invalid_products == 1
+        assert Product.objects.get(product_id="WS-C2960S-48FPD-L").list_price == 2.0
+
+    def test_import_in_streaming_mode(self):
+        test_file = "excel_import_products_test-with_product_group.xlsx"
+        expected_messages = self.prepare_import_products_excel_file(test_file).import_result_messages
+        expected_values = list(Product.objects.all().values_list("product_id", "list_price", "product_group__name"))
+        Product.objects.all().delete()
+        ProductGroup.objects.all().delete()
+
+        # the rows of the file are read in chunks, the header is verified using the first row only
+        product_file = ProductsExcelImporter(os.path.join(os.getcwd(), "tests", "data", test_file), streaming=True)
+        product_file.streaming_chunk_size = 7
+        product_file.verify_file()
+        assert product_file.workbook is None
+
+        product_file.import_to_database()
+
+        assert product_file.invalid_products == 0
+        assert product_file.import_result_messages == expected_messages
+        assert product_file.amount_of_products == len(expected_values)
+        assert list(Product.objects.all().values_list(
+            "product_id", "list_price", "product_group__name"
+        )) == expected_values
+
+    def test_import_csv_file(self, tmpdir):
+        test_file = "excel_import_products_test-with_product_group.xlsx"
+        self.prepare_import_products_excel_file(test_file)
+        expected_values = list(Product.objects.all().values_list(
+            "product_id", "description", "list_price", "currency", "vendor__name", "product_group__name"
+        ))
+        Product.objects.all().delete()
+        ProductGroup.objects.all().delete()
+
+        csv_file = str(tmpdir.join("products.csv"))
+        pd.read_excel(os.path.join(os.getcwd(), "tests", "data", test_file), sheetname="products").to_csv(
+            csv_file, index=False
+        )
+
+        # CSV files are always imported in streaming mode
+        product_file = ProductsExcelImporter(csv_file)
+        assert product_file.streaming is True
+        product_file.verify_file()
+        product_file.import_to_database(bulk_mode=True)
+
+        assert product_file.invalid_products == 0
+        assert list(Product.objects.all().values_list(
+            "product_id", "description", "list_price", "currency", "vendor__name", "product_group__name"
+        )) == expected_values
@@ -205,7 +205,7 @@ class TestImportProductsFileUploadForm:
         form = ImportProductsFileUploadForm(data={}, files=files)
         assert form.is_valid() is False
         assert "excel_file" in form.errors
-        assert "only .xlsx files are allowed" in str(form.errors["excel_file"])
+        assert "only .xlsx and .csv files are allowed" in str(form.errors["excel_file"])
 
         files = {
             "excel_file": SimpleUploadedFile("myfile.xlsx", b"")
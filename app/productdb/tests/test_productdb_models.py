@@ -1361,3 +1361,23 @@ class TestProductMigrationOption:
         assert pmo3.is_replacement_in_db() is False
         assert pmo3.get_product_replacement_id() is None
         assert pmo3.replacement_db_product is None
+
+    def test_changed_migration_option_clears_eox_fingerprint(self):
+        p = mixer.blend("productdb.Product", product_id="My Product ID", vendor=Vendor.objects.get(id=1))
+        Product.objects.filter(id=p.id).update(eox_fingerprint="fingerprint")
+        pms = ProductMigrationSource.objects.create(name="Test")
+
+        # options of the synchronization keep the fingerprint
+        pmo = ProductMigrationOption(product=p, migration_source=pms, replacement_product_id="replacement")
+        pmo.eox_synchronized = True
+        pmo.save()
+        assert Product.objects.get(id=p.id).eox_fingerprint == "fingerprint"
+
+        pmo = ProductMigrationOption.objects.get(id=pmo.id)
+        pmo.comment = "changed comment"
+        pmo.save()
+        assert Product.objects.get(id=p.id).eox_fingerprint is None
+
+        Product.objects.filter(id=p.id).update(eox_fingerprint="fingerprint")
+        pmo.delete()
+        assert Product.objects.get(id=p.id).eox_fingerprint is None
@@ -10,7 +10,7 @@ from django.core.urlresolvers import reverse
 from django.test import Client
 from mixer.backend.django import mixer
 from app.config.settings import AppSettings
-from app.config.models import NotificationMessage
+from app.config.models import NotificationMessage, ImportRun
 from app.productdb import tasks
 from app.productdb.excel_import import ProductsExcelImporter, ProductMigrationsExcelImporter
 from app.productdb.models import JobFile, Product, ProductMigrationSource, ProductMigrationOption, Vendor, ProductCheck, \
@@ -64,6 +64,24 @@ class BaseProductMigrationsExcelImporterMock(ProductMigrationsExcelImporter):
         ])
 
 
+class MultipleProductsExcelImporterMock(BaseProductsExcelImporterMock):
+    def _create_data_frame(self):
+        # the same Product ID is used multiple times within the file
+        self.__wb_data_frame__ = pd.DataFrame([
+            ["Product A", "description of Product A", "4000.00", "USD", "Cisco Systems"],
+            ["Product B", "description of Product B", "3000.00", "USD", "Cisco Systems"],
+            ["Product C", "description of Product C", "2000.00", "USD", "Cisco Systems"],
+            ["Product A", "new description of Product A", "4000.00", "USD", "Cisco Systems"],
+            ["Product D", "description of Product D", "1000.00", "USD", "Cisco Systems"],
+        ], columns=[
+            "product id",
+            "description",
+            "list price",
+            "currency",
+            "vendor",
+        ])
+
+
 class InvalidProductsImportProductsExcelFileMock(BaseProductsExcelImporterMock):
     invalid_products = 100
 
@@ -74,6 +92,8 @@ class InvalidProductsImportProductsExcelFileMock(BaseProductsExcelImporterMock):
 @pytest.fixture
 def suppress_state_update_in_tasks(monkeypatch):
     monkeypatch.setattr(tasks.import_price_list, "update_state", lambda state, meta: None)
+    monkeypatch.setattr(tasks.import_price_list_chunk, "update_state", lambda state, meta: None)
+    monkeypatch.setattr(tasks.summarize_price_list_import, "update_state", lambda state, meta: None)
     monkeypatch.setattr(tasks.import_product_migrations, "update_state", lambda state, meta: None)
     monkeypatch.setattr(tasks.perform_product_check, "update_state", lambda state, meta: None)
 
@@ -117,6 +137,12 @@ class TestImportProductMigrationsTask:
         assert ProductMigrationSource.objects.count() == 2, "One Product Migration Source was created"
         assert ProductMigrationOption.objects.count() == 2, "One Product Migration Option was created"
 
+        # the result messages are stored in the ImportRun
+        import_run = ImportRun.objects.get()
+        assert result["import_run_id"] == import_run.id
+        assert import_run.finished is not None
+        assert import_run.items.filter(key="Product A", status=NotificationMessage.MESSAGE_SUCCESS).count() == 2
+
     def test_call_with_invalid_invalid_file_format(self):
         jf = JobFile.objects.create(file=SimpleUploadedFile("myfile.xlsx", b"xyz"))
         expected_message = "import failed, invalid file format ("
@@ -193,6 +219,45 @@ class TestImportPriceListTask:
         p = Product.objects.get(product_id="Product A")
         assert "description of Product A" == p.description
 
+    def test_skip_import_of_identical_price_list(self, monkeypatch):
+        # replace the ProductsExcelImporter class
+        monkeypatch.setattr(tasks, "ProductsExcelImporter", BaseProductsExcelImporterMock)
+
+        jf = JobFile.objects.create(file=SimpleUploadedFile("myfile.xlsx", b"xyz"))
+        assert jf.content_hash == "3608bca1e44ea6c4d268eb6db02260269892c0b42b86bbf1e77a6fa16c3c9282"
+        tasks.import_price_list(
+            job_file_id=jf.id,
+            create_notification_on_server=False,
+            user_for_revision=User.objects.get(username="api")
+        )
+        Product.objects.filter(product_id="Product A").update(description="changed description")
+
+        # an identical file is not imported again if the products were not changed since then
+        jf = JobFile.objects.create(file=SimpleUploadedFile("myfile.xlsx", b"xyz"))
+        result = tasks.import_price_list(
+            job_file_id=jf.id,
+            create_notification_on_server=False,
+            user_for_revision=User.objects.get(username="api")
+        )
+
+        assert "The uploaded file is identical to the file that was imported" in result["status_message"]
+        assert JobFile.objects.count() == 0, "Should be deleted after the task was completed"
+        assert Product.objects.get(product_id="Product A").description == "changed description"
+
+        # the file is imported again if a product was changed
+        p = Product.objects.get(product_id="Product A")
+        p.save()
+
+        jf = JobFile.objects.create(file=SimpleUploadedFile("myfile.xlsx", b"xyz"))
+        result = tasks.import_price_list(
+            job_file_id=jf.id,
+            create_notification_on_server=False,
+            user_for_revision=User.objects.get(username="api")
+        )
+
+        assert "1 Products successful updated" in result["status_message"]
+        assert Product.objects.get(product_id="Product A").description == "description of Product A"
+
     def test_notification_message_on_import_price_list_task(self, monkeypatch):
         # replace the ProductsExcelImporter class
         monkeypatch.setattr(tasks, "ProductsExcelImporter", BaseProductsExcelImporterMock)
@@ -221,6 +286,38 @@ class TestImportPriceListTask:
         assert NotificationMessage.objects.count() == 1
         assert JobFile.objects.count() == 0, "Should be deleted after the task was completed"
 
+    def test_parallel_import_price_list_task(self, monkeypatch, settings):
+        # replace the ProductsExcelImporter class
+        monkeypatch.setattr(tasks, "ProductsExcelImporter", MultipleProductsExcelImporterMock)
+        settings.PDB_RESULT_SUMMARY_MESSAGES = 2
+
+        jf = JobFile.objects.create(file=SimpleUploadedFile("myfile.xlsx", b"xyz"))
+        result = tasks.import_price_list(
+            job_file_id=jf.id,
+            create_notification_on_server=True,
+            update_only=False,
+            user_for_revision=User.objects.get(username="api"),
+            amount_of_chunks=2
+        )
+
+        assert "status_message" in result, "If successful, a status message should be returned"
+        assert "5 Products successful updated." in result["status_message"]
+        assert JobFile.objects.count() == 0, "Should be deleted after the task was completed"
+        assert NotificationMessage.objects.count() == 1, "A single notification message is created"
+        assert Product.objects.count() == 4
+        assert Product.objects.get(product_id="Product A").description == "new description of Product A"
+
+        # the messages of all chunks are stored in a single ImportRun, only the first messages are part of the result
+        nm = NotificationMessage.objects.first()
+        import_run = ImportRun.objects.get()
+        assert nm.get_result_run() == import_run
+        assert result["import_run_id"] == import_run.id
+        assert import_run.items.exclude(key="").exists(), "the items are stored with the Product ID"
+        assert import_run.items.count() > 2
+        assert result["status_message"].count("<li>product <code>") == 2
+        assert "view all messages" in result["status_message"]
+        assert "<li>" not in nm.detailed_message, "the messages are paged from the ImportRun"
+
     def test_call_with_invalid_products(self, monkeypatch):
         # replace the ProductsExcelImporter class
         monkeypatch.setattr(tasks, "ProductsExcelImporter", InvalidProductsImportProductsExcelFileMock)
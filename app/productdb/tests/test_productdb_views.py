@@ -2,6 +2,7 @@
 Test suite for the productdb.views module
 """
 import datetime
+import json
 import pytest
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.auth.models import AnonymousUser, Permission
@@ -12,8 +13,9 @@ from django.http import Http404
 from django.test import RequestFactory
 from mixer.backend.django import mixer
 from app.productdb import views
+from app.productdb.excel_import import ImportDiff
 from app.productdb.models import ProductList, Product, ProductMigrationOption, Vendor, ProductMigrationSource, \
-    ProductCheck
+    ProductCheck, JobFile
 
 pytestmark = pytest.mark.django_db
 
@@ -1020,6 +1022,61 @@ class TestImportProductsView:
         assert response.url == reverse("task_in_progress", kwargs={"task_id": "mock_task_id"})
 
 
+@pytest.mark.usefixtures("import_default_vendors")
+class TestImportPreviewView:
+    URL_NAME = "productdb:import_preview"
+
+    @staticmethod
+    def create_user():
+        user = mixer.blend("auth.User", is_superuser=False, is_staff=False)
+        user.user_permissions.add(Permission.objects.get(codename="change_product"))
+        return user
+
+    @staticmethod
+    def create_preview_file(user, import_preview=True):
+        diff = ImportDiff("products", False, [], {"created": 0})
+        return JobFile.objects.create(
+            file=SimpleUploadedFile("import_preview.json", json.dumps(diff.to_dict()).encode("utf-8")),
+            import_preview=import_preview,
+            created_by=user
+        )
+
+    def test_preview_of_user(self):
+        user = self.create_user()
+        preview_file = self.create_preview_file(user)
+
+        url = reverse(self.URL_NAME, kwargs={"preview_id": preview_file.id})
+        request = RequestFactory().get(url)
+        request.user = user
+        response = views.import_preview(request, preview_file.id)
+
+        assert response.status_code == 200, "Should be callable"
+
+    def test_preview_of_other_user(self):
+        preview_file = self.create_preview_file(self.create_user())
+
+        url = reverse(self.URL_NAME, kwargs={"preview_id": preview_file.id})
+        request = RequestFactory().get(url)
+        request.user = self.create_user()
+
+        with pytest.raises(Http404):
+            views.import_preview(request, preview_file.id)
+
+        with pytest.raises(Http404):
+            views.download_import_preview(request, preview_file.id)
+
+    def test_job_file_is_not_a_preview(self):
+        user = self.create_user()
+        job_file = self.create_preview_file(user, import_preview=False)
+
+        url = reverse(self.URL_NAME, kwargs={"preview_id": job_file.id})
+        request = RequestFactory().get(url)
+        request.user = user
+
+        with pytest.raises(Http404):
+            views.import_preview(request, job_file.id)
+
+
 @pytest.mark.usefixtures("import_default_vendors")
 class TestEditUserProfileView:
     URL_NAME = "productdb:edit-user_profile"
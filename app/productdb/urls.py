@@ -86,6 +86,9 @@ urlpatterns = [
 
     url(r'^import/products/$', views.import_products, name='import_products'),
     url(r'^import/productmigrations/$', views.import_product_migrations, name='import_product_migrations'),
+    url(r'^import/preview/(?P<preview_id>\d+)/$', views.import_preview, name='import_preview'),
+    url(r'^import/preview/(?P<preview_id>\d+)/download/$', views.download_import_preview,
+        name='download_import_preview'),
     url(r'^about/$', views.about_view, name='about'),
     url(r'^$', views.home, name='home'),
 ]
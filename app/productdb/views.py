@@ -1,3 +1,4 @@
+import json
 import logging
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
@@ -5,7 +6,7 @@ from django.contrib.auth.decorators import permission_required
 from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db.models import Q
-from django.http import Http404
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.template.defaultfilters import safe
 from django.utils.html import escape
@@ -20,6 +21,7 @@ from app.productdb.models import Product, JobFile, ProductGroup, ProductList, Us
     ProductCheck
 from app.productdb.models import Vendor
 import app.productdb.tasks as tasks
+from app.productdb.excel_import import ImportDiff
 from django_project.celery import set_meta_data_for_task
 from app.productdb.utils import login_required_if_login_only_mode
 
@@ -537,17 +539,25 @@ def import_products(request):
         form = ImportProductsFileUploadForm(request.user, request.POST, request.FILES)
         if form.is_valid():
             # file is valid, save and execute the import job
-            job_file = JobFile(file=request.FILES['excel_file'])
+            job_file = JobFile(file=request.FILES['excel_file'], created_by=request.user)
             job_file.save()
 
             eta = now() + timedelta(seconds=3)
+            if form.cleaned_data["preview_only"]:
+                return _start_import_preview(
+                    request, job_file, "products", update_only=form.cleaned_data["update_existing_products_only"]
+                )
+
             task = tasks.import_price_list.apply_async(
                 eta=eta,
                 kwargs={
                     "job_file_id": job_file.id,
                     "create_notification_on_server": not form.cleaned_data["suppress_notification"],
                     "update_only": form.cleaned_data["update_existing_products_only"],
-                    "user_for_revision": request.user.username
+                    "user_for_revision": request.user.username,
+                    "bulk_mode": form.cleaned_data["bulk_import"],
+                    "amount_of_chunks": settings.PDB_PARALLEL_IMPORT_CHUNKS if form.cleaned_data["parallel_import"]
+                    else 1
                 }
             )
 
@@ -576,10 +586,13 @@ def import_product_migrations(request):
         form = ImportProductMigrationFileUploadForm(request.POST, request.FILES)
         if form.is_valid():
             # file is valid, save and execute the import job
-            job_file = JobFile(file=request.FILES['excel_file'])
+            job_file = JobFile(file=request.FILES['excel_file'], created_by=request.user)
             job_file.save()
 
             eta = now() + timedelta(seconds=3)
+            if form.cleaned_data["preview_only"]:
+                return _start_import_preview(request, job_file, "product_migrations")
+
             task = tasks.import_product_migrations.apply_async(
                 eta=eta,
                 kwargs={
@@ -605,6 +618,108 @@ def import_product_migrations(request):
     return render(request, "productdb/import/import_product_migrations.html", context=context)
 
 
+def _start_import_preview(request, job_file, import_type, update_only=False):
+    """start the dry-run of the given import file and redirect to the task in progress view (the preview is only
+    accessible for the user of the request)"""
+    task = tasks.preview_import.apply_async(
+        eta=now() + timedelta(seconds=3),
+        kwargs={
+            "job_file_id": job_file.id,
+            "import_type": import_type,
+            "update_only": update_only,
+            "username": request.user.username
+        }
+    )
+
+    set_meta_data_for_task(
+        task_id=task.id,
+        title="Create import preview",
+        auto_redirect=False,
+        redirect_to=reverse("productdb:import_products" if import_type == "products"
+                            else "productdb:import_product_migrations")
+    )
+
+    return redirect(reverse("task_in_progress", kwargs={"task_id": task.id}))
+
+
+def _load_import_preview(request, preview_id):
+    """load the ImportDiff of the given preview file, only the user that created the preview can access it"""
+    preview_file = get_object_or_404(JobFile, id=preview_id, import_preview=True, created_by=request.user)
+    try:
+        preview_file.file.open("r")
+        diff = ImportDiff.from_dict(json.loads(preview_file.file.read()))
+        preview_file.file.close()
+
+    except Exception:  # catch any exception, the preview file is not readable
+        logger.warning("cannot load import preview %s" % preview_id, exc_info=True)
+        raise Http404("Import preview not found")
+
+    return preview_file, diff
+
+
+@login_required()
+@permission_required('productdb.change_product', raise_exception=True)
+def import_preview(request, preview_id):
+    """review the changes of an import preview and start the import of the changes
+    :param request:
+    :param preview_id:
+    :return:
+    """
+    preview_file, diff = _load_import_preview(request, preview_id)
+    if diff.import_type == "product_migrations" and \
+            not request.user.has_perm("productdb.change_productmigrationoption"):
+        return HttpResponse(status=403)
+
+    if request.method == "POST":
+        task = tasks.apply_import_preview.apply_async(
+            eta=now() + timedelta(seconds=3),
+            kwargs={
+                "preview_file_id": preview_file.id,
+                "create_notification_on_server": not (request.user.is_superuser and
+                                                      request.POST.get("suppress_notification", False)),
+                "user_for_revision": request.user.username
+            }
+        )
+
+        set_meta_data_for_task(
+            task_id=task.id,
+            title="Apply import preview",
+            auto_redirect=False,
+            redirect_to=reverse("productdb:import_products" if diff.import_type == "products"
+                                else "productdb:import_product_migrations")
+        )
+
+        return redirect(reverse("task_in_progress", kwargs={"task_id": task.id}))
+
+    context = {
+        "preview_id": preview_file.id,
+        "import_type": diff.import_type,
+        "update_only": diff.update_only,
+        "summary": [(key, value) for key, value in diff.summary.items() if not isinstance(value, dict)],
+        "changed_fields": diff.summary.get("changed fields", {}).items(),
+        "applicable_entries": len([e for e in diff.entries if e["status"] in [ImportDiff.CREATED,
+                                                                             ImportDiff.CHANGED]])
+    }
+
+    return render(request, "productdb/import/import_preview.html", context=context)
+
+
+@login_required()
+@permission_required('productdb.change_product', raise_exception=True)
+def download_import_preview(request, preview_id):
+    """download the changes of an import preview as CSV file
+    :param request:
+    :param preview_id:
+    :return:
+    """
+    preview_file, diff = _load_import_preview(request, preview_id)
+
+    response = HttpResponse(diff.to_data_frame().to_csv(index=False), content_type="text/csv")
+    response["Content-Disposition"] = "attachment; filename=\"import_preview_%s.csv\"" % preview_file.id
+
+    return response
+
+
 @login_required()
 def edit_user_profile(request):
     up, _ = UserProfile.objects.get_or_create(user=request.user)
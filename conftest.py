@@ -1,11 +1,11 @@
 import json
 import pytest
 import redis
-import requests
 from cacheops import invalidate_all
 from django.core.management import call_command
 from django.core.cache import cache
 from requests import Response
+from app.ciscoeox import base_api, http_client
 from app.config.settings import AppSettings
 from app.config import utils
 
@@ -17,6 +17,8 @@ def pytest_addoption(parser):
     parser.addoption("--online", action="store_true", help="run tests online (with external API access)")
     parser.addoption("--selenium", action="store_true", help="execute selenium based test cases against a test "
                                                              "instance")
+    parser.addoption("--benchmark", action="store_true", help="run the benchmarks against the local Cisco EoX API "
+                                                              "stand-in server")
 
 
 @pytest.fixture
@@ -87,9 +89,9 @@ def mock_cisco_api_authentication_server(monkeypatch):
     monkeypatch.setattr(utils, "check_cisco_eox_api_access", lambda x, y, z: True)
     monkeypatch.setattr(utils, "check_cisco_hello_api_access", lambda x, y, z: True)
     monkeypatch.setattr(
-        requests,
+        http_client,
         "post",
-        lambda url, params=None: mock_post_response()
+        lambda url, **kwargs: mock_post_response()
     )
 
 
@@ -103,3 +105,11 @@ def flush_cache():
     """delete all cached data"""
     cache.clear()
     invalidate_all()
+    base_api.access_token_memo.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_cisco_api_http_client(settings):
+    """use a new session and circuit breaker of the Cisco API per test (without delay between the retries)"""
+    settings.PDB_CISCO_API_RETRY_BACKOFF = 0
+    http_client.reset()
@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 import logging
 import os
+import time
 import celery
 import raven
 from celery import states
@@ -43,6 +44,120 @@ class TaskState(object):
     PENDING = states.PENDING
 
 
+class ProgressReporter(object):
+    """
+    Throttled progress updates for long running tasks (every update is a write to the result backend). Progress
+    updates are sent at most every min_interval seconds and every min_count processed entries, status messages without
+    progress values are always sent. The task meta contains the processed and the total amount of entries, the rate
+    (entries per second) and the estimated remaining time in seconds (eta).
+
+    The reporter can be used as status_callback of the importers.
+    """
+    def __init__(self, task, total=None, min_interval=None, min_count=None, meta=None):
+        """
+        :param task: bound task that should be updated
+        :param total: total amount of entries (if known)
+        :param min_interval: minimum time in seconds between two progress updates (PDB_PROGRESS_MIN_INTERVAL)
+        :param min_count: minimum amount of processed entries between two progress updates (PDB_PROGRESS_MIN_COUNT)
+        :param meta: additional values that are part of every update
+        """
+        self.task = task
+        self.total = total
+        self.min_interval = settings.PDB_PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.min_count = settings.PDB_PROGRESS_MIN_COUNT if min_count is None else min_count
+        self.meta = meta if meta else {}
+        self.status_message = ""
+        self.processed = None
+        self.amount_of_updates = 0
+        self._start_time = None
+        self._start_processed = 0
+        self._last_update_time = None
+        self._last_update_processed = 0
+
+    def __call__(self, status_message, processed=None, total=None):
+        """update the status message, the update is throttled if a progress value is given"""
+        if total is not None:
+            self.total = total
+
+        if processed is None:
+            self.send(status_message)
+
+        else:
+            self.progress(processed, status_message)
+
+    def progress(self, processed, status_message=None):
+        """
+        update the amount of processed entries
+        :return: True, if the update was sent to the result backend
+        """
+        if self._start_time is None:
+            # the rate is computed from the first progress update
+            self._start_time = time.time()
+            self._start_processed = processed
+
+        self.processed = processed
+        if status_message:
+            self.status_message = status_message
+
+        if self._last_update_time is not None and processed != self.total:
+            if time.time() - self._last_update_time < self.min_interval or \
+                    processed - self._last_update_processed < self.min_count:
+                return False
+
+        self.send()
+        return True
+
+    def send(self, status_message=None):
+        """send the current state to the result backend"""
+        if status_message is not None:
+            self.status_message = status_message
+
+        self.task.update_state(state=TaskState.PROCESSING, meta=self.get_meta())
+        self.amount_of_updates += 1
+        self._last_update_time = time.time()
+        self._last_update_processed = self.processed if self.processed else 0
+
+    @property
+    def rows_per_second(self):
+        if self._start_time is None:
+            return None
+
+        elapsed = time.time() - self._start_time
+        if elapsed <= 0 or self.processed == self._start_processed:
+            return None
+
+        return (self.processed - self._start_processed) / elapsed
+
+    @property
+    def eta(self):
+        """estimated remaining time in seconds"""
+        rate = self.rows_per_second
+        if rate is None or self.total is None:
+            return None
+
+        return max(0, int((self.total - self.processed) / rate))
+
+    def get_meta(self):
+        meta = dict(self.meta)
+        meta["status_message"] = self.status_message
+        if self.processed is not None:
+            rate = self.rows_per_second
+            meta.update({
+                "processed": self.processed,
+                "total": self.total,
+                "rows_per_second": round(rate, 1) if rate else None,
+                "eta": self.eta
+            })
+
+            if rate:
+                meta["status_message"] += "<br><small>%.1f entries per second" % rate
+                if meta["eta"] is not None:
+                    meta["status_message"] += ", about %d:%02d minutes remaining" % divmod(meta["eta"], 60)
+                meta["status_message"] += "</small>"
+
+        return meta
+
+
 def is_worker_active():
     try:
         i = app.control.inspect()
@@ -23,6 +23,59 @@ CELERYBEAT_SCHEDULE_FILENAME = "../data/celerybeat-schedule.db"
 CELERYBEAT_PIDFILE = "../celerybeat.pid"
 CELERYBEAT_SCHEDULER = 'djcelery.schedulers.DatabaseScheduler'
 CELERYD_PREFETCH_MULTIPLIER = os.environ.get("PDB_CELERY_CONCURRENCY", 4)
+
+# amount of chunks for the parallel import of price lists
+PDB_PARALLEL_IMPORT_CHUNKS = int(os.environ.get("PDB_PARALLEL_IMPORT_CHUNKS",
+                                                os.environ.get("PDB_CELERY_CONCURRENCY", 4)))
+
+# revision granularity of imports and synchronizations ("row", "chunk" or "job") and the amount of objects per chunk
+PDB_REVISION_GRANULARITY = os.environ.get("PDB_REVISION_GRANULARITY", "row")
+PDB_REVISION_CHUNK_SIZE = int(os.environ.get("PDB_REVISION_CHUNK_SIZE", 1000))
+
+# throttling of the progress updates of long running tasks (minimum seconds and entries between two updates)
+PDB_PROGRESS_MIN_INTERVAL = float(os.environ.get("PDB_PROGRESS_MIN_INTERVAL", 1.0))
+PDB_PROGRESS_MIN_COUNT = int(os.environ.get("PDB_PROGRESS_MIN_COUNT", 100))
+
+# amount of result messages of a synchronization or import that are part of the task result, all messages are stored
+# per item in the database (SyncRun and ImportRun) and paged in the Notification Message detail view
+PDB_RESULT_SUMMARY_MESSAGES = int(os.environ.get("PDB_RESULT_SUMMARY_MESSAGES", 20))
+
+# Redis database that stores the state of the Cisco API rate limiter and the synchronized products of a parallel
+# synchronization (shared by all workers)
+PDB_RATE_LIMIT_REDIS_URL = os.environ.get("PDB_RATE_LIMIT_REDIS_URL", "redis://%s:%s/0" % (redis_server, redis_port))
+
+# amount of threads that fetch the result pages of a Cisco EoX API query concurrently
+PDB_CISCO_EOX_API_PAGE_WORKERS = int(os.environ.get("PDB_CISCO_EOX_API_PAGE_WORKERS", 4))
+
+# HTTP client of the Cisco API: size of the connection pool per host, timeouts in seconds, retries of idempotent calls
+# (exponential backoff with jitter, base and maximum delay in seconds) and the circuit breaker (consecutive failed
+# calls until the endpoint is considered unavailable and the seconds until the next trial call)
+PDB_CISCO_API_POOL_SIZE = int(os.environ.get("PDB_CISCO_API_POOL_SIZE", 10))
+PDB_CISCO_API_CONNECT_TIMEOUT = float(os.environ.get("PDB_CISCO_API_CONNECT_TIMEOUT", 10))
+PDB_CISCO_API_READ_TIMEOUT = float(os.environ.get("PDB_CISCO_API_READ_TIMEOUT", 60))
+PDB_CISCO_API_MAX_RETRIES = int(os.environ.get("PDB_CISCO_API_MAX_RETRIES", 3))
+PDB_CISCO_API_RETRY_BACKOFF = float(os.environ.get("PDB_CISCO_API_RETRY_BACKOFF", 0.5))
+PDB_CISCO_API_RETRY_BACKOFF_MAX = float(os.environ.get("PDB_CISCO_API_RETRY_BACKOFF_MAX", 30))
+PDB_CISCO_API_CIRCUIT_BREAKER_THRESHOLD = int(os.environ.get("PDB_CISCO_API_CIRCUIT_BREAKER_THRESHOLD", 5))
+PDB_CISCO_API_CIRCUIT_BREAKER_RESET = float(os.environ.get("PDB_CISCO_API_CIRCUIT_BREAKER_RESET", 60))
+
+# seconds before the expiry of the Cisco API access token, in which the token is refreshed (the token is kept in memory
+# until then)
+PDB_CISCO_API_TOKEN_REFRESH_MARGIN = int(os.environ.get("PDB_CISCO_API_TOKEN_REFRESH_MARGIN", 60))
+
+# archive the raw responses of the Cisco EoX API (compressed JSONL files per query and synchronization run), an
+# archived run can be replayed by the synchronization task
+PDB_CISCO_EOX_API_ARCHIVE = True if os.environ.get("PDB_CISCO_EOX_API_ARCHIVE") else False
+PDB_CISCO_EOX_API_ARCHIVE_DIRECTORY = os.environ.get("PDB_CISCO_EOX_API_ARCHIVE_DIRECTORY",
+                                                     os.path.join(DATA_DIRECTORY, "cisco_eox_archive"))
+
+# execute the Cisco EoX API queries of a synchronization in parallel tasks (amount of queries per task), a task with
+# failed queries retries them on its own (maximum amount of retries and the base delay in seconds, doubled per retry)
+PDB_CISCO_EOX_API_PARALLEL_SYNC = True if os.environ.get("PDB_CISCO_EOX_API_PARALLEL_SYNC") else False
+PDB_CISCO_EOX_API_QUERIES_PER_TASK = int(os.environ.get("PDB_CISCO_EOX_API_QUERIES_PER_TASK", 1))
+PDB_CISCO_EOX_API_QUERY_RETRIES = int(os.environ.get("PDB_CISCO_EOX_API_QUERY_RETRIES", 2))
+PDB_CISCO_EOX_API_QUERY_RETRY_DELAY = int(os.environ.get("PDB_CISCO_EOX_API_QUERY_RETRY_DELAY", 60))
+
 CELERYBEAT_SCHEDULE = {
     'periodic-sync-with-cisco-eox-api': {
         'task': 'ciscoeox.synchronize_with_cisco_eox_api',
@@ -33,6 +86,11 @@ CELERYBEAT_SCHEDULE = {
         'task': 'ciscoeox.populate_product_lc_state_sync_field',
         'schedule': crontab(hour=2, minute=0)
     },
+    # remove the results of synchronization and import runs without Notification Message (after the task results)
+    'config.delete_expired_result_runs': {
+        'task': 'config.delete_expired_result_runs',
+        'schedule': crontab(hour=1, minute=0)
+    },
     # remove all product checks every Sunday at midnight
     'productdb.delete_all_product_checks': {
         'task': 'productdb.delete_all_product_checks',
@@ -62,3 +62,49 @@ class TestCustomMetaData:
         assert result["title"] == test_title
         assert result["auto_redirect"] is False
         assert result["redirect_to"] == test_redirect
+
+
+class TestProgressReporter:
+    class MockTask:
+        def __init__(self):
+            self.updates = []
+
+        def update_state(self, state, meta):
+            self.updates.append((state, meta))
+
+    def test_status_message_without_progress(self):
+        task = self.MockTask()
+        reporter = celery.ProgressReporter(task)
+        reporter("first message")
+        reporter("second message")
+
+        assert len(task.updates) == 2
+        assert task.updates[0] == (celery.TaskState.PROCESSING, {"status_message": "first message"})
+        assert task.updates[1] == (celery.TaskState.PROCESSING, {"status_message": "second message"})
+
+    def test_throttled_progress_updates(self):
+        task = self.MockTask()
+        reporter = celery.ProgressReporter(task, total=100, min_interval=0, min_count=25)
+        for processed in range(1, 101):
+            reporter("processing...", processed=processed)
+
+        # the first update, every 25 entries and the last update
+        assert reporter.amount_of_updates == len(task.updates)
+        assert len(task.updates) == 5
+        state, meta = task.updates[-1]
+        assert state == celery.TaskState.PROCESSING
+        assert meta["processed"] == 100
+        assert meta["total"] == 100
+        assert "rows_per_second" in meta
+        assert "eta" in meta
+        assert meta["status_message"].startswith("processing...")
+
+    def test_progress_updates_throttled_by_time(self):
+        task = self.MockTask()
+        reporter = celery.ProgressReporter(task, total=1000, min_interval=3600, min_count=1)
+        for processed in range(1, 1001):
+            reporter.progress(processed)
+
+        # only the first and the last update are sent
+        assert len(task.updates) == 2
+        assert task.updates[-1][1]["processed"] == 1000
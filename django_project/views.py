@@ -162,6 +162,48 @@ def task_progress_view(request, task_id):
     return render(request, "django_project/task_progress_view.html", context=context)
 
 
+def _parallel_task_status(parallel_task_info):
+    """
+    returns the combined state of a task that was split into parallel tasks (e.g. the chunks of an import or the query
+    batches of a synchronization), the result is provided by the summary task (chord callback)
+    """
+    summary_task = celery.AsyncResult(parallel_task_info["summary_task_id"])
+    if summary_task.state == TaskState.SUCCESS:
+        response = {
+            "state": "success",
+            "status_message": summary_task.info.get("status_message", "")
+        }
+        if "error_message" in summary_task.info:
+            response["error_message"] = summary_task.info["error_message"]
+
+    elif summary_task.state in [TaskState.PENDING, TaskState.STARTED] or \
+            summary_task.state.lower() == TaskState.PROCESSING:
+        # combine the progress of all tasks
+        processed_entries = 0
+        for task_id in parallel_task_info["task_ids"]:
+            task = celery.AsyncResult(task_id)
+            if isinstance(task.info, dict):
+                # progress of a running task (see ProgressReporter) or the result of a finished task
+                processed = task.info.get("processed", task.info.get("processed_entries", 0))
+                processed_entries += processed if processed else 0
+
+        response = {
+            "state": "processing",
+            "status_message": "Process entry <strong>%s</strong> of <strong>%s</strong> in %d parallel "
+                              "tasks..." % (processed_entries,
+                                            parallel_task_info["total_entries"],
+                                            len(parallel_task_info["task_ids"]))
+        }
+
+    else:
+        response = {
+            "state": "failed",
+            "error_message": str(summary_task.info),  # this is the exception that was raised
+        }
+
+    return response
+
+
 def task_status_ajax(request, task_id):
     """returns a JSON representation of the task state"""
     if settings.DEBUG:  # show results for task in debug mode
@@ -183,6 +225,13 @@ def task_status_ajax(request, task_id):
                     "state": "processing",
                     "status_message": task.info.get("status_message", "")
                 }
+                # progress values of the ProgressReporter
+                for key in ["processed", "total", "rows_per_second", "eta"]:
+                    if key in task.info:
+                        response[key] = task.info[key]
+
+            elif task.state == TaskState.SUCCESS and "parallel_tasks" in task.info:
+                response = _parallel_task_status(task.info["parallel_tasks"])
 
             elif task.state == TaskState.SUCCESS:
                 response = {